@@ -1955,6 +1955,7 @@ func get_snapped_position(world_pos: Vector3) -> Vector3:
 var watchdog_timer: Timer
 var signal_file_path: String = "reload_signal.json"
 var last_signal_timestamp: float = 0.0
+var last_signal_timestamps: Dictionary = {}  # dxf_file -> timestamp-ul ultimului semnal tratat
 var watchdog_process: int = -1
 
 func _setup_dxf_watchdog():
@@ -2000,14 +2001,23 @@ func _check_reload_signal():
 	if typeof(signal_data) != TYPE_DICTIONARY:
 		return
 	
-	var timestamp = signal_data.get("timestamp", 0.0)
-	if timestamp > last_signal_timestamp:
-		last_signal_timestamp = timestamp
-		var glb_file = signal_data.get("glb_file", "")
-		var dxf_file = signal_data.get("dxf_file", "")
-		
-		print("[DEBUG] Watchdog signal received: reloading ", glb_file)
-		_reload_single_glb(glb_file, dxf_file)
+	# "signals" păstrează ultimul semnal al fiecărui DXF (nivele terminate în aceeași secundă)
+	var signals = signal_data.get("signals", {})
+	if typeof(signals) != TYPE_DICTIONARY or signals.is_empty():
+		signals = {signal_data.get("dxf_file", ""): signal_data}
+	
+	for dxf_key in signals.keys():
+		var entry = signals[dxf_key]
+		if typeof(entry) != TYPE_DICTIONARY:
+			continue
+		var timestamp = entry.get("timestamp", 0.0)
+		if timestamp > last_signal_timestamps.get(dxf_key, last_signal_timestamp):
+			last_signal_timestamps[dxf_key] = timestamp
+			var glb_file = entry.get("glb_file", "")
+			var dxf_file = entry.get("dxf_file", "")
+			
+			print("[DEBUG] Watchdog signal received: reloading ", glb_file)
+			_reload_single_glb(glb_file, dxf_file)
 
 func _reload_single_glb(glb_path: String, dxf_path: String):
 	if not FileAccess.file_exists(glb_path):
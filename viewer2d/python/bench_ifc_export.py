@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark pentru exportul IFC din GLB (`_from_glb.ifc`).
+
+Pentru fiecare DXF de test:
+1. generează GLB + mapping (fără IFC) într-un folder temporar
+2. rulează convert_glb_to_ifc de mai multe ori
+3. raportează timpul median, dimensiunea fișierului și numărul de entități
+
+Utilizare:
+    python bench_ifc_export.py [--runs 3] [fisier1.dxf fisier2.dxf ...]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+
+DEFAULT_SAMPLES = [
+    "dxf/0First.Floor_0.00.dxf",
+    "dxf/0Firstfloor.dxf",
+    "dxf/1SecondFloor.dxf",
+    "dxf/2Acoperis_2.80.dxf",
+    "dxf/etaj_01.dxf",
+]
+
+
+def quiet_call(func, *args, **kwargs):
+    """Rulează o funcție cu stdout redirecționat (convertorul printează mult [DEBUG])"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark export IFC din GLB")
+    parser.add_argument("dxf_files", nargs="*", help="Fișiere DXF (implicit mostrele din dxf/)")
+    parser.add_argument("--runs", type=int, default=3, help="Numărul de rulări per fișier (implicit 3)")
+    parser.add_argument("--keep", action="store_true", help="Păstrează folderul temporar cu rezultatele")
+    args = parser.parse_args()
+
+    from dxf_to_glb_trimesh import dxf_to_gltf
+    from ifc_glb_converter import convert_glb_to_ifc
+    import ifcopenshell
+
+    samples = args.dxf_files or [os.path.join(SCRIPT_DIR, p) for p in DEFAULT_SAMPLES]
+    work_dir = tempfile.mkdtemp(prefix="bench_ifc_")
+
+    rows = []
+    try:
+        for dxf_path in samples:
+            if not os.path.exists(dxf_path):
+                print(f"[WARNING] Lipsește: {dxf_path}")
+                continue
+            stem = os.path.splitext(os.path.basename(dxf_path))[0]
+            glb_path = os.path.join(work_dir, stem + ".glb")
+            mapping_path = os.path.join(work_dir, stem + "_mapping.json")
+            ifc_path = os.path.join(work_dir, stem + "_from_glb.ifc")
+
+            quiet_call(dxf_to_gltf, dxf_path, glb_path, ifc_mode="none")
+
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                ok = quiet_call(convert_glb_to_ifc, glb_path, mapping_path, ifc_path)
+                timings.append(time.perf_counter() - start)
+                if not ok:
+                    print(f"[ERROR] Conversia a eșuat: {stem}")
+                    break
+
+            model = ifcopenshell.open(ifc_path)
+            rows.append({
+                "name": stem,
+                "time_ms": statistics.median(timings) * 1000.0,
+                "size_kb": os.path.getsize(ifc_path) / 1024.0,
+                "entities": len(list(model)),
+                "points": len(model.by_type("IfcCartesianPoint")),
+                "face_sets": len(model.by_type("IfcTriangulatedFaceSet")) + len(model.by_type("IfcPolygonalFaceSet")),
+            })
+            print(f"[DEBUG] {stem}: {rows[-1]['time_ms']:.0f} ms")
+    finally:
+        if args.keep:
+            print(f"[DEBUG] Rezultate păstrate în: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n{'Fișier':24s} {'timp ms':>9s} {'KB':>9s} {'entități':>9s} {'puncte':>8s} {'face sets':>10s}")
+    for row in rows:
+        print(f"{row['name']:24s} {row['time_ms']:9.0f} {row['size_kb']:9.1f} {row['entities']:9d} "
+              f"{row['points']:8d} {row['face_sets']:10d}")
+    if rows:
+        print(f"{'TOTAL':24s} {sum(r['time_ms'] for r in rows):9.0f} {sum(r['size_kb'] for r in rows):9.1f} "
+              f"{sum(r['entities'] for r in rows):9d} {sum(r['points'] for r in rows):8d} "
+              f"{sum(r['face_sets'] for r in rows):10d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark pentru timpul de pornire al convertorului DXF → GLB.
+
+Rulează `python -X importtime` într-un proces curat și raportează:
+- timpul total de import pentru dxf_to_glb_trimesh
+- cele mai costisitoare module (cumulativ)
+- dacă subsistemele opționale (IFC, Door/Window) au fost încărcate la pornire
+
+Utilizare:
+    python bench_import_time.py [--runs 5] [--top 15] [--module dxf_to_glb_trimesh]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Module care NU ar trebui încărcate la pornire (se încarcă la prima utilizare)
+OPTIONAL_MODULES = (
+    "ifcopenshell",
+    "ifc_background_converter",
+    "ifc_glb_converter",
+    "ifc_parametric_exporter",
+    "door_window_processor",
+)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_importtime(module_name):
+    """
+    Importă modulul într-un proces nou cu -X importtime.
+
+    Returns:
+        list: tuple (self_us, cumulative_us, nume_modul) pentru fiecare import
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=SCRIPT_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importul {module_name} a eșuat:\n{result.stderr}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue  # linia de antet
+        # Păstrează indentarea: modulele de nivel superior încep imediat după "| "
+        entries.append((self_us, cumulative_us, parts[2][1:].rstrip()))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time pentru convertorul DXF")
+    parser.add_argument("--runs", type=int, default=5, help="Numărul de rulări (implicit 5)")
+    parser.add_argument("--top", type=int, default=15, help="Câte module să afișeze (implicit 15)")
+    parser.add_argument("--module", default="dxf_to_glb_trimesh", help="Modulul măsurat")
+    args = parser.parse_args()
+
+    totals = []
+    last_entries = []
+    for i in range(args.runs):
+        entries = run_importtime(args.module)
+        total = next((cum for _, cum, name in entries if name.strip() == args.module), None)
+        if total is None:
+            print(f"[ERROR] Modulul {args.module} nu apare în raportul importtime")
+            sys.exit(1)
+        totals.append(total / 1000.0)
+        last_entries = entries
+        print(f"[DEBUG] Run {i + 1}/{args.runs}: {totals[-1]:.1f} ms")
+
+    print(f"\n=== {args.module}: import time ({args.runs} rulări) ===")
+    print(f"  median: {statistics.median(totals):.1f} ms")
+    print(f"  min:    {min(totals):.1f} ms")
+    print(f"  max:    {max(totals):.1f} ms")
+
+    # Importurile directe ale modulului măsurat (indentare de un nivel), după timpul cumulativ
+    top_level = {}
+    for _, cum, name in last_entries:
+        root = name.lstrip()
+        if len(name) - len(root) == 2:
+            top_level[root] = max(top_level.get(root, 0), cum)
+    print(f"\n=== Top {args.top} importuri (cumulativ, ultima rulare) ===")
+    for name, cum in sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {cum / 1000.0:8.1f} ms  {name}")
+
+    loaded = {name.strip() for _, _, name in last_entries}
+    eager = [m for m in OPTIONAL_MODULES if m in loaded]
+    print("\n=== Subsisteme opționale ===")
+    for module in OPTIONAL_MODULES:
+        status = "ÎNCĂRCAT la pornire" if module in eager else "lazy"
+        print(f"  {module:28s} {status}")
+    if eager:
+        print(f"[WARNING] Module opționale importate la pornire: {', '.join(eager)}")
+
+
+if __name__ == "__main__":
+    main()
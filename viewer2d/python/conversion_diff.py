@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Conversion Diff - diferențe la nivel de element între două conversii DXF -> GLB
+===============================================================================
+
+Folosit de watchdog pentru reîncărcarea incrementală în Godot:
+1. Fiecare nod din GLB primește un ID stabil (uuid-ul determinist al elementului sau,
+   pentru GLB-urile mai vechi, handle-ul DXF + indexul fragmentului) și un hash al
+   geometriei (vertecși, fețe, transformare, material). Numele nodului conține
+   contorul din ordinea DXF, deci rămâne doar payload pentru înlocuirea nodurilor
+2. Amprentele ultimei conversii sunt păstrate lângă GLB (`<stem>_elements.json`)
+3. Diferența (added / removed / changed / renamed) merge în reload signal, împreună
+   cu un GLB delta care conține doar elementele adăugate sau modificate, astfel încât
+   viewer-ul poate înlocui nodurile în loc să reimporte tot nivelul. Elementele cu
+   aceeași geometrie dar alt nume de nod (ex. după ștergerea unei entități anterioare
+   în DXF) sunt raportate ca renamed, ca viewer-ul să redenumească nodul
+
+Utilizare:
+    python conversion_diff.py vechi.glb nou.glb [delta.glb]
+"""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import trimesh
+from trimesh.exchange import gltf
+
+FINGERPRINT_FORMAT = 2
+
+# Zecimalele păstrate în hash (sub precizia de modelare, peste zgomotul numeric al booleenelor)
+GEOMETRY_DECIMALS = 5
+
+
+def fingerprints_path(glb_path):
+    """Calea fișierului cu amprentele elementelor pentru un GLB"""
+    glb_path = Path(glb_path)
+    return glb_path.with_name(glb_path.stem + "_elements.json")
+
+
+def delta_glb_path(glb_path):
+    """Calea GLB-ului delta pentru un GLB"""
+    glb_path = Path(glb_path)
+    return glb_path.with_name(glb_path.stem + "_delta.glb")
+
+
+def element_key(node_name, metadata):
+    """
+    Cheia stabilă a unui element, fără indexul fragmentului: uuid-ul determinist
+    (derivat din handle-ul DXF, vezi element_ids.py), apoi handle-ul DXF pentru GLB-urile
+    generate înainte de uuid-urile deterministe, iar numele nodului doar în ultimă instanță.
+    Numele nodului nu intră în cheie: contorul lui urmează ordinea entităților din DXF.
+    """
+    if metadata.get("uuid"):
+        return metadata["uuid"]
+    handle = metadata.get("dxf_handle") or metadata.get("handle")
+    return f"handle/{handle}" if handle else node_name
+
+
+def element_id(key, fragment):
+    """ID-ul unui nod: cheia elementului + indexul fragmentului (piesele cu aceeași cheie, ex. după booleene)"""
+    return f"{key}#{fragment}" if fragment else key
+
+
+def geometry_hash(mesh, transform):
+    """
+    Hash-ul geometriei unui nod: vertecși, fețe, transformare și culoarea materialului.
+    Numele materialului este derivat din numele nodului (contorul din ordinea DXF), deci nu intră în hash.
+    """
+    hasher = hashlib.sha1()
+    hasher.update(np.round(np.asarray(mesh.vertices, dtype=np.float64), GEOMETRY_DECIMALS).tobytes())
+    hasher.update(np.asarray(mesh.faces, dtype=np.int64).tobytes())
+    hasher.update(np.round(np.asarray(transform, dtype=np.float64), GEOMETRY_DECIMALS).tobytes())
+    material = getattr(mesh.visual, "material", None)
+    if material is not None:
+        hasher.update(str(getattr(material, "baseColorFactor", "")).encode())
+    return hasher.hexdigest()
+
+
+def fingerprint_scene(scene):
+    """
+    Amprentele tuturor nodurilor cu geometrie dintr-o scenă.
+
+    Returns:
+        dict: id element -> {"node": nume nod, "hash": hash geometrie}
+    """
+    elements = {}
+    fragments = {}
+    for node_name in scene.graph.nodes_geometry:
+        transform, geometry_name = scene.graph[node_name]
+        mesh = scene.geometry[geometry_name]
+        key = element_key(node_name, mesh.metadata)
+        fragment = fragments.get(key, 0)
+        fragments[key] = fragment + 1
+        elements[element_id(key, fragment)] = {
+            "node": node_name,
+            "hash": geometry_hash(mesh, transform),
+        }
+    return elements
+
+
+def load_fingerprints(glb_path):
+    """
+    Amprentele ultimei conversii pentru GLB: din fișierul sidecar sau, dacă lipsește,
+    calculate din GLB-ul existent.
+
+    Returns:
+        dict sau None dacă nu există o conversie anterioară
+    """
+    sidecar = fingerprints_path(glb_path)
+    try:
+        with open(sidecar, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") == FINGERPRINT_FORMAT:
+            return data["elements"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if not Path(glb_path).exists():
+        return None
+    try:
+        return fingerprint_scene(trimesh.load(str(glb_path), force="scene"))
+    except Exception as e:
+        print(f"[WARNING] Could not fingerprint previous GLB {glb_path}: {e}")
+        return None
+
+
+def save_fingerprints(glb_path, elements):
+    """Scrie amprentele conversiei curente lângă GLB"""
+    with open(fingerprints_path(glb_path), "w", encoding="utf-8") as f:
+        json.dump({"format": FINGERPRINT_FORMAT, "elements": elements}, f, indent=2)
+
+
+def diff_fingerprints(previous, current):
+    """
+    Diferența dintre două seturi de amprente.
+
+    Returns:
+        dict: "added"/"removed"/"changed" cu {"id", "node"}, "renamed" cu {"id", "old_node", "node"}
+        (aceeași geometrie, alt nume de nod) și numărul de elemente neschimbate
+    """
+    added, removed, changed, renamed = [], [], [], []
+    for eid, element in current.items():
+        old = previous.get(eid)
+        if old is None:
+            added.append({"id": eid, "node": element["node"]})
+        elif old["hash"] != element["hash"]:
+            changed.append({"id": eid, "node": element["node"]})
+        elif old["node"] != element["node"]:
+            renamed.append({"id": eid, "old_node": old["node"], "node": element["node"]})
+    for eid, element in previous.items():
+        if eid not in current:
+            removed.append({"id": eid, "node": element["node"]})
+    return {
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "renamed": renamed,
+        "unchanged": len(current) - len(added) - len(changed) - len(renamed),
+    }
+
+
+def export_delta_glb(scene, node_names, out_path):
+    """Exportă într-un GLB separat doar nodurile date (cu transformarea, materialul și extras-urile lor)"""
+    delta = trimesh.Scene()
+    for node_name in node_names:
+        transform, geometry_name = scene.graph[node_name]
+        delta.add_geometry(scene.geometry[geometry_name], node_name=node_name,
+                           geom_name=geometry_name, transform=transform)
+    with open(out_path, "wb") as f:
+        f.write(gltf.export_glb(delta))
+
+
+def compute_conversion_diff(glb_path, previous):
+    """
+    Compară GLB-ul nou cu amprentele conversiei anterioare, scrie amprentele noi
+    și GLB-ul delta (doar dacă există elemente adăugate sau modificate).
+
+    Args:
+        glb_path: GLB-ul rezultat din conversia curentă
+        previous: amprentele anterioare (din load_fingerprints) sau None
+
+    Returns:
+        tuple: (diff sau None dacă nu există conversie anterioară, calea GLB-ului delta sau None)
+    """
+    scene = trimesh.load(str(glb_path), force="scene")
+    current = fingerprint_scene(scene)
+    save_fingerprints(glb_path, current)
+    if previous is None:
+        return None, None
+
+    diff = diff_fingerprints(previous, current)
+    delta_path = delta_glb_path(glb_path)
+    delta_nodes = [element["node"] for element in diff["added"] + diff["changed"]]
+    if delta_nodes:
+        export_delta_glb(scene, delta_nodes, delta_path)
+        return diff, delta_path
+    if delta_path.exists():
+        delta_path.unlink()
+    return diff, None
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python conversion_diff.py <old.glb> <new.glb> [delta.glb]")
+        return 1
+
+    previous = fingerprint_scene(trimesh.load(sys.argv[1], force="scene"))
+    scene = trimesh.load(sys.argv[2], force="scene")
+    diff = diff_fingerprints(previous, fingerprint_scene(scene))
+    print(f"[DIFF] {len(diff['added'])} added, {len(diff['removed'])} removed, "
+          f"{len(diff['changed'])} changed, {len(diff['renamed'])} renamed, {diff['unchanged']} unchanged")
+    for kind in ("added", "removed", "changed"):
+        for element in diff[kind]:
+            print(f"  {kind}: {element['id']}")
+    for element in diff["renamed"]:
+        print(f"  renamed: {element['id']} ({element['old_node']} -> {element['node']})")
+
+    if len(sys.argv) > 3:
+        export_delta_glb(scene, [e["node"] for e in diff["added"] + diff["changed"]], sys.argv[3])
+        print(f"[DIFF] Delta GLB: {sys.argv[3]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
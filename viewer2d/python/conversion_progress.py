@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Conversion Progress - ieșire progresivă în timpul conversiei DXF -> GLB
+=======================================================================
+
+Cu `--progressive`, viewer-ul nu mai așteaptă sfârșitul tuturor etapelor:
+1. Elementele terminate în bucla de entități se scriu în loturi, ca GLB-uri numerotate
+   (`<stem>_chunk_000.glb`, `<stem>_chunk_001.glb`, ...), cu aceleași nume de noduri
+   ca în GLB-ul final
+2. Evenimentele se scriu ca NDJSON (un obiect JSON pe linie) într-un fișier dedicat,
+   implicit `<stem>_progress.ndjson` lângă GLB (`--progress-file` pentru altă cale), cu
+   etapa, procentul și numărul de elemente terminate. Stdout rămâne doar log-ul obișnuit
+   `[DEBUG] ...`, deci fișierul se poate citi linie cu linie cu un parser JSON lines
+   (fiecare linie este scrisă complet și golită imediat; fișierul este trunchiat la
+   începutul fiecărei conversii progresive)
+3. GLB-ul final consolidat se scrie ca până acum și se anunță prin evenimentul "done",
+   ultimul din fișier
+
+Geometria din loturi este cea dinaintea scăderii voidurilor și a tăierii la acoperiș;
+GLB-ul final o înlocuiește.
+
+Evenimente:
+    {"event": "progress", "stage": ..., "percent": ..., "elements": ..., "entities": ..., "total_entities": ...}
+    {"event": "chunk", "index": ..., "path": ..., "count": ..., "elements": ..., "percent": ...}
+    {"event": "done", "glb": ..., "mapping": ..., "chunks": ..., "elements": ..., "elapsed": ...}
+"""
+
+import json
+import time
+from pathlib import Path
+
+import trimesh
+from trimesh.exchange import gltf
+
+# Numărul implicit de elemente (meshuri) dintr-un lot
+PROGRESS_CHUNK_SIZE = 50
+
+# Intervalul minim (secunde) între două evenimente "progress" din aceeași etapă
+PROGRESS_INTERVAL = 0.25
+
+# Procentul total acoperit de fiecare etapă a conversiei
+STAGE_RANGES = {
+    "read": (0.0, 5.0),
+    "entities": (5.0, 70.0),
+    "booleans": (70.0, 90.0),
+    "export": (90.0, 100.0),
+}
+
+
+def chunk_path(out_path, index):
+    """Calea lotului `index` pentru GLB-ul final `out_path`"""
+    out_path = Path(out_path)
+    return out_path.with_name(f"{out_path.stem}_chunk_{index:03d}.glb")
+
+
+def progress_path(out_path):
+    """Calea implicită a fișierului de evenimente NDJSON pentru GLB-ul final `out_path`"""
+    out_path = Path(out_path)
+    return out_path.with_name(f"{out_path.stem}_progress.ndjson")
+
+
+def clear_chunks(out_path):
+    """Șterge loturile rămase de la conversia anterioară a aceluiași GLB"""
+    out_path = Path(out_path)
+    for old_chunk in out_path.parent.glob(f"{out_path.stem}_chunk_*.glb"):
+        try:
+            old_chunk.unlink()
+        except OSError as e:
+            print(f"[WARNING] Could not remove old chunk {old_chunk}: {e}")
+
+
+class ProgressReporter:
+    """
+    Colectează meshurile terminate, scrie loturile GLB și fluxul NDJSON.
+
+    Args:
+        out_path: GLB-ul final (loturile se scriu lângă el)
+        chunk_size: elemente per lot
+        node_name: funcție (mesh, index) -> numele nodului din scenă (același ca în GLB-ul final)
+        events_path: fișierul NDJSON al evenimentelor (implicit progress_path(out_path))
+    """
+
+    def __init__(self, out_path, chunk_size=PROGRESS_CHUNK_SIZE, node_name=None, events_path=None):
+        self.out_path = Path(out_path)
+        self.chunk_size = max(1, int(chunk_size))
+        self.node_name = node_name or (lambda mesh, index: mesh.metadata.get("name", f"solid_{index}"))
+        self.started = time.time()
+        self.chunks = 0
+        self.elements = 0
+        self.pending = []
+        self._emitted = set()
+        self._scanned = 0
+        self._last_event = 0.0
+        clear_chunks(self.out_path)
+        self.events_path = Path(events_path) if events_path else progress_path(self.out_path)
+        self.events = open(self.events_path, "w", encoding="utf-8")
+        print(f"[DEBUG] Progress events: {self.events_path}")
+
+    def emit(self, event, **fields):
+        """Scrie un eveniment NDJSON (o linie completă) în fișierul de evenimente"""
+        if self.events.closed:
+            return
+        self.events.write(json.dumps({"event": event, **fields}) + "\n")
+        self.events.flush()
+
+    def close(self):
+        if not self.events.closed:
+            self.events.close()
+
+    def percent(self, stage, fraction):
+        low, high = STAGE_RANGES[stage]
+        return round(low + (high - low) * min(max(fraction, 0.0), 1.0), 1)
+
+    def stage(self, stage, fraction=0.0, force=True, **fields):
+        """Eveniment "progress" pentru etapa dată (fraction = partea terminată din etapă)"""
+        now = time.monotonic()
+        if not force and now - self._last_event < PROGRESS_INTERVAL:
+            return
+        self._last_event = now
+        self.emit("progress", stage=stage, percent=self.percent(stage, fraction), elements=self.elements, **fields)
+
+    def entities_done(self, done, total, solids):
+        """
+        Apelat în bucla de entități: preia meshurile noi din `solids` și scrie loturile pline.
+
+        Args:
+            done: entități procesate
+            total: numărul total de entități (None în modul flux, când nu se cunoaște)
+            solids: lista de solide a pipeline-ului (meshuri sau dicționare TOV cu "mesh")
+        """
+        self.collect(solids)
+        while len(self.pending) >= self.chunk_size:
+            self.write_chunk(self.pending[:self.chunk_size], done, total)
+            self.pending = self.pending[self.chunk_size:]
+        fraction = done / total if total else 0.0
+        self.stage("entities", fraction, force=False, entities=done, total_entities=total)
+
+    def collect(self, solids):
+        """Meshurile apărute în `solids` de la ultimul apel (lista poate și pierde elemente)"""
+        start = self._scanned if len(solids) >= self._scanned else 0
+        for item in solids[start:]:
+            mesh = item["mesh"] if isinstance(item, dict) else item
+            if id(mesh) in self._emitted or mesh is None or len(mesh.vertices) == 0:
+                continue
+            self._emitted.add(id(mesh))
+            self.pending.append(mesh)
+        self._scanned = len(solids)
+
+    def flush(self, done, total):
+        """Scrie ultimul lot (incomplet) la sfârșitul buclei de entități"""
+        if self.pending:
+            self.write_chunk(self.pending, done, total)
+            self.pending = []
+        self.stage("entities", 1.0, entities=done, total_entities=total)
+
+    def write_chunk(self, meshes, done, total):
+        scene = trimesh.Scene()
+        for mesh in meshes:
+            scene.add_geometry(mesh, node_name=self.node_name(mesh, self.elements))
+            self.elements += 1
+        path = chunk_path(self.out_path, self.chunks)
+        with open(path, "wb") as f:
+            f.write(gltf.export_glb(scene))
+        self.emit("chunk", index=self.chunks, path=str(path), count=len(meshes), elements=self.elements,
+                  percent=self.percent("entities", done / total if total else 0.0))
+        self.chunks += 1
+
+    def finish(self, glb_path, mapping_path):
+        """Evenimentul final: GLB-ul consolidat este scris"""
+        self.emit("done", glb=str(glb_path), mapping=str(mapping_path), chunks=self.chunks,
+                  elements=self.elements, percent=100.0, elapsed=round(time.time() - self.started, 3))
+        self.close()
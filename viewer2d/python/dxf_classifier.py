@@ -0,0 +1,375 @@
+"""
+DXF Classifier - clasificarea entităților DXF într-o singură trecere
+===================================================================
+
+Conversia DXF -> GLB are mai multe etape care lucrează pe modelspace: cercurile de
+control (forme spațiale), liniile de secțiune, blocurile Door/Window *_TOV, blocurile
+de ferestre (doar metadata), blocurile cu geometrie și extrudările simple.
+
+Acest modul parcurge modelspace-ul o singură dată și, pentru fiecare entitate:
+1. Citește tipul, handle-ul, layer-ul și numele blocului
+2. Extrage XDATA o singură dată și parsează tag-urile QCAD 'cheie:valoare' într-un
+   XDataParams comun tuturor etapelor
+3. Îi atribuie un rol (ROLE_*) și o pune în bucket-ul rolului
+
+Ordinea din DXF se păstrează în `entities` (numerotarea meshurilor și UUID-urile
+depind de ea). Componentele unui bloc se clasifică o singură dată, la primul INSERT.
+
+Pentru un document citit în flux (dxf_ir.stream_document), `entities` este un
+generator: entitățile se clasifică pe măsură ce pipeline-ul le consumă și doar
+bucket-urile necesare după bucla principală (control, section) sunt păstrate.
+Cercurile de control se citesc înainte, printr-o trecere care parsează doar CIRCLE.
+
+Conversia parțială (EntityFilter: layere incluse/excluse, regiune bbox/poligon)
+marchează la clasificare entitățile neselectate (`selected=False`); pipeline-ul
+nu le generează geometria, dar le păstrează locul în numerotarea meshurilor.
+Din același motiv liniile de secțiune neselectate rămân în grupul lor de rol.
+"""
+
+ROLE_CONTROL = "control"      # CIRCLE pe layerul 'control' (Z pentru formele spațiale)
+ROLE_SECTION = "section"      # LINE pe layerul 'section' (planuri de secțiune)
+ROLE_TOV = "tov"              # INSERT *_TOV (Door/Window din biblioteci)
+ROLE_WINDOW = "window"        # INSERT pe layerul IfcWindow (doar metadata)
+ROLE_BLOCK = "block"          # INSERT cu geometrie
+ROLE_EXTRUSION = "extrusion"  # LWPOLYLINE / POLYLINE / CIRCLE extrudate
+ROLE_OTHER = "other"          # restul (fără geometrie proprie)
+ROLES = (ROLE_CONTROL, ROLE_SECTION, ROLE_TOV, ROLE_WINDOW, ROLE_BLOCK, ROLE_EXTRUSION, ROLE_OTHER)
+
+CONTROL_LAYER = "control"
+SECTION_LAYER = "section"
+WINDOW_LAYER = "IfcWindow"
+EXTRUSION_TYPES = ("LWPOLYLINE", "POLYLINE", "CIRCLE")
+
+
+def _float(text):
+    return float(text.split(":")[0])
+
+
+def _int(text):
+    return int(text.split(":")[0])
+
+
+def _flag(text):
+    return bool(int(text.split(":")[0]))
+
+
+def _text(text):
+    return text.strip()
+
+
+# Cheia din XDATA -> (câmpul din XDataParams, conversia valorii)
+XDATA_FIELDS = {
+    "height": ("height", _float),
+    "z": ("z", _float),
+    "Name": ("name", _text),
+    "solid": ("solid", _int),
+    "angle": ("angle", _float),
+    "rotate90": ("rotate90", _flag),
+    "rotate_x": ("rotate_x", _float),
+    "rotate_y": ("rotate_y", _float),
+    "rotation_x": ("rotation_x", _float),
+    "rotation_y": ("rotation_y", _float),
+    "Opening_area": ("opening_area", _text),
+}
+
+
+class XDataParams:
+    """
+    Parametrii din XDATA QCAD (tag-uri 1000 'cheie:valoare'), parsați o singură dată.
+    Un câmp rămâne None dacă cheia lipsește sau valoarea nu se poate converti;
+    fiecare etapă își aplică propriile valori implicite prin value().
+    """
+
+    __slots__ = tuple(field for field, _ in XDATA_FIELDS.values())
+
+    def __init__(self, tags=()):
+        for field in self.__slots__:
+            setattr(self, field, None)
+        for code, value in tags:
+            if code != 1000:
+                continue
+            key, separator, text = str(value).partition(":")
+            if not separator or key not in XDATA_FIELDS:
+                continue
+            field, convert = XDATA_FIELDS[key]
+            try:
+                setattr(self, field, convert(text))
+            except ValueError:
+                pass
+
+    def value(self, field, default):
+        """Valoarea câmpului sau default dacă lipsește"""
+        value = getattr(self, field)
+        return default if value is None else value
+
+
+class EntityRecord:
+    """O entitate clasificată: entitatea, datele citite o singură dată și rolul ei"""
+
+    __slots__ = ("entity", "kind", "handle", "layer", "block_name", "xdata", "params", "role", "selected")
+
+    def __init__(self, entity, kind, handle, layer, block_name, xdata, role):
+        self.entity = entity
+        self.kind = kind
+        self.handle = handle
+        self.layer = layer
+        self.block_name = block_name
+        self.xdata = xdata
+        self.params = XDataParams(xdata.get("QCAD", ()))
+        self.role = role
+        self.selected = True
+
+
+def read_entity_xdata(entity, verbose=False):
+    """
+    XDATA entității: appid -> lista tag-urilor (QCAD plus appid-urile raportate de entitate).
+
+    Args:
+        verbose: afișează tag-urile și erorile (doar pentru entitățile din modelspace)
+    """
+    xdata = {}
+    if not entity.has_xdata:
+        return xdata
+    appids = []
+    if hasattr(entity, "get_xdata_appids"):
+        appids = entity.get_xdata_appids()
+    if "QCAD" not in appids:
+        appids.append("QCAD")
+    for appid in appids:
+        try:
+            data = entity.get_xdata(appid)
+            if data:
+                xdata[appid] = list(data)
+                if verbose:
+                    print(f"[DEBUG] XDATA for {entity.dxftype()} handle={getattr(entity.dxf, 'handle', None)} "
+                          f"appid={appid}: {xdata[appid]}")
+        except Exception as ex:
+            if verbose:
+                print(f"[DEBUG] XDATA error for appid {appid}: {ex}")
+    return xdata
+
+
+def classify_entity(entity, enable_tov=True, verbose=False):
+    """Înregistrarea unei entități, cu rolul ei în pipeline"""
+    kind = entity.dxftype()
+    handle = getattr(entity.dxf, "handle", None)
+    layer = getattr(entity.dxf, "layer", "default")
+    block_name = getattr(entity.dxf, "name", "") if kind == "INSERT" else ""
+
+    if kind == "CIRCLE" and layer == CONTROL_LAYER:
+        role = ROLE_CONTROL
+    elif kind == "LINE" and layer.lower() == SECTION_LAYER:
+        role = ROLE_SECTION
+    elif kind == "INSERT":
+        insert_point = getattr(entity.dxf, "insert", None)
+        if enable_tov and block_name.endswith("_TOV"):
+            role = ROLE_TOV
+        elif layer == WINDOW_LAYER and not block_name.endswith("_TOV") and insert_point and block_name:
+            role = ROLE_WINDOW
+        elif layer != WINDOW_LAYER and insert_point is not None and block_name:
+            role = ROLE_BLOCK
+        else:
+            role = ROLE_OTHER
+    elif kind in EXTRUSION_TYPES:
+        role = ROLE_EXTRUSION
+    else:
+        role = ROLE_OTHER
+
+    return EntityRecord(entity, kind, handle, layer, block_name, read_entity_xdata(entity, verbose), role)
+
+
+def _parse_list(value):
+    """Listă de nume: "A,B" sau iterabil; None pentru listă goală"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    names = {str(name).strip() for name in value if str(name).strip()}
+    return names or None
+
+
+def _parse_numbers(value, option):
+    """Numere din "a,b,c" (sau "a,b;c,d") sau dintr-o secvență"""
+    parts = value.replace(";", ",").split(",") if isinstance(value, str) else value
+    try:
+        return [float(v) for v in parts]
+    except (TypeError, ValueError):
+        raise ValueError(f"Valoare invalidă pentru {option}: {value!r}") from None
+
+
+def parse_region(bbox=None, polygon=None):
+    """
+    Regiunea 2D a conversiei parțiale (shapely), din bbox și/sau poligon.
+
+    Args:
+        bbox: "xmin,ymin,xmax,ymax" sau secvență de 4 numere
+        polygon: "x1,y1;x2,y2;..." sau secvență de puncte (x, y)
+
+    Returns:
+        Polygon sau None dacă nu s-a cerut nicio regiune (ambele date = intersecția lor)
+    """
+    if bbox is None and polygon is None:
+        return None
+    from shapely.geometry import Polygon, box
+
+    region = None
+    if bbox is not None:
+        values = _parse_numbers(bbox, "bbox")
+        if len(values) != 4 or values[0] >= values[2] or values[1] >= values[3]:
+            raise ValueError(f"bbox trebuie să fie xmin,ymin,xmax,ymax cu xmin < xmax și ymin < ymax: {bbox!r}")
+        region = box(*values)
+    if polygon is not None:
+        if isinstance(polygon, str):
+            values = _parse_numbers(polygon, "polygon")
+            points = list(zip(values[0::2], values[1::2]))
+        else:
+            points = [tuple(_parse_numbers(point, "polygon")) for point in polygon]
+        shape = Polygon(points) if len(points) >= 3 else None
+        if shape is None or shape.area <= 0:
+            raise ValueError(f"polygon trebuie să aibă cel puțin 3 puncte și arie nenulă: {polygon!r}")
+        shape = shape if shape.is_valid else shape.buffer(0)
+        region = shape if region is None else region.intersection(shape)
+    if region.is_empty:
+        raise ValueError("Regiunea conversiei parțiale este goală")
+    return region
+
+
+def entity_footprint(entity):
+    """
+    Amprenta 2D aproximativă a unei entități (înfășurătoarea convexă a punctelor de
+    definiție; arcele din bulge sunt ignorate, INSERT = punctul de inserție).
+
+    Returns:
+        geometrie shapely sau None pentru entitățile fără geometrie cunoscută
+    """
+    from shapely.geometry import MultiPoint, Point
+
+    kind = entity.dxftype()
+    if kind == "LWPOLYLINE":
+        points = [(float(p[0]), float(p[1])) for p in entity.lwpoints]
+    elif kind == "POLYLINE":
+        points = [(float(v.dxf.location.x), float(v.dxf.location.y)) for v in entity.vertices]
+    elif kind == "LINE":
+        points = [(entity.dxf.start.x, entity.dxf.start.y), (entity.dxf.end.x, entity.dxf.end.y)]
+    elif kind in ("CIRCLE", "ARC"):
+        return Point(entity.dxf.center.x, entity.dxf.center.y).buffer(float(entity.dxf.radius))
+    elif kind == "INSERT":
+        insert_point = getattr(entity.dxf, "insert", None)
+        points = [(insert_point.x, insert_point.y)] if insert_point is not None else []
+    else:
+        return None
+    return MultiPoint(points).convex_hull if points else None
+
+
+class EntityFilter:
+    """
+    Selecția unei conversii parțiale.
+
+    Args:
+        layers: doar aceste layere (listă sau "A,B"); None = toate
+        exclude_layers: layere excluse
+        bbox / polygon: regiunea 2D (vezi parse_region); se păstrează entitățile a
+            căror amprentă intersectează regiunea
+
+    Layerele se compară cu layer-ul entității din modelspace (pentru blocuri, layer-ul
+    INSERT-ului). Cercurile de control sunt mereu păstrate: definesc suprafața formelor
+    spațiale pentru toate elementele.
+    """
+
+    def __init__(self, layers=None, exclude_layers=None, bbox=None, polygon=None):
+        from shapely.prepared import prep
+
+        self.layers = _parse_list(layers)
+        self.exclude_layers = _parse_list(exclude_layers) or set()
+        self.region = parse_region(bbox, polygon)
+        self._prepared_region = prep(self.region) if self.region is not None else None
+
+    @property
+    def active(self):
+        return self.layers is not None or bool(self.exclude_layers) or self.region is not None
+
+    def accepts(self, record):
+        """True dacă entitatea intră în conversie"""
+        if record.role == ROLE_CONTROL:
+            return True
+        if self.layers is not None and record.layer not in self.layers:
+            return False
+        if record.layer in self.exclude_layers:
+            return False
+        if self._prepared_region is not None:
+            footprint = entity_footprint(record.entity)
+            return footprint is not None and self._prepared_region.intersects(footprint)
+        return True
+
+    def describe(self):
+        parts = []
+        if self.layers is not None:
+            parts.append(f"layers={','.join(sorted(self.layers))}")
+        if self.exclude_layers:
+            parts.append(f"exclude_layers={','.join(sorted(self.exclude_layers))}")
+        if self.region is not None:
+            parts.append(f"region bounds={tuple(round(v, 3) for v in self.region.bounds)}")
+        return " ".join(parts) or "none"
+
+
+class ClassifiedDocument:
+    """
+    Modelspace-ul clasificat: `entities` în ordinea din DXF, `by_role` pe bucket-uri,
+    iar block() oferă componentele unui bloc (clasificate o singură dată).
+    """
+
+    def __init__(self, doc, enable_tov=True, entity_filter=None):
+        self.doc = doc
+        self.enable_tov = enable_tov
+        self.entity_filter = entity_filter if entity_filter is not None and entity_filter.active else None
+        self.by_role = {role: [] for role in ROLES}
+        self.counts = dict.fromkeys(ROLES, 0)
+        self.filtered = 0
+        self._blocks = {}
+        if getattr(doc, "streaming", False):
+            # Cercurile de control trebuie cunoscute înaintea oricărei geometrii
+            self.by_role[ROLE_CONTROL] = [record for record in (classify_entity(entity, enable_tov)
+                                                                for entity in doc.modelspace(types=("CIRCLE",)))
+                                          if record.role == ROLE_CONTROL]
+            self.entities = self._stream()
+        else:
+            self.entities = [self._classify(entity) for entity in doc.modelspace()]
+            for record in self.entities:
+                if record.selected or record.role == ROLE_SECTION:
+                    self.by_role[record.role].append(record)
+
+    def _classify(self, entity):
+        """Clasifică o entitate din modelspace și aplică filtrul conversiei parțiale"""
+        record = classify_entity(entity, self.enable_tov, verbose=True)
+        if self.entity_filter is not None and not self.entity_filter.accepts(record):
+            record.selected = False
+            self.filtered += 1
+        else:
+            self.counts[record.role] += 1
+        return record
+
+    def _stream(self):
+        """Entitățile documentului citit în flux, clasificate pe rând"""
+        for record in (self._classify(entity) for entity in self.doc.modelspace()):
+            if record.role == ROLE_SECTION:
+                self.by_role[ROLE_SECTION].append(record)
+            yield record
+
+    def block(self, name):
+        """Înregistrările componentelor blocului (listă goală dacă blocul lipsește sau e gol)"""
+        if name not in self._blocks:
+            layout = self.doc.blocks.get(name)
+            self._blocks[name] = [classify_entity(entity, self.enable_tov) for entity in layout] if layout else []
+        return self._blocks[name]
+
+    def summary(self):
+        """Numărul de entități selectate pe rol (pentru log; în flux, după consumarea `entities`)"""
+        summary = ", ".join(f"{role}={count}" for role, count in self.counts.items() if count)
+        if self.entity_filter is not None:
+            summary += f" | filtered out={self.filtered} ({self.entity_filter.describe()})"
+        return summary
+
+
+def classify_document(doc, enable_tov=True, entity_filter=None):
+    """Clasifică modelspace-ul documentului (ezdxf sau dxf_ir) într-o singură trecere"""
+    return ClassifiedDocument(doc, enable_tov, entity_filter)
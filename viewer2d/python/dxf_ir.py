@@ -0,0 +1,548 @@
+"""
+DXF IR - reprezentare intermediară normalizată a entităților DXF, cu cache binar
+================================================================================
+
+Pipeline-ul DXF -> GLB folosește doar o mică parte din ezdxf: tipul entității,
+câteva atribute DXF (handle, layer, insert, scale, center, ...), XDATA, punctele
+polilinilor (cu bulge) și blocurile referite de INSERT-uri. Importul ezdxf (~0.5s)
+și parsarea fișierului domină însă pornirea unei conversii mici.
+
+Acest modul:
+1. Transformă modelspace-ul și blocurile folosite de el (recursiv) în înregistrări
+   tipizate, compatibile ca interfață cu entitățile ezdxf folosite de pipeline
+2. Le păstrează într-un cache binar compact (marshal + zlib) cu cheia = hash-ul
+   sha256 al fișierului DXF, în folderul cache al utilizatorului (vezi default_cache_dir;
+   suprascris de variabila de mediu VIEWER2D_IR_CACHE sau de --ir-cache-dir)
+3. La rulările următoare documentul se încarcă din cache, fără import ezdxf
+4. Cache-ul este limitat: intrările nefolosite de IR_CACHE_MAX_AGE zile se șterg, iar peste
+   IR_CACHE_MAX_BYTES se șterg cele mai vechi (după ultima folosire)
+
+Pipeline-ul consumă întotdeauna IR-ul (și la prima conversie), deci rezultatul
+este identic indiferent dacă documentul vine din cache sau din ezdxf.
+
+Pentru desene foarte mari, stream_document() citește modelspace-ul entitate cu
+entitate prin addon-ul iterdxf din ezdxf (fără a încărca documentul în memorie) și
+încarcă din secțiunea BLOCKS doar blocurile referite, la primul acces.
+
+Utilizare:
+    python dxf_ir.py fisier.dxf [--rebuild | --stream]
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+# Se incrementează la orice schimbare a înregistrărilor (invalidează cache-ul existent)
+IR_FORMAT = 1
+
+# Variabila de mediu care suprascrie folderul cache-ului IR
+IR_CACHE_ENV = "VIEWER2D_IR_CACHE"
+
+# Limitele cache-ului IR: dimensiunea totală și vechimea intrărilor nefolosite
+IR_CACHE_MAX_BYTES = 256 * 1024 * 1024
+IR_CACHE_MAX_AGE = 30 * 24 * 3600
+
+# Atributele DXF păstrate (doar cele suportate de tipul entității)
+ENTITY_ATTRIBUTES = ("handle", "layer", "name", "insert", "rotation", "xscale", "yscale", "zscale",
+                     "center", "radius", "start", "end", "start_angle", "end_angle")
+VERTEX_ATTRIBUTES = ("location", "bulge")
+VECTOR_ATTRIBUTES = frozenset(("insert", "center", "start", "end", "location"))
+
+# Codurile XDATA ale căror valori sunt puncte (1010-1013 și variantele 1020-1059)
+XDATA_POINT_CODES = range(1010, 1060)
+
+
+class IRVec(tuple):
+    """Punct 3D (x, y, z) compatibil cu Vec3 din ezdxf: indexare, .x/.y/.z, fals pentru vectorul nul"""
+
+    __slots__ = ()
+
+    def __new__(cls, x=0.0, y=0.0, z=0.0):
+        return tuple.__new__(cls, (float(x), float(y), float(z)))
+
+    x = property(lambda self: self[0])
+    y = property(lambda self: self[1])
+    z = property(lambda self: self[2])
+
+    def __bool__(self):
+        return any(self)
+
+    def __repr__(self):
+        return f"Vec3({self[0]}, {self[1]}, {self[2]})"
+
+
+class IRTag:
+    """
+    Tag XDATA (code, value) cu interfața și repr-ul lui DXFTag (repr-ul apare în mapping-ul JSON).
+    Ca DXFTag, nu este tuple: codul care filtrează tag-urile cu isinstance(..., tuple) se comportă la fel.
+    """
+
+    __slots__ = ("code", "value")
+
+    def __init__(self, code, value):
+        self.code = code
+        self.value = value
+
+    def __getitem__(self, index):
+        return (self.code, self.value)[index]
+
+    def __iter__(self):
+        yield self.code
+        yield self.value
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash((self.code, self.value))
+
+    def __repr__(self):
+        return f"DXFTag({self.code!r}, {self.value!r})"
+
+
+class IRAttributes:
+    """Namespace-ul `entity.dxf`: doar atributele suportate de tipul entității"""
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+    def __repr__(self):
+        return f"IRAttributes({self.__dict__})"
+
+
+class IREntity:
+    """Entitate DXF normalizată, cu interfața ezdxf folosită de pipeline"""
+
+    __slots__ = ("kind", "dxf", "_xdata", "lwpoints", "closed", "vertices", "is_closed")
+
+    # Obiectul XData din ezdxf nu este reprezentat; XDATA se citește prin get_xdata()
+    xdata = None
+
+    def __init__(self, kind, attributes, xdata=None):
+        self.kind = kind
+        self.dxf = IRAttributes(attributes)
+        self._xdata = xdata or {}
+
+    def dxftype(self):
+        return self.kind
+
+    @property
+    def has_xdata(self):
+        return bool(self._xdata)
+
+    def get_xdata(self, appid):
+        try:
+            return list(self._xdata[appid])
+        except KeyError:
+            raise ValueError(appid) from None
+
+    def __repr__(self):
+        return f"IREntity({self.kind}, handle={getattr(self.dxf, 'handle', None)})"
+
+
+class IRLayout(list):
+    """Modelspace sau bloc: lista entităților, în ordinea din DXF"""
+
+    def __init__(self, name, entities=()):
+        super().__init__(entities)
+        self.name = name
+
+
+class IRBlocks(dict):
+    """Blocurile documentului (doar cele folosite de modelspace): nume -> IRLayout"""
+
+    def __iter__(self):
+        return iter(self.values())
+
+
+class IRDocument:
+    """Documentul DXF normalizat: modelspace() și blocks.get(name), ca în ezdxf"""
+
+    # Documentul este complet în memorie (vezi IRStreamDocument)
+    streaming = False
+
+    def __init__(self, modelspace, blocks, source_hash=""):
+        self._modelspace = modelspace
+        self.blocks = blocks
+        self.source_hash = source_hash
+
+    def modelspace(self):
+        return self._modelspace
+
+    def close(self):
+        pass
+
+
+# -----------------------------
+# Construirea IR-ului din ezdxf
+# -----------------------------
+def _plain(value):
+    """Valoare serializabilă cu marshal (Vec3 -> tuple)"""
+    if hasattr(value, "x") and hasattr(value, "y"):
+        return (float(value.x), float(value.y), float(getattr(value, "z", 0.0)))
+    return value
+
+
+def _entity_record(entity, attribute_names=ENTITY_ATTRIBUTES):
+    """Înregistrarea unei entități ezdxf: (tip, atribute, xdata, geometrie)"""
+    attributes = {}
+    for name in attribute_names:
+        if entity.dxf.is_supported(name):
+            attributes[name] = _plain(getattr(entity.dxf, name))
+
+    xdata = {}
+    if entity.xdata:
+        for appid in entity.xdata.data:
+            tags = entity.get_xdata(appid)
+            xdata[appid] = tuple((tag.code, _plain(tag.value)) for tag in tags)
+
+    kind = entity.dxftype()
+    geometry = None
+    if kind == "LWPOLYLINE":
+        geometry = (tuple(tuple(float(v) for v in point) for point in entity.lwpoints), bool(entity.closed))
+    elif kind == "POLYLINE":
+        geometry = (tuple(_entity_record(vertex, VERTEX_ATTRIBUTES) for vertex in entity.vertices),
+                    bool(entity.is_closed))
+    return (kind, attributes, xdata, geometry)
+
+
+def build_records(doc):
+    """
+    Înregistrările modelspace-ului și ale blocurilor folosite de el (recursiv, pentru
+    INSERT-uri imbricate) dintr-un document ezdxf.
+    """
+    modelspace = [_entity_record(entity) for entity in doc.modelspace()]
+    blocks = {}
+    pending = [record[1].get("name") for record in modelspace if record[0] == "INSERT"]
+    while pending:
+        name = pending.pop()
+        if not name or name in blocks:
+            continue
+        layout = doc.blocks.get(name)
+        if layout is None:
+            continue
+        blocks[name] = [_entity_record(entity) for entity in layout]
+        pending.extend(record[1].get("name") for record in blocks[name] if record[0] == "INSERT")
+    return {"format": IR_FORMAT, "modelspace": modelspace, "blocks": blocks}
+
+
+# -----------------------------
+# Reconstruirea documentului din înregistrări
+# -----------------------------
+def _entity_from_record(record):
+    kind, attributes, xdata, geometry = record
+    attributes = {name: IRVec(*value) if name in VECTOR_ATTRIBUTES and value is not None else value
+                  for name, value in attributes.items()}
+    tags = {appid: tuple(IRTag(code, IRVec(*value) if code in XDATA_POINT_CODES and isinstance(value, tuple)
+                               else value) for code, value in values)
+            for appid, values in xdata.items()}
+    entity = IREntity(kind, attributes, tags)
+    if kind == "LWPOLYLINE":
+        entity.lwpoints, entity.closed = geometry
+    elif kind == "POLYLINE":
+        vertices, entity.is_closed = geometry
+        entity.vertices = [_entity_from_record(vertex) for vertex in vertices]
+    return entity
+
+
+def document_from_records(records, source_hash=""):
+    """IRDocument din înregistrările produse de build_records"""
+    modelspace = IRLayout("*Model_Space", (_entity_from_record(r) for r in records["modelspace"]))
+    blocks = IRBlocks((name, IRLayout(name, (_entity_from_record(r) for r in entities)))
+                      for name, entities in records["blocks"].items())
+    return IRDocument(modelspace, blocks, source_hash)
+
+
+# -----------------------------
+# Citire în flux (iterdxf) pentru desene foarte mari
+# -----------------------------
+class IRStreamBlocks:
+    """
+    Blocurile unui document citit în flux: un bloc se încarcă din secțiunea BLOCKS
+    abia la primul get(name) și rămâne în memorie (doar blocurile referite).
+    """
+
+    def __init__(self, source):
+        self._source = source
+        self._positions = None
+        self._layouts = {}
+
+    def get(self, name, default=None):
+        if name not in self._layouts:
+            self._layouts[name] = self._load(name)
+        layout = self._layouts[name]
+        return default if layout is None else layout
+
+    def __iter__(self):
+        return iter(layout for layout in self._layouts.values() if layout is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def keys(self):
+        return [name for name, layout in self._layouts.items() if layout is not None]
+
+    def _load_entry(self, index):
+        """Entitatea ezdxf de la poziția `index` din indexul fișierului"""
+        from ezdxf.entities import factory
+        from ezdxf.lldxf.extendedtags import ExtendedTags
+
+        entries = self._source.structure.index
+        start, end = entries[index].location, entries[index + 1].location
+        self._source.file.seek(start)
+        text = self._source.file.read(end - start).decode(self._source.encoding, errors=self._source.errors)
+        return factory.load(ExtendedTags.from_text(text.replace("\r\n", "\n")))
+
+    def _block_positions(self):
+        """Numele blocurilor -> poziția entității BLOCK în index (se citesc doar antetele)"""
+        positions = {}
+        entries = self._source.structure.index
+        index = self._source.sections.get("BLOCKS")
+        if index is None:
+            return positions
+        index += 1
+        while entries[index].value != "ENDSEC":
+            if entries[index].value == "BLOCK":
+                positions[self._load_entry(index).dxf.name] = index
+            index += 1
+        return positions
+
+    def _load(self, name):
+        from ezdxf.addons.iterdxf import SUPPORTED_TYPES
+        from ezdxf.entities.subentity import entity_linker
+
+        # Modelspace-ul se citește secvențial din același fișier: poziția se restaurează
+        position = self._source.file.tell()
+        try:
+            if self._positions is None:
+                self._positions = self._block_positions()
+            index = self._positions.get(name)
+            if index is None:
+                return None
+            entries = self._source.structure.index
+            linked_entity = entity_linker()
+            entities = []
+            index += 1
+            while entries[index].value != "ENDBLK":
+                if entries[index].value in SUPPORTED_TYPES:
+                    entity = self._load_entry(index)
+                    # VERTEX / ATTRIB / SEQEND se atașează entității părinte
+                    if not linked_entity(entity):
+                        entities.append(entity)
+                index += 1
+            return IRLayout(name, (_entity_from_record(_entity_record(entity)) for entity in entities))
+        finally:
+            self._source.file.seek(position)
+
+
+class IRStreamDocument:
+    """
+    Document DXF citit în flux: modelspace() produce entitățile IR pe rând, direct
+    din fișier, fără a păstra documentul ezdxf (memoria nu crește cu numărul de
+    entități, în afara indexului de poziții al fișierului).
+    """
+
+    streaming = True
+
+    def __init__(self, dxf_path):
+        from ezdxf.addons import iterdxf
+
+        self._source = iterdxf.opendxf(str(dxf_path))
+        self.blocks = IRStreamBlocks(self._source)
+        self.source_hash = ""
+
+    def modelspace(self, types=None):
+        """
+        Entitățile IR ale modelspace-ului, una câte una. Fiecare apel recitește
+        secțiunea ENTITIES; `types` (ex. ("CIRCLE",)) sare peste restul fără a le parsa.
+        """
+        for entity in self._source.modelspace(types):
+            yield _entity_from_record(_entity_record(entity))
+
+    def close(self):
+        self._source.close()
+
+
+def stream_document(dxf_path):
+    """Documentul DXF ca IR citit în flux (iterdxf), pentru fișiere prea mari pentru readfile"""
+    doc = IRStreamDocument(dxf_path)
+    print(f"[IR] Streaming {dxf_path} ({os.path.getsize(dxf_path) / 1e6:.1f} MB, "
+          f"{len(doc._source.structure.index)} index entries)")
+    return doc
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+def file_hash(path):
+    """sha256 al conținutului fișierului"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def default_cache_dir():
+    """
+    Folderul cache-ului IR: VIEWER2D_IR_CACHE dacă e setată, altfel folderul cache al
+    utilizatorului (%LOCALAPPDATA% pe Windows, $XDG_CACHE_HOME sau ~/.cache în rest),
+    iar în lipsa unui home, folderul temporar al sistemului
+    """
+    override = os.environ.get(IR_CACHE_ENV)
+    if override:
+        return Path(override)
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        base = Path(os.environ["LOCALAPPDATA"])
+    elif os.environ.get("XDG_CACHE_HOME"):
+        base = Path(os.environ["XDG_CACHE_HOME"])
+    else:
+        try:
+            base = Path.home() / ".cache"
+        except RuntimeError:
+            base = Path(tempfile.gettempdir())
+    return base / "viewer2d" / "ir"
+
+
+def cache_path(source_hash, cache_dir=None):
+    return Path(cache_dir or default_cache_dir()) / f"{source_hash}.ir"
+
+
+def prune_cache(cache_dir, max_bytes=IR_CACHE_MAX_BYTES, max_age=IR_CACHE_MAX_AGE, keep=None):
+    """
+    Șterge intrările nefolosite de mai mult de `max_age` secunde (și fișierele temporare
+    rămase de la scrieri întrerupte), apoi pe cele mai vechi până când cache-ul încape
+    în `max_bytes`. Vechimea este data ultimei folosiri (mtime, actualizat la citire).
+    `keep` este intrarea tocmai scrisă, care nu se șterge.
+
+    Returns:
+        int: numărul de fișiere șterse
+    """
+    now = time.time()
+    entries = []
+    removed = 0
+    for path in Path(cache_dir).glob("*.ir*"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        stale = now - stat.st_mtime > max_age
+        if path != keep and (stale or (path.suffix == ".tmp" and now - stat.st_mtime > 3600)):
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        elif path.suffix == ".ir":
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            path.unlink()
+            removed += 1
+            total -= size
+        except OSError:
+            pass
+    if removed:
+        print(f"[IR] Pruned {removed} cache entries from {cache_dir}")
+    return removed
+
+
+def _read_cache(path):
+    try:
+        with open(path, "rb") as f:
+            records = marshal.loads(zlib.decompress(f.read()))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, EOFError, TypeError, zlib.error) as e:
+        print(f"[WARNING] IR cache unreadable, rebuilding: {path} ({e})")
+        return None
+    if not isinstance(records, dict) or records.get("format") != IR_FORMAT:
+        return None
+    try:
+        os.utime(path)  # Ultima folosire, pentru prune_cache
+    except OSError:
+        pass
+    return records
+
+
+def _write_cache(path, records):
+    """Scriere atomică (fișier temporar unic + replace), sigură pentru conversii paralele"""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(zlib.compress(marshal.dumps(records), 1))
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"[WARNING] Could not write IR cache {path}: {e}")
+        return
+    prune_cache(path.parent, keep=path)
+
+
+def load_document(dxf_path, use_cache=True, cache_dir=None):
+    """
+    Documentul DXF ca IR: din cache dacă fișierul (după conținut) a mai fost citit,
+    altfel prin ezdxf (importat doar acum) și salvat în cache.
+
+    Args:
+        dxf_path: Calea fișierului DXF
+        use_cache: False pentru a citi mereu cu ezdxf (fără a scrie în cache)
+        cache_dir: Folderul cache-ului (implicit default_cache_dir())
+
+    Returns:
+        IRDocument
+    """
+    start = time.time()
+    source_hash = file_hash(dxf_path)
+    path = cache_path(source_hash, cache_dir)
+
+    records = _read_cache(path) if use_cache else None
+    if records is not None:
+        doc = document_from_records(records, source_hash)
+        print(f"[IR] Loaded {len(doc.modelspace())} entities, {len(doc.blocks)} blocks from cache "
+              f"in {time.time() - start:.3f}s")
+        return doc
+
+    import ezdxf
+    records = build_records(ezdxf.readfile(dxf_path))
+    if use_cache:
+        _write_cache(path, records)
+    doc = document_from_records(records, source_hash)
+    print(f"[IR] Parsed {len(doc.modelspace())} entities, {len(doc.blocks)} blocks with ezdxf "
+          f"in {time.time() - start:.3f}s")
+    return doc
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python dxf_ir.py <file.dxf> [--rebuild | --stream]")
+        return 1
+    dxf_path = sys.argv[1]
+    if "--rebuild" in sys.argv[2:]:
+        path = cache_path(file_hash(dxf_path))
+        if path.exists():
+            path.unlink()
+    doc = stream_document(dxf_path) if "--stream" in sys.argv[2:] else load_document(dxf_path)
+    kinds = {}
+    for entity in doc.modelspace():
+        kinds[entity.dxftype()] = kinds.get(entity.dxftype(), 0) + 1
+        if entity.dxftype() == "INSERT":
+            doc.blocks.get(entity.dxf.name)
+    print(f"[IR] {dxf_path}: {kinds}, blocks: {sorted(doc.blocks.keys())}")
+    doc.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,46 +1,100 @@
-import ezdxf
 import trimesh
 import numpy as np
-from trimesh.creation import extrude_polygon
 from shapely.geometry import Polygon
-import uuid
 import sys
 import time
 import json
 import os
 import re
+import argparse
+import importlib
 from trimesh.exchange import gltf
 
-# Import pentru conversia IFC în background
-try:
-    from ifc_background_converter import (
-        create_background_converter, 
-        process_xdata_for_element,
-        IfcBackgroundConverter
-    )
-    IFC_CONVERSION_AVAILABLE = True
-    print("[DEBUG] IFC Background Converter disponibil")
-except ImportError as e:
-    print(f"[WARNING] IFC Background Converter indisponibil: {e}")
-    IFC_CONVERSION_AVAILABLE = False
-
-# Import pentru conversia IFC bazată pe GLB
-try:
-    from ifc_glb_converter import convert_glb_to_ifc
-    IFC_GLB_CONVERSION_AVAILABLE = True
-    print("[DEBUG] IFC GLB Converter disponibil")
-except ImportError as e:
-    print(f"[WARNING] IFC GLB Converter indisponibil: {e}")
-    IFC_GLB_CONVERSION_AVAILABLE = False
-
-# Import pentru procesorul door/window
-try:
-    from door_window_processor import DoorWindowProcessor
-    DOOR_WINDOW_PROCESSOR_AVAILABLE = True
-    print("[DEBUG] Door/Window Processor disponibil")
-except ImportError as e:
-    print(f"[WARNING] Door/Window Processor indisponibil: {e}")
-    DOOR_WINDOW_PROCESSOR_AVAILABLE = False
+import dxf_ir
+from dxf_classifier import (ROLE_BLOCK, ROLE_CONTROL, ROLE_SECTION, ROLE_TOV, ROLE_WINDOW, EntityFilter,
+                            classify_document)
+from element_ids import ElementIdFactory
+from extrusion_kernel import extrude_footprint
+from element_store import ElementStore, make_record, plain, share
+from quantity_takeoff import DeferredVolumes, FootprintBatch
+from transform_stack import TransformStack
+
+# -----------------------------
+# Subsisteme opționale (IFC, Door/Window) - încărcate la prima utilizare
+# -----------------------------
+# Modurile IFC acceptate de pipeline (--ifc=none|final|background|from-glb, combinabile cu virgulă):
+#   final     - un singur IFC (<base>.ifc) din meshurile finale aflate în memorie
+#   background - <base>_auto.ifc într-un proces separat
+#   from-glb  - <base>_from_glb.ifc prin recitirea GLB-ului și a mapping-ului de pe disc
+#   parametric - <base>_parametric.ifc cu prisme IfcExtrudedAreaSolid și goluri IfcOpeningElement
+IFC_MODES = ("final", "background", "from-glb", "parametric")
+DEFAULT_IFC_MODES = ("final",)
+
+# Cache pentru modulele opționale: nume modul -> modul sau None dacă importul a eșuat
+_OPTIONAL_MODULES = {}
+
+# Opacitatea voidurilor afișate în modul preview (fără booleene, voidurile apar peste solide)
+PREVIEW_VOID_ALPHA = 0.25
+
+# Generatorul de UUID-uri deterministe al conversiei curente (resetat de dxf_to_gltf pentru fiecare DXF)
+_element_ids = ElementIdFactory("")
+
+def new_element_uuid(handle, *parts):
+    """UUIDv5 stabil pentru un element: fișierul sursă + handle DXF + sub-părți (vezi element_ids.py)"""
+    return _element_ids.element_uuid(handle, *parts)
+
+def _load_optional_module(module_name, label):
+    """
+    Importă un subsistem opțional abia când pipeline-ul are nevoie de el.
+    Astfel un preview care scrie doar GLB nu plătește importul ifcopenshell.
+    Rezultatul (modulul sau None) este păstrat în cache.
+    """
+    if module_name not in _OPTIONAL_MODULES:
+        try:
+            _OPTIONAL_MODULES[module_name] = importlib.import_module(module_name)
+            print(f"[DEBUG] {label} disponibil")
+        except ImportError as e:
+            print(f"[WARNING] {label} indisponibil: {e}")
+            _OPTIONAL_MODULES[module_name] = None
+    return _OPTIONAL_MODULES[module_name]
+
+def load_ifc_background_converter():
+    """Modulul ifc_background_converter sau None."""
+    return _load_optional_module("ifc_background_converter", "IFC Background Converter")
+
+def load_ifc_glb_converter():
+    """Modulul ifc_glb_converter sau None."""
+    return _load_optional_module("ifc_glb_converter", "IFC GLB Converter")
+
+def load_ifc_parametric_exporter():
+    """Modulul ifc_parametric_exporter sau None."""
+    return _load_optional_module("ifc_parametric_exporter", "IFC Parametric Exporter")
+
+def load_door_window_processor():
+    """Modulul door_window_processor sau None."""
+    return _load_optional_module("door_window_processor", "Door/Window Processor")
+
+def parse_ifc_modes(value):
+    """
+    Normalizează opțiunea --ifc într-un set de moduri.
+
+    Args:
+        value: "none", un mod, o listă separată prin virgulă ("final,background")
+               sau un iterabil de moduri
+
+    Returns:
+        set: modurile IFC active (set gol pentru "none")
+    """
+    if value is None:
+        return set(DEFAULT_IFC_MODES)
+    if isinstance(value, str):
+        value = [part.strip() for part in value.split(",") if part.strip()]
+    modes = set(value)
+    modes.discard("none")
+    unknown = modes - set(IFC_MODES)
+    if unknown:
+        raise ValueError(f"Mod IFC necunoscut: {', '.join(sorted(unknown))} (valide: none, {', '.join(IFC_MODES)})")
+    return modes
 
 # -----------------------------
 # Extragerea Z global din numele fișierului
@@ -153,29 +207,22 @@ def get_material(layer):
 # -----------------------------
 # Funcții pentru control spațial cu cercuri
 # -----------------------------
-def read_control_circles(doc, layer="control", global_z=0.0):
+def read_control_circles(circles, layer="control", global_z=0.0):
     """
     Citește cercurile de control cu Z din XDATA pentru formele spațiale.
     Z-ul din XDATA este relativ la global_z din numele fișierului.
+
+    Args:
+        circles: înregistrările ROLE_CONTROL din dxf_classifier (XDATA deja parsat)
     """
-    msp = doc.modelspace()
     control_points = []
 
-    circles = list(msp.query(f"CIRCLE[layer=='{layer}']"))
     print(f"[DEBUG] Cercuri de control gasite pe layer '{layer}': {len(circles)}")
 
-    for c in circles:
+    for record in circles:
+        c = record.entity
         x, y = float(c.dxf.center[0]), float(c.dxf.center[1])
-        z_relative = 0.0  # Z relativ din XDATA
-
-        if c.has_xdata:
-            try:
-                xdata = c.get_xdata("QCAD")
-                for code, value in xdata:
-                    if code == 1000 and isinstance(value, str) and value.startswith("z:"):
-                        z_relative = float(value.split(":")[1])
-            except Exception as e:
-                print(f"[DEBUG] Eroare XDATA pentru cerc de control ({x:.2f}, {y:.2f}): {e}")
+        z_relative = record.params.value("z", 0.0)  # Z relativ din XDATA
 
         # Calculează Z final: global_z + z_relative
         z_final = global_z + z_relative
@@ -354,7 +401,7 @@ def lwpolyline_to_points(entity, arc_segments=16):
     Convertește LWPOLYLINE în listă de puncte, discretizând arcele.
     
     Args:
-        entity: entitatea LWPOLYLINE din ezdxf
+        entity: entitatea LWPOLYLINE (ezdxf sau dxf_ir)
         arc_segments: număr de segmente pentru fiecare arc
     
     Returns:
@@ -392,7 +439,7 @@ def polyline_to_points(entity, arc_segments=16):
     Convertește POLYLINE în listă de puncte, discretizând arcele.
     
     Args:
-        entity: entitatea POLYLINE din ezdxf
+        entity: entitatea POLYLINE (ezdxf sau dxf_ir)
         arc_segments: număr de segmente pentru fiecare arc
     
     Returns:
@@ -426,6 +473,57 @@ def polyline_to_points(entity, arc_segments=16):
     
     return points
 
+def footprint_points(entity, ent_type, arc_segments=16, circle_segments=32):
+    """
+    Conturul unei entități de amprentă (LWPOLYLINE, POLYLINE, CIRCLE).
+    
+    Returns:
+        tuple: (lista de puncte (x, y), închis) sau ([], False) pentru celelalte entități
+    """
+    if ent_type == "LWPOLYLINE":
+        return lwpolyline_to_points(entity, arc_segments), getattr(entity, "closed", False)
+    if ent_type == "POLYLINE":
+        return polyline_to_points(entity, arc_segments), getattr(entity, "is_closed", False)
+    if ent_type == "CIRCLE" and hasattr(entity, "dxf"):
+        center = (entity.dxf.center.x, entity.dxf.center.y)
+        radius = entity.dxf.radius
+        points = [
+            (
+                center[0] + np.cos(2 * np.pi * i / circle_segments) * radius,
+                center[1] + np.sin(2 * np.pi * i / circle_segments) * radius,
+            )
+            for i in range(circle_segments)
+        ]
+        return points, True
+    return [], False
+
+def measure_footprints(records, arc_segments=16, circle_segments=32, ifc_type=None):
+    """
+    Amprentele și cantitățile unui lot de înregistrări (vezi quantity_takeoff.py).
+    
+    Args:
+        records: înregistrările din dxf_classifier; None = element fără amprentă
+        ifc_type: IfcType comun al lotului (blocuri); implicit layer-ul fiecărei înregistrări
+    
+    Returns:
+        FootprintBatch cu cantitățile calculate (înălțimea și Opening_area din XDATA)
+    """
+    contours = [footprint_points(record.entity, record.kind, arc_segments, circle_segments)
+                if record is not None else ([], False) for record in records]
+    batch = FootprintBatch([points for points, _ in contours], [closed for _, closed in contours])
+    
+    heights = np.zeros(len(records))
+    opening_areas = np.zeros(len(records))
+    for index, record in enumerate(records):
+        if record is None:
+            continue
+        heights[index] = record.params.value("height", 1.0)
+        # Opening_area se scade din aria laterală doar la IfcSpace, pentru amprentele valide
+        if batch.valid[index] and (ifc_type or record.layer) == "IfcSpace":
+            opening_areas[index] = evaluate_math_formula(record.params.value("opening_area", ""))
+    batch.takeoff(heights, opening_areas)
+    return batch
+
 # -----------------------------
 # Funcții pentru rotația în jurul primului segment
 # -----------------------------
@@ -448,7 +546,7 @@ def is_special_angle(angle_degrees):
     
     return False
 
-def create_projected_rotated_mesh(points, height, angle_degrees):
+def create_projected_rotated_mesh(points, height, angle_degrees, transform=None):
     """
     Creează un mesh prin proiectarea conturului pe un plan înclinat și extrudarea pe normala planului.
     NOUA IMPLEMENTARE: Pentru unghiuri diferite de 90°, 180°, 270°
@@ -457,6 +555,7 @@ def create_projected_rotated_mesh(points, height, angle_degrees):
         points: lista de puncte (x, y) care definesc poligonul
         height: înălțimea extrudării
         angle_degrees: unghiul de rotație în grade în jurul primului segment
+        transform: TransformStack aplicat vertecșilor înainte de crearea meshului (plasare, rotații)
     
     Returns:
         mesh rezultat sau None dacă nu se poate crea
@@ -505,21 +604,11 @@ def create_projected_rotated_mesh(points, height, angle_degrees):
         inclined_normal = rotation_matrix @ original_normal
         
         # PROIECȚIA: Proiectează punctele pe planul înclinat
-        # Pentru fiecare punct, calculează proiecția pe planul care trece prin primul punct
-        projected_points_3d = []
-        
-        for point in points:
-            # Punctul în spațiul 3D
-            point_3d = np.array([point[0], point[1], 0])
-            
-            # Calculează distanța de la punct la planul înclinat
-            # Planul trece prin p1 și are normala inclined_normal
-            to_point = point_3d - p1
-            distance_to_plane = np.dot(to_point, inclined_normal)
-            
-            # Proiectează punctul pe planul înclinat
-            projected_point = point_3d - distance_to_plane * inclined_normal
-            projected_points_3d.append(projected_point)
+        # Proiecția pe planul care trece prin primul punct (normala inclined_normal),
+        # ca o singură transformare aplicată tuturor punctelor
+        points_3d = np.column_stack([np.asarray(points, dtype=np.float64)[:, :2], np.zeros(len(points))])
+        projection = TransformStack().linear(np.eye(3) - np.outer(inclined_normal, inclined_normal), p1)
+        projected_points_3d = projection.transform_points(points_3d)
         
         # Creează mesh-ul din punctele proiectate
         num_points = len(projected_points_3d)
@@ -530,8 +619,10 @@ def create_projected_rotated_mesh(points, height, angle_degrees):
         # Punctele de sus (extrudate pe direcția normală a planului înclinat)
         top_vertices = base_vertices + height * inclined_normal
         
-        # Combină toate vertexurile
+        # Combină toate vertexurile (cu plasarea / rotațiile elementului aplicate o singură dată)
         all_vertices = np.vstack([base_vertices, top_vertices])
+        if transform is not None:
+            all_vertices = transform.transform_points(all_vertices)
         
         # Creează fețele folosind triangulare pentru poligoanele de bază și sus
         faces = []
@@ -575,7 +666,7 @@ def create_projected_rotated_mesh(points, height, angle_degrees):
         print(f"[DEBUG] Projected rotated mesh creation failed: {ex}")
         return None
 
-def create_inclined_mesh(points, height, angle_degrees):
+def create_inclined_mesh(points, height, angle_degrees, transform=None):
     """
     FUNCȚIE MENȚINUTĂ PENTRU COMPATIBILITATE
     Creează un mesh prin proiectarea conturului pe un plan înclinat și extrudarea pe normala planului.
@@ -584,6 +675,7 @@ def create_inclined_mesh(points, height, angle_degrees):
         points: lista de puncte (x, y) care definesc poligonul
         height: înălțimea extrudării
         angle_degrees: unghiul de înclinare în grade (pozitiv = antiorar, negativ = orar)
+        transform: TransformStack aplicat vertecșilor înainte de crearea meshului (plasare, rotații)
     
     Returns:
         mesh rezultat sau None dacă nu se poate crea
@@ -632,21 +724,11 @@ def create_inclined_mesh(points, height, angle_degrees):
         inclined_normal = rotation_matrix @ original_normal
         
         # Proiectează punctele pe planul înclinat
-        # Pentru fiecare punct, calculează proiecția pe planul care trece prin primul punct
-        projected_points_3d = []
-        
-        for point in points:
-            # Punctul în spațiul 3D
-            point_3d = np.array([point[0], point[1], 0])
-            
-            # Calculează distanța de la punct la planul înclinat
-            # Planul trece prin p1 și are normala inclined_normal
-            to_point = point_3d - p1
-            distance_to_plane = np.dot(to_point, inclined_normal)
-            
-            # Proiectează punctul pe planul înclinat
-            projected_point = point_3d - distance_to_plane * inclined_normal
-            projected_points_3d.append(projected_point)
+        # Proiecția pe planul care trece prin primul punct (normala inclined_normal),
+        # ca o singură transformare aplicată tuturor punctelor
+        points_3d = np.column_stack([np.asarray(points, dtype=np.float64)[:, :2], np.zeros(len(points))])
+        projection = TransformStack().linear(np.eye(3) - np.outer(inclined_normal, inclined_normal), p1)
+        projected_points_3d = projection.transform_points(points_3d)
         
         # Creează poligonul din punctele proiectate
         # Pentru a crea un mesh valid, avem nevoie să definim fețele
@@ -658,8 +740,10 @@ def create_inclined_mesh(points, height, angle_degrees):
         # Punctele de sus (extrudate pe direcția normală)
         top_vertices = base_vertices + height * inclined_normal
         
-        # Combină toate vertexurile
+        # Combină toate vertexurile (cu plasarea / rotațiile elementului aplicate o singură dată)
         all_vertices = np.vstack([base_vertices, top_vertices])
+        if transform is not None:
+            all_vertices = transform.transform_points(all_vertices)
         
         # Creează fețele folosind triangulare pentru poligoanele de bază și sus
         faces = []
@@ -704,13 +788,14 @@ def create_inclined_mesh(points, height, angle_degrees):
         print(f"[DEBUG] Inclined mesh creation failed: {ex}")
         return None
 
-def create_rotated_90_mesh(points, height):
+def create_rotated_90_mesh(points, height, transform=None):
     """
     Rotește poligonul cu 90° în jurul primului segment și extrudează pe normala feței rotite.
     
     Args:
         points: lista de puncte (x, y) care definesc poligonul
         height: înălțimea extrudării
+        transform: TransformStack aplicat vertecșilor înainte de crearea meshului (plasare, rotații)
     
     Returns:
         mesh rezultat sau None dacă nu se poate crea
@@ -753,22 +838,9 @@ def create_rotated_90_mesh(points, height):
                           sin_angle * axis_cross_matrix + 
                           (1 - cos_angle) * np.dot(axis_cross_matrix, axis_cross_matrix))
         
-        # Rotește toate punctele în jurul primului segment
-        rotated_points_3d = []
-        
-        for point in points:
-            # Punctul în spațiul 3D
-            point_3d = np.array([point[0], point[1], 0])
-            
-            # Translează punctul la origine (relativ la p1)
-            translated_point = point_3d - p1
-            
-            # Aplică rotația
-            rotated_point = rotation_matrix @ translated_point
-            
-            # Translează înapoi
-            final_point = rotated_point + p1
-            rotated_points_3d.append(final_point)
+        # Rotește toate punctele în jurul primului segment (o singură transformare față de p1)
+        points_3d = np.column_stack([np.asarray(points, dtype=np.float64)[:, :2], np.zeros(len(points))])
+        rotated_points_3d = TransformStack().linear(rotation_matrix, p1).transform_points(points_3d)
         
         # Calculează normala feței rotite folosind primele 3 puncte
         if len(rotated_points_3d) >= 3:
@@ -790,8 +862,10 @@ def create_rotated_90_mesh(points, height):
         # Punctele de sus (extrudate pe direcția normalei feței rotite)
         top_vertices = base_vertices + height * face_normal
         
-        # Combină toate vertexurile
+        # Combină toate vertexurile (cu plasarea / rotațiile elementului aplicate o singură dată)
         all_vertices = np.vstack([base_vertices, top_vertices])
+        if transform is not None:
+            all_vertices = transform.transform_points(all_vertices)
         num_points = len(points)
         
         # Creează fețele folosind aceeași logică ca în create_inclined_mesh
@@ -836,7 +910,7 @@ def create_rotated_90_mesh(points, height):
         print(f"[DEBUG] 90° rotated mesh creation failed: {ex}")
         return None
 
-def create_angle_based_mesh(points, height, angle_degrees):
+def create_angle_based_mesh(points, height, angle_degrees, transform=None):
     """
     Creează mesh bazat pe tipul unghiului:
     - Pentru 90°, 180°, 270°: folosește rotația 3D directă (funcția existentă)
@@ -846,6 +920,7 @@ def create_angle_based_mesh(points, height, angle_degrees):
         points: lista de puncte (x, y) care definesc poligonul
         height: înălțimea extrudării  
         angle_degrees: unghiul de rotație în grade
+        transform: TransformStack aplicat vertecșilor înainte de crearea meshului (plasare, rotații)
     
     Returns:
         mesh rezultat sau None dacă nu se poate crea
@@ -857,22 +932,24 @@ def create_angle_based_mesh(points, height, angle_degrees):
     if is_special_angle(angle_degrees):
         print(f"[DEBUG] Unghi special {angle_degrees}° - folosesc rotatia 3D directa")
         # Pentru unghiurile speciale, folosește implementarea existentă create_inclined_mesh
-        return create_inclined_mesh(points, height, angle_degrees)
+        return create_inclined_mesh(points, height, angle_degrees, transform)
     else:
         print(f"[DEBUG] Unghi arbitrar {angle_degrees}° - folosesc proiectia pe planul rotit")
         # Pentru unghiurile arbitrare, folosește noua implementare cu proiecție
-        return create_projected_rotated_mesh(points, height, angle_degrees)
+        return create_projected_rotated_mesh(points, height, angle_degrees, transform)
 
 # -----------------------------
 # Funcții pentru tăierea elementelor la acoperiș
 # -----------------------------
-def trim_elements_to_roof(solids, mapping):
+def trim_elements_to_roof(solids, mapping, volumes=None):
     """
     Taie elementele structurale (IfcWall, IfcCovering, IfcColumn) la fața inferioară a acoperișului.
     
     Args:
         solids: lista de mesh-uri
         mapping: lista de dicționare cu informații despre mesh-uri
+        volumes: DeferredVolumes - volumele după tăiere se calculează înainte de export
+            (None = calcul imediat)
     
     Returns:
         tuple: (solids_trimmed, mapping_updated)
@@ -972,7 +1049,7 @@ def trim_elements_to_roof(solids, mapping):
                         
                         if trimmed_mesh and hasattr(trimmed_mesh, 'vertices') and len(trimmed_mesh.vertices) > 0:
                             # Păstrează metadata originală
-                            trimmed_mesh.metadata = dict(final_mesh.metadata)
+                            trimmed_mesh.metadata = share(final_mesh.metadata)
                             final_mesh = trimmed_mesh
                             intersections_found = True
                             
@@ -995,7 +1072,9 @@ def trim_elements_to_roof(solids, mapping):
             if intersections_found:
                 updated_entry["trimmed_to_roof"] = True
                 # Recalculează volumul după tăierea la acoperiș
-                if hasattr(final_mesh, 'volume') and final_mesh.volume > 0:
+                if volumes is not None:
+                    volumes.defer(struct_uuid, final_mesh, "roof trimming")
+                elif hasattr(final_mesh, 'volume') and final_mesh.volume > 0:
                     updated_entry["volume"] = float(final_mesh.volume)
                     print(f"[DEBUG] Volume updated after roof trimming: {updated_entry['mesh_name']} = {final_mesh.volume:.3f}m³")
             updated_mapping.append(updated_entry)
@@ -1014,10 +1093,136 @@ def trim_elements_to_roof(solids, mapping):
     
     return final_solids, updated_mapping
 
+def make_preview_overlay(mesh, entry=None):
+    """
+    Marchează un void ca suprafață transparentă pentru modul preview (în loc să fie scăzut
+    din solide). Intrarea lui de mapping primește "preview_overlay": True.
+    """
+    color = list(mesh.metadata.get("material_color", [0.5, 0.5, 0.5]))
+    rgba = np.array(color + [PREVIEW_VOID_ALPHA], dtype=np.float32)
+    mesh.metadata["material_color"] = color
+    mesh.metadata["material_alpha"] = PREVIEW_VOID_ALPHA
+    mesh.metadata["material_rgba"] = rgba
+    mesh.metadata["preview_overlay"] = True
+    mesh.visual.vertex_colors = np.tile(rgba, (len(mesh.vertices), 1))
+    entry = entry if entry is not None else mesh.metadata.get("mapping_entry")
+    if entry is not None:
+        entry["preview_overlay"] = True
+    return mesh
+
+def _slice_surface_to_convex(mesh, piece):
+    """Partea unei suprafețe deschise din interiorul unui poligon convex (fără capace)"""
+    from shapely.geometry.polygon import orient
+
+    vertices, faces = mesh.vertices, mesh.faces
+    coords = orient(piece, sign=1.0).exterior.coords  # Sens trigonometric: interiorul e la stânga laturii
+    for (ax, ay), (bx, by) in zip(coords[:-1], coords[1:]):
+        vertices, faces = trimesh.intersections.slice_faces_plane(
+            vertices, faces, plane_normal=[-(by - ay), bx - ax, 0.0], plane_origin=[ax, ay, 0.0])[:2]
+        if len(faces) == 0:
+            return None
+    return trimesh.Trimesh(vertices=vertices, faces=faces)
+
+def clip_elements_to_region(solids, mapping, region, volumes=None):
+    """
+    Taie solidele care traversează marginea regiunii conversiei parțiale.
+
+    Solidele de pe margine se intersectează boolean cu prisma verticală a regiunii
+    (funcționează și pentru regiuni neconvexe), suprafețele deschise se taie cu
+    planele verticale ale laturilor (pe piese convexe ale regiunii); elementele
+    complet în afara regiunii sunt eliminate împreună cu intrările lor din mapping.
+
+    Args:
+        solids: lista de mesh-uri
+        mapping: lista de dicționare cu informații despre mesh-uri
+        region: Polygon shapely (vezi dxf_classifier.parse_region)
+        volumes: DeferredVolumes - volumele după decupare se calculează înainte de export
+            (None = calcul imediat)
+
+    Returns:
+        tuple: (solids_clipped, mapping_updated)
+    """
+    import shapely
+    from shapely.geometry import box
+    from shapely.prepared import prep
+
+    prepared_region = prep(region)
+    if region.convex_hull.area - region.area <= 1e-9 * max(region.area, 1.0):
+        convex_pieces = [region]
+    else:
+        convex_pieces = list(shapely.constrained_delaunay_triangles(region).geoms)
+
+    uuid_to_entry = {entry["uuid"]: entry for entry in mapping if entry.get("uuid")}
+    clipped_solids = []
+    kept_uuids = set()
+    removed_uuids = set()
+
+    for mesh in solids:
+        mesh_uuid = mesh.metadata.get("uuid")
+        if len(mesh.vertices) == 0:
+            clipped_solids.append(mesh)
+            kept_uuids.add(mesh_uuid)
+            continue
+        bounds = mesh.bounds
+        footprint = box(bounds[0][0], bounds[0][1], bounds[1][0], bounds[1][1])
+        if prepared_region.contains(footprint):
+            clipped_solids.append(mesh)
+            kept_uuids.add(mesh_uuid)
+            continue
+        if not prepared_region.intersects(footprint):
+            print(f"[DEBUG] Outside region, dropped: {mesh.metadata.get('name', 'unknown')}")
+            removed_uuids.add(mesh_uuid)
+            continue
+
+        try:
+            if mesh.is_volume:
+                # Prisma regiunii acoperă toată înălțimea mesh-ului
+                prism = trimesh.creation.extrude_polygon(region, bounds[1][2] - bounds[0][2] + 2.0)
+                prism.apply_translation([0.0, 0.0, bounds[0][2] - 1.0])
+                clipped = trimesh.boolean.intersection([mesh, prism])
+            else:
+                # Suprafețele deschise nu intră în booleene: tăiere cu planele laturilor fiecărei piese convexe
+                parts = [part for part in (_slice_surface_to_convex(mesh, piece) for piece in convex_pieces)
+                         if part is not None]
+                clipped = trimesh.util.concatenate(parts) if parts else None
+        except Exception as ex:
+            print(f"[DEBUG] Failed to clip {mesh.metadata.get('name')} to region: {ex}")
+            clipped_solids.append(mesh)
+            kept_uuids.add(mesh_uuid)
+            continue
+
+        if clipped is None or len(clipped.vertices) == 0 or len(clipped.faces) == 0:
+            print(f"[DEBUG] Clipping left nothing of {mesh.metadata.get('name', 'unknown')}, dropped")
+            removed_uuids.add(mesh_uuid)
+            continue
+
+        # Materialul se re-aplică din metadata (material_rgba) la verificarea finală
+        clipped.metadata = share(mesh.metadata)
+        clipped_solids.append(clipped)
+        kept_uuids.add(mesh_uuid)
+        entry = uuid_to_entry.get(mesh_uuid)
+        if entry is not None:
+            entry["clipped_to_region"] = True
+            if clipped.is_volume:
+                if volumes is not None:
+                    volumes.defer(mesh_uuid, clipped, "region clipping", positive=False)
+                else:
+                    entry["volume"] = float(clipped.volume)
+        print(f"[DEBUG] Clipped {mesh.metadata.get('name')} to region")
+
+    # Intrările fără niciun mesh rămas (fragmentele booleene au același uuid) dispar din mapping
+    dropped = removed_uuids - kept_uuids
+    updated_mapping = [entry for entry in mapping if entry.get("uuid") not in dropped]
+    print(f"[DEBUG] Region clipping complete: {len(clipped_solids)} meshes kept, {len(dropped)} elements dropped")
+    return clipped_solids, updated_mapping
+
 def apply_xyz_rotations(mesh, rotate_x, rotate_y, rotate_z=0.0):
     """
     Aplică rotații pe axele X, Y și Z la un mesh deja extrudat.
     
+    Rotațiile (ordinea Z, Y, X) se compun într-o singură matrice și se aplică pe loc,
+    fără copierea meshului (vezi transform_stack.py).
+    
     Args:
         mesh: trimesh object
         rotate_x: unghiul de rotație în jurul axei X în grade
@@ -1025,39 +1230,18 @@ def apply_xyz_rotations(mesh, rotate_x, rotate_y, rotate_z=0.0):
         rotate_z: unghiul de rotație în jurul axei Z în grade
     
     Returns:
-        mesh rotit sau mesh original dacă nu există rotații
+        mesh-ul rotit (același obiect)
     """
-    if abs(rotate_x) < 1e-6 and abs(rotate_y) < 1e-6 and abs(rotate_z) < 1e-6:
+    rotations = TransformStack().rotate_xyz(rotate_x, rotate_y, rotate_z)
+    if rotations.is_identity:
         return mesh  # Nu sunt rotații de aplicat
     
     try:
-        mesh_copy = mesh.copy()
-        
-        # Aplică rotațiile în ordine: Z, Y, X (pentru a păstra consistența cu standardele 3D)
-        if abs(rotate_z) > 1e-6:
-            angle_z_rad = np.radians(rotate_z)
-            rotation_z = trimesh.transformations.rotation_matrix(angle_z_rad, [0, 0, 1])
-            mesh_copy.apply_transform(rotation_z)
-            print(f"[DEBUG] Applied Z rotation: {rotate_z}°")
-        
-        if abs(rotate_y) > 1e-6:
-            angle_y_rad = np.radians(rotate_y)
-            rotation_y = trimesh.transformations.rotation_matrix(angle_y_rad, [0, 1, 0])
-            mesh_copy.apply_transform(rotation_y)
-            print(f"[DEBUG] Applied Y rotation: {rotate_y}°")
-        
-        if abs(rotate_x) > 1e-6:
-            angle_x_rad = np.radians(rotate_x)
-            rotation_x = trimesh.transformations.rotation_matrix(angle_x_rad, [1, 0, 0])
-            mesh_copy.apply_transform(rotation_x)
-            print(f"[DEBUG] Applied X rotation: {rotate_x}°")
-        
+        rotations.apply(mesh)
         print(f"[DEBUG] Applied XYZ rotations: X={rotate_x}°, Y={rotate_y}°, Z={rotate_z}°")
-        return mesh_copy
-        
     except Exception as ex:
         print(f"[DEBUG] XYZ rotation failed: {ex}")
-        return mesh
+    return mesh
 
 # -----------------------------
 # Procesare blocuri Door/Window cu logica TOV/FOV
@@ -1079,12 +1263,13 @@ def process_door_window_block(doc, insert_entity, global_z, mesh_name_count, map
     Returns:
         bool: True dacă blocul a fost procesat cu succes
     """
-    if not DOOR_WINDOW_PROCESSOR_AVAILABLE:
+    door_window_module = load_door_window_processor()
+    if door_window_module is None:
         return False
         
     try:
         # Inițializează procesorul
-        processor = DoorWindowProcessor()
+        processor = door_window_module.DoorWindowProcessor()
         
         # Extrage datele TOV din INSERT entity
         block_name = getattr(insert_entity.dxf, "name", "")
@@ -1093,7 +1278,7 @@ def process_door_window_block(doc, insert_entity, global_z, mesh_name_count, map
         scale_x = getattr(insert_entity.dxf, "xscale", 1.0)
         scale_y = getattr(insert_entity.dxf, "yscale", 1.0)
         scale_z = getattr(insert_entity.dxf, "zscale", 1.0)
-        handle = getattr(insert_entity, 'handle', 'unknown')
+        handle = getattr(insert_entity.dxf, 'handle', None) or 'unknown'
         xdata = getattr(insert_entity, 'xdata', {})
         
         if not insert_point or not block_name.endswith('_TOV'):
@@ -1177,32 +1362,21 @@ def process_door_window_block(doc, insert_entity, global_z, mesh_name_count, map
                         mesh = create_mesh_from_entity(entity, thickness, solid_flag, mesh_name)
                         
                         if mesh and len(mesh.vertices) > 0:
-                            # APLICĂ TRANSFORMĂRILE ÎN ORDINEA CORECTĂ:
-                            
+                            # APLICĂ TRANSFORMĂRILE ÎN ORDINEA CORECTĂ, compuse și aplicate o singură dată:
                             # 1. Scalare la origine (0,0,0)
-                            if scale_x != 1.0 or scale_y != 1.0 or scale_z != 1.0:
-                                scale_matrix = np.eye(4)
-                                scale_matrix[0, 0] = scale_x
-                                scale_matrix[1, 1] = scale_y  
-                                scale_matrix[2, 2] = scale_z
-                                mesh.apply_transform(scale_matrix)
-                                print(f"[DEBUG] Applied scaling: ({scale_x:.2f}, {scale_y:.2f}, {scale_z:.2f})")
-                            
                             # 2. Rotație la origine (0,0,0) - pentru DXF INSERT entities este în jurul axei Z
-                            if abs(tov_data['rotation']) > 0.01:  # Doar dacă rotația este semnificativă
-                                angle_rad = np.radians(tov_data['rotation'])
-                                rotation_matrix = trimesh.transformations.rotation_matrix(angle_rad, [0, 0, 1], [0, 0, 0])
-                                mesh.apply_transform(rotation_matrix)
-                                print(f"[DEBUG] Applied Z-axis rotation: {tov_data['rotation']:.1f}° around origin")
-                            
+                            #    (doar dacă rotația este semnificativă)
                             # 3. Translație la poziția finală în world space
                             final_position = [
                                 tov_data['position'][0],
                                 tov_data['position'][1],
                                 tov_data['position'][2]
                             ]
-                            mesh.apply_translation(final_position)
-                            print(f"[DEBUG] Applied final translation to: ({final_position[0]:.2f}, {final_position[1]:.2f}, {final_position[2]:.2f})")
+                            tov_rotation = tov_data['rotation'] if abs(tov_data['rotation']) > 0.01 else 0.0
+                            TransformStack().scale(scale_x, scale_y, scale_z).rotate(
+                                tov_rotation, [0, 0, 1]).translate(final_position).apply(mesh)
+                            print(f"[DEBUG] Applied TOV transform: scale=({scale_x:.2f}, {scale_y:.2f}, {scale_z:.2f}), "
+                                  f"Z rotation={tov_rotation:.1f}°, translation=({final_position[0]:.2f}, {final_position[1]:.2f}, {final_position[2]:.2f})")
                             
                             # Adaugă mesh-ul la listele corespunzătoare
                             # Păstrează numele real al layer-ului ca material pentru diferențiere
@@ -1323,7 +1497,7 @@ def process_door_window_block(doc, insert_entity, global_z, mesh_name_count, map
                     # Creează mapping entry pentru material
                     mapping_entry = {
                         "mesh_name": f"DoorWindow_{base_name}_{material}",
-                        "uuid": str(__import__('uuid').uuid4()),
+                        "uuid": new_element_uuid(handle, "tov", material),
                         "ifc_type": f"Ifc{'Door' if lib_type == 'doors' else 'Window'}",
                         "name": f"{base_name}_{material}",
                         "material": material,
@@ -1507,15 +1681,15 @@ def create_mesh_from_entity(entity, thickness, solid_flag, mesh_name):
                         if 'door' in mesh_name.lower():
                             # Pentru uși, păstrează thickness-ul subțire pentru tăiere în pereți
                             # Ușile sunt de obicei void-uri care taie pereții
-                            mesh = extrude_polygon(poly, max(thickness, 0.2))  # Minimum 20cm pentru uși
+                            mesh = extrude_footprint(poly, max(thickness, 0.2))  # Minimum 20cm pentru uși
                             print(f"[DEBUG] Door mesh kept thin: {thickness:.2f} -> {max(thickness, 0.2):.2f} for wall cutting")
                         else:
                             # Pentru ferestre și alte elemente, îmbunătățește înălțimea
                             height = max(thickness, 2.5)  # Minimum înălțime realistă pentru ferestre
-                            mesh = extrude_polygon(poly, height)
+                            mesh = extrude_footprint(poly, height)
                             print(f"[DEBUG] Enhanced window/other mesh height from {thickness:.2f} to {height:.2f}")
                     else:
-                        mesh = extrude_polygon(poly, thickness)
+                        mesh = extrude_footprint(poly, thickness)
                     
         elif entity_type == "POLYLINE":
             # Similar cu LWPOLYLINE dar pentru POLYLINE vechi
@@ -1534,7 +1708,7 @@ def create_mesh_from_entity(entity, thickness, solid_flag, mesh_name):
                         points.append(points[0])  # Închide poligonul
                     poly = Polygon(points[:-1])  # Exclude ultimul punct duplicat
                     if poly.is_valid and poly.area > 0:
-                        mesh = extrude_polygon(poly, thickness)
+                        mesh = extrude_footprint(poly, thickness)
                         
         elif entity_type == "LINE":
             # Pentru LINE, creează o geometrie subțire (rectangulară)
@@ -1562,7 +1736,7 @@ def create_mesh_from_entity(entity, thickness, solid_flag, mesh_name):
                 
                 poly = Polygon(points)
                 if poly.is_valid and poly.area > 0:
-                    mesh = extrude_polygon(poly, thickness)
+                    mesh = extrude_footprint(poly, thickness)
                     
         elif entity_type == "ARC":
             # Pentru ARC, discretizează în segmente
@@ -1594,7 +1768,7 @@ def create_mesh_from_entity(entity, thickness, solid_flag, mesh_name):
                     
                     poly = Polygon(rect_points)
                     if poly.is_valid and poly.area > 0:
-                        mesh = extrude_polygon(poly, thickness)
+                        mesh = extrude_footprint(poly, thickness)
                         
         elif entity_type == "CIRCLE":
             # Pentru CIRCLE, creează un cilindru
@@ -1615,7 +1789,7 @@ def create_mesh_from_entity(entity, thickness, solid_flag, mesh_name):
                 
                 poly = Polygon(points)
                 if poly.is_valid and poly.area > 0:
-                    mesh = extrude_polygon(poly, thickness)
+                    mesh = extrude_footprint(poly, thickness)
         
         if mesh is not None and len(mesh.vertices) > 0:
             print(f"[DEBUG] Created mesh for {entity_type}: {len(mesh.vertices)} vertices, {len(mesh.faces)} faces")
@@ -1667,10 +1841,9 @@ def create_ifc_mapping_entry(mesh_entry, handle, xdata, element_name, element_ty
     """
     Creează intrarea de mapping pentru IFC conform formatului existent
     """
-    import uuid
     return {
         "mesh_name": mesh_entry.get("name", element_name),
-        "uuid": str(uuid.uuid4()),  # Adaugă uuid pentru compatibilitate cu restul mapping-ului
+        "uuid": new_element_uuid(handle, "tov_component", mesh_entry.get("layer", "unknown")),  # uuid pentru compatibilitate cu restul mapping-ului
         "ifc_type": f"Ifc{element_type.capitalize()}",
         "name": element_name,
         "material": mesh_entry.get("material", "default"),
@@ -1689,64 +1862,56 @@ def create_ifc_mapping_entry(mesh_entry, handle, xdata, element_name, element_ty
 # -----------------------------
 # Procesare geometrie din blocuri
 # -----------------------------
-def process_block_geometry(doc, block_layout, insert_point, rotation_angle, 
+def block_prism(placement, points, height, scale):
+    """
+    Prisma unei componente de bloc extrudate, pentru exportul IFC parametric: profilul local
+    (scalat) extrudat pe axa Z locală, cu plasarea world a componentei (origine, axa Z, axa X).
+    Rotațiile X/Y globale de pe bloc (ferestre verticale) rămân în plasare.
+
+    Returns:
+        dict {"z_base", "height", "profile", "location", "axis", "ref_direction"} sau None dacă
+        plasarea, fără scalare, nu este o rotație (scalare nulă sau oglindire)
+    """
+    if min(abs(s) for s in scale) <= 1e-12:
+        return None
+    rotation = placement.matrix[:3, :3] / np.asarray(scale, dtype=np.float64)
+    if not np.allclose(rotation.T @ rotation, np.eye(3), atol=1e-9) or np.linalg.det(rotation) < 0:
+        return None
+    return {"z_base": 0.0, "height": float(height * scale[2]),
+            "profile": [[float(p[0]) * scale[0], float(p[1]) * scale[1]] for p in points],
+            "location": placement.matrix[:3, 3].tolist(),
+            "axis": rotation[:, 2].tolist(), "ref_direction": rotation[:, 0].tolist()}
+
+def process_block_geometry(doc, block_records, insert_point, rotation_angle, 
                           scale_x, scale_y, scale_z, layer, insert_handle,
-                          insert_xdata, mesh_name_count, mapping, solids, voids, control_points=None, global_z=0.0):
+                          insert_params, mesh_name_count, mapping, solids, voids, control_points=None, global_z=0.0,
+                          preview=False, store=None):
     """
     Procesează geometria dintr-un bloc DXF cu rotația în jurul punctului de inserție.
     
     Args:
         doc: documentul DXF
-        block_layout: layout-ul blocului
+        block_records: componentele blocului, clasificate (ClassifiedDocument.block)
         insert_point: punctul de inserție al blocului
         rotation_angle: rotația blocului în grade
         scale_x, scale_y, scale_z: scalarea blocului
         layer: layer-ul entității INSERT
         insert_handle: handle-ul entității INSERT
-        insert_xdata: XDATA de pe entitatea INSERT
+        insert_params: XDATA parsat de pe entitatea INSERT (XDataParams)
         mesh_name_count: counter pentru nume mesh-uri
         mapping: lista de mapping
         solids: lista de mesh-uri solide
         voids: lista de mesh-uri void
+        preview: True pentru a nu aplica voidurile (se adaugă transparente, vezi make_preview_overlay)
+        store: ElementStore pentru metadata și mapping (None = dicționare simple)
     """
     
-    # Parsează XDATA de pe entitatea INSERT pentru parametri globali de bloc
-    def parse_insert_xdata(xdata_dict, global_z):
-        rotate_x_global = 0.0
-        rotate_y_global = 0.0
-        z_relative = 0.0  # Z relativ la global_z
-        block_solid_flag = 1  # Implicit solid, doar dacă e explicit 0 devine void
-        
-        for appid_data in xdata_dict.values():
-            for code, value in appid_data:
-                if code == 1000:
-                    sval = str(value)
-                    if sval.startswith("rotate_x:") or sval.startswith("rotation_x:"):
-                        try:
-                            rotate_x_global = float(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("rotate_y:") or sval.startswith("rotation_y:"):
-                        try:
-                            rotate_y_global = float(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("z:"):
-                        try:
-                            z_relative = float(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("solid:"):
-                        try:
-                            block_solid_flag = int(sval.split(":")[1])
-                        except Exception:
-                            pass
-        
-        # Calculează Z final: global_z + z_relative
-        z_final = global_z + z_relative
-        return rotate_x_global, rotate_y_global, z_final, z_relative, block_solid_flag
-    
-    rotate_x_global, rotate_y_global, z_final, z_relative, block_solid_flag = parse_insert_xdata(insert_xdata, global_z)
+    # Parametrii globali de bloc din XDATA de pe entitatea INSERT (rotate_x / rotation_x etc.)
+    rotate_x_global = insert_params.value("rotate_x", insert_params.value("rotation_x", 0.0))
+    rotate_y_global = insert_params.value("rotate_y", insert_params.value("rotation_y", 0.0))
+    z_relative = insert_params.value("z", 0.0)  # Z relativ la global_z
+    z_final = global_z + z_relative
+    block_solid_flag = insert_params.value("solid", 1)  # Implicit solid, doar dacă e explicit 0 devine void
     
     if abs(rotate_x_global) > 1e-6 or abs(rotate_y_global) > 1e-6:
         print(f"[DEBUG] Block global rotations: X={rotate_x_global:.1f}°, Y={rotate_y_global:.1f}°")
@@ -1759,96 +1924,50 @@ def process_block_geometry(doc, block_layout, insert_point, rotation_angle,
     # Punctul de origine pentru rotații (punctul de inserție cu Z final)
     rotation_origin = np.array([insert_point.x, insert_point.y, z_final])
     
+    # IfcType din layer-ul blocului (cu fallback pentru layer "0")
+    ifc_type = layer if layer != "0" else "IfcWindow"  # Presupunem că blocurile pe layer 0 sunt ferestre
+    
+    # Amprentele și cantitățile componentelor, validate pe lot (vezi quantity_takeoff.py)
+    footprints = measure_footprints(block_records, 16, 32, ifc_type=ifc_type)
+    
+    # Transformările inserției, comune tuturor componentelor, compuse într-o singură matrice
+    # (vezi transform_stack.py), toate la origine (0,0,0):
+    # 1. Scalare  2. Rotația blocului în jurul axei Z  3. Rotațiile XYZ globale de pe bloc
+    insert_transform = (TransformStack()
+                        .scale(scale_x, scale_y, scale_z)
+                        .rotate(rotation_angle, [0, 0, 1])
+                        .rotate_xyz(rotate_x_global, rotate_y_global, 0.0))
+    if not insert_transform.is_identity:
+        print(f"[DEBUG] Block transform: scale=({scale_x:.3f}, {scale_y:.3f}, {scale_z:.3f}), "
+              f"Z rotation={rotation_angle:.1f}°, X={rotate_x_global:.1f}°, Y={rotate_y_global:.1f}°")
+    
     # Procesează fiecare entitate din bloc
-    for entity in block_layout:
-        ent_type = entity.dxftype()
-        
-        # Extrage XDATA din entitatea din bloc
-        entity_xdata = {}
-        if entity.has_xdata:
-            try:
-                appids = []
-                if hasattr(entity, "get_xdata_appids"):
-                    appids = entity.get_xdata_appids()
-                if "QCAD" not in appids:
-                    appids.append("QCAD")
-                
-                for appid in appids:
-                    try:
-                        data = entity.get_xdata(appid)
-                        if data:
-                            entity_xdata[appid] = list(data)
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-        
-        # Parsează parametrii entității din bloc (doar proprietăți geometrice)
-        def parse_entity_xdata(xdata_list, global_z):
-            height = 1.0  # Înălțimea extrudării
-            name_str = ""  # Numele elementului
-            solid_flag = 1  # Solid/void flag
-            angle = 0.0  # Unghiul planului înclinat
-            rotate90 = False  # Rotația cu 90° în jurul primului segment
-            opening_area_formula = ""  # Formula pentru Opening_area (pentru IfcSpace)
-            z_relative = 0.0  # Z relativ din XDATA
-            
-            for code, value in xdata_list:
-                if code == 1000:
-                    sval = str(value)
-                    if sval.startswith("height:"):
-                        try:
-                            height = float(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("z:"):
-                        try:
-                            z_relative = float(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("Name:"):
-                        name_str = sval.split(":", 1)[1].strip()
-                    elif sval.startswith("solid:"):
-                        try:
-                            solid_flag = int(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("angle:"):
-                        try:
-                            angle = float(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("rotate90:"):
-                        try:
-                            rotate90 = bool(int(sval.split(":")[1]))
-                        except Exception:
-                            pass
-                    elif sval.startswith("Opening_area:"):
-                        opening_area_formula = sval.split(":", 1)[1].strip()
-            
-            # Calculează Z final pentru entitatea din bloc
-            z_final = global_z + z_relative
-            return height, z_final, z_relative, name_str, solid_flag, angle, rotate90, opening_area_formula
-        
-        height, z_final_entity, z_relative_entity, name_str, solid_flag, angle, rotate90, opening_area_formula = parse_entity_xdata(
-            entity_xdata.get("QCAD", []), global_z
-        )
+    for row, record in enumerate(block_records):
+        entity = record.entity
+        ent_type = record.kind
+        
+        # Parametrii geometrici ai entității din bloc (XDATA parsat o singură dată per bloc)
+        params = record.params
+        height = params.value("height", 1.0)  # Înălțimea extrudării
+        z_relative_entity = params.value("z", 0.0)  # Z relativ din XDATA
+        z_final_entity = global_z + z_relative_entity
+        name_str = params.value("name", "")  # Numele elementului
+        solid_flag = params.value("solid", 1)  # Solid/void flag
+        angle = params.value("angle", 0.0)  # Unghiul planului înclinat
+        rotate90 = params.value("rotate90", False)  # Rotația cu 90° în jurul primului segment
         
         # Rotațiile finale sunt doar cele globale de pe bloc (nu mai adunăm cu elementele)
         final_rotate_x = rotate_x_global
         final_rotate_y = rotate_y_global
         
         # Generează numele mesh-ului: IfcType_ComponentLayer_Name
-        entity_handle = getattr(entity, 'handle', f"block_{insert_handle}")
+        entity_handle = record.handle or f"block_{insert_handle}"
         entity_layer = getattr(entity, 'dxf', None)
         component_layer = getattr(entity_layer, 'layer', 'DefaultMaterial') if entity_layer else 'DefaultMaterial'
         
         # Materialul se bazează pe layer-ul componentei din bloc, nu pe layer-ul INSERT-ului
         rgba = get_material(component_layer)
-        mesh_uuid = str(uuid.uuid4())
-        
-        # IfcType din layer-ul blocului (cu fallback pentru layer "0")
-        ifc_type = layer if layer != "0" else "IfcWindow"  # Presupunem că blocurile pe layer 0 sunt ferestre
+        mesh_uuid = new_element_uuid(insert_handle, "block", entity_handle)
         
         # IfcType din layer-ul blocului, ComponentLayer din layer-ul entității, Name din XDATA
         key = (ifc_type, component_layer, name_str)
@@ -1858,171 +1977,88 @@ def process_block_geometry(doc, block_layout, insert_point, rotation_angle,
         else:
             mesh_name = f"{ifc_type}_{component_layer}_{mesh_name_count[key]}"
         
+        # 4. Translația la poziția finală în world space, după transformările inserției
+        z_position = z_final_entity
+        if "IfcColumn" in ifc_type:
+            z_position = global_z  # Coloanele încep de la nivelul global
+        final_position = [insert_point.x, insert_point.y, z_position]
+        placement = insert_transform.copy().translate(final_position)
+        
         # Procesează geometria entității
         mesh = None
-        points = []
+        points = footprints.rings[row]
+        closed = footprints.closed[row]
+        poly = footprints.polygon(row)
+        is_extrusion = True  # False doar pentru formele spațiale (deformate de cercurile de control)
+        prism = None  # Prismă verticală în coordonate world, pentru exportul IFC parametric
         
         if ent_type == "LWPOLYLINE":
-            points = lwpolyline_to_points(entity, 16)
-            closed = getattr(entity, "closed", False)
-            
             if closed and len(points) >= 3:
-                poly = Polygon(points)
-                if poly.is_valid and poly.area > 0:
+                if footprints.valid[row]:
                     # Folosește formele spațiale dacă avem cercuri de control
                     if control_points and len(control_points) > 0:
                         print(f"[DEBUG] Creeaza mesh spatial in bloc cu {len(control_points)} cercuri de control")
-                        mesh = create_spatial_mesh_from_contour(points, control_points, height)
+                        mesh = placement.apply(create_spatial_mesh_from_contour(points, control_points, height))
+                        is_extrusion = False
                     elif rotate90:
                         print(f"[DEBUG] Creeaza mesh 90° rotit in bloc")
-                        mesh = create_rotated_90_mesh(points, height)
+                        mesh = create_rotated_90_mesh(points, height, placement)
                     elif abs(angle) > 1e-6:
-                        mesh = create_angle_based_mesh(points, height, angle)
+                        mesh = create_angle_based_mesh(points, height, angle, placement)
                     else:
-                        mesh = extrude_polygon(poly, height)
+                        mesh = placement.apply(extrude_footprint(poly, height))
+                        if mesh is not None:
+                            prism = block_prism(placement, points, height, (scale_x, scale_y, scale_z))
                     
                     if mesh is not None:
-                        # NOUA ORDINEA TRANSFORMĂRILOR:
-                        # 1. Scalare la origine (0,0,0)
-                        if abs(scale_x - 1.0) > 1e-6 or abs(scale_y - 1.0) > 1e-6 or abs(scale_z - 1.0) > 1e-6:
-                            scale_matrix = np.diag([scale_x, scale_y, scale_z, 1.0])
-                            mesh.apply_transform(scale_matrix)
-                            print(f"[DEBUG] Applied scaling: X={scale_x:.3f}, Y={scale_y:.3f}, Z={scale_z:.3f}")
-
-                        # 2. Rotația blocului în jurul axei Z la origine (0,0,0)
-                        if abs(rotation_angle) > 1e-6:
-                            z_rotation_matrix = trimesh.transformations.rotation_matrix(
-                                np.radians(rotation_angle), [0, 0, 1], [0, 0, 0]
-                            )
-                            mesh.apply_transform(z_rotation_matrix)
-                            print(f"[DEBUG] Applied Z rotation: {rotation_angle:.1f}° around origin")
-
-                        # 3. Rotațiile XYZ la origine (0,0,0)
-                        if abs(final_rotate_x) > 1e-6 or abs(final_rotate_y) > 1e-6:
-                            mesh = apply_xyz_rotations_around_point(
-                                mesh, final_rotate_x, final_rotate_y, 0.0, [0, 0, 0]
-                            )
-
-                        # 4. Translația la poziția finală în world space
-                        z_position = z_final_entity
                         if "IfcColumn" in ifc_type:
-                            z_position = global_z  # Coloanele încep de la nivelul global
                             print(f"[DEBUG] Coloana LWPOLYLINE {mesh_name}: z_final_entity={z_final_entity:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
-
-                        final_position = [insert_point.x, insert_point.y, z_position]
-                        mesh.apply_translation(final_position)
-                        print(f"[DEBUG] Applied final translation to: {final_position}")
+                        print(f"[DEBUG] Applied block placement (composed transform) to: {final_position}")
                         
         elif ent_type == "POLYLINE":
-            points = polyline_to_points(entity, 16)
-            closed = getattr(entity, "is_closed", False)
-            
             if closed and len(points) >= 3:
-                poly = Polygon(points)
-                if poly.is_valid and poly.area > 0:
+                if footprints.valid[row]:
                     # Extrudare
                     if rotate90:
                         print(f"[DEBUG] Creeaza mesh 90° rotit POLYLINE in bloc")
-                        mesh = create_rotated_90_mesh(points, height)
+                        mesh = create_rotated_90_mesh(points, height, placement)
                     elif abs(angle) > 1e-6:
-                        mesh = create_angle_based_mesh(points, height, angle)
+                        mesh = create_angle_based_mesh(points, height, angle, placement)
                     else:
-                        mesh = extrude_polygon(poly, height)
+                        mesh = placement.apply(extrude_footprint(poly, height))
+                        if mesh is not None:
+                            prism = block_prism(placement, points, height, (scale_x, scale_y, scale_z))
                     
                     if mesh is not None:
-                        # NOUA ORDINEA TRANSFORMĂRILOR:
-                        # 1. Scalare la origine (0,0,0)
-                        if abs(scale_x - 1.0) > 1e-6 or abs(scale_y - 1.0) > 1e-6 or abs(scale_z - 1.0) > 1e-6:
-                            scale_matrix = np.diag([scale_x, scale_y, scale_z, 1.0])
-                            mesh.apply_transform(scale_matrix)
-                            print(f"[DEBUG] Applied scaling: X={scale_x:.3f}, Y={scale_y:.3f}, Z={scale_z:.3f}")
-
-                        # 2. Rotația blocului în jurul axei Z la origine (0,0,0)
-                        if abs(rotation_angle) > 1e-6:
-                            z_rotation_matrix = trimesh.transformations.rotation_matrix(
-                                np.radians(rotation_angle), [0, 0, 1], [0, 0, 0]
-                            )
-                            mesh.apply_transform(z_rotation_matrix)
-                            print(f"[DEBUG] Applied Z rotation: {rotation_angle:.1f}° around origin")
-
-                        # 3. Rotațiile XYZ la origine (0,0,0)
-                        if abs(final_rotate_x) > 1e-6 or abs(final_rotate_y) > 1e-6:
-                            mesh = apply_xyz_rotations_around_point(
-                                mesh, final_rotate_x, final_rotate_y, 0.0, [0, 0, 0]
-                            )
-
-                        # 4. Translația la poziția finală în world space
-                        z_position = z_final_entity
                         if "IfcColumn" in ifc_type:
-                            z_position = global_z  # Coloanele încep de la nivelul global
                             print(f"[DEBUG] Coloana POLYLINE {mesh_name}: z_final_entity={z_final_entity:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
-
-                        final_position = [insert_point.x, insert_point.y, z_position]
-                        mesh.apply_translation(final_position)
-                        print(f"[DEBUG] Applied final translation to: {final_position}")
+                        print(f"[DEBUG] Applied block placement (composed transform) to: {final_position}")
         
         elif ent_type == "CIRCLE" and hasattr(entity, "dxf"):
-            center = (entity.dxf.center.x, entity.dxf.center.y)
-            radius = entity.dxf.radius
-            segments = 32
-            points = [
-                (
-                    center[0] + np.cos(2 * np.pi * i / segments) * radius,
-                    center[1] + np.sin(2 * np.pi * i / segments) * radius,
-                )
-                for i in range(segments)
-            ]
-            
-            poly = Polygon(points)
-            if poly.is_valid and poly.area > 0:
+            if footprints.valid[row]:
                 # Extrudare
                 if abs(angle) > 1e-6:
-                    mesh = create_inclined_mesh(points, height, angle)
+                    mesh = create_inclined_mesh(points, height, angle, placement)
                 else:
-                    mesh = extrude_polygon(poly, height)
+                    mesh = placement.apply(extrude_footprint(poly, height))
+                    if mesh is not None:
+                        prism = block_prism(placement, points, height, (scale_x, scale_y, scale_z))
                 
                 if mesh is not None:
-                    # NOUA ORDINEA TRANSFORMĂRILOR:
-                    # 1. Scalare la origine (0,0,0)
-                    if abs(scale_x - 1.0) > 1e-6 or abs(scale_y - 1.0) > 1e-6 or abs(scale_z - 1.0) > 1e-6:
-                        scale_matrix = np.diag([scale_x, scale_y, scale_z, 1.0])
-                        mesh.apply_transform(scale_matrix)
-                        print(f"[DEBUG] Applied scaling: X={scale_x:.3f}, Y={scale_y:.3f}, Z={scale_z:.3f}")
-
-                    # 2. Rotația blocului în jurul axei Z la origine (0,0,0)
-                    if abs(rotation_angle) > 1e-6:
-                        z_rotation_matrix = trimesh.transformations.rotation_matrix(
-                            np.radians(rotation_angle), [0, 0, 1], [0, 0, 0]
-                        )
-                        mesh.apply_transform(z_rotation_matrix)
-                        print(f"[DEBUG] Applied Z rotation: {rotation_angle:.1f}° around origin")
-
-                    # 3. Rotațiile XYZ la origine (0,0,0)
-                    if abs(final_rotate_x) > 1e-6 or abs(final_rotate_y) > 1e-6:
-                        mesh = apply_xyz_rotations_around_point(
-                            mesh, final_rotate_x, final_rotate_y, 0.0, [0, 0, 0]
-                        )
-
-                    # 4. Translația la poziția finală în world space
-                    z_position = z_final_entity
                     if "IfcColumn" in ifc_type:
-                        z_position = global_z  # Coloanele încep de la nivelul global
                         print(f"[DEBUG] Coloana CIRCLE {mesh_name}: z_final_entity={z_final_entity:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
-
-                    final_position = [insert_point.x, insert_point.y, z_position]
-                    mesh.apply_translation(final_position)
-                    print(f"[DEBUG] Applied final translation to: {final_position}")
+                    print(f"[DEBUG] Applied block placement (composed transform) to: {final_position}")
         
         # Adaugă mesh-ul la lista corespunzătoare și mapping
         if mesh is not None:
             # Setează metadata
-            mesh.metadata = {
+            mesh.metadata = make_record(store, {
                 "uuid": mesh_uuid,
                 "name": mesh_name,
                 "dxf_handle": entity_handle,
                 "layer": component_layer,  # Layer-ul componentei pentru material
                 "role": 0 if solid_flag == 0 else 1  # 0 = void, 1 = solid
-            }
+            })
             
             # Setează culorile pe baza materialului componentei (NU pe layer-ul blocului)
             color = rgba[:3]
@@ -2050,21 +2086,14 @@ def process_block_geometry(doc, block_layout, insert_point, rotation_angle,
             
             # Calculează proprietățile geometrice
             if len(points) >= 3:
-                segment_lengths = [
-                    np.linalg.norm(np.array(points[i]) - np.array(points[(i+1)%len(points)])) 
-                    for i in range(len(points))
-                ]
-                perimeter = float(np.sum(segment_lengths))
-                area = float(Polygon(points).area) if len(points) >= 3 else 0.0
-                lateral_area = perimeter * height
-                volume = area * height
+                segment_lengths = footprints.segment_lengths(row)
+                perimeter = float(footprints.perimeters[row])
+                area = float(footprints.areas[row])
+                lateral_area = float(footprints.lateral_areas[row])  # Cu Opening_area scăzută pentru IfcSpace
+                volume = float(footprints.volumes[row])
                 
-                # Pentru IfcSpace, scade Opening_area din lateral_area dacă este specificată
-                if ifc_type == "IfcSpace" and opening_area_formula:
-                    opening_area_value = evaluate_math_formula(opening_area_formula)
-                    if opening_area_value > 0:
-                        lateral_area = max(0.0, lateral_area - opening_area_value)
-                        print(f"[DEBUG] IfcSpace {mesh_name}: lateral_area adjusted with Opening_area={opening_area_value:.2f}, final lateral_area={lateral_area:.2f}")
+                if ifc_type == "IfcSpace" and footprints.opening_areas[row] > 0:
+                    print(f"[DEBUG] IfcSpace {mesh_name}: lateral_area adjusted with Opening_area={footprints.opening_areas[row]:.2f}, final lateral_area={lateral_area:.2f}")
             else:
                 segment_lengths = []
                 perimeter = 0.0
@@ -2073,7 +2102,7 @@ def process_block_geometry(doc, block_layout, insert_point, rotation_angle,
                 volume = 0.0
             
             # Adaugă la mapping
-            mapping_entry = {
+            mapping_entry = make_record(store, {
                 "dxf_handle": entity_handle,
                 "mesh_name": mesh_name,
                 "uuid": mesh_uuid,
@@ -2084,6 +2113,8 @@ def process_block_geometry(doc, block_layout, insert_point, rotation_angle,
                 "component_layer": component_layer,  # Layer-ul componentei pentru material
                 "material_layer": component_layer,  # Layer-ul pentru maparea materialului
                 "block_name": f"From_{insert_handle}",  # Referință la blocul părinte
+                "extrusion": is_extrusion,  # Prismă extrudată (fețe plane, IFC poligonal)
+                "prism": prism,
                 "insert_position": {  # Poziția world a blocului
                     "x": float(insert_point.x),
                     "y": float(insert_point.y),
@@ -2104,7 +2135,7 @@ def process_block_geometry(doc, block_layout, insert_point, rotation_angle,
                 "volume": volume,
                 "vertices": [[float(p[0]), float(p[1])] for p in points],
                 "is_cut_by": []
-            }
+            })
             
             # Nu adăugăm mapping-ul aici - se va adăuga după procesarea boolean
             
@@ -2146,8 +2177,9 @@ def process_block_geometry(doc, block_layout, insert_point, rotation_angle,
         
         print(f"[DEBUG] Block boolean processing: {len(block_solids)} solids, {len(block_voids)} voids")
         
-        # Aplică operațiile boolean între componentele blocului
+        # Aplică operațiile boolean între componentele blocului (nu și în preview)
         final_block_meshes = []
+        applied_voids = [] if preview else block_voids
         
         for solid_mesh in block_solids:
             current_mesh = solid_mesh
@@ -2156,7 +2188,7 @@ def process_block_geometry(doc, block_layout, insert_point, rotation_angle,
             cutting_voids = []
             
             # Aplică doar void-urile compatibile la acest solid
-            for void_mesh in block_voids:
+            for void_mesh in applied_voids:
                 void_uuid = void_mesh.metadata.get("uuid")
                 void_layer = void_mesh.metadata.get("component_layer", "")
                 
@@ -2193,7 +2225,7 @@ def process_block_geometry(doc, block_layout, insert_point, rotation_angle,
                                 diff_result = current_mesh.difference(void_mesh)
                                 if diff_result and hasattr(diff_result, 'vertices') and len(diff_result.vertices) > 0:
                                     # Păstrează metadata originală
-                                    diff_result.metadata = dict(current_mesh.metadata)
+                                    diff_result.metadata = share(current_mesh.metadata)
                                     
                                     # Păstrează proprietățile vizuale (material și culori) din metadata
                                     if "material_rgba" in current_mesh.metadata:
@@ -2274,6 +2306,12 @@ def process_block_geometry(doc, block_layout, insert_point, rotation_angle,
                     block_cutting_voids.append(void_mesh)
                     print(f"[DEBUG] Block cutting void identified: {void_mesh.metadata.get('name')} with XYZ rotations")
         
+        if preview:
+            # Preview: voidurile blocului (sau blocul void întreg) se afișează transparent, fără tăieri
+            overlays = final_block_meshes + block_voids if block_is_void else block_voids
+            solids.extend(make_preview_overlay(mesh) for mesh in overlays)
+            block_cutting_voids = []
+        
         # Aplică void-urile blocului la solidele existente de tip IfcWall și IfcCovering
         if block_cutting_voids:
             print(f"[DEBUG] Applying {len(block_cutting_voids)} block cutting voids to existing solids")
@@ -2314,7 +2352,7 @@ def process_block_geometry(doc, block_layout, insert_point, rotation_angle,
                                     diff_result = current_mesh.difference(void_mesh)
                                     if diff_result and hasattr(diff_result, 'vertices') and len(diff_result.vertices) > 0:
                                         # Păstrează metadata originală
-                                        diff_result.metadata = dict(current_mesh.metadata)
+                                        diff_result.metadata = share(current_mesh.metadata)
                                         current_mesh = diff_result
                                         cutting_voids.append(void_uuid)
                                         print(f"[DEBUG] Block void {void_uuid} cut existing {ifc_type} solid {solid_uuid}")
@@ -2391,7 +2429,7 @@ def process_block_geometry(doc, block_layout, insert_point, rotation_angle,
 
 def apply_xyz_rotations_around_point(mesh, rotate_x, rotate_y, rotate_z, point):
     """
-    Aplică rotații XYZ în jurul unui punct specific.
+    Aplică rotații XYZ în jurul unui punct specific (compuse într-o singură matrice, pe loc).
     
     Args:
         mesh: mesh-ul de rotit
@@ -2401,34 +2439,13 @@ def apply_xyz_rotations_around_point(mesh, rotate_x, rotate_y, rotate_z, point):
     Returns:
         mesh: mesh-ul rotit
     """
-    if abs(rotate_x) < 1e-6 and abs(rotate_y) < 1e-6 and abs(rotate_z) < 1e-6:
+    rotations = TransformStack().rotate_xyz(rotate_x, rotate_y, rotate_z, point)
+    if rotations.is_identity:
         return mesh
     
     try:
-        # Aplică rotațiile în ordinea: Z, Y, X
-        if abs(rotate_z) > 1e-6:
-            rotation_matrix = trimesh.transformations.rotation_matrix(
-                np.radians(rotate_z), [0, 0, 1], point
-            )
-            mesh.apply_transform(rotation_matrix)
-            print(f"[DEBUG] Applied Z rotation: {rotate_z:.1f}° around point {point}")
-        
-        if abs(rotate_y) > 1e-6:
-            rotation_matrix = trimesh.transformations.rotation_matrix(
-                np.radians(rotate_y), [0, 1, 0], point
-            )
-            mesh.apply_transform(rotation_matrix)
-            print(f"[DEBUG] Applied Y rotation: {rotate_y:.1f}° around point {point}")
-        
-        if abs(rotate_x) > 1e-6:
-            rotation_matrix = trimesh.transformations.rotation_matrix(
-                np.radians(rotate_x), [1, 0, 0], point
-            )
-            mesh.apply_transform(rotation_matrix)
-            print(f"[DEBUG] Applied X rotation: {rotate_x:.1f}° around point {point}")
-        
+        rotations.apply(mesh)
         print(f"[DEBUG] Applied XYZ rotations around point: X={rotate_x:.1f}°, Y={rotate_y:.1f}°, Z={rotate_z:.1f}°")
-        
     except Exception as e:
         print(f"[DEBUG] Error applying XYZ rotations around point: {e}")
     
@@ -2437,6 +2454,12 @@ def apply_xyz_rotations_around_point(mesh, rotate_x, rotate_y, rotate_z, point):
 # -----------------------------
 # Export doar GLB
 # -----------------------------
+def scene_node_name(mesh, index):
+    """Numele nodului din scenă: MeshName_LAYER_LayerName (layer-ul codificat pentru Godot)"""
+    if "name" in mesh.metadata:
+        return f"{mesh.metadata['name']}_LAYER_{mesh.metadata.get('layer', 'unknown')}"
+    return f"solid_{index}"
+
 def export_scene(scene, out_path):
     if not out_path.lower().endswith(".glb"):
         out_path = os.path.splitext(out_path)[0] + ".glb"
@@ -2458,151 +2481,153 @@ def export_scene(scene, out_path):
 # -----------------------------
 # Procesare Linii de Sectiune
 # -----------------------------
-def process_section_lines(doc, mapping):
+def process_section_lines(section_lines, mapping):
     """
     Procesează liniile de pe layerul 'section' pentru a crea planuri de secțiune.
     
     Args:
-        doc: documentul DXF
+        section_lines: înregistrările ROLE_SECTION din dxf_classifier (LINE pe layerul 'section');
+            cele neselectate de conversia parțială păstrează doar indexul planului
         mapping: lista de mapping unde vor fi adăugate datele de secțiune
     
     Returns:
         list: Lista cu dicționare ce conțin informații despre secțiuni
     """
-    msp = doc.modelspace()
     section_data = []
+    plane_index = 0
     
     print("[DEBUG] Processing section lines...")
     
-    for entity in msp:
-        # Caută linii pe layerul 'section'
-        if (entity.dxftype() == "LINE" and 
-            getattr(entity.dxf, "layer", "").lower() == "section"):
-            
-            start_point = entity.dxf.start
-            end_point = entity.dxf.end
-            handle = getattr(entity.dxf, "handle", None)
-            
-            # Parsează XDATA pentru parametrii de secțiune
-            section_depth = 5.0  # default
-            lower_z = -10.0      # default
-            upper_z = 20.0       # default
-            section_id = f"section_{handle}" if handle else f"section_{len(section_data)}"
-            
-            if entity.has_xdata:
-                try:
-                    qcad_data = entity.get_xdata("QCAD")
-                    if qcad_data:
-                        for item in qcad_data:
-                            if isinstance(item, tuple) and len(item) >= 2:
-                                tag, value = item[0], item[1]
-                                if tag == 1000:  # String data
-                                    value_str = str(value).lower()
-                                    if "section_depth:" in value_str:
-                                        try:
-                                            section_depth = float(value_str.split("section_depth:")[1].split()[0])
-                                        except:
-                                            pass
-                                    elif "lower_z:" in value_str:
-                                        try:
-                                            lower_z = float(value_str.split("lower_z:")[1].split()[0])
-                                        except:
-                                            pass
-                                    elif "upper_z:" in value_str:
-                                        try:
-                                            upper_z = float(value_str.split("upper_z:")[1].split()[0])
-                                        except:
-                                            pass
-                except Exception as e:
-                    print(f"[DEBUG] Error parsing section XDATA: {e}")
-            
-            # Calculează vectorul direcției în planul XY
-            direction_vector = np.array([
-                end_point.x - start_point.x,
-                end_point.y - start_point.y,
-                0.0
-            ])
-            
-            # Calculează lungimea liniei (va fi folosită ca lățimea planului)
-            line_length = np.linalg.norm(direction_vector)
-            if line_length > 1e-6:
-                direction_vector = direction_vector / line_length
-            else:
-                print(f"[WARNING] Section line has zero length, skipping")
-                continue
-            
-            # Calculează normala planului (perpendiculară pe direcția liniei în planul XY)
-            plane_normal = np.array([-direction_vector[1], direction_vector[0], 0.0])
-            
-            # Centrul planului (punctul mijloc al liniei)
-            plane_center = np.array([
-                (start_point.x + end_point.x) / 2.0,
-                (start_point.y + end_point.y) / 2.0,
-                (lower_z + upper_z) / 2.0
-            ])
-            
-            # Creează mesh pentru planul de secțiune (gri transparent)
-            plane_width = max(section_depth, 1.0)
-            plane_height = upper_z - lower_z
-            
-            # Creează informațiile pentru planul de secțiune
-            section_info = {
-                "section_id": section_id,
-                "start_point": [start_point.x, start_point.y, getattr(start_point, 'z', 0.0)],
-                "end_point": [end_point.x, end_point.y, getattr(end_point, 'z', 0.0)],
-                "plane_center": plane_center,
-                "plane_normal": plane_normal,
+    for record in section_lines:
+        entity = record.entity
+        start_point = entity.dxf.start
+        end_point = entity.dxf.end
+        handle = getattr(entity.dxf, "handle", None)
+        
+        # Parsează XDATA pentru parametrii de secțiune
+        section_depth = 5.0  # default
+        lower_z = -10.0      # default
+        upper_z = 20.0       # default
+        section_id = f"section_{handle}" if handle else f"section_{len(section_data)}"
+        
+        if record.xdata:
+            try:
+                qcad_data = record.xdata.get("QCAD")
+                if qcad_data:
+                    for item in qcad_data:
+                        if isinstance(item, tuple) and len(item) >= 2:
+                            tag, value = item[0], item[1]
+                            if tag == 1000:  # String data
+                                value_str = str(value).lower()
+                                if "section_depth:" in value_str:
+                                    try:
+                                        section_depth = float(value_str.split("section_depth:")[1].split()[0])
+                                    except:
+                                        pass
+                                elif "lower_z:" in value_str:
+                                    try:
+                                        lower_z = float(value_str.split("lower_z:")[1].split()[0])
+                                    except:
+                                        pass
+                                elif "upper_z:" in value_str:
+                                    try:
+                                        upper_z = float(value_str.split("upper_z:")[1].split()[0])
+                                    except:
+                                        pass
+            except Exception as e:
+                print(f"[DEBUG] Error parsing section XDATA: {e}")
+        
+        # Calculează vectorul direcției în planul XY
+        direction_vector = np.array([
+            end_point.x - start_point.x,
+            end_point.y - start_point.y,
+            0.0
+        ])
+        
+        # Calculează lungimea liniei (va fi folosită ca lățimea planului)
+        line_length = np.linalg.norm(direction_vector)
+        if line_length > 1e-6:
+            direction_vector = direction_vector / line_length
+        else:
+            print(f"[WARNING] Section line has zero length, skipping")
+            continue
+        
+        # Calculează normala planului (perpendiculară pe direcția liniei în planul XY)
+        plane_normal = np.array([-direction_vector[1], direction_vector[0], 0.0])
+        
+        # Centrul planului (punctul mijloc al liniei)
+        plane_center = np.array([
+            (start_point.x + end_point.x) / 2.0,
+            (start_point.y + end_point.y) / 2.0,
+            (lower_z + upper_z) / 2.0
+        ])
+        
+        # Creează mesh pentru planul de secțiune (gri transparent)
+        plane_width = max(section_depth, 1.0)
+        plane_height = upper_z - lower_z
+        
+        # Creează informațiile pentru planul de secțiune
+        section_info = {
+            "section_id": section_id,
+            "start_point": [start_point.x, start_point.y, getattr(start_point, 'z', 0.0)],
+            "end_point": [end_point.x, end_point.y, getattr(end_point, 'z', 0.0)],
+            "plane_center": plane_center,
+            "plane_normal": plane_normal,
+            "section_depth": section_depth,
+            "line_length": line_length,  # Lungimea reală a liniei din DXF
+            "lower_z": lower_z,
+            "upper_z": upper_z,
+            "plane_index": plane_index
+        }
+        plane_index += 1
+        if not record.selected:
+            continue
+        section_data.append(section_info)
+        
+        # Adaugă la mapping
+        section_uuid = new_element_uuid(handle, "section")
+        section_entry = {
+                "dxf_handle": handle,
+                "uuid": section_uuid,
+                "type": "section_plane",
+                "layer": "section",
+                "start_point": {
+                    "x": float(start_point.x),
+                    "y": float(start_point.y),
+                    "z": float(start_point.z) if hasattr(start_point, 'z') else 0.0
+                },
+                "end_point": {
+                    "x": float(end_point.x),
+                    "y": float(end_point.y),
+                    "z": float(end_point.z) if hasattr(end_point, 'z') else 0.0
+                },
+                "direction_vector": {
+                    "x": float(direction_vector[0]),
+                    "y": float(direction_vector[1]),
+                    "z": float(direction_vector[2])
+                },
+                "plane_normal": {
+                    "x": float(plane_normal[0]),
+                    "y": float(plane_normal[1]),
+                    "z": float(plane_normal[2])
+                },
+                "plane_center": {
+                    "x": float(plane_center[0]),
+                    "y": float(plane_center[1]),
+                    "z": float(plane_center[2])
+                },
                 "section_depth": section_depth,
-                "line_length": line_length,  # Lungimea reală a liniei din DXF
                 "lower_z": lower_z,
-                "upper_z": upper_z
-            }
-            section_data.append(section_info)
-            
-            # Adaugă la mapping
-            section_uuid = str(uuid.uuid4())
-            section_entry = {
-                    "dxf_handle": handle,
-                    "uuid": section_uuid,
-                    "type": "section_plane",
-                    "layer": "section",
-                    "start_point": {
-                        "x": float(start_point.x),
-                        "y": float(start_point.y),
-                        "z": float(start_point.z) if hasattr(start_point, 'z') else 0.0
-                    },
-                    "end_point": {
-                        "x": float(end_point.x),
-                        "y": float(end_point.y),
-                        "z": float(end_point.z) if hasattr(end_point, 'z') else 0.0
-                    },
-                    "direction_vector": {
-                        "x": float(direction_vector[0]),
-                        "y": float(direction_vector[1]),
-                        "z": float(direction_vector[2])
-                    },
-                    "plane_normal": {
-                        "x": float(plane_normal[0]),
-                        "y": float(plane_normal[1]),
-                        "z": float(plane_normal[2])
-                    },
-                    "plane_center": {
-                        "x": float(plane_center[0]),
-                        "y": float(plane_center[1]),
-                        "z": float(plane_center[2])
-                    },
-                    "section_depth": section_depth,
-                    "lower_z": lower_z,
-                    "upper_z": upper_z,
-                    "material": {
-                        "color": [0.7, 0.7, 0.7],  # Gri deschis
-                        "alpha": 0.3               # Transparent
-                    }
+                "upper_z": upper_z,
+                "material": {
+                    "color": [0.7, 0.7, 0.7],  # Gri deschis
+                    "alpha": 0.3               # Transparent
                 }
-            
-            mapping.append(section_entry)
-            print(f"[DEBUG] Added section plane: depth={section_depth}, z_range=({lower_z}, {upper_z}), line_length={line_length:.2f}")
-    
+            }
+        
+        mapping.append(section_entry)
+        print(f"[DEBUG] Added section plane: depth={section_depth}, z_range=({lower_z}, {upper_z}), line_length={line_length:.2f}")
+
     print(f"[DEBUG] Processed {len(section_data)} section planes")
     return section_data  # Return the section data, not the meshes
 
@@ -2668,76 +2693,176 @@ def create_section_plane_mesh(center, normal, width, height):
         print(f"[ERROR] Failed to create section plane mesh: {e}")
         return None
 
+# -----------------------------
+# Conversie parțială
+# -----------------------------
+def reserve_element_names(record, classified, mesh_name_count):
+    """
+    Consumă numele de mesh și UUID-urile pe care o entitate filtrată le-ar fi primit,
+    astfel încât o conversie parțială numește elementele exact ca una completă.
+    (Numerotarea meshurilor Door/Window *_TOV nu este rezervată.)
+    """
+    if record.role in (ROLE_TOV, ROLE_WINDOW):
+        return
+    block_records = classified.block(record.block_name) if record.role == ROLE_BLOCK else None
+    if block_records:
+        ifc_type = record.layer if record.layer != "0" else "IfcWindow"
+        for component in block_records:
+            component_layer = getattr(component.entity.dxf, "layer", "DefaultMaterial")
+            new_element_uuid(record.handle, "block", component.handle or f"block_{record.handle}")
+            key = (ifc_type, component_layer, component.params.value("name", ""))
+            mesh_name_count[key] = mesh_name_count.get(key, 0) + 1
+        return
+    new_element_uuid(record.handle)
+    key = (record.layer, record.params.value("name", ""))
+    mesh_name_count[key] = mesh_name_count.get(key, 0) + 1
+
 # -----------------------------
 # Conversie DXF → GLB
 # -----------------------------
-def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
+def dxf_to_gltf(dxf_path, out_path, arc_segments=16, ifc_mode=DEFAULT_IFC_MODES, enable_tov=True,
+                ifc_geometry="auto", ir_cache=True, ir_cache_dir=None, stream=False,
+                layers=None, exclude_layers=None, bbox=None, polygon=None, clip=False, preview=False,
+                progressive=False, chunk_size=None, tiles=False, tile_size=None, lod=False, ifc_dir=None,
+                progress_file=None):
+    """
+    Convertește un fișier DXF în GLB (+ mapping JSON și, opțional, IFC).
+
+    Args:
+        dxf_path: Calea fișierului DXF
+        out_path: Calea fișierului GLB generat
+        arc_segments: Numărul de segmente pentru discretizarea arcelor
+        ifc_mode: Modurile IFC active ("none", "final", "background", "from-glb", "parametric" sau combinație)
+        enable_tov: False pentru a sări procesarea blocurilor Door/Window *_TOV
+        ifc_geometry: Geometria IFC din modul background ("auto", "polygonal", "triangulated", "brep")
+        ir_cache: False pentru a parsa DXF-ul cu ezdxf fără cache-ul IR (vezi dxf_ir.py)
+        ir_cache_dir: Folderul cache-ului IR (implicit VIEWER2D_IR_CACHE sau cache-ul utilizatorului)
+        stream: True pentru a citi modelspace-ul în flux (iterdxf), fără a încărca tot documentul;
+            pentru desene foarte mari (nu folosește cache-ul IR)
+        layers: conversie parțială - doar aceste layere (listă sau "A,B")
+        exclude_layers: conversie parțială - layere excluse
+        bbox: conversie parțială - regiunea "xmin,ymin,xmax,ymax" (sau secvență de 4 numere)
+        polygon: conversie parțială - regiunea poligonală "x1,y1;x2,y2;..." (sau listă de puncte)
+        clip: True pentru a tăia solidele care traversează marginea regiunii
+        preview: True pentru feedback rapid: fără scăderea voidurilor, fără tăierea la acoperiș
+            și fără IFC; voidurile se exportă ca meshuri transparente (PREVIEW_VOID_ALPHA)
+        progressive: True pentru loturi GLB numerotate și progres NDJSON în timpul conversiei,
+            într-un fișier separat de log (vezi conversion_progress.py); GLB-ul final se scrie la fel
+        chunk_size: elemente per lot în modul progresiv (implicit PROGRESS_CHUNK_SIZE)
+        tiles: True pentru a scrie și tile-uri GLB (quadtree XY) + indexul <stem>_tileset.json
+            (vezi tile_export.py)
+        tile_size: meshuri per tile înainte de împărțire (implicit TILE_MAX_ELEMENTS)
+        lod: True pentru variante simplificate ale meshurilor curbe, ca noduri `_LOD<n>`
+            cu praguri screen_size în extras (vezi lod_export.py)
+        ifc_dir: folderul fișierelor IFC (implicit lângă GLB); watchdog-ul scrie GLB-ul trecerii
+            finale într-un folder de staging, dar IFC-urile direct lângă GLB-ul afișat
+        progress_file: fișierul NDJSON al evenimentelor progresive (implicit <stem>_progress.ndjson)
+    """
     print(f"[DEBUG] Start DXF to GLB: {dxf_path} -> {out_path}")
     start_time = time.time()
+    ifc_modes = parse_ifc_modes(ifc_mode)
+    # Numele de bază al fișierelor IFC (<base>.ifc, <base>_auto.ifc, ...)
+    ifc_base = os.path.splitext(out_path)[0]
+    if ifc_dir:
+        ifc_base = os.path.join(ifc_dir, os.path.basename(ifc_base))
+    if preview and ifc_modes:
+        # IFC-ul unui preview ar conține geometria netăiată
+        print(f"[DEBUG] Preview mode: IFC export skipped ({', '.join(sorted(ifc_modes))})")
+        ifc_modes = set()
+    print(f"[DEBUG] IFC modes: {', '.join(sorted(ifc_modes)) or 'none'} | TOV: {enable_tov} | preview: {preview}")
+    entity_filter = EntityFilter(layers, exclude_layers, bbox, polygon)
+    if entity_filter.active:
+        print(f"[DEBUG] Partial conversion: {entity_filter.describe()} | clip: {clip}")
 
     # Extrage Z global din numele fișierului
     global_z = extract_global_z_from_filename(dxf_path)
     print(f"[DEBUG] Global Z level from filename: {global_z}")
 
-    doc = ezdxf.readfile(dxf_path)
-    msp = doc.modelspace()
+    # Entitățile normalizate (IR): din cache după hash-ul fișierului, ezdxf doar la prima citire
+    if stream:
+        doc = dxf_ir.stream_document(dxf_path)
+    else:
+        doc = dxf_ir.load_document(dxf_path, use_cache=ir_cache, cache_dir=ir_cache_dir)
+
+    # Ieșire progresivă: loturi GLB + evenimente NDJSON într-un fișier dedicat (stdout rămâne log-ul)
+    progress = None
+    if progressive:
+        from conversion_progress import PROGRESS_CHUNK_SIZE, ProgressReporter
+        progress = ProgressReporter(out_path, chunk_size or PROGRESS_CHUNK_SIZE, scene_node_name, progress_file)
+        progress.stage("read", 1.0)
+
+    # UUID-urile elementelor derivă din numele fișierului și handle-urile DXF (stabile între conversii)
+    global _element_ids
+    _element_ids = ElementIdFactory(dxf_path)
 
     # Inițializează converterul IFC în background
     ifc_converter = None
     ifc_output_path = None
-    if IFC_CONVERSION_AVAILABLE:
+    ifc_background_module = load_ifc_background_converter() if "background" in ifc_modes else None
+    if ifc_background_module is not None:
         try:
             # Determină numele proiectului din calea fișierului
             project_name = os.path.splitext(os.path.basename(dxf_path))[0]
-            ifc_converter = create_background_converter(f"Project_{project_name}")
-            ifc_output_path = os.path.splitext(out_path)[0] + "_auto.ifc"
+            ifc_converter = ifc_background_module.create_background_converter(f"Project_{project_name}", ifc_geometry)
+            ifc_output_path = ifc_base + "_auto.ifc"
             print(f"[DEBUG] IFC Background Converter initialized: {ifc_output_path}")
         except Exception as e:
             print(f"[WARNING] Could not initialize IFC converter: {e}")
             ifc_converter = None
 
+    # O singură trecere prin modelspace: rol + XDATA parsat pentru fiecare entitate
+    classified = classify_document(doc, enable_tov, entity_filter)
+
     # Citește cercurile de control pentru formele spațiale
-    control_points = read_control_circles(doc, layer="control", global_z=global_z)
+    control_points = read_control_circles(classified.by_role[ROLE_CONTROL], layer="control", global_z=global_z)
     print(f"[DEBUG] Control circles loaded: {len(control_points)} with global_z={global_z}")
 
     solids = []
     voids = []
     mesh_name_count = {}
     mapping = []
-
-    for idx, e in enumerate(msp):
-        ent_type = e.dxftype()
-        handle = getattr(e.dxf, "handle", None)
-        layer = getattr(e.dxf, "layer", "default")
-        xdata = {}
-
-        if e.has_xdata:
-            appids = []
-            if hasattr(e, "get_xdata_appids"):
-                appids = e.get_xdata_appids()
-            if "QCAD" not in appids:
-                appids.append("QCAD")
-            for appid in appids:
-                try:
-                    data = e.get_xdata(appid)
-                    if data:
-                        xdata[appid] = list(data)
-                        print(f"[DEBUG] XDATA for {ent_type} handle={handle} appid={appid}: {xdata[appid]}")
-                except Exception as ex:
-                    print(f"[DEBUG] XDATA error for appid {appid}: {ex}")
+    # Metadata meshurilor și intrările de mapping, pe coloane (vezi element_store.py)
+    store = ElementStore()
+    total_entities = len(classified.entities) if isinstance(classified.entities, list) else None
+    # Volumele de după voiduri / tăierea la acoperiș / decuparea regiunii, calculate o singură dată înainte de export
+    volumes = DeferredVolumes()
+
+    # Amprentele și cantitățile tuturor elementelor, validate pe lot (vezi quantity_takeoff.py);
+    # în modul --stream entitățile nu sunt în memorie, deci fiecare element este un lot de unul
+    circle_segments = max(32, arc_segments * 2)  # Mai multe segmente pentru cercuri
+    footprints = None
+    if total_entities is not None:
+        footprints = measure_footprints(
+            [record if record.selected and not (record.kind == "CIRCLE" and record.layer == "control") else None
+             for record in classified.entities],
+            arc_segments, circle_segments)
+
+    # Ordinea din DXF se păstrează: numerotarea meshurilor și UUID-urile depind de ea
+    for idx, record in enumerate(classified.entities):
+        if progress:
+            progress.entities_done(idx, total_entities, solids)
+        e = record.entity
+        ent_type = record.kind
+        handle = record.handle
+        layer = record.layer
+        params = record.params
+
+        if not record.selected:
+            # În afara conversiei parțiale: fără geometrie, dar cu numele rezervate
+            reserve_element_names(record, classified, mesh_name_count)
+            continue
 
         # Debug pentru toate entitățile, nu doar cele cu XDATA
         print(f"[DEBUG] Processing entity: {ent_type} handle={handle} layer={layer}")
 
         # Pentru blocurile INSERT, obține numele blocului
-        block_name = ""
+        block_name = record.block_name
         if ent_type == "INSERT":
-            block_name = getattr(e.dxf, "name", "")
             print(f"[DEBUG] INSERT block name: {block_name}")
 
         # IMPORTANT: Procesare Door/Window TOV TREBUIE să fie ÎNAINTE de IfcWindow metadata!
         # Procesare pentru blocurile Door/Window TOV (cu logica FOV din biblioteci)
-        if ent_type == "INSERT" and DOOR_WINDOW_PROCESSOR_AVAILABLE and block_name.endswith('_TOV'):
+        if record.role == ROLE_TOV:
             if process_door_window_block(doc, e, global_z, mesh_name_count, mapping, solids, voids, control_points):
                 print(f"[DEBUG] Successfully processed Door/Window TOV: {block_name}")
                 continue  # Nu procesăm blocul ca geometrie normală sau window metadata
@@ -2745,84 +2870,51 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
                 print(f"[DEBUG] Failed to process Door/Window TOV: {block_name}, falling back to normal processing")
 
         # Procesare specială pentru blocurile de ferestre (doar pentru metadata, NU pentru TOV!)
-        if ent_type == "INSERT" and layer == "IfcWindow" and not block_name.endswith('_TOV'):
-            insert_point = getattr(e.dxf, "insert", None)
+        if record.role == ROLE_WINDOW:
+            # Rolul garantează punctul de inserție și numele blocului
+            insert_point = e.dxf.insert
             rotation_angle = getattr(e.dxf, "rotation", 0.0)  # Rotația în grade
             
-            if insert_point and block_name:
-                # Parsează XDATA pentru Z
-                z_relative = 0.0  # Z relativ la global_z
-                window_height = 1.2  # Înălțime implicită pentru ferestre
-                window_name = block_name
-                
-                if e.has_xdata:
-                    try:
-                        appids = []
-                        if hasattr(e, "get_xdata_appids"):
-                            appids = e.get_xdata_appids()
-                        if "QCAD" not in appids:
-                            appids.append("QCAD")
-                        
-                        for appid in appids:
-                            try:
-                                xdata_qcad = e.get_xdata(appid)
-                                if xdata_qcad:
-                                    for code, value in xdata_qcad:
-                                        if code == 1000:
-                                            sval = str(value)
-                                            if sval.startswith("z:"):
-                                                try:
-                                                    z_relative = float(sval.split(":")[1])
-                                                except Exception:
-                                                    pass
-                                            elif sval.startswith("height:"):
-                                                try:
-                                                    window_height = float(sval.split(":")[1])
-                                                except Exception:
-                                                    pass
-                                            elif sval.startswith("Name:"):
-                                                window_name = sval.split(":", 1)[1].strip()
-                                    break  # După ce găsim XDATA valid, ieșim
-                            except Exception as ex:
-                                print(f"[DEBUG] XDATA appid {appid} error: {ex}")
-                    except Exception as ex:
-                        print(f"[DEBUG] XDATA parsing error for window block: {ex}")
-                
-                # Calculează Z final pentru fereastră
-                z_final = global_z + z_relative
-                
-                # Creează entry pentru mapping
-                window_uuid = str(uuid.uuid4())
-                window_entry = {
-                    "dxf_handle": handle,
-                    "block_name": block_name,
-                    "window_name": window_name,
-                    "uuid": window_uuid,
-                    "type": "window_block",
-                    "layer": layer,
-                    "gltf_file": f"library/gltf library/Windows/{block_name}.gltf",
-                    "position": {
-                        "x": float(insert_point.x),
-                        "y": float(insert_point.y), 
-                        "z": z_final  # Z final calculat (global_z + z_relative)
-                    },
-                    "z_final": z_final,       # Z final calculat
-                    "z_relative": z_relative, # Z relativ din XDATA
-                    "global_z": global_z,     # Z global din numele fișierului
-                    "rotation": {
-                        "z": rotation_angle  # Rotația în jurul axei Z în grade
-                    },
-                    "scale": {
-                        "x": 1.0,
-                        "y": 1.0,
-                        "z": 1.0
-                    },
-                    "height": window_height
-                }
-                
-                mapping.append(window_entry)
-                print(f"[DEBUG] Added window block: {block_name} at ({insert_point.x:.2f}, {insert_point.y:.2f}, {z_final:.2f}) global_z={global_z} + z_relative={z_relative} rotation={rotation_angle:.1f}°")
-                continue  # Nu procesăm blocul ca geometrie normală
+            # Z, înălțimea și numele din XDATA
+            z_relative = params.value("z", 0.0)  # Z relativ la global_z
+            window_height = params.value("height", 1.2)  # Înălțime implicită pentru ferestre
+            window_name = params.value("name", block_name)
+            
+            # Calculează Z final pentru fereastră
+            z_final = global_z + z_relative
+            
+            # Creează entry pentru mapping
+            window_uuid = new_element_uuid(handle, "window_block")
+            window_entry = {
+                "dxf_handle": handle,
+                "block_name": block_name,
+                "window_name": window_name,
+                "uuid": window_uuid,
+                "type": "window_block",
+                "layer": layer,
+                "gltf_file": f"library/gltf library/Windows/{block_name}.gltf",
+                "position": {
+                    "x": float(insert_point.x),
+                    "y": float(insert_point.y), 
+                    "z": z_final  # Z final calculat (global_z + z_relative)
+                },
+                "z_final": z_final,       # Z final calculat
+                "z_relative": z_relative, # Z relativ din XDATA
+                "global_z": global_z,     # Z global din numele fișierului
+                "rotation": {
+                    "z": rotation_angle  # Rotația în jurul axei Z în grade
+                },
+                "scale": {
+                    "x": 1.0,
+                    "y": 1.0,
+                    "z": 1.0
+                },
+                "height": window_height
+            }
+            
+            mapping.append(window_entry)
+            print(f"[DEBUG] Added window block: {block_name} at ({insert_point.x:.2f}, {insert_point.y:.2f}, {z_final:.2f}) global_z={global_z} + z_relative={z_relative} rotation={rotation_angle:.1f}°")
+            continue  # Nu procesăm blocul ca geometrie normală
 
         # Procesare pentru blocurile cu geometrie (INSERT cu conținut solid)
         if ent_type == "INSERT" and layer != "IfcWindow":
@@ -2837,14 +2929,15 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
                 # Încearcă să găsească blocul în document
                 try:
                     print(f"[DEBUG] Looking for block: {block_name}")
-                    block_layout = doc.blocks.get(block_name)
-                    if block_layout:
+                    block_records = classified.block(block_name)
+                    if block_records:
                         # Procesează geometria din bloc cu punctul de inserție ca origine pentru rotații
                         print(f"[DEBUG] Processing geometry block: {block_name} at ({insert_point.x:.2f}, {insert_point.y:.2f})")
                         process_block_geometry(
-                            doc, block_layout, insert_point, rotation_angle, 
+                            doc, block_records, insert_point, rotation_angle, 
                             scale_x, scale_y, scale_z, layer, handle, 
-                            xdata, mesh_name_count, mapping, solids, voids, control_points, global_z
+                            params, mesh_name_count, mapping, solids, voids, control_points, global_z,
+                            preview=preview, store=store
                         )
                         continue  # Blocul a fost procesat, trecem la următoarea entitate
                     else:
@@ -2853,67 +2946,21 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
                     print(f"[DEBUG] Error processing block {block_name}: {ex}")
                     # Continuă cu procesarea normală dacă blocul nu poate fi procesat
 
-        def parse_xdata_from_list(xdata_list, global_z):
-            height = 1.0
-            z_relative = 0.0  # Z relativ la global_z
-            name_str = ""
-            solid_flag = 1  # Implicit solid, doar dacă e explicit setat pe 0 devine void
-            angle = 0.0  # Unghiul de rotație în grade (implicit 0)
-            rotate90 = False  # Rotația cu 90° în jurul primului segment
-            rotate_x = 0.0  # Rotația în jurul axei X în grade
-            rotate_y = 0.0  # Rotația în jurul axei Y în grade
-            opening_area_formula = ""  # Formula pentru Opening_area (pentru IfcSpace)
-            for code, value in xdata_list:
-                if code == 1000:
-                    sval = str(value)
-                    if sval.startswith("height:"):
-                        try:
-                            height = float(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("z:"):
-                        try:
-                            z_relative = float(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("Name:"):
-                        name_str = sval.split(":", 1)[1].strip()
-                    elif sval.startswith("solid:"):
-                        try:
-                            solid_flag = int(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("angle:"):
-                        try:
-                            angle = float(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("rotate90:"):
-                        try:
-                            rotate90 = bool(int(sval.split(":")[1]))
-                        except Exception:
-                            pass
-                    elif sval.startswith("rotate_x:"):
-                        try:
-                            rotate_x = float(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("rotate_y:"):
-                        try:
-                            rotate_y = float(sval.split(":")[1])
-                        except Exception:
-                            pass
-                    elif sval.startswith("Opening_area:"):
-                        opening_area_formula = sval.split(":", 1)[1].strip()
-            
-            # Calculează Z final: global_z + z_relative
-            z_final = global_z + z_relative
-            return height, z_final, z_relative, name_str, solid_flag, angle, rotate90, rotate_x, rotate_y, opening_area_formula
-
-        height, z_final, z_relative, name_str, solid_flag, angle, rotate90, rotate_x, rotate_y, opening_area_formula = parse_xdata_from_list(xdata.get("QCAD", []), global_z)
+        # Parametrii din XDATA (parsați o singură dată de dxf_classifier)
+        height = params.value("height", 1.0)
+        z_relative = params.value("z", 0.0)  # Z relativ la global_z
+        z_final = global_z + z_relative
+        name_str = params.value("name", "")
+        solid_flag = params.value("solid", 1)  # Implicit solid, doar dacă e explicit setat pe 0 devine void
+        angle = params.value("angle", 0.0)  # Unghiul de rotație în grade (implicit 0)
+        rotate90 = params.value("rotate90", False)  # Rotația cu 90° în jurul primului segment
+        rotate_x = params.value("rotate_x", 0.0)  # Rotația în jurul axei X în grade
+        rotate_y = params.value("rotate_y", 0.0)  # Rotația în jurul axei Y în grade
         rgba = get_material(layer)
         color, alpha = rgba[:3], rgba[3]
-        mesh, mesh_uuid = None, str(uuid.uuid4())
+        mesh, mesh_uuid = None, new_element_uuid(handle)
+        is_extrusion = True  # False doar pentru formele spațiale (deformate de cercurile de control)
+        prism = None  # Prismă verticală simplă (profil + bază Z + înălțime) pentru exportul IFC parametric
 
         key = (layer, name_str)
         mesh_name_count[key] = mesh_name_count.get(key, 0) + 1
@@ -2922,142 +2969,123 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
         # Determină rolul elementului: void dacă solid_flag=0, altfel solid
         is_void = (solid_flag == 0)
 
-        poly = None
-        points = []
-        closed = False
+        # Amprenta elementului din lot (conturul, validarea și cantitățile sunt deja calculate)
+        if footprints is not None:
+            batch, row = footprints, idx
+        else:
+            batch, row = measure_footprints([record if not (ent_type == "CIRCLE" and layer == "control") else None],
+                                            arc_segments, circle_segments), 0
+        points = batch.rings[row]
+        closed = batch.closed[row]
+        poly = batch.polygon(row)
+
+        # Rotațiile suplimentare pe axele X și Y (doar pentru mesh-urile non-spațiale), compuse cu
+        # plasarea Z și aplicate o singură dată pe vertecși (vezi transform_stack.py)
+        rotations = TransformStack().rotate_xyz(rotate_x, rotate_y, 0.0)
         
         # Procesare LWPOLYLINE cu suport pentru arce și forme spațiale
         if ent_type == "LWPOLYLINE":
-            points = lwpolyline_to_points(e, arc_segments)
-            closed = getattr(e, "closed", False)
             if closed and len(points) >= 3:
-                poly = Polygon(points)
-                if poly.is_valid and poly.area > 0:
+                if batch.valid[row]:
                     # Folosește formele spațiale dacă avem cercuri de control
                     if control_points and len(control_points) > 0:
                         print(f"[DEBUG] Creeaza mesh spatial cu {len(control_points)} cercuri de control")
                         mesh = create_spatial_mesh_from_contour(points, control_points, height)
+                        is_extrusion = False
                     elif rotate90:
                         # Rotație cu 90° în jurul primului segment
                         print(f"[DEBUG] Creeaza mesh 90° rotit cu normala fetei")
-                        mesh = create_rotated_90_mesh(points, height)
-                        if mesh is not None:
-                            # Pentru coloane, z_final devine nivelul global
-                            z_position = z_final
-                            if "IfcColumn" in layer:
-                                z_position = global_z  # Coloanele încep de la nivelul global
-                                print(f"[DEBUG] Coloana direct LWPOLYLINE rotate90 {mesh_name}: z_final={z_final:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
-                            
-                            mesh.apply_translation([0, 0, z_position])
+                        # Pentru coloane, z_final devine nivelul global
+                        z_position = z_final
+                        if "IfcColumn" in layer:
+                            z_position = global_z  # Coloanele încep de la nivelul global
+                            print(f"[DEBUG] Coloana direct LWPOLYLINE rotate90 {mesh_name}: z_final={z_final:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
+                        # Plasarea Z urmată de rotațiile X/Y, aplicate la generarea vertecșilor
+                        placement = TransformStack().translate([0, 0, z_position]).push(rotations.matrix)
+                        mesh = create_rotated_90_mesh(points, height, placement)
                     elif abs(angle) > 1e-6:
                         # Creează mesh cu rotație și proiecție pe plan
-                        mesh = create_angle_based_mesh(points, height, angle)
+                        mesh = create_angle_based_mesh(points, height, angle, rotations)
                     else:
                         # Mesh orizontal standard cu translație Z
-                        mesh = extrude_polygon(poly, height)
+                        # Pentru coloane, z_final devine nivelul global
+                        z_position = z_final
+                        if "IfcColumn" in layer:
+                            z_position = global_z  # Coloanele încep de la nivelul global
+                            print(f"[DEBUG] Coloana direct LWPOLYLINE standard {mesh_name}: z_final={z_final:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
+                        # Extrudare direct la cota finală (extrusion_kernel, fără extrude_polygon + translație)
+                        mesh = rotations.apply(extrude_footprint(poly, height, z_position))
                         if mesh is not None:
-                            # Pentru coloane, z_final devine nivelul global
-                            z_position = z_final
-                            if "IfcColumn" in layer:
-                                z_position = global_z  # Coloanele încep de la nivelul global
-                                print(f"[DEBUG] Coloana direct LWPOLYLINE standard {mesh_name}: z_final={z_final:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
-                            
-                            mesh.apply_translation([0, 0, z_position])
-                    
-                    # Aplică rotațiile suplimentare pe axele X și Y doar pentru mesh-urile non-spațiale
-                    if mesh is not None and not (control_points and len(control_points) > 0):
-                        if abs(rotate_x) > 1e-6 or abs(rotate_y) > 1e-6:
-                            mesh = apply_xyz_rotations(mesh, rotate_x, rotate_y, 0.0)
+                            prism = {"z_base": float(z_position), "height": float(height)}
 
         # Procesare POLYLINE cu suport pentru arce și forme spațiale
         elif ent_type == "POLYLINE":
-            points = polyline_to_points(e, arc_segments)
-            closed = getattr(e, "is_closed", False)
             if closed and len(points) >= 3:
-                poly = Polygon(points)
-                if poly.is_valid and poly.area > 0:
+                if batch.valid[row]:
                     # Folosește formele spațiale dacă avem cercuri de control
                     if control_points and len(control_points) > 0:
                         print(f"[DEBUG] Creeaza mesh spatial POLYLINE cu {len(control_points)} cercuri de control")
                         mesh = create_spatial_mesh_from_contour(points, control_points, height)
+                        is_extrusion = False
                     elif rotate90:
                         # Rotație cu 90° în jurul primului segment
                         print(f"[DEBUG] Creeaza mesh 90° rotit POLYLINE cu normala fetei")
-                        mesh = create_rotated_90_mesh(points, height)
-                        if mesh is not None:
-                            # Pentru coloane, z_final devine nivelul global
-                            z_position = z_final
-                            if "IfcColumn" in layer:
-                                z_position = global_z  # Coloanele încep de la nivelul global
-                                print(f"[DEBUG] Coloana direct POLYLINE rotate90 {mesh_name}: z_final={z_final:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
-                            
-                            mesh.apply_translation([0, 0, z_position])
+                        # Pentru coloane, z_final devine nivelul global
+                        z_position = z_final
+                        if "IfcColumn" in layer:
+                            z_position = global_z  # Coloanele încep de la nivelul global
+                            print(f"[DEBUG] Coloana direct POLYLINE rotate90 {mesh_name}: z_final={z_final:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
+                        # Plasarea Z urmată de rotațiile X/Y, aplicate la generarea vertecșilor
+                        placement = TransformStack().translate([0, 0, z_position]).push(rotations.matrix)
+                        mesh = create_rotated_90_mesh(points, height, placement)
                     elif abs(angle) > 1e-6:
                         # Creează mesh cu rotație și proiecție pe plan
-                        mesh = create_angle_based_mesh(points, height, angle)
+                        mesh = create_angle_based_mesh(points, height, angle, rotations)
                     else:
                         # Mesh orizontal standard cu translație Z
-                        mesh = extrude_polygon(poly, height)
+                        # Pentru coloane, z_final devine nivelul global
+                        z_position = z_final
+                        if "IfcColumn" in layer:
+                            z_position = global_z  # Coloanele încep de la nivelul global
+                            print(f"[DEBUG] Coloana direct POLYLINE standard {mesh_name}: z_final={z_final:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
+                        # Extrudare direct la cota finală (extrusion_kernel, fără extrude_polygon + translație)
+                        mesh = rotations.apply(extrude_footprint(poly, height, z_position))
                         if mesh is not None:
-                            # Pentru coloane, z_final devine nivelul global
-                            z_position = z_final
-                            if "IfcColumn" in layer:
-                                z_position = global_z  # Coloanele încep de la nivelul global  
-                                print(f"[DEBUG] Coloana direct POLYLINE standard {mesh_name}: z_final={z_final:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
-                            
-                            mesh.apply_translation([0, 0, z_position])
-                    
-                    # Aplică rotațiile suplimentare pe axele X și Y doar pentru mesh-urile non-spațiale
-                    if mesh is not None and not (control_points and len(control_points) > 0):
-                        if abs(rotate_x) > 1e-6 or abs(rotate_y) > 1e-6:
-                            mesh = apply_xyz_rotations(mesh, rotate_x, rotate_y, 0.0)
+                            prism = {"z_base": float(z_position), "height": float(height)}
 
         # Procesare CIRCLE cu suport pentru forme spațiale (EXCLUDE cercurile de control)
         elif ent_type == "CIRCLE" and hasattr(e, "dxf") and layer != "control":
-            center = (e.dxf.center.x, e.dxf.center.y)
-            radius = e.dxf.radius
-            segments = max(32, arc_segments * 2)  # Mai multe segmente pentru cercuri
-            points = [
-                (
-                    center[0] + np.cos(2 * np.pi * i / segments) * radius,
-                    center[1] + np.sin(2 * np.pi * i / segments) * radius,
-                )
-                for i in range(segments)
-            ]
-            closed = True
-            poly = Polygon(points)
-            if poly.is_valid and poly.area > 0:
+            if batch.valid[row]:
                 # Folosește formele spațiale dacă avem cercuri de control
                 if control_points and len(control_points) > 0:
                     print(f"[DEBUG] Creeaza mesh spatial CIRCLE cu {len(control_points)} cercuri de control")
                     mesh = create_spatial_mesh_from_contour(points, control_points, height)
+                    is_extrusion = False
                 elif abs(angle) > 1e-6:
                     # Creează mesh cu rotație și proiecție pe plan
-                    mesh = create_angle_based_mesh(points, height, angle)
+                    mesh = create_angle_based_mesh(points, height, angle, rotations)
                 else:
                     # Mesh orizontal standard cu translație Z
-                    mesh = extrude_polygon(poly, height)
+                    # Pentru coloane, z_final devine nivelul global
+                    z_position = z_final
+                    if "IfcColumn" in layer:
+                        z_position = global_z  # Coloanele încep de la nivelul global
+                        print(f"[DEBUG] Coloana direct CIRCLE standard {mesh_name}: z_final={z_final:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
+                    # Extrudare direct la cota finală (extrusion_kernel, fără extrude_polygon + translație)
+                    mesh = rotations.apply(extrude_footprint(poly, height, z_position))
                     if mesh is not None:
-                        # Pentru coloane, z_final devine nivelul global
-                        z_position = z_final
-                        if "IfcColumn" in layer:
-                            z_position = global_z  # Coloanele încep de la nivelul global  
-                            print(f"[DEBUG] Coloana direct CIRCLE standard {mesh_name}: z_final={z_final:.3f} -> z_position={global_z:.3f} (baza la nivel global)")
-                        
-                        mesh.apply_translation([0, 0, z_position])
-                
-                # Aplică rotațiile suplimentare pe axele X și Y doar pentru mesh-urile non-spațiale
-                if mesh is not None and not (control_points and len(control_points) > 0):
-                    if abs(rotate_x) > 1e-6 or abs(rotate_y) > 1e-6:
-                        mesh = apply_xyz_rotations(mesh, rotate_x, rotate_y, 0.0)
+                        prism = {"z_base": float(z_position), "height": float(height)}
+
+        if mesh is not None and is_extrusion and not rotations.is_identity:
+            print(f"[DEBUG] Applied XYZ rotations: X={rotate_x}°, Y={rotate_y}°, Z=0.0°")
 
         # Calculează proprietăți geometrice pentru mapping
         if closed and len(points) >= 3:
-            segment_lengths = [np.linalg.norm(np.array(points[i]) - np.array(points[(i+1)%len(points)])) for i in range(len(points))]
-            perimeter = float(np.sum(segment_lengths))
-            area = float(poly.area) if poly else 0.0
-            lateral_area = perimeter * height
-            volume = area * height
+            segment_lengths = batch.segment_lengths(row)
+            perimeter = float(batch.perimeters[row])
+            area = float(batch.areas[row])
+            lateral_area = float(batch.lateral_areas[row])  # Cu Opening_area scăzută pentru IfcSpace
+            volume = float(batch.volumes[row])
         else:
             segment_lengths = []
             perimeter = 0.0
@@ -3068,7 +3096,7 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
         if mesh is not None:
             mesh.name = mesh_name
 
-            mesh.metadata = {
+            mesh.metadata = store.add({
                 "uuid": mesh_uuid,
                 "handle": handle,
                 "layer": layer,
@@ -3080,7 +3108,7 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
                 "angle": angle,
                 "rotate_x": rotate_x,
                 "rotate_y": rotate_y,
-            }
+            })
 
             rgba_float = np.array(color + [alpha], dtype=np.float32)
             mesh.visual.vertex_colors = np.tile(rgba_float, (len(mesh.vertices), 1))
@@ -3102,14 +3130,11 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
 
             print(f"[DEBUG] Export mesh: {mesh_name} | color={color} alpha={alpha} | vertex_colors.shape={mesh.visual.vertex_colors.shape if hasattr(mesh.visual, 'vertex_colors') else 'N/A'} | height={height} z_final={z_final} (global_z={global_z} + z_relative={z_relative})")
 
-            # Pentru IfcSpace, scade Opening_area din lateral_area dacă este specificată
-            if layer == "IfcSpace" and opening_area_formula:
-                opening_area_value = evaluate_math_formula(opening_area_formula)
-                if opening_area_value > 0:
-                    lateral_area = max(0.0, lateral_area - opening_area_value)
-                    print(f"[DEBUG] IfcSpace {mesh_name}: lateral_area adjusted with Opening_area={opening_area_value:.2f}, final lateral_area={lateral_area:.2f}")
+            # Pentru IfcSpace, Opening_area a fost scăzută din lateral_area în lotul de amprente
+            if layer == "IfcSpace" and batch.opening_areas[row] > 0:
+                print(f"[DEBUG] IfcSpace {mesh_name}: lateral_area adjusted with Opening_area={batch.opening_areas[row]:.2f}, final lateral_area={lateral_area:.2f}")
 
-            entry = {
+            entry = store.add({
                 "dxf_handle": handle,
                 "mesh_name": mesh_name,
                 "uuid": mesh_uuid,
@@ -3122,6 +3147,9 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
                 "z_final": z_final,         # Z final calculat (global_z + z_relative)
                 "z_relative": z_relative,   # Z relativ din XDATA
                 "global_z": global_z,       # Z global din numele fișierului
+                "extrusion": is_extrusion,  # Prismă extrudată (fețe plane, IFC poligonal)
+                # Prismă verticală (profil = vertices) doar dacă nu s-au aplicat rotații X/Y
+                "prism": prism if abs(rotate_x) <= 1e-6 and abs(rotate_y) <= 1e-6 else None,
                 "segment_lengths": segment_lengths,
                 "perimeter": perimeter,
                 "area": area,
@@ -3129,7 +3157,7 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
                 "volume": volume,
                 "vertices": [list(map(float, pt)) for pt in points] if points else [],
                 "is_cut_by": []
-            }
+            })
             mapping.append(entry)
 
             if is_void:
@@ -3137,8 +3165,22 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
             else:
                 solids.append(mesh)
 
+    # Modelspace-ul a fost consumat (în flux, abia acum se cunosc numerele pe rol)
+    print(f"[DEBUG] Entities by role: {classified.summary()}")
+    doc.close()
+    if progress:
+        entities_processed = sum(classified.counts.values()) + classified.filtered
+        progress.collect(solids)
+        progress.flush(entities_processed, total_entities or entities_processed)
+        progress.stage("booleans", 0.0)
+
     uuid_to_entry = {entry["uuid"]: entry for entry in mapping}
 
+    # Intrările voidurilor (nu ajung în mapping-ul final) - necesare golurilor din IFC-ul parametric;
+    # voidurile blocurilor (role 0) taie direct în process_block_geometry, fără să treacă prin `voids`
+    void_uuids = {mesh.metadata.get("uuid") for mesh in voids if not isinstance(mesh, dict)}
+    void_entries = [entry for entry in mapping if entry["uuid"] in void_uuids or entry.get("role") == 0]
+
     # Separează voidurile și solidele pentru aplicarea logicii globale
     global_voids = []
     layer_voids_by_layer = {}  # Pentru voidurile cu solid_flag=0 (per layer)
@@ -3171,6 +3213,13 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
     print(f"[DEBUG] Layer-specific voids: {sum(len(v) for v in layer_voids_by_layer.values())}")
     print(f"[DEBUG] All solids: {len(all_solids)}")
 
+    preview_overlays = []
+    if preview:
+        # Preview: nicio scădere booleană; voidurile rămân vizibile, transparente, peste solide
+        preview_overlays = global_voids + [mesh for layer_voids in layer_voids_by_layer.values() for mesh in layer_voids]
+        global_voids, layer_voids_by_layer = [], {}
+        print(f"[DEBUG] Preview mode: {len(preview_overlays)} voids exported as overlays, booleans skipped")
+
     new_solids = []
     
     # Prima etapă: Aplică voidurile globale (layerul "void") la toate solidele
@@ -3214,15 +3263,13 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
                 if diff:
                     if isinstance(diff, list):
                         for dmesh in diff:
-                            dmesh.metadata = dict(mesh.metadata) if hasattr(mesh, 'metadata') else {}
+                            dmesh.metadata = share(mesh.metadata) if hasattr(mesh, 'metadata') else {}
                             new_solids.append(dmesh)
                     else:
-                        diff.metadata = dict(mesh.metadata) if hasattr(mesh, 'metadata') else {}
+                        diff.metadata = share(mesh.metadata) if hasattr(mesh, 'metadata') else {}
                         new_solids.append(diff)
-                        # Recalculează volumul după tăierea cu voidurile globale
-                        if hasattr(diff, 'volume') and diff.volume > 0 and solid_uuid in uuid_to_entry:
-                            uuid_to_entry[solid_uuid]["volume"] = float(diff.volume)
-                            print(f"[DEBUG] Volume updated after global voids: {uuid_to_entry[solid_uuid]['mesh_name']} = {diff.volume:.3f}m³")
+                        # Volumul după tăierea cu voidurile globale se calculează înainte de export
+                        volumes.defer(solid_uuid, diff, "global voids")
                 else:
                     new_solids.append(mesh)
             except Exception as ex:
@@ -3295,15 +3342,13 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
                         if diff:
                             if isinstance(diff, list):
                                 for dmesh in diff:
-                                    dmesh.metadata = dict(mesh.metadata) if hasattr(mesh, 'metadata') else {}
+                                    dmesh.metadata = share(mesh.metadata) if hasattr(mesh, 'metadata') else {}
                                     processed_solids.append(dmesh)
                             else:
-                                diff.metadata = dict(mesh.metadata) if hasattr(mesh, 'metadata') else {}
+                                diff.metadata = share(mesh.metadata) if hasattr(mesh, 'metadata') else {}
                                 processed_solids.append(diff)
-                                # Recalculează volumul după tăierea cu ferestrele
-                                if hasattr(diff, 'volume') and diff.volume > 0 and solid_uuid in uuid_to_entry:
-                                    uuid_to_entry[solid_uuid]["volume"] = float(diff.volume)
-                                    print(f"[DEBUG] Volume updated after IfcWindow cutting: {uuid_to_entry[solid_uuid]['mesh_name']} = {diff.volume:.3f}m³")
+                                # Volumul după tăierea cu ferestrele se calculează înainte de export
+                                volumes.defer(solid_uuid, diff, "IfcWindow cutting")
                         else:
                             processed_solids.append(mesh)
                     except Exception as ex:
@@ -3361,15 +3406,13 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
                     if diff:
                         if isinstance(diff, list):
                             for dmesh in diff:
-                                dmesh.metadata = dict(mesh.metadata) if hasattr(mesh, 'metadata') else {}
+                                dmesh.metadata = share(mesh.metadata) if hasattr(mesh, 'metadata') else {}
                                 processed_solids.append(dmesh)
                         else:
-                            diff.metadata = dict(mesh.metadata) if hasattr(mesh, 'metadata') else {}
+                            diff.metadata = share(mesh.metadata) if hasattr(mesh, 'metadata') else {}
                             processed_solids.append(diff)
-                            # Recalculează volumul după tăierea cu voidurile de layer
-                            if hasattr(diff, 'volume') and diff.volume > 0 and solid_uuid in uuid_to_entry:
-                                uuid_to_entry[solid_uuid]["volume"] = float(diff.volume)
-                                print(f"[DEBUG] Volume updated after layer voids: {uuid_to_entry[solid_uuid]['mesh_name']} = {diff.volume:.3f}m³")
+                            # Volumul după tăierea cu voidurile de layer se calculează înainte de export
+                            volumes.defer(solid_uuid, diff, "layer voids")
                     else:
                         processed_solids.append(mesh)
                 except Exception as ex:
@@ -3389,8 +3432,22 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
     
     solids = final_solids
 
-    # Taie elementele structurale la acoperiș
-    solids, mapping = trim_elements_to_roof(solids, mapping)
+    if preview:
+        solids.extend(make_preview_overlay(mesh, uuid_to_entry.get(mesh.metadata.get("uuid")))
+                      for mesh in preview_overlays)
+    else:
+        # Taie elementele structurale la acoperiș
+        solids, mapping = trim_elements_to_roof(solids, mapping, volumes)
+
+    # Conversie parțială: taie solidele la marginea regiunii
+    if clip and entity_filter.region is not None:
+        solids, mapping = clip_elements_to_region(solids, mapping, entity_filter.region, volumes)
+
+    # Volumele elementelor tăiate: o singură evaluare per element, pe meshul final
+    volumes.resolve(mapping)
+
+    if progress:
+        progress.stage("export", 0.0)
 
     # Verificare finală și re-aplicare materiale înainte de export
     print(f"[DEBUG] Final material verification for {len(solids)} meshes:")
@@ -3428,11 +3485,11 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
 
     # Process section lines from DXF
     try:
-        section_data = process_section_lines(doc, mapping)
+        section_data = process_section_lines(classified.by_role[ROLE_SECTION], mapping)
         print(f"[DEBUG] Found {len(section_data)} section lines")
         
         # Add section planes to the existing solids list
-        for i, section in enumerate(section_data):
+        for section in section_data:
             # Extract parameters for section plane mesh creation
             center = section['plane_center']
             normal = section['plane_normal']
@@ -3441,9 +3498,9 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
             
             section_mesh = create_section_plane_mesh(center, normal, width, height)
             if section_mesh:
-                mesh_name = f"section_plane_{i}"
+                mesh_name = f"section_plane_{section['plane_index']}"
                 section_mesh.name = mesh_name
-                section_uuid = str(uuid.uuid4())
+                section_uuid = new_element_uuid("section_plane", section['section_id'])
                 
                 # Get material from layer_materials.json
                 rgba = get_material('section')
@@ -3510,39 +3567,48 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
 
     # Creează scenă și exportă
     scene = trimesh.Scene()
+    lod_writer = None
+    if lod:
+        from lod_export import LodWriter
+        lod_writer = LodWriter()
     for i, mesh in enumerate(solids):
-        if "name" in mesh.metadata:
-            base_name = mesh.metadata["name"]
-            layer = mesh.metadata.get("layer", "unknown")
-            
-            # Encoding layer în numele node-ului pentru Godot
-            # Format: MeshName_LAYER_LayerName pentru identificare în Godot
-            node_name = f"{base_name}_LAYER_{layer}"
-        else:
-            node_name = f"solid_{i}"
+        # Encoding layer în numele node-ului pentru Godot
+        node_name = scene_node_name(mesh, i)
+        if "name" not in mesh.metadata:
             print(f"[WARNING] Mesh fara 'name' in metadata, fallback la {node_name}")
         
         print(f"[DEBUG] Add to scene: node_name={node_name} | original_layer={mesh.metadata.get('layer', 'unknown')} | vertices={len(mesh.vertices)}")
-        scene.add_geometry(mesh, node_name=node_name)
+        if lod_writer:
+            lod_writer.add(scene, mesh, node_name)
+        else:
+            scene.add_geometry(mesh, node_name=node_name)
+    if lod_writer:
+        print(f"[DEBUG] LOD: {lod_writer.stats['lods']} variants for {lod_writer.stats['meshes']} meshes "
+              f"({lod_writer.stats['faces']} -> {lod_writer.stats['lod_faces']} faces at the lowest level)")
 
     # Export mapping JSON
     json_path = os.path.splitext(out_path)[0] + "_mapping.json"
     import json
     with open(json_path, "w", encoding="utf-8") as jf:
-        json.dump(mapping, jf, indent=2)
+        json.dump(mapping, jf, indent=2, default=plain)
     print(f"[DEBUG] Exported mapping JSON: {json_path}")
 
     # Start IFC background conversion
-    if ifc_converter and IFC_CONVERSION_AVAILABLE and ifc_output_path:
+    if ifc_converter and ifc_output_path:
         try:
             print(f"[DEBUG] Adding {len(mapping)} elements to IFC queue...")
             
+            # Geometria finală (după booleene și trim) grupată pe uuid, în bufferele store-ului;
+            # un element poate avea mai multe fragmente în scenă
+            store.collect_geometry(solids)
+            
             # Add all mapping elements to IFC queue
             for entry in mapping:
                 try:
                     # Process XDATA before conversion
-                    processed_entry = process_xdata_for_element(entry)
-                    ifc_converter.queue_element_for_conversion(processed_entry)
+                    processed_entry = ifc_background_module.process_xdata_for_element(entry)
+                    vertices, faces = store.geometry(entry.get("uuid"))
+                    ifc_converter.queue_element_for_conversion(processed_entry, vertices, faces)
                 except Exception as e:
                     print(f"[WARNING] Could not process element for IFC: {entry.get('mesh_name', 'Unknown')} - {e}")
             
@@ -3555,19 +3621,62 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
 
     export_scene(scene, out_path)
 
+    # Tile-uri pentru încărcarea pe bucăți a modelelor mari (GLB-ul complet rămâne)
+    if tiles:
+        from tile_export import TILE_MAX_ELEMENTS, export_tiles
+        try:
+            tileset_file, tile_stats = export_tiles(solids, out_path, scene_node_name, tile_size or TILE_MAX_ELEMENTS)
+            print(f"[DEBUG] Exported {tile_stats['tiles']} tiles ({tile_stats['bytes']} bytes): {tileset_file}")
+        except Exception as e:
+            print(f"[WARNING] Tile export failed: {e}")
+
+    if progress:
+        progress.finish(out_path, json_path)
+
     elapsed = time.time() - start_time
     print(f"[DEBUG] Finished DXF to GLB in {elapsed:.2f} sec.")
     
-    # GLB-based IFC conversion (more robust - uses final geometry + metadata)
-    if IFC_GLB_CONVERSION_AVAILABLE:
+    ifc_glb_module = load_ifc_glb_converter() if ifc_modes & {"final", "from-glb"} else None
+    
+    # IFC din meshurile finale aflate deja în memorie (fără recitirea GLB/JSON)
+    if ifc_glb_module is not None and "final" in ifc_modes:
+        try:
+            ifc_final_path = ifc_base + ".ifc"
+            project_name = os.path.splitext(os.path.basename(out_path))[0]
+            ifc_start = time.time()
+            if ifc_glb_module.convert_meshes_to_ifc(solids, mapping, ifc_final_path, project_name):
+                print(f"[SUCCESS] IFC export completed in {time.time() - ifc_start:.2f} sec: {ifc_final_path}")
+            else:
+                print(f"[WARNING] IFC export failed")
+        except Exception as e:
+            print(f"[WARNING] IFC export error: {e}")
+    
+    # IFC parametric: prismele ca IfcExtrudedAreaSolid, voidurile ca IfcOpeningElement
+    if "parametric" in ifc_modes:
+        parametric_module = load_ifc_parametric_exporter()
+        try:
+            if parametric_module is not None:
+                ifc_parametric_path = ifc_base + "_parametric.ifc"
+                project_name = os.path.splitext(os.path.basename(out_path))[0]
+                ifc_start = time.time()
+                if parametric_module.convert_meshes_to_parametric_ifc(solids, mapping, ifc_parametric_path,
+                                                                      project_name, void_entries):
+                    print(f"[SUCCESS] Parametric IFC export completed in {time.time() - ifc_start:.2f} sec: {ifc_parametric_path}")
+                else:
+                    print(f"[WARNING] Parametric IFC export failed")
+        except Exception as e:
+            print(f"[WARNING] Parametric IFC export error: {e}")
+    
+    # GLB-based IFC conversion (opțional: recitește GLB-ul și mapping-ul de pe disc)
+    if ifc_glb_module is not None and "from-glb" in ifc_modes:
         try:
             base_name = os.path.splitext(out_path)[0]
             json_mapping_path = base_name + "_mapping.json"
-            ifc_from_glb_path = base_name + "_from_glb.ifc"
+            ifc_from_glb_path = ifc_base + "_from_glb.ifc"
             
             if os.path.exists(json_mapping_path):
                 print(f"[DEBUG] Starting GLB-based IFC conversion...")
-                if convert_glb_to_ifc(out_path, json_mapping_path, ifc_from_glb_path):
+                if ifc_glb_module.convert_glb_to_ifc(out_path, json_mapping_path, ifc_from_glb_path):
                     print(f"[SUCCESS] GLB-based IFC conversion completed: {ifc_from_glb_path}")
                 else:
                     print(f"[WARNING] GLB-based IFC conversion failed")
@@ -3577,7 +3686,7 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
             print(f"[WARNING] GLB-based IFC conversion error: {e}")
     
     # Information about IFC background conversion
-    if ifc_converter and IFC_CONVERSION_AVAILABLE:
+    if ifc_converter:
         print(f"[INFO] IFC conversion running in background...")
         print(f"[INFO] Final IFC file: {ifc_output_path}")
         print(f"[INFO] To wait for completion: ifc_converter.wait_for_completion()")
@@ -3586,14 +3695,59 @@ def dxf_to_gltf(dxf_path, out_path, arc_segments=16):
 # Main
 # -----------------------------
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python dxf_to_glb.py input.dxf output.glb [arc_segments]")
-        sys.exit(1)
-
-    dxf_path = sys.argv[1]
-    out_path = sys.argv[2]
-    arc_segments = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    parser = argparse.ArgumentParser(description="Conversie DXF -> GLB (+ mapping JSON, IFC opțional)")
+    parser.add_argument("dxf_path", help="Fișierul DXF de intrare")
+    parser.add_argument("out_path", help="Fișierul GLB de ieșire")
+    parser.add_argument("arc_segments", nargs="?", type=int, default=16,
+                        help="Segmente pentru discretizarea arcelor (implicit 16)")
+    parser.add_argument("--ifc", default=",".join(DEFAULT_IFC_MODES),
+                        help="Moduri IFC: none, final, background, from-glb, parametric (combinabile cu virgulă; implicit final)")
+    parser.add_argument("--ifc-geometry", default="auto", choices=("auto", "polygonal", "triangulated", "brep"),
+                        help="Geometria pentru --ifc=background (implicit auto: poligonal pentru extrudări)")
+    parser.add_argument("--no-tov", action="store_true",
+                        help="Nu procesa blocurile Door/Window *_TOV (nu încarcă bibliotecile)")
+    parser.add_argument("--no-ir-cache", action="store_true",
+                        help="Parsează DXF-ul cu ezdxf fără cache-ul de entități IR")
+    parser.add_argument("--ir-cache-dir", default=None,
+                        help="Folderul cache-ului IR (implicit $VIEWER2D_IR_CACHE sau cache-ul utilizatorului)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Citește modelspace-ul în flux (iterdxf), pentru desene foarte mari")
+    parser.add_argument("--layers", help="Conversie parțială: doar aceste layere (separate prin virgulă)")
+    parser.add_argument("--exclude-layers", help="Conversie parțială: layere excluse (separate prin virgulă)")
+    parser.add_argument("--bbox", help="Conversie parțială: regiunea xmin,ymin,xmax,ymax")
+    parser.add_argument("--polygon", help="Conversie parțială: regiunea poligonală x1,y1;x2,y2;...")
+    parser.add_argument("--clip", action="store_true",
+                        help="Taie solidele care traversează marginea regiunii (--bbox/--polygon)")
+    parser.add_argument("--progressive", action="store_true",
+                        help="Scrie loturi GLB (<nume>_chunk_NNN.glb) și progres NDJSON (<nume>_progress.ndjson) în timpul conversiei")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Elemente per lot pentru --progressive (implicit 50)")
+    parser.add_argument("--progress-file", default=None,
+                        help="Fișierul NDJSON al evenimentelor pentru --progressive (implicit <nume>_progress.ndjson)")
+    parser.add_argument("--tiles", action="store_true",
+                        help="Scrie și tile-uri GLB (quadtree XY) în <nume>_tiles/ cu indexul <nume>_tileset.json")
+    parser.add_argument("--tile-size", type=int, default=None,
+                        help="Meshuri per tile pentru --tiles (implicit 200)")
+    parser.add_argument("--lod", action="store_true",
+                        help="Adaugă variante simplificate (LOD) pentru meshurile curbe, cu praguri screen_size în extras")
+    parser.add_argument("--ifc-dir", default=None,
+                        help="Folderul fișierelor IFC (implicit lângă GLB)")
+    parser.add_argument("--preview", action="store_true",
+                        help="Preview rapid: fără booleene și tăiere la acoperiș, voidurile transparente, fără IFC")
+    args = parser.parse_args()
 
-    dxf_to_gltf(dxf_path, out_path, arc_segments)
-
-    print(f"Converted {dxf_path} to {out_path}")
\ No newline at end of file
+    try:
+        ifc_modes = parse_ifc_modes(args.ifc)
+        EntityFilter(args.layers, args.exclude_layers, args.bbox, args.polygon)
+    except ValueError as e:
+        parser.error(str(e))
+
+    dxf_to_gltf(args.dxf_path, args.out_path, args.arc_segments,
+                ifc_mode=ifc_modes, enable_tov=not args.no_tov, ifc_geometry=args.ifc_geometry,
+                ir_cache=not args.no_ir_cache, ir_cache_dir=args.ir_cache_dir, stream=args.stream,
+                layers=args.layers, exclude_layers=args.exclude_layers, bbox=args.bbox,
+                polygon=args.polygon, clip=args.clip, preview=args.preview,
+                progressive=args.progressive, chunk_size=args.chunk_size, progress_file=args.progress_file,
+                tiles=args.tiles, tile_size=args.tile_size, lod=args.lod, ifc_dir=args.ifc_dir)
+
+    print(f"Converted {args.dxf_path} to {args.out_path}")
\ No newline at end of file
@@ -1,11 +1,11 @@
 import ezdxf
 import ifcopenshell
 import ifcopenshell.api
-import uuid
 import sys
 import time
 import numpy as np
 from shapely.geometry import Polygon
+from element_ids import ElementIdFactory, ifc_guid
 
 # Map layer to IFC type (simplified)
 LAYER_TO_IFC = {
@@ -51,6 +51,8 @@ def dxf_to_ifc(dxf_path, ifc_path):
     print(f"[DEBUG] Start DXF to IFC: {dxf_path} -> {ifc_path}")
     start_time = time.time()
     doc = ezdxf.readfile(dxf_path)
+    # GlobalId-uri stabile între conversii: fișierul sursă + handle-ul DXF
+    element_ids = ElementIdFactory(dxf_path)
     msp = doc.modelspace()
     
     # Create IFC file
@@ -154,11 +156,10 @@ def dxf_to_ifc(dxf_path, ifc_path):
                 body_context, 'Body', 'SweptSolid', [solid_geom]
             )
             product_shape = ifc.createIfcProductDefinitionShape(None, None, [shape_representation])
-            guid = ifcopenshell.guid.compress(uuid.uuid4().hex)
             product = ifcopenshell.api.run('root.create_entity', ifc, 
                                           ifc_class=solid["ifc_type"], 
-                                          name=f"{solid['ifc_type']}_{solid['handle'] or solid['idx']}", 
-                                          guid=guid)
+                                          name=f"{solid['ifc_type']}_{solid['handle'] or solid['idx']}")
+            product.GlobalId = ifc_guid(element_ids.element_uuid(solid['handle'] or f"idx/{solid['idx']}"))
             product.Representation = product_shape
             ifcopenshell.api.run('spatial.assign_container', ifc, 
                                 products=[product], 
@@ -177,11 +178,10 @@ def dxf_to_ifc(dxf_path, ifc_path):
                 body_context, 'Body', 'SweptSolid', [void_geom]
             )
             product_shape = ifc.createIfcProductDefinitionShape(None, None, [shape_representation])
-            guid = ifcopenshell.guid.compress(uuid.uuid4().hex)
             opening = ifcopenshell.api.run('root.create_entity', ifc, 
                                            ifc_class='IfcOpeningElement', 
-                                           name=f"Opening_{void['handle'] or void['idx']}", 
-                                           guid=guid)
+                                           name=f"Opening_{void['handle'] or void['idx']}")
+            opening.GlobalId = ifc_guid(element_ids.element_uuid(void['handle'] or f"idx/{void['idx']}", "opening"))
             opening.Representation = product_shape
             ifcopenshell.api.run('spatial.assign_container', ifc, 
                                 products=[opening], 
@@ -2,17 +2,166 @@ import os
 import time
 import json
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
+try:
+    import conversion_diff
+except ImportError as e:
+    # Fără diff (ex. trimesh lipsă) viewer-ul reîncarcă tot nivelul
+    print(f"[WATCHDOG] Element diff disabled: {e}")
+    conversion_diff = None
+
+# Evenimentele aceluiași fișier sosite în această fereastră (secunde) produc o singură conversie
+DEBOUNCE_SECONDS = 1.0
+# Numărul maxim de conversii simultane (nivele/fișiere diferite)
+MAX_WORKERS = 2
+# Întâi un preview fără booleene (--preview), apoi conversia finală care îl înlocuiește atomic
+PREVIEW_PASS = True
+# Subfolderul (din folderul de output) în care se scrie conversia finală înainte de înlocuire
+STAGING_FOLDER = ".final"
+# Modurile IFC ale trecerii finale (--ifc), ca înainte de preview: <nume>_auto.ifc și <nume>_from_glb.ifc;
+# "none" dezactivează IFC-ul. Preview-ul nu scrie niciodată IFC (geometria lui nu este tăiată)
+FINAL_PASS_IFC = "background,from-glb"
+# Încercările de înlocuire a signal file-ului (pe Windows os.replace eșuează cât timp Godot îl citește)
+SIGNAL_REPLACE_ATTEMPTS = 10
+
+# Serializează scrierile în signal file: workerii paraleli și ambele treceri notifică același fișier
+_signal_lock = threading.Lock()
+
+
+class ConversionJob:
+    """O conversie programată pentru un fișier DXF; poate fi anulată de un eveniment mai nou"""
+    
+    def __init__(self, dxf_path, events, first_event):
+        self.dxf_path = dxf_path
+        self.events = events  # Câte evenimente au fost comasate în acest job
+        self.first_event = first_event  # time.monotonic() la primul eveniment
+        self.dispatched = time.monotonic()
+        self.started = None
+        self.cancelled = False
+        self.process = None
+        self._lock = threading.Lock()
+    
+    def cancel(self):
+        """Anulează jobul; procesul de conversie în curs (dacă există) este oprit"""
+        with self._lock:
+            self.cancelled = True
+            if self.process is not None and self.process.poll() is None:
+                self.process.terminate()
+    
+    def run_process(self, command):
+        """
+        Rulează comanda de conversie; returnează (returncode, stdout, stderr)
+        sau None dacă jobul a fost anulat înainte sau în timpul rulării.
+        """
+        with self._lock:
+            if self.cancelled:
+                return None
+            self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        stdout, stderr = self.process.communicate()
+        if self.cancelled:
+            return None
+        return self.process.returncode, stdout, stderr
+
+
+class ConversionQueue:
+    """
+    Coadă de conversii cu debounce per fișier.
+    
+    - evenimentele aceluiași fișier se comasează până când trec DEBOUNCE_SECONDS fără alt eveniment
+    - un eveniment nou anulează conversia în curs a aceluiași fișier (rezultatul ar fi oricum vechi)
+    - conversiile fișierelor diferite rulează în paralel, pe un pool de cel mult MAX_WORKERS
+    """
+    
+    def __init__(self, convert, debounce=DEBOUNCE_SECONDS, max_workers=MAX_WORKERS):
+        self.convert = convert  # funcție (ConversionJob) -> None, rulată pe un worker
+        self.debounce = debounce
+        self.pending = {}  # cale -> {"path", "first", "last", "count"}
+        self.running = {}  # cale -> ConversionJob (în așteptare pe pool sau în conversie)
+        self.condition = threading.Condition()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dxf-convert")
+        self.stopped = False
+        self.scheduler = threading.Thread(target=self._schedule_loop, name="dxf-debounce", daemon=True)
+        self.scheduler.start()
+    
+    def submit(self, dxf_path):
+        """Înregistrează un eveniment pentru fișier (apelat din threadul observer-ului, nu blochează)"""
+        key = str(dxf_path)
+        now = time.monotonic()
+        with self.condition:
+            entry = self.pending.setdefault(key, {"path": dxf_path, "first": now, "count": 0})
+            entry["last"] = now
+            entry["count"] += 1
+            
+            job = self.running.get(key)
+            if job is not None and not job.cancelled:
+                print(f"[WATCHDOG] Newer event for {dxf_path.name}: cancelling in-flight conversion")
+                job.cancel()
+            self.condition.notify()
+    
+    def stop(self):
+        """Oprește programarea și anulează conversiile în curs"""
+        with self.condition:
+            self.stopped = True
+            for job in self.running.values():
+                job.cancel()
+            self.condition.notify()
+        self.executor.shutdown(wait=True)
+    
+    def _schedule_loop(self):
+        with self.condition:
+            while not self.stopped:
+                now = time.monotonic()
+                timeout = None
+                for key, entry in list(self.pending.items()):
+                    if key in self.running:
+                        continue  # pornește după ce jobul curent (anulat) se termină
+                    due = entry["last"] + self.debounce
+                    if due <= now:
+                        del self.pending[key]
+                        self._dispatch(key, entry)
+                    else:
+                        timeout = due - now if timeout is None else min(timeout, due - now)
+                self.condition.wait(timeout)
+    
+    def _dispatch(self, key, entry):
+        job = ConversionJob(entry["path"], entry["count"], entry["first"])
+        self.running[key] = job
+        print(f"[WATCHDOG] Queued {job.dxf_path.name}: {job.events} event(s) coalesced, "
+              f"debounce {job.dispatched - job.first_event:.2f}s | {self._depth()}")
+        self.executor.submit(self._run_job, key, job)
+    
+    def _run_job(self, key, job):
+        job.started = time.monotonic()
+        try:
+            self.convert(job)
+        except Exception as e:
+            print(f"[WATCHDOG] Error processing {job.dxf_path}: {e}")
+        finally:
+            with self.condition:
+                del self.running[key]
+                self.condition.notify()
+                print(f"[WATCHDOG] Job finished: {job.dxf_path.name} | {self._depth()}")
+    
+    def _depth(self):
+        """Adâncimea cozii (apelat cu condition deținut)"""
+        waiting = sum(1 for job in self.running.values() if job.started is None)
+        return (f"queue: {len(self.pending)} debouncing, {waiting} waiting, "
+                f"{len(self.running) - waiting} converting")
+
+
 class DXFHandler(FileSystemEventHandler):
-    def __init__(self, watch_folder, output_folder, conversion_script, callback_file):
+    def __init__(self, watch_folder, output_folder, conversion_script, callback_file, job_queue=None):
         self.watch_folder = Path(watch_folder)
         self.output_folder = Path(output_folder)
         self.conversion_script = Path(conversion_script)
         self.callback_file = Path(callback_file)
-        self.processing = set()  # Pentru a evita procesarea multiplă
+        # Coada poate fi comună mai multor foldere monitorizate (un singur pool de conversie)
+        self.job_queue = job_queue or ConversionQueue(self.convert_job)
         
     def on_modified(self, event):
         if event.is_directory:
@@ -20,7 +169,7 @@ class DXFHandler(FileSystemEventHandler):
             
         file_path = Path(event.src_path)
         if file_path.suffix.lower() == '.dxf':
-            self._process_dxf_file(file_path)
+            self.job_queue.submit(file_path)
     
     def on_created(self, event):
         if event.is_directory:
@@ -28,54 +177,117 @@ class DXFHandler(FileSystemEventHandler):
             
         file_path = Path(event.src_path)
         if file_path.suffix.lower() == '.dxf':
-            # Așteaptă ca fișierul să fie complet scris
-            time.sleep(1.0)  # Delay mai mare
-            self._process_dxf_file(file_path)
+            self.job_queue.submit(file_path)
     
-    def _process_dxf_file(self, dxf_path):
-        if str(dxf_path) in self.processing:
+    def on_moved(self, event):
+        if event.is_directory:
             return
             
-        self.processing.add(str(dxf_path))
+        # Multe aplicații CAD salvează într-un fișier temporar și apoi îl redenumesc
+        file_path = Path(event.dest_path)
+        if file_path.suffix.lower() == '.dxf':
+            self.job_queue.submit(file_path)
+    
+    def convert_job(self, job):
+        """Rulează conversia unui job din coadă (pe un worker din pool)"""
+        dxf_path = job.dxf_path
+        print(f"[WATCHDOG] DXF file changed: {dxf_path}")
         
-        try:
-            print(f"[WATCHDOG] DXF file changed: {dxf_path}")
-            
-            # Verifică că fișierul este complet scris
-            self._wait_for_file_complete(dxf_path)
-            
-            # Calculează calea de output
-            glb_path = self.output_folder / (dxf_path.stem + ".glb")
-            
-            # Șterge GLB-ul vechi și cache-ul Godot
-            self._clear_old_files(glb_path)
-            
-            # Rulează conversia DXF → GLB
-            print(f"[WATCHDOG] Converting {dxf_path} → {glb_path}")
-            result = subprocess.run([
-                "python", 
-                str(self.conversion_script),
-                str(dxf_path),
-                str(glb_path)
-            ], capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print(f"[WATCHDOG] Conversion successful")
-                
-                # Așteaptă ca GLB-ul să fie complet scris
-                self._wait_for_file_complete(glb_path)
-                
-                # Notifică Godot despre schimbare
-                self._notify_godot_reload(dxf_path, glb_path)
-            else:
-                print(f"[WATCHDOG] Conversion failed: {result.stderr}")
-                
-        except Exception as e:
-            print(f"[WATCHDOG] Error processing {dxf_path}: {e}")
-        finally:
-            self.processing.discard(str(dxf_path))
+        # Verifică că fișierul este complet scris
+        self._wait_for_file_complete(dxf_path, job)
+        if job.cancelled:
+            print(f"[WATCHDOG] Conversion cancelled before start: {dxf_path.name}")
+            return
+        
+        # Calculează calea de output
+        glb_path = self.output_folder / (dxf_path.stem + ".glb")
+        
+        # Amprentele conversiei anterioare, înainte ca GLB-ul vechi să fie șters
+        previous = conversion_diff.load_fingerprints(glb_path) if conversion_diff else None
+        
+        # Șterge GLB-ul vechi și cache-ul Godot
+        self._clear_old_files(glb_path)
+        
+        # Prima trecere: preview rapid, pentru feedback imediat în viewer
+        if PREVIEW_PASS:
+            if self._run_pass(job, dxf_path, glb_path, glb_path, "preview", previous) is None:
+                return
+            # Amprentele preview-ului: diff-ul trecerii finale se face față de ce afișează viewer-ul
+            previous = conversion_diff.load_fingerprints(glb_path) if conversion_diff else None
+        
+        # Trecerea finală: scrisă separat, apoi mutată peste preview (viewer-ul nu vede fișiere parțiale)
+        staging_path = self.output_folder / STAGING_FOLDER / glb_path.name if PREVIEW_PASS else glb_path
+        staging_path.parent.mkdir(exist_ok=True)
+        self._run_pass(job, dxf_path, staging_path, glb_path, "final", previous)
     
-    def _wait_for_file_complete(self, file_path):
+    def _run_pass(self, job, dxf_path, out_path, glb_path, conversion_pass, previous):
+        """
+        Rulează o trecere de conversie și notifică viewer-ul.
+        
+        Args:
+            out_path: unde scrie convertorul (pentru trecerea finală cu preview: folderul de staging)
+            glb_path: GLB-ul afișat de viewer
+            conversion_pass: "preview" (fără booleene) sau "final"
+            previous: amprentele conversiei afișate, pentru diff
+        
+        Returns:
+            True/False după rezultatul conversiei, None dacă jobul a fost anulat
+        """
+        print(f"[WATCHDOG] Converting ({conversion_pass}) {dxf_path} → {glb_path}")
+        command = [
+            "python", 
+            str(self.conversion_script),
+            str(dxf_path),
+            str(out_path),
+        ]
+        if conversion_pass == "preview":
+            # Preview-ul nu are nevoie de IFC (nu încarcă ifcopenshell)
+            command += ["--ifc=none", "--preview"]
+        else:
+            command.append(f"--ifc={FINAL_PASS_IFC}")
+            if out_path != glb_path:
+                # GLB-ul final rămâne în staging până la înlocuire; IFC-urile se scriu direct lângă GLB-ul afișat
+                command.append(f"--ifc-dir={glb_path.parent}")
+        conversion_start = time.monotonic()
+        result = job.run_process(command)
+        conversion_time = time.monotonic() - conversion_start
+        
+        if result is None:
+            print(f"[WATCHDOG] Conversion ({conversion_pass}) cancelled after {conversion_time:.2f}s (newer change): {dxf_path.name}")
+            return None
+        
+        returncode, _, stderr = result
+        if returncode != 0:
+            print(f"[WATCHDOG] Conversion ({conversion_pass}) failed: {stderr}")
+            return False
+        
+        print(f"[WATCHDOG] Conversion ({conversion_pass}) successful: {dxf_path.name} | conversion {conversion_time:.2f}s, "
+              f"wait in pool {job.started - job.dispatched:.2f}s, "
+              f"total since first event {time.monotonic() - job.first_event:.2f}s")
+        
+        # Așteaptă ca GLB-ul să fie complet scris
+        self._wait_for_file_complete(out_path, job)
+        if job.cancelled:
+            return None
+        if out_path != glb_path:
+            self._replace_outputs(out_path, glb_path)
+        
+        # Notifică Godot despre schimbare
+        diff, delta_path = self._compute_diff(glb_path, previous)
+        self._notify_godot_reload(dxf_path, glb_path, diff, delta_path, conversion_pass)
+        return True
+    
+    def _replace_outputs(self, staged_glb, glb_path):
+        """Mută atomic GLB-ul și mapping-ul din staging peste cele afișate (mapping-ul întâi)"""
+        staged_mapping = staged_glb.with_name(staged_glb.stem + "_mapping.json")
+        if staged_mapping.exists():
+            os.replace(staged_mapping, glb_path.with_name(glb_path.stem + "_mapping.json"))
+        os.replace(staged_glb, glb_path)
+        # Godot reimportă GLB-ul înlocuit doar fără fișierele de import vechi
+        self._clear_old_files(glb_path, keep_outputs=True)
+        print(f"[WATCHDOG] Final GLB replaced preview: {glb_path.name}")
+    
+    def _wait_for_file_complete(self, file_path, job=None):
         """Așteaptă ca fișierul să fie complet scris verificând dimensiunea stabilă"""
         max_wait = 5  # secunde
         stable_time = 0.5  # secunde de stabilitate
@@ -85,6 +297,8 @@ class DXFHandler(FileSystemEventHandler):
         start_time = time.time()
         
         while time.time() - start_time < max_wait:
+            if job is not None and job.cancelled:
+                return
             try:
                 current_size = file_path.stat().st_size
                 if current_size == last_size:
@@ -103,28 +317,82 @@ class DXFHandler(FileSystemEventHandler):
         
         print(f"[WATCHDOG] File wait timeout: {file_path}")
     
-    def _notify_godot_reload(self, dxf_path, glb_path):
-        """Scrie un signal file pentru Godot să știe că trebuie să reîncarce"""
+    def _compute_diff(self, glb_path, previous):
+        """Diferența față de conversia anterioară și GLB-ul delta (None, None dacă nu se poate)"""
+        if conversion_diff is None:
+            return None, None
+        try:
+            diff, delta_path = conversion_diff.compute_conversion_diff(glb_path, previous)
+        except Exception as e:
+            print(f"[WATCHDOG] Element diff failed, falling back to full reload: {e}")
+            return None, None
+        if diff is not None:
+            print(f"[WATCHDOG] Element diff: {len(diff['added'])} added, {len(diff['removed'])} removed, "
+                  f"{len(diff['changed'])} changed, {len(diff['renamed'])} renamed, {diff['unchanged']} unchanged")
+        return diff, delta_path
+    
+    def _notify_godot_reload(self, dxf_path, glb_path, diff=None, delta_path=None, conversion_pass="final"):
+        """
+        Scrie un signal file pentru Godot să știe că trebuie să reîncarce.
+        Cu diff, acțiunea este "patch": viewer-ul poate șterge nodurile removed/changed,
+        redenumi nodurile renamed și adăuga nodurile din delta_glb, fără să reimporte tot nivelul.
+        "pass" este "preview" (geometrie fără booleene) sau "final".
+        
+        Fișierul păstrează ultimul semnal al fiecărui DXF în "signals" (cheie: dxf_file), ca două
+        nivele terminate în aceeași secundă să nu se suprascrie; câmpurile de pe primul nivel
+        sunt ale ultimului semnal scris.
+        """
         signal_data = {
             "timestamp": time.time(),
             "dxf_file": str(dxf_path),
             "glb_file": str(glb_path),
-            "action": "reload"
+            "action": "reload",
+            "pass": conversion_pass
         }
+        if diff is not None:
+            signal_data["action"] = "patch"
+            signal_data["diff"] = diff
+            signal_data["delta_glb"] = str(delta_path) if delta_path else None
         
         try:
-            with open(self.callback_file, 'w') as f:
-                json.dump(signal_data, f, indent=2)
+            with _signal_lock:
+                signal_data["timestamp"] = time.time()
+                self._write_signal(signal_data)
             print(f"[WATCHDOG] Godot notified via {self.callback_file}")
         except Exception as e:
             print(f"[WATCHDOG] Failed to notify Godot: {e}")
     
-    def _clear_old_files(self, glb_path):
-        """Șterge fișierele vechi și cache-ul Godot complet"""
+    def _write_signal(self, signal_data):
+        """Adaugă semnalul la cele păstrate per DXF și scrie atomic signal file-ul (apelat cu _signal_lock)"""
+        signals = {}
+        try:
+            with open(self.callback_file, 'r') as f:
+                signals = json.load(f).get("signals") or {}
+        except (OSError, ValueError, AttributeError):
+            pass
+        signals[signal_data["dxf_file"]] = dict(signal_data)
+        
+        temp_file = self.callback_file.with_name(self.callback_file.name + ".tmp")
+        with open(temp_file, 'w') as f:
+            json.dump(dict(signal_data, signals=signals), f, indent=2)
+        for attempt in range(SIGNAL_REPLACE_ATTEMPTS):
+            try:
+                os.replace(temp_file, self.callback_file)
+                return
+            except PermissionError:
+                if attempt == SIGNAL_REPLACE_ATTEMPTS - 1:
+                    raise
+                time.sleep(0.05)
+    
+    def _clear_old_files(self, glb_path, keep_outputs=False):
+        """
+        Șterge fișierele vechi și cache-ul Godot complet
+        (cu keep_outputs, GLB-ul și mapping-ul rămân - tocmai au fost înlocuite)
+        """
         files_deleted = []
         
         # Șterge GLB-ul vechi
-        if glb_path.exists():
+        if glb_path.exists() and not keep_outputs:
             glb_path.unlink()
             files_deleted.append(f"GLB: {glb_path.name}")
         
@@ -135,8 +403,8 @@ class DXFHandler(FileSystemEventHandler):
             files_deleted.append(f"Import: {import_file.name}")
         
         # Șterge fișierul de mapping JSON și import-ul său
-        mapping_file = glb_path.with_suffix("_mapping.json")
-        if mapping_file.exists():
+        mapping_file = glb_path.with_name(glb_path.stem + "_mapping.json")
+        if mapping_file.exists() and not keep_outputs:
             mapping_file.unlink()
             files_deleted.append(f"Mapping: {mapping_file.name}")
         
@@ -145,6 +413,13 @@ class DXFHandler(FileSystemEventHandler):
             mapping_import.unlink()
             files_deleted.append(f"Mapping import: {mapping_import.name}")
         
+        # Șterge GLB-ul delta anterior și import-ul său (amprentele rămân pentru diff)
+        delta_file = glb_path.with_name(glb_path.stem + "_delta.glb")
+        for old_delta in (delta_file, Path(str(delta_file) + ".import")):
+            if old_delta.exists():
+                old_delta.unlink()
+                files_deleted.append(f"Delta: {old_delta.name}")
+        
         # Încearcă să șteargă din .godot/imported/
         try:
             project_folder = glb_path.parent.parent  # Presupun că GLB e în subfolder
@@ -179,14 +454,18 @@ def main():
         Path(folder).mkdir(exist_ok=True)
     Path(output_folder).mkdir(exist_ok=True)
     
-    # Configurează watchdog pentru fiecare folder
+    # Configurează watchdog pentru fiecare folder; toate folderele folosesc aceeași coadă de conversie
     observer = Observer()
+    job_queue = None
     for watch_folder in watch_folders:
-        event_handler = DXFHandler(watch_folder, output_folder, conversion_script, callback_file)
+        event_handler = DXFHandler(watch_folder, output_folder, conversion_script, callback_file, job_queue)
+        job_queue = event_handler.job_queue
         observer.schedule(event_handler, watch_folder, recursive=True)
         print(f"[WATCHDOG] Starting monitoring of {watch_folder}")
     
     print(f"[WATCHDOG] Output folder: {output_folder}")
+    print(f"[WATCHDOG] Debounce: {DEBOUNCE_SECONDS}s | max parallel conversions: {MAX_WORKERS} | "
+          f"preview pass: {PREVIEW_PASS} | final pass IFC: {FINAL_PASS_IFC}")
     print(f"[WATCHDOG] Press Ctrl+C to stop")
     
     observer.start()
@@ -199,6 +478,8 @@ def main():
         print("[WATCHDOG] Stopped")
     
     observer.join()
+    if job_queue is not None:
+        job_queue.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Element IDs - identificatori deterministici pentru elementele convertite
+========================================================================
+
+UUID-urile elementelor sunt UUIDv5 (bazate pe nume), derivate din:
+1. identitatea fișierului sursă (numele DXF-ului, fără folder și extensie)
+2. handle-ul DXF al entității (păstrat de aplicațiile CAD între salvări)
+3. indexul sub-părții (componentă de bloc, fragment boolean, material TOV)
+
+Aceeași intrare produce deci aceleași ID-uri la fiecare conversie, ceea ce permite
+cache-ul, diff-ul între conversii, reutilizarea nodurilor în Godot și urmărirea
+schimbărilor în IFC. GlobalId-urile IFC sunt forma comprimată (22 caractere) a
+acestor UUID-uri.
+"""
+
+import uuid
+from pathlib import Path
+
+# Namespace-ul fix al convertorului (uuid5(NAMESPACE_URL, "viewer2d/dxf-elements"))
+ELEMENT_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "viewer2d/dxf-elements")
+
+
+def source_identity(source) -> str:
+    """Identitatea fișierului sursă: numele fără folder și extensie, case-insensitive"""
+    return Path(str(source)).stem.lower()
+
+
+def derived_uuid(parent, *parts) -> str:
+    """
+    UUID derivat dintr-un UUID părinte și o cale de sub-părți
+    (ex. fragmentul 2 al unui element, property set-ul unui element).
+    """
+    return str(uuid.uuid5(uuid.UUID(str(parent)), "/".join(str(p) for p in parts)))
+
+
+def project_uuid(project_name) -> str:
+    """UUID-ul proiectului IFC (părintele ierarhiei site/building/storey și al relațiilor)"""
+    return str(uuid.uuid5(ELEMENT_NAMESPACE, f"project/{project_name}"))
+
+
+def ifc_guid(element_uuid) -> str:
+    """GlobalId IFC (UUID comprimat în 22 caractere) pentru un UUID"""
+    import ifcopenshell.guid
+    return ifcopenshell.guid.compress(uuid.UUID(str(element_uuid)).hex)
+
+
+class ElementIdFactory:
+    """
+    Generează UUID-urile elementelor unei conversii.
+
+    Cheia unui element este handle-ul DXF urmat de sub-părți; dacă aceeași cheie
+    apare din nou (ex. o componentă a aceluiași bloc inserat de două ori fără
+    handle de INSERT distinct), se adaugă numărul apariției, deci ID-urile rămân
+    unice și stabile cât timp ordinea entităților din DXF nu se schimbă.
+    """
+
+    def __init__(self, source):
+        self.namespace = uuid.uuid5(ELEMENT_NAMESPACE, source_identity(source))
+        self._issued = {}
+
+    def element_uuid(self, handle, *parts) -> str:
+        key = "/".join(str(p) for p in (handle,) + parts)
+        occurrence = self._issued.get(key, 0)
+        self._issued[key] = occurrence + 1
+        if occurrence:
+            key = f"{key}#{occurrence}"
+        return str(uuid.uuid5(self.namespace, key))
+
+
+class GlobalIdAllocator:
+    """
+    UUID-urile elementelor IFC ale unui model: primul element cu un UUID dat îl
+    primește neschimbat, fragmentele următoare (același UUID, ex. piese rezultate
+    din booleene) primesc UUID-uri derivate cu indexul fragmentului.
+    """
+
+    def __init__(self):
+        self._fragments = {}
+
+    def fragment_uuid(self, element_uuid) -> str:
+        fragment = self._fragments.get(element_uuid, 0)
+        self._fragments[element_uuid] = fragment + 1
+        if fragment:
+            return derived_uuid(element_uuid, "fragment", fragment)
+        return str(element_uuid)
+
+
+def _reference_key(value) -> str:
+    """Cheia stabilă a unei valori referite de o relație IFC"""
+    if hasattr(value, "is_a"):
+        if value.is_a("IfcRoot"):
+            return value.GlobalId
+        return f"{value.is_a()}:{getattr(value, 'Name', '') or ''}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(sorted(_reference_key(v) for v in value)) + "]"
+    return str(value)
+
+
+def stabilize_relationship_guids(model, namespace_uuid):
+    """
+    Înlocuiește GlobalId-urile aleatoare ale relațiilor (create de ifcopenshell.api
+    sau direct) cu UUID-uri derivate din clasa relației și din obiectele pe care le
+    leagă. Se apelează după ce toate obiectele au GlobalId-uri deterministe.
+    """
+    seen = {}
+    for relationship in model.by_type("IfcRelationship"):
+        info = relationship.get_info(recursive=False)
+        references = [f"{name}={_reference_key(value)}" for name, value in sorted(info.items())
+                      if name not in ("id", "type", "GlobalId", "OwnerHistory", "Name", "Description")
+                      and value is not None]
+        key = relationship.is_a() + "|" + "|".join(references)
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        if occurrence:
+            key = f"{key}#{occurrence}"
+        relationship.GlobalId = ifc_guid(derived_uuid(namespace_uuid, "relationship", key))
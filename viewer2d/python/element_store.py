@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+Element Store - proprietățile elementelor ca structure-of-arrays
+================================================================
+
+Fiecare element avea un dicționar `metadata` pe mesh (copiat cu `dict(mesh.metadata)` pentru
+fiecare fragment boolean) și o intrare de mapping cu ~20 de chei, cu conturul ca liste Python
+de float. Pe planurile cu mii de elemente, obiectele mici domină memoria și timpul de GC.
+ElementStore ține aceleași date pe coloane:
+1. Proprietățile numerice (z, arii, volume, unghiuri, alpha) în coloane float64, rolul și
+   flag-urile în coloane întregi / booleene
+2. Textele repetate (layere, tipuri IFC, bloc) ca indici într-un tabel de stringuri internate;
+   textele unice (uuid, handle, nume) într-o coloană de referințe
+3. Conturul (`vertices`) și `segment_lengths` în buffere float64 comune, indexate prin offset
+4. `None` și listele goale doar în schema rândului (fără obiecte); cheile rare sau mutabile
+   (`prism`, `insert_position`, ...) într-un dicționar per rând, ca până acum
+5. Geometria finală (fragmentele concatenate pe uuid) în buffere de vertecși / fețe cu
+   offset-uri, pentru coada IFC
+
+Meshurile și mapping-ul primesc `ElementRecord`, o vedere `MutableMapping` asupra unui rând:
+codul existent (`metadata["name"]`, `.get()`, `in`, `entry["volume"] = ...`) rămâne neschimbat,
+iar fragmentele booleene împart aceeași înregistrare în loc să o copieze. Fiecare rând își
+păstrează schema (ordinea cheilor și tipul valorilor), deci extras-urile GLB și mapping-ul JSON
+sunt identice cu cele scrise din dicționare.
+
+Listele citite din coloane (contur, culori, `is_cut_by` gol) sunt copii: se modifică prin
+atribuire (`entry["is_cut_by"] = existing + cuts`), nu cu `.append()`.
+"""
+
+from collections.abc import MutableMapping
+
+import numpy as np
+
+# Coloanele store-ului pe tipuri; cheile necunoscute (sau valorile de alt tip) rămân în dicționarul rândului
+FLOAT_KEYS = ("angle", "rotate_x", "rotate_y", "z_final", "z_relative", "global_z", "height",
+              "perimeter", "area", "lateral_area", "volume", "alpha", "material_alpha")
+INT_KEYS = ("role", "solid_flag")
+BOOL_KEYS = ("is_void", "extrusion")
+STRING_KEYS = ("layer", "component_layer", "material_layer", "ifc_type", "block_name")   # internate
+TEXT_KEYS = ("uuid", "dxf_handle", "handle", "name", "mesh_name", "component_name")    # unice per element
+COLOR_KEYS = ("color", "material_color")   # [r, g, b] float
+RGBA_KEYS = ("material_rgba",)             # np.ndarray float32 (4,)
+POINTS_KEYS = ("vertices",)                # conturul: [[x, y(, z)], ...] float
+NUMBERS_KEYS = ("segment_lengths",)        # [float, ...]
+LINK_KEYS = ("mapping_entry",)             # altă înregistrare din același store
+
+# Capacitatea inițială (rânduri); coloanele se dublează la nevoie
+STORE_INITIAL_CAPACITY = 256
+
+# Tipurile valorilor din schema unui rând
+KIND_FLOAT = "f"
+KIND_INT_AS_FLOAT = "j"    # int într-o coloană float (ex. "angle": 0), citit înapoi ca int
+KIND_INT = "i"
+KIND_BOOL = "b"
+KIND_STRING = "s"
+KIND_TEXT = "t"
+KIND_COLOR = "c"
+KIND_RGBA = "r"
+KIND_POINTS = "p"
+KIND_NUMBERS = "n"
+KIND_LINK = "l"
+KIND_NONE = "0"            # None, fără stocare
+KIND_EMPTY_LIST = "e"      # [], fără stocare (se citește ca listă nouă)
+KIND_OBJECT = "o"          # valoarea păstrată ca atare în dicționarul rândului
+
+# (dtype, valoare implicită, forma unei celule) pentru coloanele fiecărui tip
+_COLUMN_LAYOUT = {
+    KIND_FLOAT: (np.float64, np.nan, ()),
+    KIND_INT: (np.int64, 0, ()),
+    KIND_BOOL: (np.bool_, False, ()),
+    KIND_STRING: (np.int32, -1, ()),
+    KIND_TEXT: (object, None, ()),
+    KIND_COLOR: (np.float64, np.nan, (3,)),
+    KIND_RGBA: (np.float32, np.nan, (4,)),
+    KIND_POINTS: (np.int64, 0, (3,)),      # (start, număr de puncte, dimensiune)
+    KIND_NUMBERS: (np.int64, 0, (2,)),     # (start, număr)
+    KIND_LINK: (np.int32, -1, ()),
+}
+
+_KEY_KINDS = {}
+for _kind, _keys in ((KIND_FLOAT, FLOAT_KEYS), (KIND_INT, INT_KEYS), (KIND_BOOL, BOOL_KEYS),
+                     (KIND_STRING, STRING_KEYS), (KIND_TEXT, TEXT_KEYS), (KIND_COLOR, COLOR_KEYS),
+                     (KIND_RGBA, RGBA_KEYS), (KIND_POINTS, POINTS_KEYS), (KIND_NUMBERS, NUMBERS_KEYS),
+                     (KIND_LINK, LINK_KEYS)):
+    for _key in _keys:
+        _KEY_KINDS[_key] = _kind
+
+
+class StringTable:
+    """Stringuri internate: fiecare text distinct se păstrează o singură dată, rândurile țin indicele"""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+
+class _FloatPool:
+    """Buffer float64 care crește prin dublare; rândurile țin offset-ul și numărul de valori"""
+
+    def __init__(self, capacity=1024):
+        self.data = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+
+    def append(self, values):
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        end = self.size + len(values)
+        if end > len(self.data):
+            grown = np.empty(max(end, 2 * len(self.data)), dtype=np.float64)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        start = self.size
+        self.data[start:end] = values
+        self.size = end
+        return start
+
+
+def _is_float_list(value, length=None):
+    if type(value) is not list or (length is not None and len(value) != length):
+        return False
+    for item in value:
+        if not isinstance(item, float):
+            return False
+    return True
+
+
+def _points_dim(value):
+    """Dimensiunea punctelor unui contur nevid de float-uri (2 sau 3), sau None dacă nu se poate stoca pe coloană"""
+    dim = len(value[0]) if type(value[0]) is list else 0
+    if dim not in (2, 3):
+        return None
+    for point in value:
+        if type(point) is not list or len(point) != dim:
+            return None
+        for coord in point:
+            if not isinstance(coord, float):
+                return None
+    return dim
+
+
+class ElementStore:
+    """
+    Proprietățile tuturor elementelor unei conversii, pe coloane.
+
+    Rândurile se adaugă cu `add(values)` (un dicționar, ca înainte) și se citesc prin
+    `ElementRecord`; `column(key)` dă coloana unei chei scalare pentru toate rândurile.
+    Coloanele se alocă la prima folosire a cheii.
+    """
+
+    def __init__(self, capacity=STORE_INITIAL_CAPACITY):
+        self.size = 0
+        self.capacity = max(1, int(capacity))
+        self.columns = {}
+        self.schema = np.zeros(self.capacity, dtype=np.int32)
+        self.strings = StringTable()
+        self.points = _FloatPool()
+        self.numbers = _FloatPool()
+        self.extras = {}
+        # Schemele rândurilor: tuplu de (cheie, tip) internat + dicționarul cheie -> tip
+        self.schema_keys = [()]
+        self.schema_kinds = [{}]
+        self._schema_codes = {(): 0}
+        self._transitions = {}
+        self._geometry = None
+
+    def __len__(self):
+        return self.size
+
+    def _column(self, key, kind):
+        column = self.columns.get(key)
+        if column is None:
+            dtype, fill, shape = _COLUMN_LAYOUT[kind]
+            column = self.columns[key] = np.full((self.capacity,) + shape, fill, dtype=dtype)
+        return column
+
+    def _grow(self):
+        capacity = 2 * self.capacity
+        for key, column in self.columns.items():
+            dtype, fill, shape = _COLUMN_LAYOUT[_KEY_KINDS[key]]
+            grown = np.full((capacity,) + shape, fill, dtype=dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[key] = grown
+        schema = np.zeros(capacity, dtype=np.int32)
+        schema[:self.size] = self.schema[:self.size]
+        self.schema = schema
+        self.capacity = capacity
+
+    def add(self, values=None):
+        """Adaugă un element (cheile în ordinea din `values`) și întoarce înregistrarea lui"""
+        if self.size == self.capacity:
+            self._grow()
+        row = self.size
+        self.size += 1
+        if values:
+            self.schema[row] = self._schema_code(tuple([(key, self._write(row, key, value))
+                                                        for key, value in values.items()]))
+        return ElementRecord(self, row)
+
+    def _schema_code(self, keys):
+        code = self._schema_codes.get(keys)
+        if code is None:
+            code = len(self.schema_keys)
+            self._schema_codes[keys] = code
+            self.schema_keys.append(keys)
+            self.schema_kinds.append(dict(keys))
+        return code
+
+    def _write(self, row, key, value):
+        """Scrie valoarea în coloana ei și întoarce tipul din schemă"""
+        if value is None:
+            return KIND_NONE
+        kind = _KEY_KINDS.get(key)
+        if kind == KIND_FLOAT:
+            if isinstance(value, float):
+                self._column(key, kind)[row] = value
+                return KIND_FLOAT
+            if type(value) is int and abs(value) < 2 ** 53:
+                self._column(key, kind)[row] = value
+                return KIND_INT_AS_FLOAT
+        elif kind == KIND_TEXT or kind == KIND_STRING:
+            if type(value) is str:
+                self._column(key, kind)[row] = value if kind == KIND_TEXT else self.strings.code(value)
+                return kind
+        elif kind == KIND_INT:
+            if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+                self._column(key, kind)[row] = value
+                return KIND_INT
+        elif kind == KIND_BOOL:
+            if type(value) is bool:
+                self._column(key, kind)[row] = value
+                return KIND_BOOL
+        elif kind == KIND_COLOR:
+            if _is_float_list(value, 3):
+                self._column(key, kind)[row] = value
+                return KIND_COLOR
+        elif kind == KIND_RGBA:
+            if isinstance(value, np.ndarray) and value.dtype == np.float32 and value.shape == (4,):
+                self._column(key, kind)[row] = value
+                return KIND_RGBA
+        elif kind == KIND_POINTS:
+            dim = _points_dim(value) if type(value) is list and value else None
+            if dim is not None:
+                self._column(key, kind)[row] = (self.points.append(value), len(value), dim)
+                return KIND_POINTS
+        elif kind == KIND_NUMBERS:
+            if value and _is_float_list(value):
+                self._column(key, kind)[row] = (self.numbers.append(value), len(value))
+                return KIND_NUMBERS
+        elif kind == KIND_LINK:
+            if isinstance(value, ElementRecord) and value.store is self:
+                self._column(key, kind)[row] = value.row
+                return KIND_LINK
+        if type(value) is list and not value:
+            return KIND_EMPTY_LIST
+        self.extras.setdefault(row, {})[key] = value
+        return KIND_OBJECT
+
+    def read(self, row, key, kind):
+        """Valoarea cheii `key` a rândului, în tipul original"""
+        if kind == KIND_FLOAT:
+            return float(self.columns[key][row])
+        if kind == KIND_TEXT:
+            return self.columns[key][row]
+        if kind == KIND_STRING:
+            return self.strings.values[self.columns[key][row]]
+        if kind == KIND_NONE:
+            return None
+        if kind == KIND_OBJECT:
+            return self.extras[row][key]
+        if kind == KIND_INT_AS_FLOAT or kind == KIND_INT:
+            return int(self.columns[key][row])
+        if kind == KIND_BOOL:
+            return bool(self.columns[key][row])
+        if kind == KIND_EMPTY_LIST:
+            return []
+        if kind == KIND_COLOR:
+            return self.columns[key][row].tolist()
+        if kind == KIND_RGBA:
+            return self.columns[key][row].copy()
+        if kind == KIND_POINTS:
+            start, count, dim = self.columns[key][row]
+            return self.points.data[start:start + count * dim].reshape((count, dim)).tolist()
+        if kind == KIND_NUMBERS:
+            start, count = self.columns[key][row]
+            return self.numbers.data[start:start + count].tolist()
+        return ElementRecord(self, int(self.columns[key][row]))
+
+    def set(self, row, key, value):
+        code = int(self.schema[row])
+        old_kind = self.schema_kinds[code].get(key)
+        if old_kind == KIND_OBJECT:
+            del self.extras[row][key]
+        kind = self._write(row, key, value)
+        if kind == old_kind:
+            return
+        transition = (code, key, kind)
+        new_code = self._transitions.get(transition)
+        if new_code is None:
+            keys = self.schema_keys[code]
+            if old_kind is None:
+                keys = keys + ((key, kind),)
+            else:
+                keys = tuple((k, kind if k == key else v) for k, v in keys)
+            new_code = self._transitions[transition] = self._schema_code(keys)
+        self.schema[row] = new_code
+        if key in self.columns and kind not in _COLUMN_LAYOUT and kind != KIND_INT_AS_FLOAT:
+            self._clear(row, key)
+
+    def delete(self, row, key):
+        code = int(self.schema[row])
+        if self.schema_kinds[code][key] == KIND_OBJECT:
+            del self.extras[row][key]
+        elif key in self.columns:
+            self._clear(row, key)
+        transition = (code, key, None)
+        new_code = self._transitions.get(transition)
+        if new_code is None:
+            keys = tuple(item for item in self.schema_keys[code] if item[0] != key)
+            new_code = self._transitions[transition] = self._schema_code(keys)
+        self.schema[row] = new_code
+
+    def _clear(self, row, key):
+        """Valoarea implicită în coloană (column() nu mai vede cheia scoasă din coloană)"""
+        self.columns[key][row] = _COLUMN_LAYOUT[_KEY_KINDS[key]][1]
+
+    def column(self, key):
+        """
+        Coloana cheii scalare `key` pentru toate rândurile (copie).
+
+        Returns:
+            np.ndarray: float64 cu NaN unde rândul nu are cheia (FLOAT_KEYS), int / bool pentru
+            INT_KEYS / BOOL_KEYS, textul sau None pentru STRING_KEYS / TEXT_KEYS
+        """
+        kind = _KEY_KINDS.get(key)
+        if kind not in (KIND_FLOAT, KIND_INT, KIND_BOOL, KIND_STRING, KIND_TEXT):
+            raise KeyError(f"{key} is not a scalar column")
+        column = self.columns.get(key)
+        if kind == KIND_STRING:
+            values = self.strings.values
+            codes = column[:self.size] if column is not None else [-1] * self.size
+            return np.array([values[code] if code >= 0 else None for code in codes], dtype=object)
+        if column is None:
+            dtype, fill, _ = _COLUMN_LAYOUT[kind]
+            return np.full(self.size, fill, dtype=dtype)
+        return column[:self.size].copy()
+
+    def nbytes(self):
+        """Memoria coloanelor și a bufferelor (fără stringuri și dicționarele de rând)"""
+        arrays = list(self.columns.values()) + [self.schema, self.points.data, self.numbers.data]
+        return int(sum(array.nbytes for array in arrays))
+
+    # -----------------------------
+    # Geometria finală
+    # -----------------------------
+    def collect_geometry(self, meshes):
+        """
+        Geometria finală a meshurilor grupată după uuid, în două buffere comune (vertecși, fețe)
+        cu offset-uri per element; fragmentele cu același uuid sunt concatenate.
+        """
+        fragments = {}
+        for mesh in meshes:
+            mesh_uuid = mesh.metadata.get("uuid")
+            if mesh_uuid is None or len(mesh.vertices) == 0 or len(mesh.faces) == 0:
+                continue
+            fragments.setdefault(mesh_uuid, []).append(mesh)
+
+        index, vertices, faces = {}, [], []
+        vertex_count = face_count = 0
+        for mesh_uuid, parts in fragments.items():
+            v0, f0 = vertex_count, face_count
+            for part in parts:
+                vertices.append(np.asarray(part.vertices, dtype=np.float64))
+                faces.append(np.asarray(part.faces, dtype=np.int64) + (vertex_count - v0))
+                vertex_count += len(part.vertices)
+                face_count += len(part.faces)
+            index[mesh_uuid] = (v0, vertex_count, f0, face_count)
+
+        self._geometry = (
+            index,
+            np.vstack(vertices) if vertices else np.zeros((0, 3)),
+            np.vstack(faces) if faces else np.zeros((0, 3), dtype=np.int64),
+        )
+
+    def geometry(self, mesh_uuid):
+        """(vertecși, fețe) finale ale elementului (fețele indexate local) sau (None, None)"""
+        if self._geometry is None:
+            return None, None
+        index, vertices, faces = self._geometry
+        offsets = index.get(mesh_uuid)
+        if offsets is None:
+            return None, None
+        v0, v1, f0, f1 = offsets
+        return vertices[v0:v1], faces[f0:f1]
+
+
+class ElementRecord(MutableMapping):
+    """
+    Un rând din ElementStore, văzut ca dicționar (ordinea cheilor și tipurile valorilor se păstrează).
+
+    `copy()` / `to_dict()` întorc un dicționar independent; `tolist()` există pentru encoder-ul
+    JSON al trimesh (extras GLB cu înregistrări imbricate, ex. "mapping_entry").
+    """
+
+    __slots__ = ("store", "row")
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def _kinds(self):
+        store = self.store
+        return store.schema_kinds[store.schema[self.row]]
+
+    def __getitem__(self, key):
+        kind = self._kinds().get(key)
+        if kind is None:
+            raise KeyError(key)
+        return self.store.read(self.row, key, kind)
+
+    def get(self, key, default=None):
+        kind = self._kinds().get(key)
+        if kind is None:
+            return default
+        return self.store.read(self.row, key, kind)
+
+    def __setitem__(self, key, value):
+        self.store.set(self.row, key, value)
+
+    def __delitem__(self, key):
+        if key not in self._kinds():
+            raise KeyError(key)
+        self.store.delete(self.row, key)
+
+    def __contains__(self, key):
+        return key in self._kinds()
+
+    def __iter__(self):
+        store = self.store
+        return iter([key for key, _ in store.schema_keys[store.schema[self.row]]])
+
+    def __len__(self):
+        return len(self._kinds())
+
+    def __eq__(self, other):
+        if isinstance(other, ElementRecord) and other.store is self.store and other.row == self.row:
+            return True
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def to_dict(self):
+        """Dicționar independent, cu înregistrările imbricate convertite și ele"""
+        store, row = self.store, self.row
+        result = {}
+        for key, kind in store.schema_keys[store.schema[row]]:
+            value = store.read(row, key, kind)
+            result[key] = value.to_dict() if isinstance(value, ElementRecord) else value
+        return result
+
+    copy = to_dict
+    tolist = to_dict
+
+    def __deepcopy__(self, memo):
+        import copy
+        return copy.deepcopy(self.to_dict(), memo)
+
+    def __reduce__(self):
+        return dict, (self.to_dict(),)
+
+    def __repr__(self):
+        return f"ElementRecord({self.to_dict()!r})"
+
+
+def make_record(store, values):
+    """Înregistrare în `store` sau, fără store, dicționarul însuși (apelurile vechi rămân valide)"""
+    if store is None:
+        return values
+    return store.add(values)
+
+
+def share(metadata):
+    """Metadata pentru un fragment al meshului: înregistrarea se împarte, dicționarele simple se copiază"""
+    if isinstance(metadata, ElementRecord):
+        return metadata
+    return dict(metadata)
+
+
+def plain(value):
+    """`default` pentru json.dump: înregistrările se scriu ca dicționare"""
+    if isinstance(value, ElementRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Extrusion Kernel - extrudarea verticală a unui lot de amprente în bufferele comune
+==================================================================================
+
+`trimesh.creation.extrude_polygon` costă ~0.7 ms per element (triangulare, Trimesh cu
+`process=True` care reunește vertecșii, cache-uri), plus `apply_translation`; pe planurile
+cu mii de elemente mici costul pe obiect domină conversia. Kernel-ul:
+1. Normalizează inelele (exterior CCW, goluri CW, fără puncte consecutive duplicate)
+2. Triangulează capacele cu earcut (`mapbox_earcut`, goluri suportate; manifold3d ca rezervă)
+3. Generează pereții laterali vectorizat (NumPy) pentru tot lotul, direct pe vertecșii
+   capacelor, deci rezultatul este închis (watertight) fără reunirea vertecșilor
+4. Scrie totul într-un singur buffer de vertecși și unul de fețe, cu tabele de offset
+   per element; `Trimesh` se creează doar la cerere (`ExtrusionBatch.mesh`)
+
+Geometria este aceeași ca la `extrude_polygon` + `apply_translation` (aceiași vertecși,
+aceleași volume); diferă doar ordinea vertecșilor și a triunghiurilor capacelor.
+"""
+
+import numpy as np
+import trimesh
+
+# Distanța sub care două puncte consecutive ale unui inel se consideră duplicate
+RING_MERGE_TOLERANCE = 1e-8
+
+
+def _ring_array(coords):
+    """Inelul ca (n, 2) float64, fără punctul de închidere și fără duplicate consecutive"""
+    ring = np.asarray(coords, dtype=np.float64)[:, :2]
+    if len(ring) > 1 and np.all(np.abs(ring[0] - ring[-1]) <= RING_MERGE_TOLERANCE):
+        ring = ring[:-1]
+    if len(ring) > 1:
+        step = np.abs(np.diff(ring, axis=0, append=ring[:1])).max(axis=1)
+        ring = ring[step > RING_MERGE_TOLERANCE]
+    return ring
+
+
+def _signed_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]) + x[-1] * y[0] - x[0] * y[-1])
+
+
+def footprint_rings(footprint):
+    """
+    Inelele unei amprente: exteriorul CCW urmat de goluri CW.
+
+    Args:
+        footprint: shapely Polygon sau listă de puncte (x, y) (exterior fără goluri)
+
+    Returns:
+        list: (n, 2) float64 per inel sau listă goală pentru amprentele degenerate
+    """
+    if hasattr(footprint, "exterior"):
+        exterior, holes = footprint.exterior.coords, [hole.coords for hole in footprint.interiors]
+    else:
+        exterior, holes = footprint, []
+
+    rings = []
+    for index, coords in enumerate([exterior] + holes):
+        ring = _ring_array(coords)
+        if len(ring) < 3:
+            if index == 0:
+                return []
+            continue
+        # Exteriorul în sens trigonometric, golurile invers (normalele pereților spre exterior)
+        if (_signed_area(ring) > 0) != (index == 0):
+            ring = ring[::-1]
+        rings.append(ring)
+    return rings
+
+
+def triangulate_rings(rings):
+    """
+    Triangularea capacului (earcut, cu goluri).
+
+    Returns:
+        (m, 3) int64: indici în inelele concatenate (sensul triunghiurilor nu este garantat,
+        extrude_batch le orientează pe tot lotul)
+    """
+    vertices = np.vstack(rings) if len(rings) > 1 else rings[0]
+    try:
+        from mapbox_earcut import triangulate_float64
+        ends = np.cumsum([len(ring) for ring in rings]).astype(np.uint32)
+        return np.asarray(triangulate_float64(vertices, ends), dtype=np.int64).reshape((-1, 3))
+    except ImportError:
+        import manifold3d
+        return np.asarray(manifold3d.triangulate(rings), dtype=np.int64).reshape((-1, 3))
+
+
+class ExtrusionBatch:
+    """
+    Rezultatul extrudării unui lot: buffere comune + offset-uri per element.
+
+    Attributes:
+        vertices: (N, 3) float64 - vertecșii tuturor elementelor (pe element: capacul de jos, apoi cel de sus)
+        faces: (M, 3) int64 - fețele, cu indici globali în `vertices`
+        vertex_offsets: (E + 1,) int64 - elementul i are vertecșii vertex_offsets[i]:vertex_offsets[i + 1]
+        face_offsets: (E + 1,) int64 - elementul i are fețele face_offsets[i]:face_offsets[i + 1]
+        areas: (E,) float64 - aria amprentei (0 pentru amprentele degenerate, fără geometrie)
+        heights: (E,) float64 - înălțimea de extrudare
+    """
+
+    def __init__(self, vertices, faces, vertex_offsets, face_offsets, areas, heights):
+        self.vertices = vertices
+        self.faces = faces
+        self.vertex_offsets = vertex_offsets
+        self.face_offsets = face_offsets
+        self.areas = areas
+        self.heights = heights
+
+    def __len__(self):
+        return len(self.areas)
+
+    def element(self, index):
+        """(vertecși, fețe) ale elementului, cu fețele indexate local"""
+        v0, v1 = self.vertex_offsets[index], self.vertex_offsets[index + 1]
+        f0, f1 = self.face_offsets[index], self.face_offsets[index + 1]
+        return self.vertices[v0:v1], self.faces[f0:f1] - v0
+
+    def volume(self, index):
+        return float(self.areas[index] * abs(self.heights[index]))
+
+    def mesh(self, index):
+        """Trimesh-ul elementului (fără procesare: geometria este deja închisă și orientată) sau None"""
+        vertices, faces = self.element(index)
+        if len(faces) == 0:
+            return None
+        return trimesh.Trimesh(vertices=vertices.copy(), faces=faces, process=False)
+
+    def combined(self, indices):
+        """Un singur Trimesh cu elementele date (ex. reuniunea voidurilor), direct din buffere, sau None"""
+        parts = [self.element(index) for index in indices if self.face_offsets[index + 1] > self.face_offsets[index]]
+        if not parts:
+            return None
+        offsets = np.cumsum([0] + [len(vertices) for vertices, _ in parts[:-1]])
+        return trimesh.Trimesh(vertices=np.vstack([vertices for vertices, _ in parts]),
+                               faces=np.vstack([faces + offset for (_, faces), offset in zip(parts, offsets)]),
+                               process=False)
+
+
+def extrude_batch(footprints, heights, z_offsets=None):
+    """
+    Extrudează vertical un lot de amprente.
+
+    Args:
+        footprints: shapely Polygon sau liste de puncte (x, y), câte una per element
+        heights: înălțimile de extrudare (negativ = în jos de la baza Z)
+        z_offsets: baza Z a fiecărui element (implicit 0)
+
+    Returns:
+        ExtrusionBatch
+    """
+    count = len(footprints)
+    heights = np.asarray(heights, dtype=np.float64).reshape(-1)
+    z_offsets = np.zeros(count) if z_offsets is None else np.asarray(z_offsets, dtype=np.float64).reshape(-1)
+
+    points, ring_lengths, cap_faces = [], [], []
+    ring_sizes = np.zeros(count, dtype=np.int64)
+    for index, footprint in enumerate(footprints):
+        rings = footprint_rings(footprint)
+        if not rings or abs(heights[index]) <= RING_MERGE_TOLERANCE:
+            cap_faces.append(np.zeros((0, 3), dtype=np.int64))
+            continue
+        faces = triangulate_rings(rings)
+        if len(faces) == 0:
+            cap_faces.append(faces)
+            continue
+        points.extend(rings)
+        ring_lengths.extend(len(ring) for ring in rings)
+        cap_faces.append(faces)
+        ring_sizes[index] = sum(len(ring) for ring in rings)
+
+    # Offset-uri: fiecare element are 2n vertecși și 2m + 2n fețe (capace + pereți)
+    cap_counts = np.array([len(faces) for faces in cap_faces], dtype=np.int64)
+    vertex_offsets = np.concatenate([[0], np.cumsum(2 * ring_sizes)])
+    face_offsets = np.concatenate([[0], np.cumsum(2 * cap_counts + 2 * ring_sizes)])
+    if not points:
+        return ExtrusionBatch(np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64),
+                              vertex_offsets, face_offsets, np.zeros(count), heights)
+
+    flat = np.vstack(points)
+    owner = np.repeat(np.arange(count), ring_sizes)
+    local = np.arange(len(flat)) - np.repeat(vertex_offsets[:-1] // 2, ring_sizes)
+    base = vertex_offsets[:-1][owner]
+    size = ring_sizes[owner]
+    bottom_z = z_offsets[owner]
+
+    # Vecinul fiecărui punct în inelul lui (ultimul punct revine la începutul inelului)
+    ring_lengths = np.asarray(ring_lengths, dtype=np.int64)
+    ring_ends = np.cumsum(ring_lengths)
+    following_flat = np.arange(1, len(flat) + 1)
+    following_flat[ring_ends - 1] = ring_ends - ring_lengths
+    # Aria amprentei (shoelace pe tot lotul): exteriorul CCW pozitiv, golurile CW negative
+    cross = flat[:, 0] * flat[following_flat, 1] - flat[following_flat, 0] * flat[:, 1]
+    areas = 0.5 * np.bincount(owner, weights=cross, minlength=count)
+
+    vertices = np.empty((vertex_offsets[-1], 3), dtype=np.float64)
+    vertices[base + local, :2] = flat
+    vertices[base + local, 2] = bottom_z
+    vertices[base + size + local, :2] = flat
+    vertices[base + size + local, 2] = bottom_z + heights[owner]
+
+    faces = np.empty((face_offsets[-1], 3), dtype=np.int64)
+    cap_owner = np.repeat(np.arange(count), cap_counts)
+    caps = np.vstack(cap_faces) + vertex_offsets[:-1][cap_owner, None]
+    # Orientarea triunghiurilor capacului după semnul ariei (earcut nu garantează sensul)
+    a, b, c = vertices[caps[:, 0]], vertices[caps[:, 1]], vertices[caps[:, 2]]
+    clockwise = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0]) < 0
+    caps[clockwise] = caps[clockwise][:, ::-1]
+    cap_local = np.arange(len(caps)) - np.repeat(np.concatenate([[0], np.cumsum(cap_counts)])[:-1], cap_counts)
+    cap_start = face_offsets[:-1][cap_owner]
+    # Capacul de jos cu normala în jos, cel de sus (aceiași indici + n) cu normala în sus
+    faces[cap_start + cap_local] = caps[:, ::-1]
+    faces[cap_start + cap_counts[cap_owner] + cap_local] = caps + ring_sizes[cap_owner, None]
+
+    # Pereții: două triunghiuri per muchie de inel (jos i -> jos j -> sus j, jos i -> sus j -> sus i)
+    following = base + local + (following_flat - np.arange(len(flat)))
+    current = base + local
+    side_start = face_offsets[:-1][owner] + 2 * cap_counts[owner] + 2 * local
+    faces[side_start] = np.column_stack([current, following, following + size])
+    faces[side_start + 1] = np.column_stack([current, following + size, current + size])
+
+    # Extrudarea în jos inversează orientarea tuturor fețelor elementului
+    negative = heights < 0
+    if negative.any():
+        flip = np.repeat(negative, face_offsets[1:] - face_offsets[:-1])
+        faces[flip] = faces[flip][:, ::-1]
+
+    return ExtrusionBatch(vertices, faces, vertex_offsets, face_offsets, areas, heights)
+
+
+def extrude_footprint(footprint, height, z_offset=0.0):
+    """
+    Extrudarea unui singur element (lot de un element): înlocuiește
+    `extrude_polygon(poly, height)` + `apply_translation([0, 0, z_offset])`.
+
+    Returns:
+        trimesh.Trimesh sau None pentru amprentele degenerate
+    """
+    return extrude_batch([footprint], [height], [z_offset]).mesh(0)
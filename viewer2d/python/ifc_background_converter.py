@@ -3,19 +3,34 @@
 IFC Background Converter - Conversie automată și robustă în IFC
 Convertește automat toate elementele din DXF în IFC în timpul procesării GLB,
 cu mapare automată a layerelor și metadata complete.
+
+Conversia rulează într-un proces separat (nu thread daemon), astfel încât
+supraviețuiește ieșirii scriptului principal și nu concurează pe GIL cu
+exportul GLB. Datele (metadata + geometria finală) sunt transmise printr-un
+fișier .npz temporar, IFC-ul se scrie atomic (temp + rename), iar progresul
+se raportează în `<output>.status.json`.
+
+Utilizare job (pornit automat de start_background_conversion):
+    python ifc_background_converter.py <job.npz>
 """
 
 import json
 import os
 import re
-import threading
+import subprocess
+import sys
+import tempfile
 import time
 from typing import Dict, List, Tuple, Any, Optional
 import ifcopenshell
 import ifcopenshell.api
 import ifcopenshell.util.unit
 import uuid as uuid_module
+import numpy as np
+from element_ids import GlobalIdAllocator, derived_uuid, ifc_guid, project_uuid, stabilize_relationship_guids
 from datetime import datetime
+from ifc_geometry import (create_triangulated_face_set, create_polygonal_face_set, create_body_representation,
+                          RepresentationMapCache)
 
 # Maparea layerelor către tipurile IFC
 IFC_LAYER_MAPPING = {
@@ -59,6 +74,47 @@ IFC_LAYER_MAPPING = {
     'IfcBuildingElementProxy': 'IfcBuildingElementProxy'
 }
 
+# Modurile de scriere a geometriei:
+#   auto         - IfcPolygonalFaceSet (triunghiuri coplanare unite) pentru extrudări,
+#                  IfcTriangulatedFaceSet pentru restul
+#   polygonal    - IfcPolygonalFaceSet pentru toate elementele
+#   triangulated - IfcTriangulatedFaceSet pentru toate elementele
+#   brep         - IfcManifoldSolidBrep cu câte un IfcFace per triunghi (comportamentul vechi)
+GEOMETRY_MODES = ("auto", "polygonal", "triangulated", "brep")
+
+# Stările raportate în fișierul de status
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+def get_status_path(output_ifc_path: str) -> str:
+    """Calea fișierului de status pentru un IFC generat în background"""
+    return output_ifc_path + ".status.json"
+
+def write_status(output_ifc_path: str, state: str, **fields):
+    """Scrie atomic fișierul de status (temp + rename), ca viewer-ul să nu citească JSON parțial"""
+    status_path = get_status_path(output_ifc_path)
+    status = {
+        "state": state,
+        "ifc_file": output_ifc_path,
+        "pid": os.getpid(),
+        "timestamp": time.time()
+    }
+    status.update(fields)
+    tmp_path = status_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status, f, indent=2)
+    os.replace(tmp_path, status_path)
+
+def read_status(output_ifc_path: str) -> Optional[Dict[str, Any]]:
+    """Citește fișierul de status (None dacă nu există sau nu poate fi citit)"""
+    try:
+        with open(get_status_path(output_ifc_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
 # Predefined Types pentru fiecare tip IFC
 IFC_PREDEFINED_TYPES = {
     'IfcWall': ['STANDARD', 'POLYGONAL', 'SHEAR', 'CORE', 'PLASTERWALL', 'PARAPET', 'PARTITIONING', 'SOLIDWALL', 'RETAININGWALL', 'MOVABLE', 'ELEMENTEDWALL'],
@@ -75,8 +131,11 @@ IFC_PREDEFINED_TYPES = {
 class IfcBackgroundConverter:
     """Converter IFC care rulează în background în timpul procesării DXF→GLB"""
     
-    def __init__(self, project_name: str = "Auto-Generated IFC"):
+    def __init__(self, project_name: str = "Auto-Generated IFC", geometry_mode: str = "auto"):
+        if geometry_mode not in GEOMETRY_MODES:
+            raise ValueError(f"Mod geometrie necunoscut: {geometry_mode} (valide: {', '.join(GEOMETRY_MODES)})")
         self.project_name = project_name
+        self.geometry_mode = geometry_mode
         self.model = None
         self.project = None
         self.site = None
@@ -85,47 +144,96 @@ class IfcBackgroundConverter:
         self.owner_history = None
         self.context = None
         self.units = None
-        self.conversion_thread = None
+        self.conversion_process = None
+        self.output_ifc_path = None
         self.conversion_data = []
+        self.conversion_meshes = []
         self.conversion_complete = False
-        
-    def queue_element_for_conversion(self, element_data: Dict[str, Any]):
-        """Adaugă un element în coada de conversie IFC"""
+        self.representation_maps = None  # Geometrii repetate -> IfcRepresentationMap
+        self.project_uuid = project_uuid(project_name)
+        self.global_ids = GlobalIdAllocator()
+        
+    def queue_element_for_conversion(self, element_data: Dict[str, Any], vertices=None, faces=None):
+        """
+        Adaugă un element în coada de conversie IFC.
+        
+        Args:
+            element_data: Intrarea din mapping (metadata)
+            vertices: Vârfurile finale ale mesh-ului (N x 3), opțional
+            faces: Triunghiurile finale ale mesh-ului (M x 3), opțional
+        """
         self.conversion_data.append(element_data.copy())
+        if vertices is not None and faces is not None and len(vertices) > 0 and len(faces) > 0:
+            self.conversion_meshes.append((np.asarray(vertices, dtype=np.float64),
+                                           np.asarray(faces, dtype=np.int64)))
+        else:
+            self.conversion_meshes.append(None)
         
     def start_background_conversion(self, output_ifc_path: str):
-        """Pornește conversia IFC în background"""
+        """
+        Pornește conversia IFC într-un proces separat.
+        
+        Elementele și geometria sunt scrise într-un .npz temporar lângă fișierul
+        IFC; procesul copil îl citește, scrie IFC-ul atomic și actualizează
+        fișierul de status. Procesul nu este legat de durata de viață a
+        scriptului părinte.
+        """
         print(f"[DEBUG] Starting background IFC conversion to: {output_ifc_path}")
+        self.output_ifc_path = output_ifc_path
+        self.conversion_complete = False
         
-        self.conversion_thread = threading.Thread(
-            target=self._background_conversion_worker,
-            args=(output_ifc_path,),
-            daemon=True
-        )
-        self.conversion_thread.start()
-        
-    def _background_conversion_worker(self, output_ifc_path: str):
-        """Worker thread pentru conversia IFC în background"""
-        try:
-            print(f"[DEBUG] Background IFC conversion started with {len(self.conversion_data)} elements")
-            
-            # Creează modelul IFC
-            self._create_ifc_model()
-            
-            # Procesează toate elementele din coadă
-            for element_data in self.conversion_data:
-                self._convert_element_to_ifc(element_data)
-                
-            # Salvează fișierul IFC
-            self._save_ifc_file(output_ifc_path)
-            
-            self.conversion_complete = True
-            print(f"[SUCCESS] Background IFC conversion completed: {output_ifc_path}")
+        output_dir = os.path.dirname(os.path.abspath(output_ifc_path))
+        fd, job_path = tempfile.mkstemp(prefix=".ifc_job_", suffix=".npz", dir=output_dir)
+        os.close(fd)
+        write_conversion_job(job_path, output_ifc_path, self.project_name,
+                             self.conversion_data, self.conversion_meshes, self.geometry_mode)
+        write_status(output_ifc_path, STATUS_QUEUED, elements=len(self.conversion_data))
+        
+        # Output-ul procesului merge într-un log separat: un pipe moștenit ar ține
+        # blocat apelantul (ex. subprocess.run cu capture_output) până la final
+        log_path = output_ifc_path + ".log"
+        popen_kwargs = {}
+        if os.name == "nt":
+            popen_kwargs["creationflags"] = getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+        else:
+            popen_kwargs["start_new_session"] = True
+        with open(log_path, "w", encoding="utf-8") as log_file:
+            self.conversion_process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), job_path],
+                stdin=subprocess.DEVNULL, stdout=log_file, stderr=subprocess.STDOUT,
+                cwd=output_dir, **popen_kwargs
+            )
+        print(f"[DEBUG] IFC job pid={self.conversion_process.pid} | status: {get_status_path(output_ifc_path)}")
+        
+    def run_conversion(self, output_ifc_path: str) -> bool:
+        """Rulează conversia IFC în procesul curent (folosit de job)"""
+        print(f"[DEBUG] IFC conversion started with {len(self.conversion_data)} elements")
+        
+        # Creează modelul IFC
+        self.global_ids = GlobalIdAllocator()
+        self._create_ifc_model()
+        
+        # Prima trecere: numără geometriile identice (ferestre, blocuri repetate)
+        self.representation_maps = RepresentationMapCache(self.model, self.context)
+        elements = []
+        for element_data, mesh in zip(self.conversion_data, self.conversion_meshes):
+            if mesh is not None:
+                element_data = dict(element_data)
+                element_data['vertices'], element_data['triangles'] = mesh
+                mode = self._resolve_geometry_mode(element_data)
+                if mode != "brep":
+                    element_data['canonical'] = self.representation_maps.register(*mesh, variant=mode)
+            elements.append(element_data)
+        
+        # Procesează toate elementele din coadă
+        for element_data in elements:
+            self._convert_element_to_ifc(element_data)
+        print(f"[DEBUG] Representation maps: {self.representation_maps.map_count} shared geometries, "
+              f"{self.representation_maps.instance_count} mapped instances")
             
-        except Exception as e:
-            print(f"[ERROR] Background IFC conversion failed: {e}")
-            import traceback
-            traceback.print_exc()
+        # Salvează fișierul IFC
+        self.conversion_complete = self._save_ifc_file(output_ifc_path)
+        return self.conversion_complete
             
     def _create_ifc_model(self):
         """Creează modelul IFC cu structurile de bază"""
@@ -226,7 +334,7 @@ class IfcBackgroundConverter:
         """Creează ierarhia proiectului: Project → Site → Building → Storey"""
         # Creează proiectul
         self.project = self.model.create_entity("IfcProject",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=ifc_guid(self.project_uuid),
             OwnerHistory=self.owner_history,
             Name=self.project_name,
             Description="Auto-generated IFC from DXF via Godot CAD Viewer",
@@ -236,7 +344,7 @@ class IfcBackgroundConverter:
         
         # Creează site-ul
         self.site = self.model.create_entity("IfcSite",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=ifc_guid(derived_uuid(self.project_uuid, "IfcSite")),
             OwnerHistory=self.owner_history,
             Name="Default Site",
             CompositionType="ELEMENT"
@@ -244,7 +352,7 @@ class IfcBackgroundConverter:
         
         # Creează clădirea
         self.building = self.model.create_entity("IfcBuilding",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=ifc_guid(derived_uuid(self.project_uuid, "IfcBuilding")),
             OwnerHistory=self.owner_history,
             Name="Default Building",
             CompositionType="ELEMENT"
@@ -252,7 +360,7 @@ class IfcBackgroundConverter:
         
         # Creează etajul
         self.storey = self.model.create_entity("IfcBuildingStorey",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=ifc_guid(derived_uuid(self.project_uuid, "IfcBuildingStorey")),
             OwnerHistory=self.owner_history,
             Name="Ground Floor",
             CompositionType="ELEMENT",
@@ -377,7 +485,7 @@ class IfcBackgroundConverter:
         
         # Creează IfcSpace
         space = self.model.create_entity("IfcSpace",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=self._element_guid(element_data),
             OwnerHistory=self.owner_history,
             Name=mesh_name,
             CompositionType="ELEMENT",
@@ -399,6 +507,12 @@ class IfcBackgroundConverter:
         # Adaugă proprietățile
         self._add_element_properties(space, element_data)
         
+    def _element_guid(self, element_data: Dict[str, Any]) -> str:
+        """GlobalId-ul elementului, derivat din uuid-ul din mapping (aleator doar dacă lipsește)"""
+        if not element_data.get('uuid'):
+            return ifcopenshell.guid.new()
+        return ifc_guid(self.global_ids.fragment_uuid(element_data['uuid']))
+        
     def _create_ifc_building_element(self, element_data: Dict[str, Any], ifc_type: str):
         """Creează o entitate IFC de tip building element"""
         mesh_name = element_data.get('mesh_name', 'Element')
@@ -406,7 +520,7 @@ class IfcBackgroundConverter:
         
         # Creează entitatea IFC
         element = self.model.create_entity(ifc_type,
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=self._element_guid(element_data),
             OwnerHistory=self.owner_history,
             Name=mesh_name,
             PredefinedType=predefined_type
@@ -434,7 +548,7 @@ class IfcBackgroundConverter:
         
         # Creează IfcProxy
         proxy = self.model.create_entity("IfcProxy",
-            GlobalId=ifcopenshell.guid.new(),
+            GlobalId=self._element_guid(element_data),
             OwnerHistory=self.owner_history,
             Name=mesh_name,
             ProxyType="NOTDEFINED",
@@ -456,13 +570,52 @@ class IfcBackgroundConverter:
         # Adaugă proprietățile
         self._add_element_properties(proxy, element_data)
         
+    def _resolve_geometry_mode(self, element_data: Dict[str, Any]) -> str:
+        """Modul de geometrie efectiv al unui element ('auto' alege după câmpul 'extrusion')"""
+        if self.geometry_mode == "auto":
+            return "polygonal" if element_data.get('extrusion') else "triangulated"
+        return self.geometry_mode
+        
     def _create_mesh_geometry(self, ifc_element, element_data: Dict[str, Any]):
-        """Creează geometria mesh pentru un element IFC"""
+        """Creează geometria mesh pentru un element IFC, după geometry_mode"""
+        mode = self._resolve_geometry_mode(element_data)
+        
+        if mode == "brep":
+            self._create_brep_geometry(ifc_element, element_data)
+            return
+        
+        try:
+            vertices = element_data.get('vertices', [])
+            triangles = element_data.get('triangles', [])
+            
+            if len(vertices) == 0 or len(triangles) == 0:
+                return
+            
+            build_face_set = create_polygonal_face_set if mode == "polygonal" else create_triangulated_face_set
+            
+            # Geometrie repetată: IfcMappedItem către IfcRepresentationMap-ul comun
+            if self.representation_maps is not None:
+                representation = self.representation_maps.create_representation(
+                    element_data.get('canonical'), build_face_set)
+                if representation is not None:
+                    ifc_element.Representation = representation
+                    return
+            
+            face_set = build_face_set(self.model, vertices, triangles)
+            
+            if face_set is not None:
+                ifc_element.Representation = create_body_representation(self.model, self.context, [face_set])
+                
+        except Exception as e:
+            print(f"[WARNING] Failed to create geometry for {element_data.get('mesh_name', 'Unknown')}: {e}")
+    
+    def _create_brep_geometry(self, ifc_element, element_data: Dict[str, Any]):
+        """Creează geometria ca IfcManifoldSolidBrep cu câte un IfcFace per triunghi"""
         try:
             vertices = element_data.get('vertices', [])
             triangles = element_data.get('triangles', [])
             
-            if not vertices or not triangles:
+            if len(vertices) == 0 or len(triangles) == 0:
                 return
                 
             # Creează punctele 3D
@@ -577,7 +730,7 @@ class IfcBackgroundConverter:
             if properties:
                 # Creează property set-ul
                 property_set = self.model.create_entity("IfcPropertySet",
-                    GlobalId=ifcopenshell.guid.new(),
+                    GlobalId=ifc_guid(derived_uuid(self.project_uuid, "pset", ifc_element.GlobalId)),
                     OwnerHistory=self.owner_history,
                     Name="AutoGeneratedProperties",
                     HasProperties=properties
@@ -595,33 +748,132 @@ class IfcBackgroundConverter:
             print(f"[WARNING] Failed to add properties for {element_data.get('mesh_name', 'Unknown')}: {e}")
             
     def _save_ifc_file(self, output_path: str):
-        """Salvează modelul IFC în fișier"""
+        """Salvează modelul IFC în fișier (atomic: temp + rename)"""
+        tmp_path = output_path + ".tmp"
         try:
-            self.model.write(output_path)
+            # GlobalId-urile relațiilor derivă din obiectele legate (stabile între conversii)
+            stabilize_relationship_guids(self.model, self.project_uuid)
+            self.model.write(tmp_path)
+            os.replace(tmp_path, output_path)
             print(f"[DEBUG] IFC file saved: {output_path}")
             return True
         except Exception as e:
             print(f"[ERROR] Failed to save IFC file: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             return False
             
     def wait_for_completion(self, timeout: float = 30.0):
-        """Așteaptă finalizarea conversiei cu timeout"""
-        if self.conversion_thread:
-            self.conversion_thread.join(timeout=timeout)
-            return self.conversion_complete
-        return False
+        """Așteaptă finalizarea procesului de conversie cu timeout"""
+        if self.conversion_process:
+            try:
+                self.conversion_process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                return False
+        return self.is_conversion_complete()
         
     def is_conversion_complete(self) -> bool:
-        """Verifică dacă conversia s-a finalizat"""
+        """Verifică dacă conversia s-a finalizat (din fișierul de status)"""
+        if not self.conversion_complete and self.output_ifc_path:
+            status = read_status(self.output_ifc_path)
+            self.conversion_complete = bool(status and status.get("state") == STATUS_DONE)
         return self.conversion_complete
 
 
+# Job-ul de conversie: transfer prin .npz între procesul principal și procesul IFC
+def write_conversion_job(job_path: str, output_ifc_path: str, project_name: str,
+                         elements: List[Dict[str, Any]], meshes: List[Optional[Tuple[Any, Any]]],
+                         geometry_mode: str = "auto"):
+    """
+    Scrie job-ul de conversie într-un .npz.
+    
+    Geometria tuturor elementelor este concatenată într-un singur array de
+    vârfuri și unul de fețe; offset-urile per element permit reconstrucția.
+    Elementele fără geometrie au offset-uri egale (interval gol).
+    """
+    vertex_offsets = [0]
+    face_offsets = [0]
+    vertex_chunks = []
+    face_chunks = []
+    for mesh in meshes:
+        if mesh is not None:
+            vertices, faces = mesh
+            vertex_chunks.append(vertices)
+            face_chunks.append(faces)
+            vertex_offsets.append(vertex_offsets[-1] + len(vertices))
+            face_offsets.append(face_offsets[-1] + len(faces))
+        else:
+            vertex_offsets.append(vertex_offsets[-1])
+            face_offsets.append(face_offsets[-1])
+    
+    header = {
+        "output_ifc_path": os.path.abspath(output_ifc_path),
+        "project_name": project_name,
+        "geometry_mode": geometry_mode,
+        "elements": elements
+    }
+    np.savez(
+        job_path,
+        header=np.array(json.dumps(header, default=str)),
+        vertices=np.concatenate(vertex_chunks) if vertex_chunks else np.zeros((0, 3), dtype=np.float64),
+        faces=np.concatenate(face_chunks) if face_chunks else np.zeros((0, 3), dtype=np.int64),
+        vertex_offsets=np.array(vertex_offsets, dtype=np.int64),
+        face_offsets=np.array(face_offsets, dtype=np.int64)
+    )
+
+def read_conversion_job(job_path: str) -> IfcBackgroundConverter:
+    """Reconstruiește un converter (cu coada completă) dintr-un job .npz"""
+    with np.load(job_path) as job:
+        header = json.loads(str(job["header"]))
+        vertices = job["vertices"]
+        faces = job["faces"]
+        vertex_offsets = job["vertex_offsets"]
+        face_offsets = job["face_offsets"]
+    
+    converter = IfcBackgroundConverter(header["project_name"], header.get("geometry_mode", "auto"))
+    converter.output_ifc_path = header["output_ifc_path"]
+    for i, element in enumerate(header["elements"]):
+        v0, v1 = vertex_offsets[i], vertex_offsets[i + 1]
+        f0, f1 = face_offsets[i], face_offsets[i + 1]
+        converter.queue_element_for_conversion(element, vertices[v0:v1], faces[f0:f1])
+    return converter
+
+def run_conversion_job(job_path: str) -> bool:
+    """Punctul de intrare al procesului IFC: citește job-ul, convertește, raportează statusul"""
+    start_time = time.time()
+    output_ifc_path = None
+    try:
+        converter = read_conversion_job(job_path)
+        output_ifc_path = converter.output_ifc_path
+        write_status(output_ifc_path, STATUS_RUNNING, elements=len(converter.conversion_data))
+        
+        if not converter.run_conversion(output_ifc_path):
+            raise RuntimeError("IFC file could not be saved")
+        
+        elapsed = time.time() - start_time
+        write_status(output_ifc_path, STATUS_DONE,
+                     elements=len(converter.conversion_data), elapsed=round(elapsed, 3))
+        print(f"[SUCCESS] Background IFC conversion completed: {output_ifc_path} ({elapsed:.2f} sec)")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Background IFC conversion failed: {e}")
+        import traceback
+        traceback.print_exc()
+        if output_ifc_path:
+            write_status(output_ifc_path, STATUS_FAILED, error=str(e),
+                         elapsed=round(time.time() - start_time, 3))
+        return False
+    finally:
+        if os.path.exists(job_path):
+            os.remove(job_path)
+
+
 # Funcții helper pentru integrarea cu procesarea existentă
-def create_background_converter(project_name: str = None) -> IfcBackgroundConverter:
+def create_background_converter(project_name: str = None, geometry_mode: str = "auto") -> IfcBackgroundConverter:
     """Creează un converter IFC pentru background processing"""
     if not project_name:
         project_name = f"Auto_IFC_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    return IfcBackgroundConverter(project_name)
+    return IfcBackgroundConverter(project_name, geometry_mode)
 
 def evaluate_math_formula(formula_str):
     """Evaluează o formulă matematică în siguranță pentru XDATA Opening_area"""
@@ -679,4 +931,11 @@ def process_xdata_for_element(element_data):
         
         return processed_data
     
-    return element_data
\ No newline at end of file
+    return element_data
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python ifc_background_converter.py <job.npz>")
+        sys.exit(1)
+    sys.exit(0 if run_conversion_job(sys.argv[1]) else 1)
\ No newline at end of file
@@ -0,0 +1,514 @@
+"""
+IFC Geometry - scriere în bloc a geometriei tesselate din array-uri NumPy
+=========================================================================
+
+Construiește entitățile IfcCartesianPointList3D + IfcTriangulatedFaceSet direct
+din array-urile de vârfuri/fețe, fără bucle Python per vârf și fără entități
+IfcCartesianPoint individuale. Vârfurile duplicate (ex. cele dublate de export
+pentru normale/culori per față) sunt unite în limita unei toleranțe.
+
+Pentru prisme (extrudări) triunghiurile coplanare adiacente sunt unite în fețe
+poligonale (IfcPolygonalFaceSet), cu goluri acolo unde booleenele au tăiat fața.
+
+Geometriile identice până la o translație + rotație în jurul lui Z (ferestre TOV,
+INSERT-uri repetate ale aceluiași bloc) sunt scrise o singură dată ca
+IfcRepresentationMap și instanțiate prin IfcMappedItem (RepresentationMapCache).
+"""
+
+import hashlib
+import math
+
+import numpy as np
+
+# Toleranța implicită pentru unirea vârfurilor (metri); sub precizia contextului IFC (1e-5)
+DEFAULT_MERGE_TOLERANCE = 1e-6
+
+
+def merge_vertices(vertices, faces, tolerance=DEFAULT_MERGE_TOLERANCE):
+    """
+    Unește vârfurile care coincid în limita toleranței și reindexează fețele.
+
+    Args:
+        vertices: Array (N, 3) cu coordonatele vârfurilor
+        faces: Array (M, 3) cu indicii fețelor (bazat pe 0)
+        tolerance: Pasul grilei de cuantizare folosit pentru comparație
+
+    Returns:
+        tuple: (coords (K, 3) float64, faces (M', 3) int64) - fețele degenerate
+               după unire sunt eliminate
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    if len(vertices) == 0 or len(faces) == 0:
+        return vertices, faces
+
+    # Cuantizare pe grilă + np.unique pe rânduri: O(N log N), complet vectorizat
+    keys = np.round(vertices / tolerance).astype(np.int64)
+    _, first_index, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    coords = vertices[first_index]
+    merged_faces = inverse[faces]
+
+    # Elimină triunghiurile care au devenit degenerate (doi indici egali)
+    valid = ((merged_faces[:, 0] != merged_faces[:, 1]) &
+             (merged_faces[:, 1] != merged_faces[:, 2]) &
+             (merged_faces[:, 0] != merged_faces[:, 2]))
+    return coords, merged_faces[valid]
+
+
+def create_triangulated_face_set(model, vertices, faces, tolerance=DEFAULT_MERGE_TOLERANCE):
+    """
+    Creează un IfcTriangulatedFaceSet din array-uri NumPy.
+
+    Args:
+        model: Fișierul ifcopenshell
+        vertices: Array (N, 3) cu vârfurile
+        faces: Array (M, 3) cu triunghiurile (bazat pe 0)
+        tolerance: Toleranța pentru unirea vârfurilor (None = fără unire)
+
+    Returns:
+        Entitatea IfcTriangulatedFaceSet sau None dacă geometria e goală
+    """
+    if tolerance is not None:
+        coords, triangles = merge_vertices(vertices, faces, tolerance)
+    else:
+        coords = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        triangles = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+
+    if len(coords) == 0 or len(triangles) == 0:
+        return None
+
+    # tolist() convertește direct în float/int Python, fără comprehensions per element
+    point_list = model.create_entity("IfcCartesianPointList3D", CoordList=coords.tolist())
+    # IFC folosește indexare bazată pe 1
+    return model.create_entity("IfcTriangulatedFaceSet",
+                               Coordinates=point_list,
+                               CoordIndex=(triangles + 1).tolist())
+
+
+def _coplanar_patches(coords, triangles):
+    """
+    Grupează triunghiurile adiacente aflate în același plan.
+
+    Planul fiecărui triunghi (normală + distanța la origine) este cuantizat și
+    grupat vectorizat cu np.unique; în fiecare plan, componentele conexe (prin
+    muchii comune parcurse în sens opus) se obțin cu union-find. Grupurile sunt
+    mici (de obicei 2 triunghiuri), așa că partea per grup e Python simplu.
+
+    Returns:
+        list: tuple (indici triunghiuri, normala, muchii de contur orientate)
+              doar pentru grupurile cu cel puțin 2 triunghiuri
+    """
+    v0, v1, v2 = coords[triangles[:, 0]], coords[triangles[:, 1]], coords[triangles[:, 2]]
+    normals = np.cross(v1 - v0, v2 - v0)
+    lengths = np.linalg.norm(normals, axis=1)
+    valid = lengths > 1e-12
+    normals[valid] /= lengths[valid, None]
+    offsets = np.einsum("ij,ij->i", normals, v0)
+
+    plane_keys = np.column_stack([np.round(normals * 1e4), np.round(offsets * 1e5)]).astype(np.int64)
+    _, plane_ids = np.unique(plane_keys, axis=0, return_inverse=True)
+    plane_ids = plane_ids.reshape(-1)
+    plane_ids[~valid] = -1
+
+    order = np.argsort(plane_ids, kind="stable")
+    boundaries = np.flatnonzero(np.diff(plane_ids[order])) + 1
+    triangle_list = triangles.tolist()
+    normal_list = normals.tolist()
+
+    patches = []
+    for face_ids in np.split(order, boundaries):
+        if len(face_ids) < 2 or plane_ids[face_ids[0]] < 0:
+            continue
+        face_ids = face_ids.tolist()
+
+        edge_owner = {}
+        for f in face_ids:
+            a, b, c = triangle_list[f]
+            edge_owner[(a, b)] = f
+            edge_owner[(b, c)] = f
+            edge_owner[(c, a)] = f
+
+        parent = {f: f for f in face_ids}
+
+        def find(f):
+            while parent[f] != f:
+                parent[f] = parent[parent[f]]
+                f = parent[f]
+            return f
+
+        boundary_edges = []
+        for (a, b), f in edge_owner.items():
+            other = edge_owner.get((b, a))
+            if other is None:
+                boundary_edges.append((a, b, f))
+            else:
+                root_f, root_other = find(f), find(other)
+                if root_f != root_other:
+                    parent[root_f] = root_other
+
+        components = {}
+        for f in face_ids:
+            components.setdefault(find(f), ([], []))[0].append(f)
+        for a, b, f in boundary_edges:
+            components[find(f)][1].append((a, b))
+
+        for faces, edges in components.values():
+            if len(faces) >= 2:
+                patches.append((faces, normal_list[faces[0]], edges))
+    return patches
+
+
+def _boundary_loops(boundary_edges):
+    """
+    Înlănțuie muchiile de contur orientate în bucle închise.
+
+    Returns:
+        list: bucle de indici de vârf, sau None dacă conturul nu e o varietate simplă
+              (un vârf de contur folosit de mai multe bucle)
+    """
+    next_vertex = {}
+    for start, end in boundary_edges:
+        if start in next_vertex:
+            return None
+        next_vertex[start] = end
+
+    loops = []
+    while next_vertex:
+        start, current = next_vertex.popitem()
+        loop = [start]
+        while current != start:
+            loop.append(current)
+            if current not in next_vertex:
+                return None
+            current = next_vertex.pop(current)
+        if len(loop) >= 3:
+            loops.append(loop)
+    return loops
+
+
+def _signed_loop_area(coord_list, loop, normal):
+    """Aria cu semn a unei bucle, proiectată pe planul dominant al normalei"""
+    axis = max(range(3), key=lambda i: abs(normal[i]))
+    u, v = [i for i in range(3) if i != axis]
+    area = 0.0
+    previous = coord_list[loop[-1]]
+    for index in loop:
+        current = coord_list[index]
+        area += previous[u] * current[v] - current[u] * previous[v]
+        previous = current
+    # Proiecția inversează orientarea când componenta dominantă e negativă sau axa e Y
+    sign = (1.0 if normal[axis] > 0 else -1.0) * (-1.0 if axis == 1 else 1.0)
+    return 0.5 * area * sign
+
+
+def merge_coplanar_faces(vertices, faces, tolerance=DEFAULT_MERGE_TOLERANCE):
+    """
+    Unește triunghiurile coplanare adiacente în fețe poligonale.
+
+    Args:
+        vertices: Array (N, 3) cu vârfurile
+        faces: Array (M, 3) cu triunghiurile (bazat pe 0)
+        tolerance: Toleranța pentru unirea vârfurilor
+
+    Returns:
+        tuple: (coords (K, 3), polygons) - polygons este o listă de
+               (contur_exterior, [contururi_goluri]) cu indici bazați pe 0
+    """
+    coords, triangles = merge_vertices(vertices, faces, tolerance)
+    if len(triangles) == 0:
+        return coords, []
+
+    coord_list = coords.tolist()
+    merged = np.zeros(len(triangles), dtype=bool)
+    polygons = []
+
+    for patch_faces, normal, boundary_edges in _coplanar_patches(coords, triangles):
+        loops = _boundary_loops(boundary_edges)
+        if not loops:
+            continue
+        outer = [loop for loop in loops if _signed_loop_area(coord_list, loop, normal) > 0]
+        if len(outer) != 1:
+            continue  # fețe neconvenționale (ex. contur atins în vârf) rămân triunghiuri
+        inner = [loop for loop in loops if loop is not outer[0]]
+        polygons.append((outer[0], inner))
+        merged[patch_faces] = True
+
+    polygons.extend((triangle, []) for triangle in triangles[~merged].tolist())
+    return coords, polygons
+
+
+def create_polygonal_face_set(model, vertices, faces, tolerance=DEFAULT_MERGE_TOLERANCE):
+    """
+    Creează un IfcPolygonalFaceSet cu triunghiurile coplanare unite în poligoane.
+
+    Args:
+        model: Fișierul ifcopenshell
+        vertices: Array (N, 3) cu vârfurile
+        faces: Array (M, 3) cu triunghiurile (bazat pe 0)
+        tolerance: Toleranța pentru unirea vârfurilor
+
+    Returns:
+        Entitatea IfcPolygonalFaceSet sau None dacă geometria e goală
+    """
+    coords, polygons = merge_coplanar_faces(vertices, faces, tolerance)
+    if len(coords) == 0 or not polygons:
+        return None
+
+    # IFC folosește indexare bazată pe 1
+    ifc_faces = []
+    for outer, inner in polygons:
+        outer_index = [i + 1 for i in outer]
+        if inner:
+            ifc_faces.append(model.create_entity("IfcIndexedPolygonalFaceWithVoids",
+                                                 CoordIndex=outer_index,
+                                                 InnerCoordIndices=[[i + 1 for i in loop] for loop in inner]))
+        else:
+            ifc_faces.append(model.create_entity("IfcIndexedPolygonalFace", CoordIndex=outer_index))
+
+    point_list = model.create_entity("IfcCartesianPointList3D", CoordList=coords.tolist())
+    return model.create_entity("IfcPolygonalFaceSet", Coordinates=point_list, Faces=ifc_faces)
+
+
+def create_body_representation(model, context, items, representation_type="Tessellation"):
+    """
+    Creează IfcProductDefinitionShape cu o reprezentare 'Body'.
+
+    Args:
+        model: Fișierul ifcopenshell
+        context: IfcGeometricRepresentationContext
+        items: Lista itemilor geometrici
+        representation_type: "Tessellation", "Brep", "SweptSolid", "MappedRepresentation"...
+    """
+    shape_representation = model.create_entity("IfcShapeRepresentation",
+                                               ContextOfItems=context,
+                                               RepresentationIdentifier="Body",
+                                               RepresentationType=representation_type,
+                                               Items=list(items))
+    return model.create_entity("IfcProductDefinitionShape", Representations=[shape_representation])
+
+
+# Toleranța pentru potrivirea a două geometrii (metri) și pasul grilei pentru cheia canonică
+MAP_MATCH_TOLERANCE = 1e-5
+MAP_KEY_STEP = 1e-4
+# Costul aproximativ (în numere scrise în fișier) al unei instanțe mapate (IfcMappedItem + operator
+# + direcții + origine) și al IfcRepresentationMap-ului; geometria costă 3 numere per vârf și per triunghi
+MAP_INSTANCE_COST = 30
+MAP_COST = 15
+
+
+class CanonicalGeometry:
+    """Geometrie cu vârfurile unite, exprimată față de centroidul vârfurilor"""
+
+    __slots__ = ("key", "origin", "coords", "triangles", "group", "angle")
+
+    def __init__(self, key, origin, coords, triangles):
+        self.key = key
+        self.origin = origin
+        self.coords = coords
+        self.triangles = triangles
+        self.group = None  # _MapGroup atribuit de RepresentationMapCache.register()
+        self.angle = 0.0   # Rotația Z față de prototipul grupului
+
+
+def canonicalize_geometry(vertices, faces, variant="", tolerance=DEFAULT_MERGE_TOLERANCE):
+    """
+    Aduce geometria într-o formă canonică, invariantă la translație și rotație în jurul Z.
+
+    Cheia conține numărul de vârfuri/fețe, razele orizontale și cotele Z sortate
+    (cuantizate); două geometrii cu aceeași cheie sunt doar candidate, potrivirea
+    exactă se verifică în RepresentationMapCache.
+
+    Args:
+        vertices: Array (N, 3) cu vârfurile
+        faces: Array (M, 3) cu triunghiurile (bazat pe 0)
+        variant: Text adăugat la cheie (ex. tipul de face set construit)
+        tolerance: Toleranța pentru unirea vârfurilor
+
+    Returns:
+        CanonicalGeometry sau None dacă geometria e goală
+    """
+    coords, triangles = merge_vertices(vertices, faces, tolerance)
+    if len(coords) == 0 or len(triangles) == 0:
+        return None
+
+    # Centroidul vârfurilor este invariant la mișcări rigide
+    origin = coords.mean(axis=0)
+    local = coords - origin
+
+    radii = np.sort(np.round(np.hypot(local[:, 0], local[:, 1]) / MAP_KEY_STEP).astype(np.int64))
+    heights = np.sort(np.round(local[:, 2] / MAP_KEY_STEP).astype(np.int64))
+    digest = hashlib.sha1(f"{variant}|{len(local)}|{len(triangles)}|".encode())
+    digest.update(radii.tobytes())
+    digest.update(heights.tobytes())
+    return CanonicalGeometry(digest.hexdigest(), origin, local, triangles)
+
+
+def _canonical_triangles(triangles):
+    """Triunghiuri rotite ciclic cu indicele minim primul (orientarea păstrată), sortate"""
+    shift = np.argmin(triangles, axis=1)
+    rows = np.arange(len(triangles))[:, None]
+    rotated = triangles[rows, (shift[:, None] + np.arange(3)) % 3]
+    return rotated[np.lexsort(rotated.T[::-1])]
+
+
+def _vertex_order(coords):
+    """Ordinea lexicografică a vârfurilor pe grila de potrivire"""
+    keys = np.round(coords / MAP_KEY_STEP).astype(np.int64)
+    return np.lexsort(keys.T[::-1])
+
+
+def match_z_rotation(prototype, candidate, tolerance=MAP_MATCH_TOLERANCE):
+    """
+    Caută unghiul θ (rotație în jurul Z) pentru care prototipul rotit coincide cu candidatul.
+
+    Unghiurile încercate aliniază vârful prototipului cel mai depărtat de axa Z
+    cu vârfurile candidatului aflate la aceeași rază și cotă; potrivirea cere
+    aceleași vârfuri (în toleranță) și aceleași triunghiuri orientate.
+
+    Returns:
+        float: unghiul în radiani sau None dacă geometriile diferă
+    """
+    proto_local, candidate_local = prototype.coords, candidate.coords
+    if proto_local.shape != candidate_local.shape or prototype.triangles.shape != candidate.triangles.shape:
+        return None
+
+    proto_radii = np.hypot(proto_local[:, 0], proto_local[:, 1])
+    candidate_radii = np.hypot(candidate_local[:, 0], candidate_local[:, 1])
+    ref = int(np.argmax(proto_radii))
+    if proto_radii[ref] <= tolerance:
+        angles = [0.0]
+    else:
+        same = np.flatnonzero((np.abs(candidate_radii - proto_radii[ref]) <= tolerance) &
+                              (np.abs(candidate_local[:, 2] - proto_local[ref, 2]) <= tolerance))
+        ref_angle = math.atan2(proto_local[ref, 1], proto_local[ref, 0])
+        angles = [math.atan2(candidate_local[i, 1], candidate_local[i, 0]) - ref_angle for i in same]
+
+    candidate_order = _vertex_order(candidate_local)
+    candidate_faces = None
+    for angle in angles:
+        c, s = math.cos(angle), math.sin(angle)
+        rotated = proto_local @ np.array([[c, s, 0.0], [-s, c, 0.0], [0.0, 0.0, 1.0]])
+        proto_order = _vertex_order(rotated)
+        if np.abs(rotated[proto_order] - candidate_local[candidate_order]).max() > tolerance:
+            continue
+        # Corespondența vârfurilor: indice prototip -> indice candidat
+        correspondence = np.empty(len(proto_order), dtype=np.int64)
+        correspondence[proto_order] = candidate_order
+        if candidate_faces is None:
+            candidate_faces = _canonical_triangles(candidate.triangles)
+        if np.array_equal(_canonical_triangles(correspondence[prototype.triangles]), candidate_faces):
+            return angle
+    return None
+
+
+class _MapGroup:
+    """Geometrii identice: prototipul, numărul de instanțe și IfcRepresentationMap-ul (creat la nevoie)"""
+
+    __slots__ = ("prototype", "count", "representation_map")
+
+    def __init__(self, prototype):
+        self.prototype = prototype
+        self.count = 0
+        self.representation_map = None
+
+
+class RepresentationMapCache:
+    """
+    Reutilizează geometria elementelor repetate prin IfcRepresentationMap + IfcMappedItem.
+
+    Utilizare în două treceri: register() pentru toate elementele (grupează
+    geometriile identice), apoi create_representation() per element. Grupurile
+    la care maparea nu micșorează fișierul (geometrie unică sau mică și puțin
+    repetată, ex. două cutii) primesc None și rămân pe calea obișnuită.
+    """
+
+    def __init__(self, model, context):
+        self.model = model
+        self.context = context
+        self.groups = {}  # cheie canonică -> listă _MapGroup
+        self.map_count = 0
+        self.instance_count = 0
+        self._origin_placement = None
+        self._axis_z = None
+
+    def register(self, vertices, faces, variant=""):
+        """Canonicalizează geometria și o atribuie unui grup; returnează CanonicalGeometry sau None"""
+        canonical = canonicalize_geometry(vertices, faces, variant)
+        if canonical is None:
+            return None
+
+        groups = self.groups.setdefault(canonical.key, [])
+        for group in groups:
+            angle = match_z_rotation(group.prototype, canonical)
+            if angle is not None:
+                canonical.group, canonical.angle = group, angle
+                break
+        else:
+            canonical.group = _MapGroup(canonical)
+            groups.append(canonical.group)
+        canonical.group.count += 1
+        return canonical
+
+    def create_representation(self, canonical, build_item, representation_type="Tessellation"):
+        """
+        Creează reprezentarea mapată pentru o geometrie înregistrată.
+
+        Args:
+            canonical: Rezultatul register()
+            build_item: Funcție (model, vertices, faces) -> item geometric (ex. create_triangulated_face_set)
+            representation_type: Tipul reprezentării din IfcRepresentationMap
+
+        Returns:
+            IfcProductDefinitionShape sau None dacă geometria nu se repetă
+        """
+        if canonical is None or not self._worth_mapping(canonical.group):
+            return None
+
+        group = canonical.group
+        if group.representation_map is None:
+            prototype = group.prototype
+            item = build_item(self.model, prototype.coords, prototype.triangles)
+            if item is None:
+                return None
+            mapped_representation = self.model.create_entity("IfcShapeRepresentation",
+                                                             ContextOfItems=self.context,
+                                                             RepresentationIdentifier="Body",
+                                                             RepresentationType=representation_type,
+                                                             Items=[item])
+            group.representation_map = self.model.create_entity("IfcRepresentationMap",
+                                                                MappingOrigin=self._get_origin_placement(),
+                                                                MappedRepresentation=mapped_representation)
+            self.map_count += 1
+        return self._mapped_shape(group.representation_map, canonical.origin, canonical.angle)
+
+    @staticmethod
+    def _worth_mapping(group):
+        """Maparea merită dacă geometria scrisă o dată + instanțele costă mai puțin decât copiile"""
+        prototype = group.prototype
+        geometry_cost = 3 * (len(prototype.coords) + len(prototype.triangles))
+        return (group.count - 1) * geometry_cost > group.count * MAP_INSTANCE_COST + MAP_COST
+
+    def _get_origin_placement(self):
+        if self._origin_placement is None:
+            origin = self.model.create_entity("IfcCartesianPoint", Coordinates=[0.0, 0.0, 0.0])
+            self._origin_placement = self.model.create_entity("IfcAxis2Placement3D", Location=origin)
+        return self._origin_placement
+
+    def _mapped_shape(self, representation_map, origin, angle):
+        """IfcMappedItem cu transformarea instanței: rotație θ în jurul Z, apoi translație la origin"""
+        if self._axis_z is None:
+            self._axis_z = self.model.create_entity("IfcDirection", DirectionRatios=[0.0, 0.0, 1.0])
+        c, s = math.cos(angle), math.sin(angle)
+        operator = self.model.create_entity(
+            "IfcCartesianTransformationOperator3D",
+            Axis1=self.model.create_entity("IfcDirection", DirectionRatios=[c, s, 0.0]),
+            Axis2=self.model.create_entity("IfcDirection", DirectionRatios=[-s, c, 0.0]),
+            LocalOrigin=self.model.create_entity("IfcCartesianPoint", Coordinates=[float(v) for v in origin]),
+            Scale=1.0,
+            Axis3=self._axis_z)
+        mapped_item = self.model.create_entity("IfcMappedItem", MappingSource=representation_map,
+                                               MappingTarget=operator)
+        self.instance_count += 1
+        return create_body_representation(self.model, self.context, [mapped_item], "MappedRepresentation")
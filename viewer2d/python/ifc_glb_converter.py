@@ -13,14 +13,30 @@ Avantaje:
 - Metadata calculată din JSON (cu XDATA Opening_area, perimeter, etc.)
 - Sincronizare perfectă prin UUID-uri
 - Exportă doar elementele cu geometrie reală
+
+Când conversia rulează în același proces cu DXF → GLB, `convert_meshes_to_ifc`
+primește direct meshurile finale și mapping-ul din memorie, fără a reciti
+GLB-ul și JSON-ul de pe disc.
+
+Geometriile repetate (ferestre TOV, INSERT-uri ale aceluiași bloc) sunt scrise o
+singură dată ca IfcRepresentationMap, fiecare instanță primind un IfcMappedItem.
+
+Apelurile ifcopenshell.api sunt grupate: materialele/layer set-urile se creează o
+dată per layer, atribuirea în storey și a materialelor se face la final cu câte un
+apel multi-produs, iar property set-urile per element se scriu direct după un
+IfcPropertySetTemplate comun. Numărul de apeluri API și timpul sunt raportate.
 """
 
 import json
+import os
+import time
 import trimesh
 import ifcopenshell
 import ifcopenshell.api
 import ifcopenshell.guid
 import uuid as uuid_module
+from element_ids import GlobalIdAllocator, derived_uuid, ifc_guid, project_uuid, stabilize_relationship_guids
+from ifc_geometry import create_triangulated_face_set, create_body_representation, RepresentationMapCache
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
@@ -80,6 +96,14 @@ LAYER_TO_IFC_TYPE = {
     "ferestre": "IfcWindow",
 }
 
+# Property set-ul cu metadata fiecărui element (instanțiat din IfcPropertySetTemplate)
+ELEMENT_PSET_NAME = "Pset_ElementProperties"
+
+# Cheile de mapping care nu devin proprietăți (uuid-ul se adaugă separat, prisma este doar
+# intrarea exportului parametric)
+SKIPPED_PROPERTY_KEYS = ("uuid", "prism")
+
+
 def determine_ifc_type_from_name(mesh_name: str) -> str:
     """Determină tipul IFC din numele mesh-ului"""
     mesh_name_lower = mesh_name.lower()
@@ -102,6 +126,13 @@ class IfcGlbConverter:
         self.building = None
         self.storey = None
         self.material_cache = {}  # Cache pentru materiale și material layer sets
+        self.representation_maps = None  # Geometrii repetate -> IfcRepresentationMap
+        self.pending_container = []  # Elemente atribuite storey-ului la final, într-un singur apel
+        self.pending_materials = {}  # id material -> (material, [elemente]) atribuite la final
+        self.pset_template = None  # IfcPropertySetTemplate comun pentru Pset_ElementProperties
+        self.property_templates = {}  # nume proprietate -> tipul valorii (IfcReal, IfcText...)
+        self.element_psets = []  # Property set-urile create din template
+        self.api_stats = {}  # usecase -> [apeluri, secunde]
         self.layer_materials_config = self._load_layer_materials_config()
     
     def _load_layer_materials_config(self) -> Dict[str, Any]:
@@ -131,26 +162,25 @@ class IfcGlbConverter:
         print(f"[DEBUG] Creating IfcMaterialLayerSet for {layer_name}")
         
         # Creează material layer set
-        material_set = ifcopenshell.api.run("material.add_material_set", self.model,
-                                          name=f"{layer_name}_LayerSet", set_type="IfcMaterialLayerSet")
+        material_set = self._run_api("material.add_material_set",
+                                     name=f"{layer_name}_LayerSet", set_type="IfcMaterialLayerSet")
         
         # Creează materialele și layerele
         for layer_def in config['material_layers']:
             # Creează materialul dacă nu există
             material_key = f"material_{layer_def['material']}"
             if material_key not in self.material_cache:
-                material = ifcopenshell.api.run("material.add_material", self.model, 
-                                              name=layer_def['material'], 
-                                              category=layer_def.get('category', 'generic'))
+                material = self._run_api("material.add_material",
+                                         name=layer_def['material'],
+                                         category=layer_def.get('category', 'generic'))
                 self.material_cache[material_key] = material
             else:
                 material = self.material_cache[material_key]
             
             # Creează layer-ul și îl adaugă la set
-            layer = ifcopenshell.api.run("material.add_layer", self.model, 
-                                       layer_set=material_set, material=material)
-            ifcopenshell.api.run("material.edit_layer", self.model, layer=layer, 
-                               attributes={"LayerThickness": layer_def['thickness']})
+            layer = self._run_api("material.add_layer", layer_set=material_set, material=material)
+            self._run_api("material.edit_layer", layer=layer,
+                          attributes={"LayerThickness": layer_def['thickness']})
             
             print(f"[DEBUG] Added layer {layer_def['name']}: {layer_def['thickness']}m thick")
         
@@ -169,9 +199,9 @@ class IfcGlbConverter:
         
         print(f"[DEBUG] Creating simple IfcMaterial for {layer_name}")
         
-        material = ifcopenshell.api.run("material.add_material", self.model,
-                                      name=f"{layer_name}_Material",
-                                      category=layer_name.lower())
+        material = self._run_api("material.add_material",
+                                 name=f"{layer_name}_Material",
+                                 category=layer_name.lower())
         
         self.material_cache[cache_key] = material
         return material
@@ -186,22 +216,90 @@ class IfcGlbConverter:
             material_set = self._create_material_layer_set(layer_name, element_name)
             
             if material_set:
-                # Folosește material layer set
+                # Folosește material layer set (atribuit la final, grupat per material)
                 print(f"[DEBUG] Assigning IfcMaterialLayerSet to {element_name}")
-                ifcopenshell.api.run("material.assign_material", self.model,
-                                   products=[element], material=material_set)
+                self._queue_material(element, material_set)
             else:
                 # Fallback la material simplu
                 simple_material = self._create_simple_material(layer_name)
                 if simple_material:
                     print(f"[DEBUG] Assigning simple IfcMaterial to {element_name}")
-                    ifcopenshell.api.run("material.assign_material", self.model,
-                                       products=[element], material=simple_material)
+                    self._queue_material(element, simple_material)
                 else:
                     print(f"[WARNING] No material configuration found for layer: {layer_name}")
             
         except Exception as e:
             print(f"[ERROR] Failed to assign material to {element_name}: {e}")
+    
+    def _queue_material(self, element, material):
+        """Amână atribuirea materialului: toate elementele unui material primesc un singur apel"""
+        self.pending_materials.setdefault(material.id(), (material, []))[1].append(element)
+    
+    def _flush_grouped_assignments(self):
+        """Atribuirile amânate: storey și materiale cu câte un apel multi-produs, template-ul pset"""
+        # Doar produsele care pot fi conținute în storey (ex. IfcProxy nu are ContainedInStructure)
+        products = []
+        for element in self.pending_container:
+            if hasattr(element, "ContainedInStructure"):
+                products.append(element)
+            else:
+                print(f"[WARNING] Could not attach {element.Name} to storey: {element.is_a()} cannot be contained")
+        if products:
+            try:
+                self._run_api("spatial.assign_container", products=products, relating_structure=self.storey)
+            except Exception as e:
+                print(f"[WARNING] Could not attach elements to storey: {e}")
+        
+        for material, elements in self.pending_materials.values():
+            try:
+                self._run_api("material.assign_material", products=elements, material=material)
+            except Exception as e:
+                print(f"[ERROR] Failed to assign material {material.Name}: {e}")
+        
+        # Template-ul comun al property set-urilor per element (IFC4+)
+        if self.element_psets and self.model.schema != "IFC2X3":
+            property_templates = [
+                self.model.create_entity("IfcSimplePropertyTemplate",
+                                         GlobalId=ifc_guid(derived_uuid(self.project_uuid, "property_template", name)),
+                                         Name=name,
+                                         TemplateType="P_SINGLEVALUE",
+                                         PrimaryMeasureType=measure_type)
+                for name, measure_type in self.property_templates.items()
+            ]
+            self.pset_template = self.model.create_entity("IfcPropertySetTemplate",
+                                                          GlobalId=ifc_guid(derived_uuid(self.project_uuid, "pset_template")),
+                                                          Name=ELEMENT_PSET_NAME,
+                                                          TemplateType="PSET_OCCURRENCEDRIVEN",
+                                                          ApplicableEntity="IfcElement",
+                                                          HasPropertyTemplates=property_templates)
+            self.model.create_entity("IfcRelDefinesByTemplate",
+                                     GlobalId=ifcopenshell.guid.new(),
+                                     RelatedPropertySets=self.element_psets,
+                                     RelatingTemplate=self.pset_template)
+        
+        self.pending_container = []
+        self.pending_materials = {}
+        self.element_psets = []
+    
+    def _run_api(self, usecase: str, **settings):
+        """ifcopenshell.api.run pe modelul curent, cu numărarea apelurilor și a timpului per usecase"""
+        start = time.perf_counter()
+        try:
+            return ifcopenshell.api.run(usecase, self.model, **settings)
+        finally:
+            stats = self.api_stats.setdefault(usecase, [0, 0.0])
+            stats[0] += 1
+            stats[1] += time.perf_counter() - start
+    
+    def _report_api_stats(self, element_count: int):
+        """Afișează numărul de apeluri ifcopenshell.api și timpul total"""
+        total_calls = sum(calls for calls, _ in self.api_stats.values())
+        total_time = sum(seconds for _, seconds in self.api_stats.values())
+        per_element = total_calls / element_count if element_count else 0.0
+        print(f"[DEBUG] ifcopenshell.api: {total_calls} calls ({per_element:.2f} per element) "
+              f"in {total_time * 1000:.0f} ms")
+        for usecase, (calls, seconds) in sorted(self.api_stats.items(), key=lambda kv: kv[1][1], reverse=True):
+            print(f"[DEBUG]   {usecase:28s} {calls:5d} calls {seconds * 1000:8.1f} ms")
         
     def convert_glb_to_ifc(self, glb_path: str, json_mapping_path: str, output_ifc_path: str) -> bool:
         """
@@ -224,39 +322,105 @@ class IfcGlbConverter:
             
             print(f"[DEBUG] Found {len(glb_meshes)} meshes in GLB and {len(json_mapping)} entries in JSON")
             
-            # Creează modelul IFC
-            self._create_ifc_model(Path(glb_path).stem)
+            return self._convert_mesh_records(glb_meshes, json_mapping, output_ifc_path, Path(glb_path).stem)
             
-            # Procesează fiecare mesh cu metadata asociată
-            converted_count = 0
-            for mesh_data in glb_meshes:
-                mesh_uuid = mesh_data.get('uuid')
-                if not mesh_uuid:
-                    print(f"[WARNING] Mesh without UUID: {mesh_data.get('name', 'Unknown')}")
-                    continue
-                
-                # Găsește metadata asociată prin UUID
-                metadata = self._find_metadata_by_uuid(json_mapping, mesh_uuid)
-                if not metadata:
-                    print(f"[WARNING] No metadata found for mesh UUID: {mesh_uuid}")
-                    continue
-                
-                # Convertește mesh-ul cu metadata în element IFC
-                if self._convert_mesh_to_ifc(mesh_data, metadata):
-                    converted_count += 1
+        except Exception as e:
+            print(f"[ERROR] GLB to IFC conversion failed: {e}")
+            return False
+    
+    def convert_meshes_to_ifc(self, meshes, mapping: List[Dict[str, Any]], output_ifc_path: str,
+                              project_name: str) -> bool:
+        """
+        Convertește meshurile finale din memorie + mapping-ul în IFC
+        
+        Args:
+            meshes: Meshurile trimesh finale (după booleene/trim), cu 'uuid' în metadata
+            mapping: Intrările de mapping (aceleași care se scriu în JSON)
+            output_ifc_path: Calea unde să salveze fișierul IFC
+            project_name: Numele proiectului IFC
             
-            print(f"[DEBUG] Converted {converted_count} elements to IFC")
+        Returns:
+            True dacă conversia a fost cu succes
+        """
+        try:
+            mesh_records = []
+            for i, mesh in enumerate(meshes):
+                if len(mesh.vertices) == 0:
+                    continue
+                mesh_records.append({
+                    'name': mesh.metadata.get('name') or f"solid_{i}",
+                    'geometry': mesh,
+                    'uuid': mesh.metadata.get('uuid'),
+                    'vertices_count': len(mesh.vertices),
+                    'faces_count': len(mesh.faces)
+                })
             
-            # Salvează fișierul IFC
-            self.model.write(output_ifc_path)
-            print(f"[SUCCESS] IFC file saved: {output_ifc_path}")
+            print(f"[DEBUG] Converting {len(mesh_records)} in-memory meshes with {len(mapping)} mapping entries")
             
-            return True
+            return self._convert_mesh_records(mesh_records, mapping, output_ifc_path, project_name)
             
         except Exception as e:
-            print(f"[ERROR] GLB to IFC conversion failed: {e}")
+            print(f"[ERROR] In-memory IFC conversion failed: {e}")
             return False
     
+    def _convert_mesh_records(self, mesh_records: List[Dict[str, Any]], mapping: List[Dict[str, Any]],
+                              output_ifc_path: str, project_name: str) -> bool:
+        """Creează modelul IFC din meshuri + metadata unite prin UUID și îl salvează"""
+        # Creează modelul IFC
+        self._create_ifc_model(project_name)
+        
+        # Index UUID → metadata (join O(1) în loc de căutare liniară per mesh)
+        metadata_by_uuid = {entry.get('uuid'): entry for entry in mapping if entry.get('uuid')}
+        
+        # Prima trecere: numără geometriile identice (până la translație + rotație Z)
+        context = self.model.by_type("IfcGeometricRepresentationContext")[0]
+        self.representation_maps = RepresentationMapCache(self.model, context)
+        for mesh_data in mesh_records:
+            geometry = mesh_data.get('geometry')
+            metadata = metadata_by_uuid.get(mesh_data.get('uuid'))
+            if metadata and hasattr(geometry, 'vertices') and self._uses_mesh_geometry(metadata):
+                mesh_data['canonical'] = self.representation_maps.register(geometry.vertices, geometry.faces)
+        
+        # Procesează fiecare mesh cu metadata asociată
+        converted_count = 0
+        for mesh_data in mesh_records:
+            mesh_uuid = mesh_data.get('uuid')
+            if not mesh_uuid:
+                print(f"[WARNING] Mesh without UUID: {mesh_data.get('name', 'Unknown')}")
+                continue
+            
+            # Găsește metadata asociată prin UUID
+            metadata = metadata_by_uuid.get(mesh_uuid)
+            if not metadata:
+                print(f"[WARNING] No metadata found for mesh UUID: {mesh_uuid}")
+                continue
+            
+            # Convertește mesh-ul cu metadata în element IFC
+            if self._convert_mesh_to_ifc(mesh_data, metadata):
+                converted_count += 1
+        
+        self._flush_grouped_assignments()
+        
+        print(f"[DEBUG] Converted {converted_count} elements to IFC")
+        self._report_api_stats(converted_count)
+        print(f"[DEBUG] Representation maps: {self.representation_maps.map_count} shared geometries, "
+              f"{self.representation_maps.instance_count} mapped instances")
+        
+        # GlobalId-urile relațiilor (inclusiv cele create de ifcopenshell.api) derivă din obiectele legate
+        stabilize_relationship_guids(self.model, self.project_uuid)
+        
+        # Salvează fișierul IFC (atomic: temp + rename)
+        tmp_path = output_ifc_path + ".tmp"
+        self.model.write(tmp_path)
+        os.replace(tmp_path, output_ifc_path)
+        print(f"[SUCCESS] IFC file saved: {output_ifc_path}")
+        
+        return True
+    
+    def _uses_mesh_geometry(self, metadata: Dict[str, Any]) -> bool:
+        """Dacă elementul se exportă din geometria meshului (subclasele pot scrie altfel)"""
+        return True
+    
     def _load_glb_meshes(self, glb_path: str) -> List[Dict[str, Any]]:
         """Încarcă meshurile din fișierul GLB cu UUID-urile lor"""
         try:
@@ -314,76 +478,51 @@ class IfcGlbConverter:
             print(f"[ERROR] Failed to load JSON mapping: {e}")
             return []
     
-    def _find_metadata_by_uuid(self, json_mapping: List[Dict[str, Any]], target_uuid: str) -> Optional[Dict[str, Any]]:
-        """Găsește metadata pentru un UUID specific"""
-        for entry in json_mapping:
-            if entry.get('uuid') == target_uuid:
-                return entry
-        return None
-    
     def _create_ifc_model(self, project_name: str):
         """Creează structura de bază a modelului IFC"""
-        # Creează fișierul IFC nou
+        # Creează fișierul IFC nou (cache-urile țin de model)
         self.model = ifcopenshell.file()
+        self.material_cache = {}
+        self.pending_container = []
+        self.pending_materials = {}
+        self.pset_template = None
+        self.property_templates = {}
+        self.element_psets = []
+        self.api_stats = {}
+        # GlobalId-uri deterministe: proiectul din numele său, elementele din uuid-urile din mapping
+        self.project_uuid = project_uuid(project_name)
+        self.global_ids = GlobalIdAllocator()
         
         # Creează proiectul
-        self.project = ifcopenshell.api.run("root.create_entity", 
-                                           self.model,
-                                           ifc_class="IfcProject", 
-                                           name=f"Project_{project_name}")
+        self.project = self._run_api("root.create_entity",
+                                     ifc_class="IfcProject",
+                                     name=f"Project_{project_name}")
+        self.project.GlobalId = ifc_guid(self.project_uuid)
         
         # Adaugă unitățile de măsură (necesar pentru Blender Bonsai)
-        ifcopenshell.api.run("unit.assign_unit", self.model, length={"is_metric": True, "raw": "METERS"})
+        self._run_api("unit.assign_unit", length={"is_metric": True, "raw": "METERS"})
         
         # Creează structura ierarhică standard
-        context = ifcopenshell.api.run("context.add_context", self.model, context_type="Model")
-        body_context = ifcopenshell.api.run("context.add_context", self.model, 
-                                          context_type="Model", context_identifier="Body", 
-                                          target_view="MODEL_VIEW", parent=context)
-        
-        self.site = ifcopenshell.api.run("root.create_entity", self.model, 
-                                        ifc_class="IfcSite", name="Site")
-        self.building = ifcopenshell.api.run("root.create_entity", self.model, 
-                                           ifc_class="IfcBuilding", name="Building")
-        self.storey = ifcopenshell.api.run("root.create_entity", self.model, 
-                                         ifc_class="IfcBuildingStorey", name="Ground Floor")
+        context = self._run_api("context.add_context", context_type="Model")
+        body_context = self._run_api("context.add_context",
+                                     context_type="Model", context_identifier="Body",
+                                     target_view="MODEL_VIEW", parent=context)
+        
+        self.site = self._run_api("root.create_entity", ifc_class="IfcSite", name="Site")
+        self.building = self._run_api("root.create_entity", ifc_class="IfcBuilding", name="Building")
+        self.storey = self._run_api("root.create_entity", ifc_class="IfcBuildingStorey", name="Ground Floor")
+        for spatial in (self.site, self.building, self.storey):
+            spatial.GlobalId = ifc_guid(derived_uuid(self.project_uuid, spatial.is_a()))
         
         # Stabilește relațiile ierarhice
-        ifcopenshell.api.run("aggregate.assign_object", self.model, 
-                           products=[self.site], relating_object=self.project)
-        ifcopenshell.api.run("aggregate.assign_object", self.model, 
-                           products=[self.building], relating_object=self.site)
-        ifcopenshell.api.run("aggregate.assign_object", self.model, 
-                           products=[self.storey], relating_object=self.building)
+        self._run_api("aggregate.assign_object", products=[self.site], relating_object=self.project)
+        self._run_api("aggregate.assign_object", products=[self.building], relating_object=self.site)
+        self._run_api("aggregate.assign_object", products=[self.storey], relating_object=self.building)
     
     def _convert_mesh_to_ifc(self, mesh_data: Dict[str, Any], metadata: Dict[str, Any]) -> bool:
         """Convertește un mesh cu metadata în element IFC"""
         try:
-            mesh_name = mesh_data['name']
-            mesh_uuid = mesh_data['uuid']
-            geometry = mesh_data['geometry']
-            
-            # Determină tipul IFC
-            ifc_type = determine_ifc_type_from_name(mesh_name)
-            
-            print(f"[DEBUG] Converting {mesh_name} (UUID: {mesh_uuid}) to {ifc_type}")
-            
-            # Creează elementul IFC
-            element = ifcopenshell.api.run("root.create_entity", self.model, 
-                                         ifc_class=ifc_type, name=mesh_name)
-            
-            # Încearcă să atașeze elementul la storey
-            try:
-                ifcopenshell.api.run("spatial.assign_container", self.model,
-                                   products=[element], relating_structure=self.storey)
-            except Exception as e:
-                print(f"[WARNING] Could not attach {mesh_name} to storey: {e}")
-            
-            # Adaugă proprietățile din metadata
-            self._add_properties_to_element(element, metadata, mesh_uuid)
-            
-            # Adaugă materialele pe baza layer-ului
-            self._assign_material_to_element(element, metadata.get('layer', ''), mesh_name)
+            element, ifc_type = self._create_element(mesh_data['name'], mesh_data['uuid'], metadata)
             
             # Adaugă geometria 3D din meshul GLB
             self._add_geometry_to_element(element, mesh_data, ifc_type)
@@ -394,17 +533,37 @@ class IfcGlbConverter:
             print(f"[ERROR] Failed to convert mesh {mesh_data.get('name', 'Unknown')}: {e}")
             return False
     
+    def _create_element(self, mesh_name: str, mesh_uuid: str, metadata: Dict[str, Any]):
+        """Creează elementul IFC (fără geometrie) cu container, proprietăți și material"""
+        # Determină tipul IFC
+        ifc_type = determine_ifc_type_from_name(mesh_name)
+        
+        print(f"[DEBUG] Converting {mesh_name} (UUID: {mesh_uuid}) to {ifc_type}")
+        
+        # Creează elementul IFC
+        element = self._run_api("root.create_entity", ifc_class=ifc_type, name=mesh_name)
+        element.GlobalId = ifc_guid(self.global_ids.fragment_uuid(mesh_uuid))
+        
+        # Atașarea la storey se face la final, pentru toate elementele într-un singur apel
+        self.pending_container.append(element)
+        
+        # Adaugă proprietățile din metadata
+        self._add_properties_to_element(element, metadata, mesh_uuid)
+        
+        # Adaugă materialele pe baza layer-ului
+        self._assign_material_to_element(element, metadata.get('layer', ''), mesh_name)
+        
+        return element, ifc_type
+    
     def _add_properties_to_element(self, element, metadata: Dict[str, Any], mesh_uuid: str):
         """Adaugă proprietățile din metadata la elementul IFC"""
         try:
-            # Creează property set pentru proprietățile de bază
-            pset = ifcopenshell.api.run("pset.add_pset", self.model, 
-                                      product=element, name="Pset_ElementProperties")
+            properties = []
             
             # Adaugă proprietățile din metadata
             for key, value in metadata.items():
-                if key == 'uuid':
-                    continue  # UUID-ul e deja adăugat separat
+                if key in SKIPPED_PROPERTY_KEYS:
+                    continue
                 
                 # Convertește valoarea la tipul potrivit pentru IFC
                 if isinstance(value, (int, float)):
@@ -415,22 +574,27 @@ class IfcGlbConverter:
                     ifc_value = self.model.create_entity("IfcText", str(value))
                 
                 # Creează proprietatea
-                prop = self.model.create_entity("IfcPropertySingleValue",
-                                              Name=key,
-                                              NominalValue=ifc_value)
-                
-                # Adaugă proprietatea la property set
-                current_props = list(pset.HasProperties) if pset.HasProperties else []
-                current_props.append(prop)
-                pset.HasProperties = tuple(current_props)
+                properties.append(self.model.create_entity("IfcPropertySingleValue",
+                                                           Name=key,
+                                                           NominalValue=ifc_value))
+                self.property_templates.setdefault(key, ifc_value.is_a())
             
             # Adaugă UUID-ul ca proprietate specială pentru Godot
-            uuid_prop = self.model.create_entity("IfcPropertySingleValue",
-                                               Name="GodotUUID",
-                                               NominalValue=self.model.create_entity("IfcText", mesh_uuid))
-            current_props = list(pset.HasProperties) if pset.HasProperties else []
-            current_props.append(uuid_prop)
-            pset.HasProperties = tuple(current_props)
+            properties.append(self.model.create_entity("IfcPropertySingleValue",
+                                                       Name="GodotUUID",
+                                                       NominalValue=self.model.create_entity("IfcText", mesh_uuid)))
+            self.property_templates.setdefault("GodotUUID", "IfcText")
+            
+            # Property set-ul scris direct (fără pset.add_pset + reconstruirea tuplului la fiecare proprietate)
+            pset = self.model.create_entity("IfcPropertySet",
+                                            GlobalId=ifc_guid(derived_uuid(self.project_uuid, "pset", element.GlobalId)),
+                                            Name=ELEMENT_PSET_NAME,
+                                            HasProperties=properties)
+            self.model.create_entity("IfcRelDefinesByProperties",
+                                     GlobalId=ifcopenshell.guid.new(),
+                                     RelatedObjects=[element],
+                                     RelatingPropertyDefinition=pset)
+            self.element_psets.append(pset)
             
             print(f"[DEBUG] Added {len(metadata)} properties to {element.Name}")
             
@@ -456,49 +620,26 @@ class IfcGlbConverter:
             
             print(f"[DEBUG] Adding geometry to {mesh_data['name']}: {len(vertices)} vertices, {len(faces)} faces")
             
+            # Geometrie repetată: IfcMappedItem către IfcRepresentationMap-ul comun
+            if self.representation_maps is not None:
+                representation = self.representation_maps.create_representation(
+                    mesh_data.get('canonical'), create_triangulated_face_set)
+                if representation is not None:
+                    element.Representation = representation
+                    print(f"[DEBUG] Reused mapped geometry for {mesh_data['name']}")
+                    return
+            
             # Creează contextul geometric
             context = self.model.by_type("IfcGeometricRepresentationContext")[0]
             
-            # Convertește vertices în IfcCartesianPoint  
-            ifc_points = []
-            for vertex in vertices:
-                point = self.model.create_entity("IfcCartesianPoint", Coordinates=[float(v) for v in vertex])
-                ifc_points.append(point)
-            
-            # Convertește faces în IfcTriangleFace (pentru IfcTriangulatedFaceSet)
-            ifc_faces = []
-            for face in faces:
-                # IFC folosește indexare bazată pe 1, nu pe 0
-                face_indices = [int(idx + 1) for idx in face]
-                ifc_faces.append(tuple(face_indices))
-            
-            # Creează IfcTriangulatedFaceSet
-            triangulated_face_set = self.model.create_entity(
-                "IfcTriangulatedFaceSet",
-                Coordinates=self.model.create_entity(
-                    "IfcCartesianPointList3D",
-                    CoordList=[[float(v) for v in vertex] for vertex in vertices]
-                ),
-                CoordIndex=ifc_faces
-            )
-            
-            # Creează reprezentarea geometrică
-            shape_representation = self.model.create_entity(
-                "IfcShapeRepresentation",
-                ContextOfItems=context,
-                RepresentationIdentifier="Body",
-                RepresentationType="Tessellation",
-                Items=[triangulated_face_set]
-            )
-            
-            # Atașează reprezentarea la element prin IfcProductDefinitionShape
-            product_definition_shape = self.model.create_entity(
-                "IfcProductDefinitionShape",
-                Representations=[shape_representation]
-            )
+            # IfcTriangulatedFaceSet scris în bloc din array-uri NumPy (vârfuri duplicate unite)
+            triangulated_face_set = create_triangulated_face_set(self.model, vertices, faces)
+            if triangulated_face_set is None:
+                print(f"[WARNING] Mesh {mesh_data['name']} has only degenerate faces")
+                return
             
             # Atașează geometria la element
-            element.Representation = product_definition_shape
+            element.Representation = create_body_representation(self.model, context, [triangulated_face_set])
             
             print(f"[DEBUG] Successfully added geometry to {mesh_data['name']}")
             
@@ -520,6 +661,22 @@ def convert_glb_to_ifc(glb_path: str, json_mapping_path: str, output_ifc_path: s
     converter = IfcGlbConverter()
     return converter.convert_glb_to_ifc(glb_path, json_mapping_path, output_ifc_path)
 
+def convert_meshes_to_ifc(meshes, mapping: List[Dict[str, Any]], output_ifc_path: str, project_name: str) -> bool:
+    """
+    Funcție de utilitate pentru conversia meshuri finale (în memorie) + mapping → IFC
+    
+    Args:
+        meshes: Meshurile trimesh finale, cu 'uuid' și 'name' în metadata
+        mapping: Lista intrărilor de mapping
+        output_ifc_path: Calea pentru fișierul IFC rezultat
+        project_name: Numele proiectului IFC
+        
+    Returns:
+        True dacă conversia a fost cu succes
+    """
+    converter = IfcGlbConverter()
+    return converter.convert_meshes_to_ifc(meshes, mapping, output_ifc_path, project_name)
+
 if __name__ == "__main__":
     # Test cu fișierele din directorul curent
     import sys
@@ -0,0 +1,242 @@
+"""
+IFC Parametric Exporter - export IFC parametric (profil + extrudare)
+====================================================================
+
+Varianta parametrică a exportului din meshurile finale:
+1. Prismele verticale simple (LWPOLYLINE/POLYLINE/CIRCLE extrudate fără rotații, inclusiv
+   componentele blocurilor inserate doar cu scalare și rotație Z) sunt scrise ca
+   IfcArbitraryClosedProfileDef + IfcExtrudedAreaSolid
+2. Voidurile care le taie (din 'is_cut_by', inclusiv blocurile void) devin IfcOpeningElement
+   legate prin IfcRelVoidsElement, în loc de geometrie pre-tăiată cu booleene
+3. Orice element care nu poate fi descris parametric (forme spațiale, rotații X/Y, rotate90,
+   Door/Window *_TOV, tăiere la acoperiș sau la regiunea conversiei parțiale, voiduri
+   neparametrice) folosește geometria tesselată finală, exact ca exportul 'final'
+
+Rezultatul este mult mai mic decât varianta tesselată și păstrează intenția de
+modelare (profil, înălțime, goluri) pentru aplicațiile BIM.
+"""
+
+import ifcopenshell
+import ifcopenshell.guid
+from typing import Dict, List, Any, Optional, Tuple
+
+from element_ids import derived_uuid, ifc_guid
+from ifc_glb_converter import IfcGlbConverter
+from ifc_geometry import create_body_representation
+
+
+# Toleranța pentru puncte de profil identice (metri), sub precizia contextului IFC (1e-5)
+PROFILE_POINT_TOLERANCE = 1e-6
+
+# Proprietățile care repetă geometria unei extrudări parametrice (conturul și laturile lui);
+# se omit din property set-ul elementelor scrise parametric
+PROFILE_PROPERTY_KEYS = frozenset(("vertices", "segment_lengths"))
+
+
+def _same_point(a, b) -> bool:
+    return abs(a[0] - b[0]) <= PROFILE_POINT_TOLERANCE and abs(a[1] - b[1]) <= PROFILE_POINT_TOLERANCE
+
+
+def get_prism_parameters(entry: Dict[str, Any]) -> Optional[Tuple[List[Tuple[float, float]], float, float, Optional[Tuple]]]:
+    """
+    Extrage parametrii prismei dintr-o intrare de mapping. Profilul este conturul intrării
+    ('vertices') sau, pentru componentele de bloc, profilul local din prism['profile'], plasat
+    prin prism['location'] / ['axis'] / ['ref_direction'].
+
+    Returns:
+        tuple: (puncte profil 2D, z bază, adâncime extrudare, plasare (origine, axă, direcție X)
+               sau None pentru plasarea world) sau None dacă elementul nu este o prismă simplă
+    """
+    prism = entry.get('prism')
+    if not prism or entry.get('trimmed_to_roof') or entry.get('clipped_to_region'):
+        return None
+
+    # Elimină punctele consecutive (ciclic) care coincid: muchiile degenerate strică profilul
+    points = []
+    for p in prism.get('profile') or entry.get('vertices', []):
+        if len(p) < 2:
+            continue
+        point = (float(p[0]), float(p[1]))
+        if not points or not _same_point(points[-1], point):
+            points.append(point)
+    while len(points) >= 2 and _same_point(points[0], points[-1]):
+        points.pop()
+    if len(points) < 3:
+        return None
+
+    z_base = float(prism['z_base'])
+    height = float(prism['height'])
+    # Înălțime negativă = extrudare în jos de la z_base
+    bottom = min(z_base, z_base + height)
+    depth = abs(height)
+    if depth <= 1e-9:
+        return None
+    placement = None
+    if prism.get('location') is not None:
+        placement = (prism['location'], prism['axis'], prism['ref_direction'])
+    return points, bottom, depth, placement
+
+
+class IfcParametricExporter(IfcGlbConverter):
+    """Exporter IFC care scrie prismele ca extrudări și voidurile ca IfcOpeningElement"""
+
+    def __init__(self):
+        super().__init__()
+        self.void_entries = {}
+        self.exported_uuids = set()
+        self.extrusion_direction = None  # IfcDirection (0, 0, 1) comun tuturor extrudărilor
+        self.stats = {"parametric": 0, "openings": 0, "tessellated": 0}
+
+    def convert_meshes_to_ifc(self, meshes, mapping: List[Dict[str, Any]], output_ifc_path: str,
+                              project_name: str, void_entries: List[Dict[str, Any]] = None) -> bool:
+        """
+        Convertește meshurile finale + mapping-ul în IFC parametric
+
+        Args:
+            meshes: Meshurile trimesh finale (folosite pentru elementele neparametrice)
+            mapping: Intrările de mapping ale solidelor
+            output_ifc_path: Calea unde să salveze fișierul IFC
+            project_name: Numele proiectului IFC
+            void_entries: Intrările de mapping ale voidurilor (capturate înainte de booleene)
+
+        Returns:
+            True dacă conversia a fost cu succes
+        """
+        self.void_entries = {entry.get('uuid'): entry for entry in (void_entries or []) if entry.get('uuid')}
+        self.exported_uuids = set()
+        self.extrusion_direction = None
+        self.stats = {"parametric": 0, "openings": 0, "tessellated": 0}
+
+        success = super().convert_meshes_to_ifc(meshes, mapping, output_ifc_path, project_name)
+        print(f"[DEBUG] Parametric IFC: {self.stats['parametric']} extruded elements, "
+              f"{self.stats['openings']} openings, {self.stats['tessellated']} tessellated fallbacks")
+        return success
+
+    def _uses_mesh_geometry(self, metadata: Dict[str, Any]) -> bool:
+        """Prismele cu goluri parametrice nu folosesc geometria meshului"""
+        return get_prism_parameters(metadata) is None or self._collect_openings(metadata) is None
+
+    def _add_properties_to_element(self, element, metadata: Dict[str, Any], mesh_uuid: str):
+        """Proprietățile elementului; la extrudările parametrice fără conturul deja scris în profil"""
+        if not self._uses_mesh_geometry(metadata):
+            metadata = {key: value for key, value in metadata.items() if key not in PROFILE_PROPERTY_KEYS}
+        super()._add_properties_to_element(element, metadata, mesh_uuid)
+
+    def _convert_mesh_to_ifc(self, mesh_data: Dict[str, Any], metadata: Dict[str, Any]) -> bool:
+        """Convertește un element parametric dacă se poate, altfel tesselat"""
+        mesh_uuid = mesh_data['uuid']
+        if mesh_uuid in self.exported_uuids:
+            # Fragment rezultat din booleene al unui element deja scris parametric
+            return False
+
+        prism = get_prism_parameters(metadata)
+        openings = self._collect_openings(metadata) if prism else None
+        if prism is None or openings is None:
+            self.stats["tessellated"] += 1
+            return super()._convert_mesh_to_ifc(mesh_data, metadata)
+
+        try:
+            element, ifc_type = self._create_element(mesh_data['name'], mesh_uuid, metadata)
+            if openings and not element.is_a("IfcElement"):
+                # IfcRelVoidsElement cere un IfcElement (ex. IfcProxy nu este) - geometria deja tăiată
+                self._add_geometry_to_element(element, mesh_data, ifc_type)
+                self.stats["tessellated"] += 1
+                return True
+
+            context = self.model.by_type("IfcGeometricRepresentationContext")[0]
+
+            solid = self._create_extruded_solid(*prism)
+            element.Representation = create_body_representation(self.model, context, [solid], "SweptSolid")
+
+            for void_entry, void_prism in openings:
+                self._add_opening(element, void_entry, void_prism, context)
+
+            self.exported_uuids.add(mesh_uuid)
+            self.stats["parametric"] += 1
+            return True
+
+        except Exception as e:
+            print(f"[ERROR] Failed to convert parametric element {mesh_data.get('name', 'Unknown')}: {e}")
+            return False
+
+    def _collect_openings(self, metadata: Dict[str, Any]) -> Optional[List[Tuple[Dict[str, Any], Tuple]]]:
+        """
+        Parametrii voidurilor care taie elementul.
+
+        Returns:
+            list: (intrare void, parametri prismă) sau None dacă vreun void nu e parametric
+                  (caz în care elementul se exportă cu geometria deja tăiată)
+        """
+        openings = []
+        for void_uuid in dict.fromkeys(metadata.get('is_cut_by', [])):
+            void_entry = self.void_entries.get(void_uuid)
+            void_prism = get_prism_parameters(void_entry) if void_entry else None
+            if void_prism is None:
+                return None
+            openings.append((void_entry, void_prism))
+        return openings
+
+    def _create_extruded_solid(self, points, z_base: float, depth: float, placement=None):
+        """
+        Creează IfcExtrudedAreaSolid dintr-un profil închis 2D extrudat pe Z (world sau, cu
+        `placement` = (origine, axă Z, direcție X), pe axa Z locală a componentei de bloc)
+        """
+        # IfcIndexedPolyCurve fără segmente: polilinie prin puncte, închisă prin repetarea primului punct
+        point_list = self.model.create_entity("IfcCartesianPointList2D",
+                                              CoordList=[list(p) for p in points] + [list(points[0])])
+        curve = self.model.create_entity("IfcIndexedPolyCurve", Points=point_list, SelfIntersect=False)
+        profile = self.model.create_entity("IfcArbitraryClosedProfileDef", ProfileType="AREA", OuterCurve=curve)
+
+        if placement is None:
+            position = self.model.create_entity("IfcAxis2Placement3D",
+                                                Location=self.model.create_entity("IfcCartesianPoint",
+                                                                                  Coordinates=[0.0, 0.0, z_base]))
+        else:
+            location, axis, ref_direction = placement
+            origin = [float(o + a * z_base) for o, a in zip(location, axis)]
+            position = self.model.create_entity(
+                "IfcAxis2Placement3D",
+                Location=self.model.create_entity("IfcCartesianPoint", Coordinates=origin),
+                Axis=self.model.create_entity("IfcDirection", DirectionRatios=[float(a) for a in axis]),
+                RefDirection=self.model.create_entity("IfcDirection", DirectionRatios=[float(r) for r in ref_direction]))
+        if self.extrusion_direction is None:
+            self.extrusion_direction = self.model.create_entity("IfcDirection", DirectionRatios=[0.0, 0.0, 1.0])
+        return self.model.create_entity("IfcExtrudedAreaSolid", SweptArea=profile, Position=position,
+                                        ExtrudedDirection=self.extrusion_direction, Depth=depth)
+
+    def _add_opening(self, element, void_entry: Dict[str, Any], void_prism: Tuple, context):
+        """Creează IfcOpeningElement pentru un void și îl leagă de element prin IfcRelVoidsElement"""
+        opening_name = f"Opening_{void_entry.get('mesh_name', void_entry.get('uuid'))}"
+        opening = self._run_api("root.create_entity", ifc_class="IfcOpeningElement", name=opening_name)
+        opening.PredefinedType = "OPENING"
+        # Un void poate tăia mai multe elemente: GlobalId-ul derivă din void + elementul tăiat
+        opening.GlobalId = ifc_guid(derived_uuid(void_entry['uuid'], "opening", element.GlobalId))
+
+        solid = self._create_extruded_solid(*void_prism)
+        opening.Representation = create_body_representation(self.model, context, [solid], "SweptSolid")
+
+        # Relația directă (API-ul pentru voids diferă între versiunile ifcopenshell)
+        self.model.create_entity("IfcRelVoidsElement",
+                                 GlobalId=ifcopenshell.guid.new(),
+                                 RelatingBuildingElement=element,
+                                 RelatedOpeningElement=opening)
+        self.stats["openings"] += 1
+
+
+def convert_meshes_to_parametric_ifc(meshes, mapping: List[Dict[str, Any]], output_ifc_path: str,
+                                     project_name: str, void_entries: List[Dict[str, Any]] = None) -> bool:
+    """
+    Funcție de utilitate pentru exportul IFC parametric din meshurile finale + mapping
+
+    Args:
+        meshes: Meshurile trimesh finale, cu 'uuid' și 'name' în metadata
+        mapping: Lista intrărilor de mapping
+        output_ifc_path: Calea pentru fișierul IFC rezultat
+        project_name: Numele proiectului IFC
+        void_entries: Intrările de mapping ale voidurilor
+
+    Returns:
+        True dacă conversia a fost cu succes
+    """
+    exporter = IfcParametricExporter()
+    return exporter.convert_meshes_to_ifc(meshes, mapping, output_ifc_path, project_name, void_entries)
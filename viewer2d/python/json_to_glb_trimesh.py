@@ -1,9 +1,10 @@
 import json
 import trimesh
 import numpy as np
-from trimesh.creation import extrude_polygon
 from shapely.geometry import Polygon
 
+from extrusion_kernel import extrude_batch
+
 # Config materiale simple (culoare RGBA)
 LAYER_COLORS = {
     "Rooms": [0.8, 0.8, 0.8, 1.0],
@@ -33,9 +34,7 @@ def main(json_path, out_path):
     with open(json_path, "r") as f:
         data = json.load(f)
 
-    solids = []
-    voids = []
-    materials = []
+    footprints, heights, z_offsets, layers = [], [], [], []
 
     for entity in data:
         if entity["type"] != "LWPOLYLINE" or not entity.get("closed", False):
@@ -45,18 +44,23 @@ def main(json_path, out_path):
         if not poly.is_valid or not poly.is_simple or poly.area == 0:
             continue
         height, z = parse_height_z(entity.get("xdata", {}))
-        layer = entity.get("layer", "default")
-        color = get_color(layer)
-        mesh = extrude_polygon(poly, height)
-        mesh.apply_translation([0, 0, z])
-        if layer == "void":
-            voids.append(mesh)
-        else:
-            solids.append((mesh, color))
+        footprints.append(poly)
+        heights.append(height)
+        z_offsets.append(z)
+        layers.append(entity.get("layer", "default"))
+
+    # Toate extrudările într-un singur lot; Trimesh doar pentru solide și reuniunea voidurilor
+    batch = extrude_batch(footprints, heights, z_offsets)
+    void_union = batch.combined([i for i, layer in enumerate(layers) if layer == "void"])
+    solids = []
+    for i, layer in enumerate(layers):
+        if layer != "void":
+            mesh = batch.mesh(i)
+            if mesh is not None:
+                solids.append((mesh, get_color(layer)))
 
     # Aplica void-urile (diferenta booleana)
-    if voids:
-        void_union = trimesh.util.concatenate(voids)
+    if void_union is not None:
         new_solids = []
         for mesh, color in solids:
             diff = mesh.difference(void_union)
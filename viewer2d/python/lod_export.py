@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+LOD Export - variante simplificate (LOD) pentru meshurile exportate în GLB
+=========================================================================
+
+Pereții curbi, cercurile (discretizate cu `arc_segments`) și acoperișurile cu multe
+fețe costă la fel și când sunt la 200 m de cameră. Cu `--lod`:
+1. Meshurile cu muchii curbe (fețe vecine aproape coplanare, ca în discretizarea
+   arcelor) primesc 2-3 variante simplificate; extrudările drepte rămân neatinse
+2. Simplificarea folosește `Manifold.simplify(tolerance)` din manifold3d (colapsare de
+   muchii cu eroare geometrică limitată), cu toleranța proporțională cu diagonala
+   elementului și limitată de grosimea lui; o variantă se păstrează doar dacă reduce
+   vizibil numărul de fețe și nu schimbă bounding box-ul
+3. Variantele se scriu ca noduri separate `<nume>_LOD<n>_LAYER_<layer>` lângă nodul de
+   bază; în `extras` nodul de bază are lista `lods` cu pragurile de mărime pe ecran,
+   iar fiecare variantă are `lod_of`, `lod_level` și `screen_size`
+
+`screen_size` = fracțiunea din înălțimea ecranului acoperită de sfera elementului sub
+care viewer-ul trece la varianta respectivă (ca la LOD-urile din motoarele de jocuri).
+Variantele nu au `uuid` în metadata, deci nu ajung în mapping, IFC sau amprentele diff.
+"""
+
+import numpy as np
+import trimesh
+
+# (toleranță ca fracțiune din diagonala elementului, screen_size sub care se folosește)
+LOD_LEVELS = (
+    (0.01, 0.25),
+    (0.03, 0.08),
+    (0.08, 0.02),
+)
+
+# Meshurile cu mai puține fețe nu merită simplificate
+LOD_MIN_FACES = 64
+
+# O variantă se păstrează doar dacă are cel mult această fracțiune din fețele nivelului anterior
+LOD_MIN_REDUCTION = 0.7
+
+# Toleranța nu depășește această fracțiune din cea mai mică dimensiune (pereții subțiri nu se aplatizează)
+LOD_THICKNESS_FRACTION = 0.25
+
+# Unghiurile diedre (grade) considerate discretizarea unei suprafețe curbe
+LOD_SMOOTH_ANGLES = (0.5, 30.0)
+
+# Numărul minim de muchii "netede" pentru ca un mesh să fie considerat curb
+LOD_CURVED_EDGES = 4
+
+
+def lod_node_name(node_name, level):
+    """Numele nodului variantei: sufixul LOD înainte de `_LAYER_` (layer-ul rămâne la final pentru Godot)"""
+    if "_LAYER_" in node_name:
+        head, layer = node_name.split("_LAYER_", 1)
+        return f"{head}_LOD{level}_LAYER_{layer}"
+    return f"{node_name}_LOD{level}"
+
+
+def is_curved(mesh):
+    """True dacă meshul conține suprafețe curbe discretizate (muchii între fețe aproape coplanare)"""
+    if len(mesh.faces) < LOD_MIN_FACES:
+        return False
+    angles = np.degrees(mesh.face_adjacency_angles)
+    smooth = (angles > LOD_SMOOTH_ANGLES[0]) & (angles < LOD_SMOOTH_ANGLES[1])
+    return int(np.count_nonzero(smooth)) >= LOD_CURVED_EDGES
+
+
+def simplify_mesh(mesh, tolerance):
+    """
+    Simplifică un mesh închis cu eroarea maximă `tolerance` (unități de model).
+
+    Returns:
+        tuple: (vertecși, fețe) sau None dacă meshul nu este manifold
+    """
+    import manifold3d
+
+    try:
+        source = manifold3d.Manifold(manifold3d.Mesh(
+            vert_properties=np.asarray(mesh.vertices, dtype=np.float32),
+            tri_verts=np.asarray(mesh.faces, dtype=np.uint32)))
+        if source.status() != manifold3d.Error.NoError or source.is_empty():
+            return None
+        result = source.simplify(float(tolerance)).to_mesh()
+    except Exception as e:
+        print(f"[WARNING] LOD simplification failed for {mesh.metadata.get('name', 'mesh')}: {e}")
+        return None
+    return np.asarray(result.vert_properties[:, :3], dtype=np.float64), np.asarray(result.tri_verts, dtype=np.int64)
+
+
+def _lod_mesh(mesh, vertices, faces, level):
+    """Varianta LOD cu materialul și culoarea meshului de bază, fără uuid (nu intră în mapping/IFC)"""
+    lod = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+    material = getattr(mesh.visual, "material", None)
+    rgba = mesh.metadata.get("material_rgba")
+    if rgba is not None:
+        lod.visual.vertex_colors = np.tile(np.asarray(rgba, dtype=np.float32), (len(lod.vertices), 1))
+    if material is not None:
+        lod.visual.material = material
+    lod.metadata = {
+        "name": f"{mesh.metadata.get('name', 'solid')}_LOD{level}",
+        "layer": mesh.metadata.get("layer", "unknown"),
+        "lod_of": mesh.metadata.get("uuid"),
+        "lod_level": level,
+    }
+    return lod
+
+
+def build_lods(mesh, levels=LOD_LEVELS):
+    """
+    Variantele simplificate ale unui mesh.
+
+    Returns:
+        list: (nivel, screen_size, toleranță, mesh) în ordinea nivelurilor; gol pentru
+              meshurile drepte, mici sau nemanifold
+    """
+    if mesh.metadata.get("is_void") or not is_curved(mesh):
+        return []
+
+    extents = np.asarray(mesh.extents, dtype=np.float64)
+    diagonal = float(np.linalg.norm(extents))
+    thickness = float(extents.min())
+    lods = []
+    face_count = len(mesh.faces)
+    for fraction, screen_size in levels:
+        tolerance = min(fraction * diagonal, LOD_THICKNESS_FRACTION * thickness)
+        simplified = simplify_mesh(mesh, tolerance)
+        if simplified is None:
+            break
+        vertices, faces = simplified
+        if len(faces) < 4 or len(faces) > face_count * LOD_MIN_REDUCTION:
+            continue
+        # Silueta: bounding box-ul variantei nu se depărtează de original cu mai mult decât toleranța
+        if np.abs(np.array([vertices.min(axis=0), vertices.max(axis=0)]) - mesh.bounds).max() > 2.0 * tolerance:
+            continue
+        level = len(lods) + 1
+        lods.append((level, screen_size, tolerance, _lod_mesh(mesh, vertices, faces, level)))
+        face_count = len(faces)
+    return lods
+
+
+class LodWriter:
+    """
+    Adaugă meshurile în scenă împreună cu variantele LOD.
+
+    Args:
+        levels: (fracțiune toleranță, screen_size) per nivel, vezi LOD_LEVELS
+    """
+
+    def __init__(self, levels=LOD_LEVELS):
+        self.levels = levels
+        self.stats = {"meshes": 0, "lods": 0, "faces": 0, "lod_faces": 0}
+
+    def add(self, scene, mesh, node_name):
+        """Adaugă meshul ca nod `node_name` și variantele lui ca noduri surori"""
+        lods = build_lods(mesh, self.levels)
+        if not lods:
+            scene.add_geometry(mesh, node_name=node_name)
+            return 0
+
+        extras = {"lods": [
+            {"node": lod_node_name(node_name, level), "level": level, "screen_size": screen_size,
+             "tolerance": round(tolerance, 6), "faces": len(lod.faces)}
+            for level, screen_size, tolerance, lod in lods
+        ]}
+        scene.add_geometry(mesh, node_name=node_name, metadata=extras)
+        for level, screen_size, tolerance, lod in lods:
+            lod_name = lod_node_name(node_name, level)
+            scene.add_geometry(lod, node_name=lod_name, geom_name=lod_name,
+                               metadata={"lod_of": node_name, "lod_level": level, "screen_size": screen_size})
+
+        self.stats["meshes"] += 1
+        self.stats["lods"] += len(lods)
+        self.stats["faces"] += len(mesh.faces)
+        self.stats["lod_faces"] += len(lods[-1][3].faces)
+        print(f"[LOD] {node_name}: {len(mesh.faces)} faces -> "
+              f"{', '.join(str(len(lod.faces)) for _, _, _, lod in lods)}")
+        return len(lods)
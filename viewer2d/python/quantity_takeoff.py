@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Quantity Takeoff - validarea amprentelor și cantitățile elementelor, pe loturi
+==============================================================================
+
+Bucla de entități construia pentru fiecare polilinie închisă un `Polygon`, verifica
+`is_valid` și `area`, apoi calcula `segment_lengths` cu câte un `np.linalg.norm` per latură,
+perimetrul, aria laterală și volumul. FootprintBatch face aceleași calcule pentru toate
+amprentele deodată:
+1. Contururile se concatenează într-un singur tablou de coordonate, cu offset-uri per element
+2. Poligoanele, validarea, aria și perimetrul vin din operațiile vectorizate shapely 2
+   (`linearrings` / `polygons` / `is_valid` / `area` / `length`)
+3. Lungimile laturilor se calculează cu o singură diferență NumPy (latura de închidere inclusă)
+4. Aria laterală (minus Opening_area pentru IfcSpace) și volumul prismei se calculează pe tot lotul
+
+DeferredVolumes amână volumele de după booleene: fiecare etapă (voiduri, tăierea la
+acoperiș, decuparea regiunii) doar înregistrează meshul rezultat, iar volumul ultimului mesh
+se calculează o singură dată, înainte de exportul mapping-ului. Un mesh înlocuit de o etapă
+următoare nu mai este ținut în memorie: rămâne doar volumul lui, ca rezervă.
+"""
+
+from itertools import chain
+
+import numpy as np
+import shapely
+
+
+class FootprintBatch:
+    """
+    Amprentele unui lot de elemente.
+
+    Args:
+        rings: conturul fiecărui element (listă de puncte, goală pentru elementele fără amprentă)
+        closed: flag per contur (implicit toate închise); se măsoară doar contururile închise
+            cu cel puțin 3 puncte
+
+    Attributes:
+        valid: (E,) bool - poligon valid cu arie pozitivă
+        areas, perimeters: (E,) float64 - 0 pentru elementele fără amprentă
+        lateral_areas, volumes: (E,) float64 - cantitățile prismei, după takeoff()
+    """
+
+    def __init__(self, rings, closed=None):
+        count = len(rings)
+        self.rings = rings
+        self.closed = [True] * count if closed is None else list(closed)
+        present = np.array([is_closed and len(ring) >= 3 for ring, is_closed in zip(rings, self.closed)], dtype=bool)
+        sizes = np.array([len(ring) if keep else 0 for ring, keep in zip(rings, present)], dtype=np.int64)
+        self.segment_offsets = np.concatenate([[0], np.cumsum(sizes)])
+        self.polygons = np.full(count, None, dtype=object)
+        self.valid = np.zeros(count, dtype=bool)
+        self.areas = np.zeros(count)
+        self.perimeters = np.zeros(count)
+        self.segments = np.zeros(0)
+
+        if present.any():
+            coords = np.array(list(chain.from_iterable(ring for ring, keep in zip(rings, present) if keep)),
+                              dtype=np.float64)
+            starts, ends = self.segment_offsets[:-1][present], self.segment_offsets[1:][present]
+
+            # Lungimile laturilor: punctul următor din același contur (ultimul revine la primul);
+            # produsul scalar ca în np.linalg.norm, deci aceleași valori ca per element
+            following = np.arange(1, len(coords) + 1)
+            following[ends - 1] = starts
+            delta = coords[following] - coords
+            self.segments = np.sqrt(np.matmul(delta[:, None, :], delta[:, :, None]).reshape(-1))
+
+            # Inelele închise au nevoie de cel puțin 4 coordonate (închiderea se adaugă automat)
+            open_ring = np.any(coords[starts] != coords[ends - 1], axis=1)
+            buildable = np.flatnonzero(present)[(ends - starts) + open_ring >= 4]
+            if len(buildable):
+                mask = np.repeat(np.isin(np.flatnonzero(present), buildable), ends - starts)
+                ring_index = np.repeat(np.arange(len(buildable)), sizes[buildable])
+                polygons = shapely.polygons(shapely.linearrings(coords[mask], indices=ring_index))
+                self.polygons[buildable] = polygons
+                self.areas[buildable] = shapely.area(polygons)
+                self.perimeters[buildable] = shapely.length(polygons)
+                self.valid[buildable] = shapely.is_valid(polygons) & (self.areas[buildable] > 0)
+
+        self.heights = self.opening_areas = self.lateral_areas = self.volumes = None
+
+    def __len__(self):
+        return len(self.polygons)
+
+    def polygon(self, index):
+        """Poligonul shapely al elementului sau None"""
+        return self.polygons[index]
+
+    def segment_lengths(self, index):
+        """Lungimile laturilor elementului (listă de float, latura de închidere inclusă)"""
+        return self.segments[self.segment_offsets[index]:self.segment_offsets[index + 1]].tolist()
+
+    def takeoff(self, heights, opening_areas=None):
+        """
+        Aria laterală și volumul prismei pentru tot lotul.
+
+        Args:
+            heights: înălțimile de extrudare
+            opening_areas: ariile scăzute din aria laterală (ex. Opening_area la IfcSpace), 0 = fără
+        """
+        self.heights = np.asarray(heights, dtype=np.float64).reshape(-1)
+        self.opening_areas = (np.zeros(len(self)) if opening_areas is None
+                              else np.asarray(opening_areas, dtype=np.float64).reshape(-1))
+        self.lateral_areas = self.perimeters * self.heights
+        openings = self.opening_areas > 0
+        self.lateral_areas[openings] = np.maximum(0.0, self.lateral_areas[openings] - self.opening_areas[openings])
+        self.volumes = self.areas * self.heights
+        return self.lateral_areas, self.volumes
+
+
+class DeferredVolumes:
+    """
+    Volumele de după operațiile booleene, calculate o singură dată înainte de export.
+
+    Fiecare etapă înregistrează meshul rezultat pentru uuid-ul elementului; se păstrează doar
+    ultimul mesh per uuid (cel aflat deja în solids). Când o etapă îl înlocuiește, meshul
+    anterior este redus la volumul lui acceptat (un scalar), folosit doar dacă volumul ultimului
+    mesh nu este acceptat. La `resolve()` intrarea primește volumul ultimului mesh acceptat,
+    ca actualizările succesive de până acum.
+    """
+
+    def __init__(self):
+        self.pending = {}  # uuid -> (mesh, etapă, positive, (volum, etapă) anterior acceptat sau None)
+
+    def defer(self, element_uuid, mesh, stage, positive=True):
+        """
+        Args:
+            element_uuid: uuid-ul intrării de mapping
+            mesh: meshul rezultat după etapă
+            stage: numele etapei (pentru log)
+            positive: True dacă volumul se acceptă doar când este pozitiv
+        """
+        previous = self.pending.get(element_uuid)
+        fallback = self._accepted_volume(previous, element_uuid) if previous else None
+        self.pending[element_uuid] = (mesh, stage, positive, fallback)
+
+    @staticmethod
+    def _accepted_volume(candidate, label):
+        """Volumul acceptat al unui candidat: (volum, etapă) sau volumul anterior acceptat"""
+        mesh, stage, positive, fallback = candidate
+        try:
+            volume = float(mesh.volume)
+        except Exception as e:
+            print(f"[WARNING] Could not compute volume after {stage} for {label}: {e}")
+            return fallback
+        if positive and not volume > 0:
+            return fallback
+        return volume, stage
+
+    def resolve(self, mapping):
+        """Scrie volumele amânate în intrările din mapping; întoarce numărul de volume scrise"""
+        uuid_to_entry = {entry["uuid"]: entry for entry in mapping if entry.get("uuid")}
+        written = 0
+        for element_uuid, candidate in self.pending.items():
+            entry = uuid_to_entry.get(element_uuid)
+            if entry is None:
+                continue
+            accepted = self._accepted_volume(candidate, entry.get("mesh_name"))
+            if accepted is None:
+                continue
+            volume, stage = accepted
+            entry["volume"] = volume
+            written += 1
+            print(f"[DEBUG] Volume updated after {stage}: {entry.get('mesh_name')} = {volume:.3f}m³")
+        self.pending.clear()
+        return written
@@ -1,24 +1,112 @@
 #!/usr/bin/env python3
 """
 Smart DXF to GLB converter cu cache inteligent și optimizări
+
+Cache-ul este adresat prin conținut:
+- cheia unei conversii = digest combinat din conținutul DXF, layer_materials.json,
+  bibliotecile door/window, codul convertorului și opțiunile de conversie
+- ieșirile (GLB, mapping, IFC, raport de performanță) sunt păstrate în
+  `<cache>/objects/` după hash-ul conținutului, deci revenirea la o versiune
+  anterioară a unui fișier restaurează instant ieșirile ei
+- hash-urile fișierelor sunt reținute împreună cu mtime + size, astfel încât
+  fișierele nemodificate nu sunt recitite
 """
 
+import argparse
+import ast
 import os
+import contextlib
 import time
 import hashlib
 import json
+import shutil
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import sys
 
 # Import scriptul existent
 sys.path.append(os.path.dirname(__file__))
-from dxf_to_glb_trimesh import dxf_to_gltf
+from dxf_to_glb_trimesh import dxf_to_gltf, parse_ifc_modes, DEFAULT_IFC_MODES
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Versiunea formatului de cache (schimbarea ei invalidează toate intrările)
+CACHE_FORMAT = 2
+
+# Fișierele de date citite de convertor
+MATERIALS_FILE = SCRIPT_DIR.parent / "layer_materials.json"
+LIBRARY_FILES = (
+    SCRIPT_DIR / "dxf_library" / "doors_lib.dxf",
+    SCRIPT_DIR / "dxf_library" / "windows_lib.dxf",
+)
+
+# Modulul de intrare al pipeline-ului; modulele locale importate de el (direct, leneș sau prin
+# _load_optional_module) intră în digest-ul convertorului, vezi converter_sources()
+CONVERTER_ENTRY = "dxf_to_glb_trimesh.py"
+# Funcțiile prin care convertorul importă module după nume (primul argument este numele modulului)
+DYNAMIC_IMPORT_CALLS = ("_load_optional_module", "import_module")
+
+# Ieșirile unei conversii (sufixe față de numele de bază al GLB-ului) păstrate în cache.
+# `_auto.ifc` nu este inclus: se scrie asincron, după ce dxf_to_gltf a returnat.
+OUTPUT_SUFFIXES = (".glb", "_mapping.json", ".ifc", "_parametric.ifc", "_from_glb.ifc", "_perf.json")
+
+
+def _imported_names(source_path):
+    """Numele modulelor importate oriunde într-un fișier sursă (inclusiv importurile din funcții)"""
+    tree = ast.parse(source_path.read_text(encoding="utf-8"), filename=str(source_path))
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+        elif isinstance(node, ast.Call) and node.args and isinstance(node.args[0], ast.Constant):
+            func = node.func
+            func_name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+            if func_name in DYNAMIC_IMPORT_CALLS and isinstance(node.args[0].value, str):
+                names.append(node.args[0].value)
+    return names
+
+
+def converter_sources(entry=CONVERTER_ENTRY, source_dir=SCRIPT_DIR):
+    """
+    Codul pipeline-ului: modulul de intrare și toate modulele locale la care ajunge prin importuri.
+    Orice modificare a acestor fișiere înseamnă altă versiune de convertor. Lista se derivă din
+    importuri, astfel încât un modul nou al pipeline-ului nu poate lipsi din digest.
+    
+    Returns:
+        list: numele fișierelor (relative la source_dir), sortate
+    """
+    source_dir = Path(source_dir)
+    sources = set()
+    pending = [entry]
+    while pending:
+        name = pending.pop()
+        if name in sources:
+            continue
+        sources.add(name)
+        for module in _imported_names(source_dir / name):
+            file_name = module.split(".")[0] + ".py"
+            if file_name not in sources and (source_dir / file_name).is_file():
+                pending.append(file_name)
+    return sorted(sources)
+
 
 class SmartDXFConverter:
-    def __init__(self, cache_dir="python/cache"):
+    def __init__(self, cache_dir="python/cache", arc_segments=16, ifc_mode=DEFAULT_IFC_MODES,
+                 enable_tov=True, ifc_geometry="auto"):
         self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(exist_ok=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.objects_dir = self.cache_dir / "objects"
         self.cache_file = self.cache_dir / "conversion_cache.json"
+        # Opțiunile conversiei fac parte din cheia de cache
+        self.options = {
+            "arc_segments": int(arc_segments),
+            "ifc_mode": sorted(parse_ifc_modes(ifc_mode)),
+            "enable_tov": bool(enable_tov),
+            "ifc_geometry": ifc_geometry,
+        }
+        self._converter_digest = None
         self.load_cache()
     
     def load_cache(self):
@@ -32,118 +120,333 @@ class SmartDXFConverter:
         except Exception as e:
             print(f"[CACHE] Error loading cache: {e}")
             self.cache = {}
+        
+        if self.cache.get("format") != CACHE_FORMAT:
+            # Cache vechi (doar md5 + mtime GLB) sau corupt: se reconstruiește
+            self.cache = {"format": CACHE_FORMAT, "files": {}, "entries": {}, "targets": {}}
+        # Cheile modificate de acest proces (doar ele se scriu peste cache-ul de pe disc)
+        self._dirty = {"files": set(), "entries": set(), "targets": set()}
+    
+    def _set_cache(self, section, key, value):
+        self.cache[section][key] = value
+        self._dirty[section].add(key)
+    
+    @contextlib.contextmanager
+    def _cache_lock(self):
+        """Lock exclusiv pe cache_dir, partajat între procesele care convertesc în paralel"""
+        with open(self.cache_dir / "conversion_cache.lock", 'a+b') as lock_file:
+            try:
+                import fcntl
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            except ImportError:
+                # Windows: lock pe primul byte, cu reîncercare până se eliberează
+                import msvcrt
+                lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.05)
+            try:
+                yield
+            finally:
+                try:
+                    import fcntl
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                except ImportError:
+                    import msvcrt
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
     
     def save_cache(self):
-        """Salvează cache-ul de conversii"""
+        """
+        Salvează cache-ul de conversii (atomic: temp + rename).
+        Sub lock se recitește cache-ul de pe disc și se scriu peste el doar cheile
+        modificate de acest proces, astfel încât intrările altor workeri sunt păstrate.
+        """
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
+            with self._cache_lock():
+                try:
+                    with open(self.cache_file, 'r') as f:
+                        on_disk = json.load(f)
+                except (OSError, ValueError):
+                    on_disk = {}
+                if on_disk.get("format") == CACHE_FORMAT:
+                    for section, keys in self._dirty.items():
+                        for key in keys:
+                            on_disk[section][key] = self.cache[section][key]
+                    self.cache = on_disk
+                
+                tmp_path = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.tmp")
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.cache, f, indent=2)
+                os.replace(tmp_path, self.cache_file)
+                self._dirty = {section: set() for section in self._dirty}
         except Exception as e:
             print(f"[CACHE] Error saving cache: {e}")
     
     def get_file_hash(self, file_path):
-        """Calculează hash-ul unui fișier pentru verificarea schimbărilor"""
+        """
+        Calculează hash-ul (sha256) unui fișier pentru verificarea schimbărilor.
+        Dacă mtime și dimensiunea nu s-au schimbat, se folosește hash-ul reținut.
+        """
+        file_path = Path(file_path)
         try:
-            hasher = hashlib.md5()
+            stat = file_path.stat()
+        except OSError:
+            return None
+        
+        key = str(file_path.resolve())
+        known = self.cache["files"].get(key)
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["sha256"]
+        
+        try:
+            hasher = hashlib.sha256()
             with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
+                for chunk in iter(lambda: f.read(1 << 20), b""):
                     hasher.update(chunk)
-            return hasher.hexdigest()
+            digest = hasher.hexdigest()
         except Exception as e:
             print(f"[HASH] Error calculating hash for {file_path}: {e}")
             return None
+        
+        self._set_cache("files", key, {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest})
+        return digest
+    
+    def get_converter_digest(self):
+        """Digest-ul codului convertorului (modulele pipeline-ului), calculat o dată per instanță"""
+        if self._converter_digest is None:
+            hasher = hashlib.sha256(f"format:{CACHE_FORMAT}".encode())
+            for name in converter_sources(CONVERTER_ENTRY, SCRIPT_DIR):
+                hasher.update(f"|{name}:{self.get_file_hash(SCRIPT_DIR / name)}".encode())
+            self._converter_digest = hasher.hexdigest()
+        return self._converter_digest
+    
+    def get_cache_key(self, dxf_path):
+        """
+        Cheia conversiei: digest combinat din DXF, materiale, biblioteci, cod și opțiuni.
+        
+        Returns:
+            str sau None dacă DXF-ul nu poate fi citit
+        """
+        dxf_hash = self.get_file_hash(dxf_path)
+        if not dxf_hash:
+            return None
+        
+        inputs = {
+            "dxf": dxf_hash,
+            "materials": self.get_file_hash(MATERIALS_FILE),
+            "libraries": [self.get_file_hash(path) for path in LIBRARY_FILES],
+            "converter": self.get_converter_digest(),
+            "options": self.options,
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+    
+    def _output_paths(self, glb_path):
+        """Căile ieșirilor unei conversii: sufix -> cale"""
+        base = glb_path.with_suffix("")
+        return {suffix: Path(str(base) + suffix) for suffix in OUTPUT_SUFFIXES}
+    
+    def _object_path(self, digest):
+        return self.objects_dir / digest[:2] / digest
+    
+    def _store_object(self, file_path):
+        """Copiază un fișier în store-ul adresat prin conținut; returnează hash-ul"""
+        digest = self.get_file_hash(file_path)
+        object_path = self._object_path(digest)
+        if not object_path.exists():
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = object_path.with_name(f"{object_path.name}.{os.getpid()}.tmp")
+            shutil.copyfile(file_path, tmp_path)
+            os.replace(tmp_path, object_path)
+        return digest
+    
+    def _outputs_in_place(self, glb_path, cache_key):
+        """Ieșirile de pe disc sunt exact cele ale intrării cache_key (verificare doar prin stat)"""
+        target = self.cache["targets"].get(str(glb_path))
+        if not target or target.get("key") != cache_key:
+            return False
+        for suffix, path in self._output_paths(glb_path).items():
+            recorded = target["outputs"].get(suffix)
+            if recorded is None:
+                if path.exists():
+                    return False
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                return False
+            if stat.st_size != recorded["size"] or stat.st_mtime_ns != recorded["mtime_ns"]:
+                return False
+        return True
+    
+    def _entry_available(self, cache_key):
+        entry = self.cache["entries"].get(cache_key)
+        return bool(entry) and all(self._object_path(d).exists() for d in entry["outputs"].values())
+    
+    def _record_target(self, glb_path, cache_key, outputs):
+        """Reține ce ieșiri (și cu ce stat) au fost scrise pentru GLB-ul țintă"""
+        recorded = {}
+        for suffix, digest in outputs.items():
+            stat = self._output_paths(glb_path)[suffix].stat()
+            recorded[suffix] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        self._set_cache("targets", str(glb_path), {"key": cache_key, "outputs": recorded})
+    
+    def _remove_stale_outputs(self, glb_path, outputs):
+        """Șterge ieșirile scrise de conversia anterioară care lipsesc din `outputs` (ex. alt --ifc)"""
+        previous = self.cache["targets"].get(str(glb_path), {}).get("outputs", {})
+        for suffix, path in self._output_paths(glb_path).items():
+            if suffix in previous and suffix not in outputs and path.exists():
+                path.unlink()
+    
+    def _restore(self, glb_path, cache_key):
+        """Restaurează ieșirile unei conversii din store (copie atomică per fișier)"""
+        entry = self.cache["entries"][cache_key]
+        self._remove_stale_outputs(glb_path, entry["outputs"])
+        for suffix, path in self._output_paths(glb_path).items():
+            digest = entry["outputs"].get(suffix)
+            if digest is None:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + ".tmp")
+            shutil.copyfile(self._object_path(digest), tmp_path)
+            os.replace(tmp_path, path)
+        self._record_target(glb_path, cache_key, entry["outputs"])
+        self.save_cache()
+    
+    def _write_perf_report(self, glb_path, cache_key, conversion_time):
+        """Raportul de performanță al conversiei (păstrat în cache împreună cu celelalte ieșiri)"""
+        report = {
+            "cache_key": cache_key,
+            "conversion_time": conversion_time,
+            "converted_at": time.time(),
+            "options": self.options,
+        }
+        with open(self._output_paths(glb_path)["_perf.json"], 'w') as f:
+            json.dump(report, f, indent=2)
     
     def needs_conversion(self, dxf_path, glb_path):
-        """Verifică dacă fișierul DXF trebuie reconvertit"""
+        """Verifică dacă fișierul DXF trebuie reconvertit (nici pe disc, nici în cache)"""
         dxf_path = Path(dxf_path)
         glb_path = Path(glb_path)
         
-        # Verifică dacă GLB-ul există
-        if not glb_path.exists():
-            print(f"[SMART] GLB not found, conversion needed: {glb_path}")
-            return True
-        
-        # Calculează hash-ul DXF-ului curent
-        current_hash = self.get_file_hash(dxf_path)
-        if not current_hash:
+        cache_key = self.get_cache_key(dxf_path)
+        if not cache_key:
             return True
         
-        # Verifică cache-ul
-        cache_key = str(dxf_path)
-        if cache_key in self.cache:
-            cached_data = self.cache[cache_key]
-            cached_hash = cached_data.get("hash")
-            cached_glb_time = cached_data.get("glb_time", 0)
-            
-            # Verifică dacă hash-ul s-a schimbat
-            if current_hash != cached_hash:
-                print(f"[SMART] DXF content changed, conversion needed")
-                return True
-            
-            # Verifică dacă GLB-ul este mai nou decât în cache
-            try:
-                glb_time = glb_path.stat().st_mtime
-                if glb_time > cached_glb_time:
-                    print(f"[SMART] GLB is newer than cache, no conversion needed")
-                    return False
-            except Exception:
-                return True
-            
+        if self._outputs_in_place(glb_path, cache_key):
             print(f"[SMART] No changes detected, skipping conversion")
             return False
         
-        # Nu există în cache, trebuie convertit
-        print(f"[SMART] New file, conversion needed")
+        if self._entry_available(cache_key):
+            print(f"[SMART] Outputs available in cache, no conversion needed")
+            return False
+        
+        print(f"[SMART] Inputs changed (DXF, materials, libraries, converter or options), conversion needed")
         return True
     
     def convert(self, dxf_path, glb_path, force=False):
         """Convertește DXF la GLB cu cache inteligent"""
+        return self.convert_with_status(dxf_path, glb_path, force) is not None
+    
+    def convert_with_status(self, dxf_path, glb_path, force=False):
+        """
+        Convertește DXF la GLB cu cache inteligent.
+        
+        Returns:
+            "skipped" (ieșirile erau deja pe disc), "restored" (copiate din cache),
+            "converted" sau None dacă conversia a eșuat
+        """
         dxf_path = Path(dxf_path)
         glb_path = Path(glb_path)
         
         print(f"[SMART] Processing: {dxf_path} -> {glb_path}")
         
+        cache_key = self.get_cache_key(dxf_path)
+        if not cache_key:
+            print(f"[SMART] ✗ Cannot read: {dxf_path}")
+            return None
+        
         # Verifică dacă conversia este necesară
-        if not force and not self.needs_conversion(dxf_path, glb_path):
-            print(f"[SMART] ✓ Skipped (no changes): {glb_path}")
-            return True
+        if not force:
+            if self._outputs_in_place(glb_path, cache_key):
+                print(f"[SMART] ✓ Skipped (no changes): {glb_path}")
+                return "skipped"
+            if self._entry_available(cache_key):
+                start_time = time.time()
+                self._restore(glb_path, cache_key)
+                print(f"[SMART] ✓ Restored from cache in {time.time() - start_time:.3f}s: {glb_path}")
+                return "restored"
         
         # Înregistrează timpul de start
         start_time = time.time()
         
         try:
-            # Calculează hash-ul înainte de conversie
-            file_hash = self.get_file_hash(dxf_path)
-            
             # Efectuează conversia
             print(f"[SMART] Converting: {dxf_path}")
-            dxf_to_gltf(str(dxf_path), str(glb_path))
+            dxf_to_gltf(str(dxf_path), str(glb_path), self.options["arc_segments"],
+                        ifc_mode=self.options["ifc_mode"], enable_tov=self.options["enable_tov"],
+                        ifc_geometry=self.options["ifc_geometry"])
             
             # Verifică că GLB-ul a fost creat
             if not glb_path.exists():
                 print(f"[SMART] ✗ Conversion failed: GLB not created")
-                return False
+                return None
             
-            # Actualizează cache-ul
             conversion_time = time.time() - start_time
-            self.cache[str(dxf_path)] = {
-                "hash": file_hash,
-                "glb_path": str(glb_path),
-                "glb_time": glb_path.stat().st_mtime,
+            self._write_perf_report(glb_path, cache_key, conversion_time)
+            
+            # Păstrează ieșirile în store și actualizează cache-ul
+            outputs = {}
+            for suffix, path in self._output_paths(glb_path).items():
+                # Ieșirile rămase de la o conversie anterioară (ex. alt --ifc) nu aparțin acestei chei
+                if path.exists() and path.stat().st_mtime >= start_time:
+                    outputs[suffix] = self._store_object(path)
+            self._set_cache("entries", cache_key, {
+                "dxf_path": str(dxf_path),
+                "outputs": outputs,
                 "conversion_time": conversion_time,
                 "last_converted": time.time()
-            }
+            })
+            self._remove_stale_outputs(glb_path, outputs)
+            self._record_target(glb_path, cache_key, outputs)
             self.save_cache()
             
             print(f"[SMART] ✓ Converted in {conversion_time:.2f}s: {glb_path}")
-            return True
+            return "converted"
             
         except Exception as e:
             print(f"[SMART] ✗ Conversion failed: {e}")
-            return False
+            return None
+    
+    def expected_conversion_time(self, dxf_path):
+        """
+        Durata estimată a conversiei: ultima durată cunoscută pentru acest DXF
+        (orice versiune a lui), altfel dimensiunea fișierului ca aproximare.
+        
+        Returns:
+            tuple: (are durată cunoscută, valoare) - sortabil descrescător
+        """
+        dxf_key = str(dxf_path)
+        known = [entry for entry in self.cache["entries"].values() if entry.get("dxf_path") == dxf_key]
+        if known:
+            latest = max(known, key=lambda entry: entry.get("last_converted", 0))
+            return (1, latest.get("conversion_time", 0.0))
+        try:
+            return (0, Path(dxf_path).stat().st_size)
+        except OSError:
+            return (0, 0)
     
-    def batch_convert(self, input_dir, output_dir=None, pattern="*.dxf"):
-        """Convertește în lot toate fișierele DXF dintr-un folder"""
+    def batch_convert(self, input_dir, output_dir=None, pattern="*.dxf", jobs=1, force=False):
+        """
+        Convertește în lot toate fișierele DXF dintr-un folder
+        
+        Args:
+            jobs: numărul de procese worker (0 = câte unul per core); fișierele
+                  sunt trimise în ordinea duratei estimate, cele mai lungi primele
+        """
         input_dir = Path(input_dir)
         if output_dir:
             output_dir = Path(output_dir)
@@ -156,49 +459,94 @@ class SmartDXFConverter:
             return
         
         print(f"[SMART] Found {len(dxf_files)} DXF files")
-        converted = 0
-        skipped = 0
+        counts = {"converted": 0, "restored": 0, "skipped": 0, None: 0}
+        wall_start = time.time()
+        cpu_start = time.process_time()
+        worker_cpu = 0.0
         
+        # Fișierele deja pe disc sau în cache se rezolvă aici, fără worker
+        pending = []
         for dxf_file in dxf_files:
             glb_file = output_dir / (dxf_file.stem + ".glb")
-            
-            if self.convert(dxf_file, glb_file):
-                if self.needs_conversion(dxf_file, glb_file):
-                    converted += 1
-                else:
-                    skipped += 1
+            if force or self.needs_conversion(dxf_file, glb_file):
+                pending.append((dxf_file, glb_file))
+            else:
+                counts[self.convert_with_status(dxf_file, glb_file)] += 1
+        
+        # Cele mai lungi conversii primele, ca să nu rămână un fișier mare la coadă
+        pending.sort(key=lambda item: self.expected_conversion_time(item[0]), reverse=True)
         
-        print(f"[SMART] Batch complete: {converted} converted, {skipped} skipped")
+        jobs = min(jobs or os.cpu_count() or 1, len(pending))
+        if jobs <= 1:
+            for dxf_file, glb_file in pending:
+                counts[self.convert_with_status(dxf_file, glb_file, force=force)] += 1
+        else:
+            print(f"[SMART] Converting {len(pending)} files with {jobs} worker processes")
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                     initargs=(str(self.cache_dir), self.options)) as pool:
+                futures = {pool.submit(_convert_in_worker, str(dxf_file), str(glb_file), force): dxf_file
+                           for dxf_file, glb_file in pending}
+                for future in as_completed(futures):
+                    try:
+                        status, cpu_time = future.result()
+                    except Exception as e:
+                        print(f"[SMART] ✗ Worker failed for {futures[future]}: {e}")
+                        status, cpu_time = None, 0.0
+                    counts[status] += 1
+                    worker_cpu += cpu_time
+            # Intrările scrise de workeri
+            self.load_cache()
+        
+        wall_time = time.time() - wall_start
+        cpu_time = time.process_time() - cpu_start + worker_cpu
+        print(f"[SMART] Batch complete: {counts['converted']} converted, {counts['restored']} restored from cache, "
+              f"{counts['skipped']} skipped, {counts[None]} failed")
+        print(f"[SMART] Wall time: {wall_time:.2f}s, CPU time: {cpu_time:.2f}s")
+        return counts
+
+
+# Converterul fiecărui proces worker, creat o singură dată (worker „cald”: importuri și cache încărcate)
+_WORKER_CONVERTER = None
+
+def _init_worker(cache_dir, options):
+    global _WORKER_CONVERTER
+    _WORKER_CONVERTER = SmartDXFConverter(cache_dir, **options)
+
+def _convert_in_worker(dxf_path, glb_path, force):
+    """Conversia unui fișier într-un worker; returnează (status, timp CPU)"""
+    cpu_start = time.process_time()
+    status = _WORKER_CONVERTER.convert_with_status(dxf_path, glb_path, force=force)
+    return status, time.process_time() - cpu_start
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage:")
-        print("  python smart_dxf_converter.py input.dxf [output.glb]")
-        print("  python smart_dxf_converter.py --batch input_folder [output_folder]")
-        print("  python smart_dxf_converter.py --force input.dxf output.glb")
-        return 1
-    
-    converter = SmartDXFConverter()
-    
-    if sys.argv[1] == "--batch":
-        input_folder = sys.argv[2]
-        output_folder = sys.argv[3] if len(sys.argv) > 3 else input_folder
-        converter.batch_convert(input_folder, output_folder)
-    
-    elif sys.argv[1] == "--force":
-        if len(sys.argv) < 4:
-            print("Error: --force requires input and output files")
-            return 1
-        dxf_path = sys.argv[2]
-        glb_path = sys.argv[3]
-        converter.convert(dxf_path, glb_path, force=True)
-    
-    else:
-        dxf_path = sys.argv[1]
-        glb_path = sys.argv[2] if len(sys.argv) > 2 else Path(dxf_path).with_suffix(".glb")
-        converter.convert(dxf_path, glb_path)
-    
-    return 0
+    parser = argparse.ArgumentParser(description="Conversie DXF -> GLB cu cache adresat prin conținut")
+    parser.add_argument("--batch", action="store_true", help="Convertește toate DXF-urile din folderul de intrare")
+    parser.add_argument("--force", action="store_true", help="Convertește chiar dacă ieșirile sunt în cache")
+    parser.add_argument("--cache-dir", default="python/cache", help="Folderul cache-ului (implicit python/cache)")
+    parser.add_argument("--arc-segments", type=int, default=16, help="Segmente pentru arce (implicit 16)")
+    parser.add_argument("--ifc", default=",".join(DEFAULT_IFC_MODES),
+                        help="Moduri IFC: none, final, background, from-glb, parametric (implicit final)")
+    parser.add_argument("--ifc-geometry", default="auto", choices=("auto", "polygonal", "triangulated", "brep"),
+                        help="Geometria pentru --ifc=background")
+    parser.add_argument("--no-tov", action="store_true", help="Nu procesa blocurile Door/Window *_TOV")
+    parser.add_argument("--jobs", type=int, nargs="?", const=0, default=1,
+                        help="Conversii paralele în --batch (fără valoare: un proces per core)")
+    parser.add_argument("input", help="Fișierul DXF (sau folderul, cu --batch)")
+    parser.add_argument("output", nargs="?", help="Fișierul GLB (sau folderul, cu --batch)")
+    args = parser.parse_args()
+    
+    try:
+        converter = SmartDXFConverter(args.cache_dir, arc_segments=args.arc_segments, ifc_mode=args.ifc,
+                                      enable_tov=not args.no_tov, ifc_geometry=args.ifc_geometry)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    if args.batch:
+        counts = converter.batch_convert(args.input, args.output or args.input, jobs=args.jobs, force=args.force)
+        return 1 if counts and counts[None] else 0
+    
+    glb_path = args.output or Path(args.input).with_suffix(".glb")
+    return 0 if converter.convert(args.input, glb_path, force=args.force) else 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
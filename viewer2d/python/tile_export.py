@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Tile Export - împărțirea meshurilor finale în tile-uri GLB (quadtree XY)
+=======================================================================
+
+Pentru modelele de sit / campus un singur GLB per nivel este prea mare pentru viewer:
+1. Meshurile finale se împart recursiv după extinderea XY (quadtree) până când un
+   tile are cel mult `max_elements` meshuri; un mesh aparține tile-ului care conține
+   centrul bounding box-ului său (elementele nu se taie)
+2. Fiecare frunză devine un GLB în `<stem>_tiles/` (noduri numite ca în GLB-ul complet)
+3. Indexul `<stem>_tileset.json` urmează structura 3D Tiles 1.0 (ca exemplele din
+   `maps test/`): `boundingVolume.box`, `geometricError`, `refine: "ADD"`, `children`,
+   `content.uri`; în `extras` fiecare frunză are dimensiunea în bytes, numărul de
+   meshuri și UUID-urile elementelor
+
+Coordonatele sunt cele ale conversiei (metri, Z în sus), fără transformare geografică.
+
+Utilizare:
+    python tile_export.py model.glb [max_elements]
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import trimesh
+from trimesh.exchange import gltf
+
+# Numărul maxim implicit de meshuri într-un tile
+TILE_MAX_ELEMENTS = 200
+
+# Adâncimea maximă a quadtree-ului (4^8 tile-uri la limită)
+TILE_MAX_DEPTH = 8
+
+
+def tiles_folder(out_path):
+    """Folderul cu GLB-urile tile-urilor pentru GLB-ul complet `out_path`"""
+    out_path = Path(out_path)
+    return out_path.with_name(out_path.stem + "_tiles")
+
+
+def tileset_path(out_path):
+    """Calea indexului de tile-uri pentru GLB-ul complet `out_path`"""
+    out_path = Path(out_path)
+    return out_path.with_name(out_path.stem + "_tileset.json")
+
+
+def _box_volume(bounds):
+    """boundingVolume.box din 3D Tiles: centru + trei semi-axe (aliniate pe axe)"""
+    center = (bounds[0] + bounds[1]) / 2.0
+    half = np.maximum((bounds[1] - bounds[0]) / 2.0, 1e-6)
+    return [float(v) for v in (center[0], center[1], center[2],
+                               half[0], 0.0, 0.0,
+                               0.0, half[1], 0.0,
+                               0.0, 0.0, half[2])]
+
+
+def _union_bounds(bounds_list):
+    stacked = np.array(bounds_list, dtype=np.float64)
+    return np.array([stacked[:, 0].min(axis=0), stacked[:, 1].max(axis=0)])
+
+
+class TileWriter:
+    """
+    Construiește quadtree-ul și scrie tile-urile unui model.
+
+    Args:
+        out_path: GLB-ul complet (tile-urile și indexul se scriu lângă el)
+        node_name: funcție (mesh, index) -> numele nodului (același ca în GLB-ul complet)
+        max_elements: meshuri per tile înainte de împărțire
+        max_depth: adâncimea maximă a quadtree-ului
+    """
+
+    def __init__(self, out_path, node_name, max_elements=TILE_MAX_ELEMENTS, max_depth=TILE_MAX_DEPTH):
+        self.out_path = Path(out_path)
+        self.folder = tiles_folder(out_path)
+        self.node_name = node_name
+        self.max_elements = max(1, int(max_elements))
+        self.max_depth = max_depth
+        self.stats = {"tiles": 0, "bytes": 0}
+
+    def write(self, meshes):
+        """
+        Scrie GLB-urile tile-urilor și indexul.
+
+        Args:
+            meshes: meshurile finale, în ordinea scenei complete
+
+        Returns:
+            Path: calea indexului (tileset JSON)
+        """
+        self.folder.mkdir(exist_ok=True)
+        for old_tile in self.folder.glob("tile_*.glb"):
+            old_tile.unlink()
+
+        items = [(index, mesh) for index, mesh in enumerate(meshes) if len(mesh.vertices) > 0]
+        if items:
+            bounds = np.array([mesh.bounds for _, mesh in items], dtype=np.float64)
+            region = np.array([bounds[:, 0, :2].min(axis=0), bounds[:, 1, :2].max(axis=0)])
+            root = self._build(items, bounds, region, "0", 0)
+        else:
+            root = {"boundingVolume": {"box": _box_volume(np.zeros((2, 3)))}, "geometricError": 0.0}
+        root["refine"] = "ADD"
+
+        tileset = {
+            "asset": {"version": "1.0", "generator": "viewer2d dxf_to_glb_trimesh"},
+            "geometricError": root["geometricError"],
+            "root": root,
+            "extras": {"source_glb": self.out_path.name, "tiles": self.stats["tiles"], "bytes": self.stats["bytes"]},
+        }
+        index_path = tileset_path(self.out_path)
+        temp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(tileset, f, indent=2)
+        os.replace(temp_path, index_path)
+        return index_path
+
+    def _build(self, items, bounds, region, tile_id, depth):
+        """Nodul quadtree-ului pentru `items` (cu bounds corespunzătoare) din regiunea XY dată"""
+        size = region[1] - region[0]
+        if len(items) <= self.max_elements or depth >= self.max_depth or not np.any(size > 1e-9):
+            return self._leaf(items, bounds, tile_id)
+
+        middle = (region[0] + region[1]) / 2.0
+        centers = (bounds[:, 0, :2] + bounds[:, 1, :2]) / 2.0
+        east = centers[:, 0] >= middle[0]
+        north = centers[:, 1] >= middle[1]
+        if east.all() or (~east).all():
+            if north.all() or (~north).all():
+                # Toate centrele în același cadran: împărțirea nu separă nimic
+                return self._leaf(items, bounds, tile_id)
+
+        children = []
+        for quadrant, selected in enumerate((~east & ~north, east & ~north, ~east & north, east & north)):
+            if not selected.any():
+                continue
+            low = np.where([quadrant & 1, quadrant & 2], middle, region[0])
+            high = np.where([quadrant & 1, quadrant & 2], region[1], middle)
+            child_items = [item for item, keep in zip(items, selected) if keep]
+            children.append(self._build(child_items, bounds[selected], np.array([low, high]),
+                                        f"{tile_id}_{quadrant}", depth + 1))
+
+        node_bounds = _union_bounds([_box_bounds(child["boundingVolume"]["box"]) for child in children])
+        return {
+            "boundingVolume": {"box": _box_volume(node_bounds)},
+            # Eroarea dacă tile-urile copil lipsesc: diagonala XY a regiunii
+            "geometricError": float(np.linalg.norm(size)),
+            "children": children,
+        }
+
+    def _leaf(self, items, bounds, tile_id):
+        scene = trimesh.Scene()
+        uuids = []
+        for index, mesh in items:
+            scene.add_geometry(mesh, node_name=self.node_name(mesh, index))
+            element_uuid = mesh.metadata.get("uuid")
+            if element_uuid and element_uuid not in uuids:
+                uuids.append(element_uuid)
+        glb_bytes = gltf.export_glb(scene)
+        tile_file = self.folder / f"tile_{tile_id}.glb"
+        with open(tile_file, "wb") as f:
+            f.write(glb_bytes)
+        self.stats["tiles"] += 1
+        self.stats["bytes"] += len(glb_bytes)
+
+        return {
+            "boundingVolume": {"box": _box_volume(_union_bounds(bounds))},
+            "geometricError": 0.0,
+            "content": {"uri": f"{self.folder.name}/{tile_file.name}"},
+            "extras": {"bytes": len(glb_bytes), "meshes": len(items), "elements": uuids},
+        }
+
+
+def _box_bounds(box):
+    """Inversul lui _box_volume pentru un box aliniat pe axe"""
+    center = np.array(box[0:3])
+    half = np.array([box[3], box[7], box[11]])
+    return np.array([center - half, center + half])
+
+
+def export_tiles(meshes, out_path, node_name, max_elements=TILE_MAX_ELEMENTS, max_depth=TILE_MAX_DEPTH):
+    """
+    Funcție de utilitate: scrie tile-urile și indexul pentru meshurile finale.
+
+    Returns:
+        tuple: (calea indexului, statistici {"tiles", "bytes"})
+    """
+    writer = TileWriter(out_path, node_name, max_elements, max_depth)
+    index_path = writer.write(meshes)
+    return index_path, writer.stats
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python tile_export.py <model.glb> [max_elements]")
+        return 1
+
+    glb_path = Path(sys.argv[1])
+    max_elements = int(sys.argv[2]) if len(sys.argv) > 2 else TILE_MAX_ELEMENTS
+    scene = trimesh.load(str(glb_path), force="scene")
+    meshes, names = [], {}
+    for node_name in scene.graph.nodes_geometry:
+        transform, geometry_name = scene.graph[node_name]
+        mesh = scene.geometry[geometry_name].copy()
+        mesh.apply_transform(transform)
+        names[id(mesh)] = node_name
+        meshes.append(mesh)
+
+    index_path, stats = export_tiles(meshes, glb_path, lambda mesh, index: names[id(mesh)], max_elements)
+    print(f"[TILES] {stats['tiles']} tiles, {stats['bytes']} bytes -> {index_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Transform Stack - transformările unui element compuse într-o singură matrice 4x4
+================================================================================
+
+Blocurile și elementele rotite treceau prin mai multe `apply_transform` succesive
+(scalarea inserției, rotația Z a blocului, rotațiile rotate_x/y, translația finală), fiecare
+rescriind toți vertecșii și invalidând cache-urile trimesh; `apply_xyz_rotations` făcea în
+plus un `mesh.copy()` complet. TransformStack:
+1. Compune matricele în ordinea aplicării (ultima adăugată se aplică ultima)
+2. Se aplică o singură dată, pe loc: `apply(mesh)` (un singur `apply_transform`) sau
+   `transform_points(points)` pentru vertecșii generați direct (rotate90, planele înclinate),
+   înainte de crearea Trimesh-ului
+3. Plasările pure (doar translație) trec prin ramura rapidă din trimesh, fără rotirea
+   normalelor și fără inversarea fețelor
+
+Vertecșii rămân în coordonate world: booleenele, mapping-ul, IFC-ul și tile-urile îi
+folosesc direct, deci transformarea nu se mută pe nodurile glTF.
+"""
+
+import numpy as np
+import trimesh
+
+# Unghiurile (grade) și abaterile de scară sub care transformarea se ignoră
+ANGLE_TOLERANCE = 1e-6
+SCALE_TOLERANCE = 1e-6
+
+
+class TransformStack:
+    """
+    Transformările unui mesh, compuse într-o singură matrice 4x4.
+
+    Metodele întorc stack-ul, deci se pot înlănțui:
+        TransformStack().scale(sx, sy, sz).rotate(angle, [0, 0, 1]).translate(position).apply(mesh)
+    """
+
+    def __init__(self, matrix=None):
+        self.matrix = np.eye(4) if matrix is None else np.array(matrix, dtype=np.float64)
+
+    def copy(self):
+        return TransformStack(self.matrix)
+
+    def push(self, matrix):
+        """Adaugă o transformare 4x4, aplicată după cele existente"""
+        self.matrix = np.asarray(matrix, dtype=np.float64) @ self.matrix
+        return self
+
+    def scale(self, scale_x, scale_y, scale_z):
+        """Scalare față de origine (ignorată dacă toți factorii sunt 1)"""
+        if max(abs(scale_x - 1.0), abs(scale_y - 1.0), abs(scale_z - 1.0)) <= SCALE_TOLERANCE:
+            return self
+        return self.push(np.diag([scale_x, scale_y, scale_z, 1.0]))
+
+    def rotate(self, angle_degrees, axis, point=None):
+        """Rotație în jurul axei prin `point` (implicit originea)"""
+        if abs(angle_degrees) <= ANGLE_TOLERANCE:
+            return self
+        return self.push(trimesh.transformations.rotation_matrix(np.radians(angle_degrees), axis, point))
+
+    def rotate_xyz(self, rotate_x, rotate_y, rotate_z=0.0, point=None):
+        """Rotațiile pe axe, în ordinea Z, Y, X (ca la rotate_x / rotate_y din XDATA)"""
+        return self.rotate(rotate_z, [0, 0, 1], point).rotate(rotate_y, [0, 1, 0], point).rotate(rotate_x, [1, 0, 0], point)
+
+    def linear(self, matrix, point=None):
+        """Transformare liniară 3x3 (rotație, proiecție pe plan) față de `point` (implicit originea)"""
+        affine = np.eye(4)
+        affine[:3, :3] = matrix
+        if point is not None:
+            point = np.asarray(point, dtype=np.float64)[:3]
+            affine[:3, 3] = point - affine[:3, :3] @ point
+        return self.push(affine)
+
+    def translate(self, offset):
+        """Translație (plasarea finală)"""
+        affine = np.eye(4)
+        affine[:3, 3] = offset
+        return self.push(affine)
+
+    @property
+    def is_identity(self):
+        return np.array_equal(self.matrix, np.eye(4))
+
+    @property
+    def is_placement(self):
+        """True dacă stack-ul este o plasare pură (fără rotație sau scalare)"""
+        return np.array_equal(self.matrix[:3, :3], np.eye(3))
+
+    def transform_points(self, points):
+        """Punctele (n, 3) transformate (pentru vertecșii generați înainte de crearea meshului)"""
+        points = np.asarray(points, dtype=np.float64)
+        if self.is_identity:
+            return points
+        if self.is_placement:
+            return points + self.matrix[:3, 3]
+        return points @ self.matrix[:3, :3].T + self.matrix[:3, 3]
+
+    def apply(self, mesh):
+        """Aplică stack-ul pe mesh, pe loc, într-un singur pas; întoarce meshul"""
+        if mesh is None or self.is_identity:
+            return mesh
+        mesh.apply_transform(self.matrix)
+        return mesh
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test diff între conversii: ștergerea unei entități din DXF trebuie raportată ca
+o singură eliminare, fără elemente adăugate sau modificate, iar elementele de după ea
+(al căror nume de nod conține contorul din ordinea DXF) sunt raportate ca redenumite
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+import ezdxf
+import trimesh
+
+from conversion_diff import diff_fingerprints, fingerprint_scene
+from dxf_to_glb_trimesh import dxf_to_gltf
+
+WALL_COUNT = 6
+
+
+def create_walls_dxf(path):
+    """DXF cu câțiva pereți dreptunghiulari pe layerul IfcWall"""
+    doc = ezdxf.new('R2010')
+    msp = doc.modelspace()
+    for i in range(WALL_COUNT):
+        x = i * 2.0
+        msp.add_lwpolyline([(x, 0), (x + 1, 0), (x + 1, 0.3), (x, 0.3)], close=True,
+                           dxfattribs={'layer': 'IfcWall'})
+    doc.saveas(path)
+
+
+def convert(dxf_path):
+    """Conversia DXF -> GLB și amprentele elementelor"""
+    glb_path = str(dxf_path).replace('.dxf', '.glb')
+    dxf_to_gltf(str(dxf_path), glb_path, ifc_mode=(), ir_cache=False)
+    return fingerprint_scene(trimesh.load(glb_path, force='scene'))
+
+
+def test_deleted_entity_is_single_removal(tmp_path):
+    # Același nume de fișier în ambele conversii (ca la re-salvarea DXF-ului urmărit de watchdog)
+    (tmp_path / 'before').mkdir()
+    (tmp_path / 'after').mkdir()
+    before_dxf = tmp_path / 'before' / 'walls.dxf'
+    after_dxf = tmp_path / 'after' / 'walls.dxf'
+
+    create_walls_dxf(before_dxf)
+    doc = ezdxf.readfile(before_dxf)
+    msp = doc.modelspace()
+    msp.delete_entity(list(msp)[2])
+    doc.saveas(after_dxf)
+
+    previous = convert(before_dxf)
+    current = convert(after_dxf)
+    assert len(previous) == WALL_COUNT
+    assert len(current) == WALL_COUNT - 1
+
+    diff = diff_fingerprints(previous, current)
+    assert len(diff['removed']) == 1
+    assert diff['added'] == []
+    assert diff['changed'] == []
+    # Contorul din numele nodurilor urmează ordinea DXF: pereții de după cel șters sunt redenumiți
+    renamed = sorted((element['old_node'], element['node']) for element in diff['renamed'])
+    assert renamed == [(f'IfcWall_{n}_LAYER_IfcWall', f'IfcWall_{n - 1}_LAYER_IfcWall') for n in (4, 5, 6)]
+    assert all(previous[element['id']]['node'] == element['old_node'] for element in diff['renamed'])
+    assert diff['unchanged'] == 2
+
+
+def test_fragments_of_one_element_get_distinct_ids():
+    scene = trimesh.Scene()
+    for offset in (0.0, 5.0):
+        box = trimesh.creation.box(extents=(1, 1, 1))
+        box.apply_translation((offset, 0, 0))
+        box.metadata['uuid'] = '11111111-2222-3333-4444-555555555555'
+        scene.add_geometry(box, node_name=f'IfcWall_{int(offset)}')
+
+    elements = fingerprint_scene(scene)
+    assert sorted(elements) == ['11111111-2222-3333-4444-555555555555',
+                                '11111111-2222-3333-4444-555555555555#1']
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
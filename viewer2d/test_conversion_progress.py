@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test ieșire progresivă: evenimentele NDJSON se scriu într-un fișier dedicat, citibil cu
+un parser JSON lines, iar stdout rămâne doar log-ul conversiei
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+import ezdxf
+
+from conversion_progress import progress_path
+from dxf_to_glb_trimesh import dxf_to_gltf
+
+WALL_COUNT = 7
+
+
+def test_events_go_to_ndjson_file(tmp_path, capsys):
+    doc = ezdxf.new('R2010')
+    msp = doc.modelspace()
+    for i in range(WALL_COUNT):
+        msp.add_lwpolyline([(i * 2.0, 0), (i * 2.0 + 1, 0), (i * 2.0 + 1, 0.3), (i * 2.0, 0.3)], close=True,
+                           dxfattribs={'layer': 'IfcWall'})
+    doc.saveas(tmp_path / 'walls.dxf')
+    glb_path = tmp_path / 'walls.glb'
+    events_path = progress_path(glb_path)
+    events_path.write_text('{"event": "done"}\n')  # evenimentele conversiei anterioare
+
+    dxf_to_gltf(str(tmp_path / 'walls.dxf'), str(glb_path), ifc_mode=(), ir_cache=False,
+                progressive=True, chunk_size=3)
+
+    stdout = capsys.readouterr().out
+    assert not [line for line in stdout.splitlines() if line.startswith('{')]
+
+    with open(events_path, encoding='utf-8') as f:
+        events = [json.loads(line) for line in f]
+    assert events[0]['event'] == 'progress'
+    assert [event['count'] for event in events if event['event'] == 'chunk'] == [3, 3, 1]
+    assert events[-1]['event'] == 'done'
+    assert events[-1]['elements'] == WALL_COUNT
+    assert [event['event'] for event in events].count('done') == 1
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test clasificare DXF: rolurile entităților, parsarea XDATA QCAD, filtrul conversiei
+parțiale și echivalența documentului ezdxf cu IR-ul (inclusiv citirea în flux)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+import ezdxf
+import pytest
+
+import dxf_ir
+from dxf_classifier import (ROLE_BLOCK, ROLE_CONTROL, ROLE_EXTRUSION, ROLE_OTHER, ROLE_SECTION, ROLE_TOV,
+                            ROLE_WINDOW, EntityFilter, XDataParams, classify_document)
+
+EXPECTED_ROLES = [ROLE_CONTROL, ROLE_SECTION, ROLE_EXTRUSION, ROLE_EXTRUSION, ROLE_BLOCK,
+                  ROLE_WINDOW, ROLE_TOV, ROLE_OTHER]
+
+
+@pytest.fixture
+def plan_dxf(tmp_path):
+    """DXF cu câte o entitate pentru fiecare rol"""
+    doc = ezdxf.new('R2010')
+    doc.appids.new('QCAD')
+    msp = doc.modelspace()
+
+    column = doc.blocks.new('COLUMN')
+    column.add_circle((0, 0), 0.2, dxfattribs={'layer': 'IfcColumn'})
+    doc.blocks.new('W1').add_line((0, 0), (1, 0))
+    doc.blocks.new('DOOR_TOV').add_line((0, 0), (1, 0))
+
+    msp.add_circle((0, 0), 1.0, dxfattribs={'layer': 'control'})
+    msp.add_line((0, -1), (10, -1), dxfattribs={'layer': 'Section'})
+    wall = msp.add_lwpolyline([(0, 0), (4, 0), (4, 0.3), (0, 0.3)], close=True, dxfattribs={'layer': 'IfcWall'})
+    wall.set_xdata('QCAD', [(1000, 'height:2.8'), (1000, 'Name:Perete exterior'), (1000, 'solid:0'),
+                            (1000, 'rotate90:1'), (1000, 'angle:abc')])
+    msp.add_circle((20, 20), 0.5, dxfattribs={'layer': 'IfcColumn'})
+    msp.add_blockref('COLUMN', (6, 6), dxfattribs={'layer': 'IfcColumn'})
+    msp.add_blockref('W1', (2, 0), dxfattribs={'layer': 'IfcWindow'})
+    msp.add_blockref('DOOR_TOV', (3, 0), dxfattribs={'layer': 'IfcDoor'})
+    msp.add_text('nota', dxfattribs={'layer': 'IfcWall'})
+
+    path = tmp_path / 'plan.dxf'
+    doc.saveas(path)
+    return path
+
+
+def test_roles_in_dxf_order(plan_dxf):
+    classified = classify_document(ezdxf.readfile(plan_dxf))
+    assert [record.role for record in classified.entities] == EXPECTED_ROLES
+    assert len(classified.by_role[ROLE_EXTRUSION]) == 2
+    assert [record.kind for record in classified.block('COLUMN')] == ['CIRCLE']
+    assert classified.block('MISSING') == []
+
+
+def test_tov_disabled_falls_back_to_block(plan_dxf):
+    classified = classify_document(ezdxf.readfile(plan_dxf), enable_tov=False)
+    assert classified.entities[6].role == ROLE_BLOCK
+
+
+def test_xdata_parsed_once(plan_dxf):
+    wall = classify_document(ezdxf.readfile(plan_dxf)).entities[2]
+    params = wall.params
+    assert params.height == 2.8
+    assert params.name == 'Perete exterior'
+    assert params.solid == 0
+    assert params.rotate90 is True
+    # Valorile care nu se pot converti rămân None, iar etapa își aplică valoarea implicită
+    assert params.angle is None
+    assert params.value('angle', 0.0) == 0.0
+    assert XDataParams([(1000, 'z:1.5'), (1001, 'z:9')]).z == 1.5
+
+
+def test_partial_conversion_keeps_control_and_order(plan_dxf):
+    entity_filter = EntityFilter(layers='IfcColumn', bbox='5,5,7,7')
+    classified = classify_document(ezdxf.readfile(plan_dxf), entity_filter=entity_filter)
+
+    selected = [record.role for record in classified.entities if record.selected]
+    assert selected == [ROLE_CONTROL, ROLE_BLOCK]
+    assert len(classified.entities) == len(EXPECTED_ROLES)
+    # Liniile de secțiune neselectate rămân în grupul lor
+    assert len(classified.by_role[ROLE_SECTION]) == 1
+
+
+def test_ir_and_stream_match_ezdxf(plan_dxf, tmp_path):
+    def summary(classified):
+        return [(r.role, r.kind, r.handle, r.layer, r.block_name, r.params.height) for r in classified.entities]
+
+    expected = summary(classify_document(ezdxf.readfile(plan_dxf)))
+    ir_doc = dxf_ir.load_document(str(plan_dxf), cache_dir=tmp_path / 'ir')
+    assert summary(classify_document(ir_doc)) == expected
+
+    streamed = classify_document(dxf_ir.stream_document(str(plan_dxf)))
+    assert [record.role for record in streamed.by_role[ROLE_CONTROL]] == [ROLE_CONTROL]
+    assert summary(streamed) == expected
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
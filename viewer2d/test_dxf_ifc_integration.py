@@ -37,7 +37,7 @@ def test_dxf_to_glb_with_ifc():
     print(f'\n🚀 Rulează conversia DXF→GLB+IFC pentru: {test_dxf}')
     
     output_glb = 'test_dxf_output.glb'
-    expected_ifc = 'test_dxf_output_auto.ifc'
+    expected_ifc = 'test_dxf_output_auto.ifc'  # Produs de modul IFC 'background' (implicit este 'final')
     expected_mapping = 'test_dxf_output_mapping.json'
     
     # Import și rulează funcția principală
@@ -45,11 +45,17 @@ def test_dxf_to_glb_with_ifc():
         from dxf_to_glb_trimesh import dxf_to_gltf
         
         start_time = time.time()
-        dxf_to_gltf(test_dxf, output_glb)
+        dxf_to_gltf(test_dxf, output_glb, ifc_mode="background")
         elapsed = time.time() - start_time
         
         print(f'✅ Conversie DXF→GLB finalizată în {elapsed:.2f} secunde')
         
+        # IFC-ul background se scrie într-un proces separat: așteaptă apariția lui
+        print(f'\n⏳ Aștept finalizarea procesului IFC background (maxim 60 secunde)...')
+        deadline = time.time() + 60
+        while not os.path.exists(expected_ifc) and time.time() < deadline:
+            time.sleep(0.5)
+        
         # Verifică fișierele generate
         files_to_check = [
             (output_glb, 'GLB'),
@@ -108,10 +114,6 @@ def test_dxf_to_glb_with_ifc():
             except Exception as e:
                 print(f'❌ Eroare la verificarea IFC: {e}')
         
-        # Așteaptă puțin să vezi dacă procesul background se finalizează
-        print(f'\n⏳ Aștept finalizarea proceselor background (5 secunde)...')
-        time.sleep(5)
-        
         print(f'\n🎉 TESTUL DE INTEGRARE A FOST FINALIZAT CU SUCCES!')
         print(f'💡 Sistemul convertește automat DXF → GLB + JSON + IFC în paralel')
         print(f'🔧 Layerele IfcType sunt mapate automat la tipurile IFC corespunzătoare')
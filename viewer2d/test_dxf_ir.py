@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test cache IR: folderul cache-ului (variabilă de mediu / argument), reîncărcarea din
+cache și limitarea dimensiunii și vechimii intrărilor
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+import ezdxf
+
+import dxf_ir
+
+
+def create_dxf(path, count=3):
+    doc = ezdxf.new('R2010')
+    msp = doc.modelspace()
+    for i in range(count):
+        msp.add_lwpolyline([(i, 0), (i + 0.5, 0), (i + 0.5, 0.5)], close=True, dxfattribs={'layer': 'IfcWall'})
+    doc.saveas(path)
+
+
+def test_cache_dir_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv(dxf_ir.IR_CACHE_ENV, str(tmp_path / 'ir'))
+    assert dxf_ir.default_cache_dir() == tmp_path / 'ir'
+
+    dxf_path = tmp_path / 'plan.dxf'
+    create_dxf(dxf_path)
+    parsed = dxf_ir.load_document(str(dxf_path))
+    assert dxf_ir.cache_path(dxf_ir.file_hash(dxf_path)).exists()
+
+    cached = dxf_ir.load_document(str(dxf_path))
+    assert [e.dxf.handle for e in cached.modelspace()] == [e.dxf.handle for e in parsed.modelspace()]
+
+
+def test_prune_removes_stale_and_oldest_entries(tmp_path):
+    now = time.time()
+    for index, age_days in enumerate((40, 3, 2, 1)):
+        path = tmp_path / f'{index}.ir'
+        path.write_bytes(b'x' * 1000)
+        mtime = now - age_days * 24 * 3600
+        os.utime(path, (mtime, mtime))
+
+    # 0.ir e mai vechi de 30 de zile, iar din rest încap doar ultimele două
+    removed = dxf_ir.prune_cache(tmp_path, max_bytes=2500, keep=tmp_path / '3.ir')
+    assert removed == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['2.ir', '3.ir']
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
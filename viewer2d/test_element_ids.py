@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test ID-uri deterministe: același DXF produce aceleași UUID-uri la fiecare
+conversie, indiferent de ordinea entităților
+"""
+
+import os
+import sys
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+from element_ids import ElementIdFactory, GlobalIdAllocator, derived_uuid, ifc_guid
+
+ELEMENTS = [('3B8',), ('3B9',), ('A0D', 'block', '636'), ('A0D', 'block', '637'), ('A11', 'tov', 'glass')]
+
+
+def issue(source, elements):
+    factory = ElementIdFactory(source)
+    return {element: factory.element_uuid(*element) for element in elements}
+
+
+def test_same_uuid_across_runs():
+    assert issue('plans/Etaj_01.dxf', ELEMENTS) == issue('plans/Etaj_01.dxf', ELEMENTS)
+    # Doar numele fișierului contează, nu folderul sau majusculele
+    assert issue('plans/Etaj_01.dxf', ELEMENTS) == issue('other/etaj_01.DXF', ELEMENTS)
+
+
+def test_same_uuid_after_reordering():
+    assert issue('etaj_01.dxf', ELEMENTS) == issue('etaj_01.dxf', list(reversed(ELEMENTS)))
+
+
+def test_uuids_differ_per_source_and_element():
+    first = issue('etaj_01.dxf', ELEMENTS)
+    second = issue('etaj_02.dxf', ELEMENTS)
+    assert len(set(first.values())) == len(ELEMENTS)
+    assert not set(first.values()) & set(second.values())
+    assert all(uuid.UUID(value).version == 5 for value in first.values())
+
+
+def test_repeated_key_gets_occurrence_suffix():
+    factory = ElementIdFactory('etaj_01.dxf')
+    first = factory.element_uuid('A0D', 'block', '636')
+    second = factory.element_uuid('A0D', 'block', '636')
+    assert first != second
+    assert issue('etaj_01.dxf', [('A0D', 'block', '636')])[('A0D', 'block', '636')] == first
+
+
+def test_fragments_keep_first_uuid():
+    element = issue('etaj_01.dxf', ELEMENTS)[('3B8',)]
+    allocator = GlobalIdAllocator()
+    assert allocator.fragment_uuid(element) == element
+    assert allocator.fragment_uuid(element) == derived_uuid(element, 'fragment', 1)
+    assert len(ifc_guid(element)) == 22
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
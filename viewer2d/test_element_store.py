@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test element store: o înregistrare se citește înapoi ca dicționarul din care a fost
+creată (aceeași ordine a cheilor, aceleași tipuri), deci mapping-ul JSON și
+extras-urile GLB rămân identice
+"""
+
+import copy
+import json
+import os
+import pickle
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+import numpy as np
+
+from element_store import ElementRecord, ElementStore, plain, share
+
+
+def mapping_entry():
+    """Intrare de mapping cu toate tipurile de valori folosite de convertor"""
+    return {
+        "dxf_handle": "3B8",
+        "mesh_name": "IfcWall_exterior_1",
+        "uuid": "83f323ec-2913-52db-bcd1-1a21b3e54150",
+        "role": 1,
+        "solid_flag": 1,
+        "layer": "IfcWall",
+        "ifc_type": "IfcWall",
+        "angle": 0,                  # int într-o coloană float
+        "height": 2.8,
+        "z_final": None,
+        "perimeter": 8.6,
+        "area": 1.2,
+        "volume": 3.36,
+        "is_void": False,
+        "extrusion": True,
+        "vertices": [[0.0, 0.0], [4.0, 0.0], [4.0, 0.3], [0.0, 0.3]],
+        "segment_lengths": [4.0, 0.3, 4.0, 0.3],
+        "color": [0.7, 0.13, 0.13],
+        "is_cut_by": [],
+        "prism": {"height": 2.8, "z": 0.0},   # cheie rară, păstrată ca obiect
+    }
+
+
+def value_types(values):
+    return [(key, type(value).__name__) for key, value in values.items()]
+
+
+def test_record_round_trips_to_same_dict():
+    store = ElementStore(capacity=1)
+    original = mapping_entry()
+    record = store.add(mapping_entry())
+
+    result = record.to_dict()
+    assert list(result) == list(original)
+    assert value_types(result) == value_types(original)
+    assert result == original
+    assert json.dumps(record, default=plain) == json.dumps(original)
+
+
+def test_metadata_with_rgba_and_link():
+    store = ElementStore()
+    entry = store.add(mapping_entry())
+    metadata = store.add({
+        "uuid": entry["uuid"],
+        "name": "exterior",
+        "material_rgba": np.array([0.7, 0.13, 0.13, 1.0], dtype=np.float32),
+        "mapping_entry": entry,
+    })
+
+    rgba = metadata["material_rgba"]
+    assert rgba.dtype == np.float32
+    assert np.array_equal(rgba, np.array([0.7, 0.13, 0.13, 1.0], dtype=np.float32))
+    assert isinstance(metadata["mapping_entry"], ElementRecord)
+    assert metadata.to_dict()["mapping_entry"] == mapping_entry()
+    # Fragmentele booleene împart înregistrarea în loc să o copieze
+    assert share(metadata) is metadata
+
+
+def test_mutation_keeps_schema_order():
+    store = ElementStore()
+    record = store.add(mapping_entry())
+    record["volume"] = 2.5
+    record["is_cut_by"] = ["void-uuid"]
+    record["lateral_area"] = 17.2
+    del record["prism"]
+
+    expected = mapping_entry()
+    expected["volume"] = 2.5
+    expected["is_cut_by"] = ["void-uuid"]
+    del expected["prism"]
+    expected["lateral_area"] = 17.2
+    assert list(record) == list(expected)
+    assert record.to_dict() == expected
+    assert copy.deepcopy(record) == expected
+    assert pickle.loads(pickle.dumps(record)) == expected
+
+
+def test_columns_across_rows():
+    store = ElementStore(capacity=1)
+    for index in range(5):
+        entry = mapping_entry()
+        entry["volume"] = float(index)
+        if index == 3:
+            del entry["volume"]
+        store.add(entry)
+
+    volumes = store.column("volume")
+    assert np.isnan(volumes[3])
+    assert volumes[[0, 1, 2, 4]].tolist() == [0.0, 1.0, 2.0, 4.0]
+    assert store.column("layer").tolist() == ["IfcWall"] * 5
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test kernel de extrudare: un lot extrudat cu extrude_batch are aceleași volume,
+limite și vertecși ca trimesh.creation.extrude_polygon + apply_translation
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+import numpy as np
+import trimesh
+from shapely.geometry import Point, Polygon
+
+from extrusion_kernel import extrude_batch, extrude_footprint
+
+FOOTPRINTS = [
+    Polygon([(0, 0), (4, 0), (4, 0.3), (0, 0.3)]),                                   # perete
+    Polygon([(0, 0), (3, 0), (3, 1), (1, 1), (1, 3), (0, 3)]),                       # L concav
+    Polygon([(0, 0), (5, 0), (5, 4), (0, 4)], [[(1, 1), (2, 1), (2, 2), (1, 2)]]),   # placă cu gol
+    Point(10, 10).buffer(0.25, 16),                                                  # coloană
+    Polygon([(0, 0), (0, 2), (2, 2), (2, 0)]),                                       # orientare CW
+]
+HEIGHTS = [2.8, 1.0, 0.2, 3.0, -0.5]
+Z_OFFSETS = [0.0, 1.5, 2.8, -1.75, 0.0]
+
+
+def reference(footprint, height, z_offset):
+    mesh = trimesh.creation.extrude_polygon(footprint, height)
+    mesh.apply_translation([0, 0, z_offset])
+    return mesh
+
+
+def unique_rows(vertices):
+    return np.unique(np.round(vertices, 9), axis=0)
+
+
+def test_batch_matches_extrude_polygon():
+    batch = extrude_batch(FOOTPRINTS, HEIGHTS, Z_OFFSETS)
+    assert len(batch) == len(FOOTPRINTS)
+
+    for index, (footprint, height, z_offset) in enumerate(zip(FOOTPRINTS, HEIGHTS, Z_OFFSETS)):
+        mesh = batch.mesh(index)
+        expected = reference(footprint, height, z_offset)
+
+        assert mesh.is_watertight
+        assert mesh.volume > 0  # normalele spre exterior, și la extrudarea în jos
+        assert np.isclose(mesh.volume, abs(expected.volume))
+        assert np.isclose(batch.volume(index), abs(expected.volume))
+        assert np.isclose(batch.areas[index], footprint.area)
+        assert np.allclose(mesh.bounds, expected.bounds)
+        assert np.array_equal(unique_rows(mesh.vertices), unique_rows(expected.vertices))
+
+
+def test_single_footprint_and_degenerate_input():
+    mesh = extrude_footprint([(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)], 2.0, 1.0)
+    assert np.isclose(mesh.volume, 2.0)
+    assert np.allclose(mesh.bounds, [[0, 0, 1], [1, 1, 3]])
+
+    batch = extrude_batch([[(0, 0), (1, 0)], FOOTPRINTS[0], FOOTPRINTS[0]], [1.0, 1.0, 0.0])
+    assert batch.mesh(0) is None
+    assert batch.mesh(2) is None
+    assert batch.areas[0] == 0.0
+    assert np.isclose(batch.combined([0, 1, 2]).volume, FOOTPRINTS[0].area)
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
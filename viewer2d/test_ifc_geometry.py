@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test geometrie IFC: unirea vârfurilor duplicate, fețele IfcTriangulatedFaceSet /
+IfcPolygonalFaceSet reconstruite înapoi în aceeași geometrie și reutilizarea geometriei
+repetate prin IfcRepresentationMap (potrivirea cu rotație în jurul Z, fără potriviri false)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+import ifcopenshell
+import numpy as np
+import trimesh
+from shapely.geometry import Polygon
+
+from ifc_geometry import (RepresentationMapCache, canonicalize_geometry, create_polygonal_face_set,
+                          create_triangulated_face_set, match_z_rotation, merge_vertices)
+
+L_SHAPE = Polygon([(0, 0), (3, 0), (3, 1), (1, 1), (1, 2), (0, 2)])
+
+
+def unmerged_box():
+    """Cub 1x1x2 cu vârfurile dublate per față (ca la exportul cu normale per față)"""
+    box = trimesh.creation.box(extents=(1, 1, 2))
+    return box.vertices[box.faces].reshape(-1, 3), np.arange(len(box.faces) * 3).reshape(-1, 3)
+
+
+def mesh_from_face_set(face_set):
+    """Meshul reconstruit dintr-un IfcTriangulatedFaceSet (indici IFC bazați pe 1)"""
+    coords = np.array(face_set.Coordinates.CoordList)
+    faces = np.array(face_set.CoordIndex) - 1
+    return trimesh.Trimesh(coords, faces, process=False)
+
+
+def test_merge_vertices_deduplicates_box():
+    vertices, faces = unmerged_box()
+    assert vertices.shape == (36, 3)
+
+    coords, merged_faces = merge_vertices(vertices, faces)
+    assert coords.shape == (8, 3)
+    assert merged_faces.shape == (12, 3)
+    # Fiecare triunghi indică aceleași puncte ca înainte de unire
+    assert np.allclose(coords[merged_faces], vertices[faces])
+
+
+def test_merge_vertices_drops_degenerate_faces():
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1e-9, 0, 0]], dtype=float)
+    faces = np.array([[0, 1, 2], [0, 3, 1]])
+    coords, merged_faces = merge_vertices(vertices, faces)
+    assert len(coords) == 3
+    assert len(merged_faces) == 1
+    assert np.allclose(coords[merged_faces[0]], vertices[:3])
+
+
+def test_triangulated_face_set_round_trip():
+    vertices, faces = unmerged_box()
+    model = ifcopenshell.file(schema='IFC4X3')
+    face_set = create_triangulated_face_set(model, vertices, faces)
+
+    assert len(face_set.Coordinates.CoordList) == 8
+    assert len(face_set.CoordIndex) == 12
+    mesh = mesh_from_face_set(face_set)
+    assert mesh.is_watertight
+    assert np.isclose(mesh.volume, 2.0)
+    assert np.allclose(mesh.bounds, [[-0.5, -0.5, -1.0], [0.5, 0.5, 1.0]])
+
+
+def test_polygonal_face_set_merges_coplanar_triangles():
+    vertices, faces = unmerged_box()
+    model = ifcopenshell.file(schema='IFC4X3')
+    face_set = create_polygonal_face_set(model, vertices, faces)
+
+    assert len(face_set.Coordinates.CoordList) == 8
+    assert len(face_set.Faces) == 6
+    assert all(len(face.CoordIndex) == 4 for face in face_set.Faces)
+
+
+def test_polygonal_face_set_keeps_holes():
+    plate = Polygon([(0, 0), (4, 0), (4, 3), (0, 3)], [[(1, 1), (2, 1), (2, 2), (1, 2)]])
+    mesh = trimesh.creation.extrude_polygon(plate, 0.2)
+    model = ifcopenshell.file(schema='IFC4X3')
+    face_set = create_polygonal_face_set(model, mesh.vertices, mesh.faces)
+
+    with_voids = [face for face in face_set.Faces if face.is_a('IfcIndexedPolygonalFaceWithVoids')]
+    # Fața de jos și cea de sus au golul; 4 laturi exterioare + 4 ale golului
+    assert len(with_voids) == 2
+    assert len(face_set.Faces) == 10
+    assert len(face_set.Coordinates.CoordList) == 16
+
+
+def placed(mesh, degrees, offset):
+    """Copie a meshului rotită în jurul Z și mutată"""
+    mesh = mesh.copy()
+    mesh.apply_transform(trimesh.transformations.rotation_matrix(np.radians(degrees), [0, 0, 1]))
+    mesh.apply_translation(offset)
+    return mesh
+
+
+def canonical(mesh):
+    return canonicalize_geometry(mesh.vertices, mesh.faces)
+
+
+def instance_vertices(prototype, angle, origin):
+    """Vârfurile prototipului după transformarea instanței (rotație θ în jurul Z, apoi origin)"""
+    c, s = np.cos(angle), np.sin(angle)
+    return prototype.coords @ np.array([[c, s, 0.0], [-s, c, 0.0], [0.0, 0.0, 1.0]]) + origin
+
+
+def same_points(a, b):
+    return np.allclose(np.unique(np.round(a, 6), axis=0), np.unique(np.round(b, 6), axis=0))
+
+
+def window_frame():
+    """Ramă de fereastră: dreptunghi cu gol, extrudată (geometrie suficient de mare pentru mapare)"""
+    frame = Polygon([(0, 0), (1.2, 0), (1.2, 1.5), (0, 1.5)], [[(0.1, 0.1), (1.1, 0.1), (1.1, 1.4), (0.1, 1.4)]])
+    return trimesh.creation.extrude_polygon(frame, 0.08)
+
+
+def test_box_rotated_about_z_matches():
+    box = trimesh.creation.box(extents=(2.0, 0.5, 1.0))
+    prototype = canonical(box)
+    candidate = canonical(placed(box, 30.0, (5.0, -2.0, 1.5)))
+    assert candidate.key == prototype.key
+
+    angle = match_z_rotation(prototype, candidate)
+    assert angle is not None
+    # Cutia are simetrie de 180°, deci unghiul este 30° sau 210°
+    assert np.isclose(np.sin(2 * (angle - np.radians(30.0))), 0.0, atol=1e-9)
+    assert same_points(instance_vertices(prototype, angle, candidate.origin), candidate.coords + candidate.origin)
+
+
+def test_asymmetric_shape_gets_exact_angle():
+    mesh = trimesh.creation.extrude_polygon(L_SHAPE, 2.8)
+    prototype = canonical(mesh)
+    candidate = canonical(placed(mesh, 75.0, (10.0, 4.0, 0.0)))
+
+    angle = match_z_rotation(prototype, candidate)
+    assert np.isclose(np.cos(angle), np.cos(np.radians(75.0)))
+    assert np.isclose(np.sin(angle), np.sin(np.radians(75.0)))
+
+
+def test_mirrored_l_shape_is_rejected():
+    mesh = trimesh.creation.extrude_polygon(L_SHAPE, 2.8)
+    mirrored = mesh.copy()
+    mirrored.apply_transform(np.diag([-1.0, 1.0, 1.0, 1.0]))
+    mirrored.invert()  # normalele spre exterior, ca la un L desenat în oglindă
+
+    prototype, candidate = canonical(mesh), canonical(mirrored)
+    # Aceleași raze și cote (cheia coincide), dar nicio rotație nu le suprapune
+    assert candidate.key == prototype.key
+    assert match_z_rotation(prototype, candidate) is None
+
+
+def test_same_radii_different_shape_is_rejected():
+    def prism(degrees):
+        points = [(np.cos(np.radians(a)), np.sin(np.radians(a))) for a in degrees]
+        return trimesh.creation.extrude_polygon(Polygon(points), 1.0)
+
+    regular = canonical(prism([0, 60, 120, 180, 240, 300]))
+    irregular = canonical(prism([0, 50, 120, 180, 240, 300]))
+    assert len(regular.coords) == len(irregular.coords)
+    assert match_z_rotation(regular, irregular) is None
+
+
+def test_small_boxes_inline_and_repeated_windows_mapped():
+    model = ifcopenshell.file(schema='IFC4X3')
+    context = model.create_entity('IfcGeometricRepresentationContext', ContextType='Model',
+                                  CoordinateSpaceDimension=3, Precision=1e-5)
+    cache = RepresentationMapCache(model, context)
+
+    box = trimesh.creation.box(extents=(0.4, 0.4, 3.0))
+    boxes = [cache.register(b.vertices, b.faces) for b in (placed(box, 0, (0, 0, 0)), placed(box, 90, (6, 0, 0)))]
+    frame = window_frame()
+    windows = [cache.register(w.vertices, w.faces)
+               for w in (placed(frame, angle, (i * 3.0, 8.0, 0.9)) for i, angle in enumerate([0, 0, 90, 180, 270, 45]))]
+
+    assert boxes[0].group is boxes[1].group
+    assert len({id(window.group) for window in windows}) == 1
+    assert windows[0].group.count == 6
+
+    # Două cutii mici: geometria inline costă mai puțin decât maparea
+    assert all(cache.create_representation(b, create_triangulated_face_set) is None for b in boxes)
+    shapes = [cache.create_representation(w, create_triangulated_face_set) for w in windows]
+    assert all(shape is not None for shape in shapes)
+    assert cache.map_count == 1
+    assert cache.instance_count == 6
+    assert len(model.by_type('IfcRepresentationMap')) == 1
+    assert len(model.by_type('IfcMappedItem')) == 6
+
+    # Fiecare instanță mapată reproduce vârfurile ferestrei ei
+    for window, shape in zip(windows, shapes):
+        operator = shape.Representations[0].Items[0].MappingTarget
+        angle = np.arctan2(operator.Axis1.DirectionRatios[1], operator.Axis1.DirectionRatios[0])
+        origin = np.array(operator.LocalOrigin.Coordinates)
+        assert same_points(instance_vertices(window.group.prototype, angle, origin), window.coords + window.origin)
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
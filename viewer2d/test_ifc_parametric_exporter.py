@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test export IFC parametric: pereții cu goluri și componentele de bloc se scriu ca
+IfcExtrudedAreaSolid (golurile ca IfcOpeningElement), cu plasarea blocului, iar
+fișierul parametric este mai mic decât cel final tesselat
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+import ezdxf
+import ifcopenshell
+import numpy as np
+import pytest
+
+from dxf_to_glb_trimesh import dxf_to_gltf
+
+
+def convert(doc, tmp_path):
+    dxf_path = str(tmp_path / 'plan.dxf')
+    doc.saveas(dxf_path)
+    dxf_to_gltf(dxf_path, str(tmp_path / 'plan.glb'), ifc_mode=('final', 'parametric'), ir_cache=False)
+    final_path, parametric_path = str(tmp_path / 'plan.ifc'), str(tmp_path / 'plan_parametric.ifc')
+    return final_path, parametric_path
+
+
+def new_doc():
+    doc = ezdxf.new('R2010')
+    doc.appids.new('QCAD')
+    return doc
+
+
+def test_walls_with_voids_become_openings(tmp_path):
+    doc = new_doc()
+    msp = doc.modelspace()
+    for index in range(3):
+        y = index * 3.0
+        wall = msp.add_lwpolyline([(0, y), (6, y), (6, y + 0.3), (0, y + 0.3)], close=True,
+                                  dxfattribs={'layer': 'IfcWall'})
+        wall.set_xdata('QCAD', [(1000, 'height:2.8')])
+        void = msp.add_lwpolyline([(2, y - 0.1), (3, y - 0.1), (3, y + 0.4), (2, y + 0.4)], close=True,
+                                  dxfattribs={'layer': 'IfcWall'})
+        void.set_xdata('QCAD', [(1000, 'height:1.5'), (1000, 'z:0.9'), (1000, 'solid:0')])
+
+    final_path, parametric_path = convert(doc, tmp_path)
+    parametric = ifcopenshell.open(parametric_path)
+
+    assert len(parametric.by_type('IfcWall')) == 3
+    assert len(parametric.by_type('IfcOpeningElement')) == 3
+    assert len(parametric.by_type('IfcExtrudedAreaSolid')) == 6
+    assert os.path.getsize(parametric_path) < os.path.getsize(final_path)
+
+
+def test_block_component_keeps_placement(tmp_path):
+    doc = new_doc()
+    column = doc.blocks.new('COLUMN')
+    outline = column.add_lwpolyline([(0, 0), (0.4, 0), (0.4, 0.4), (0, 0.4)], close=True,
+                                    dxfattribs={'layer': 'IfcColumn'})
+    outline.set_xdata('QCAD', [(1000, 'height:3.0')])
+    doc.modelspace().add_blockref('COLUMN', (6, 6), dxfattribs={'layer': 'IfcColumn', 'rotation': 30})
+
+    _, parametric_path = convert(doc, tmp_path)
+    solids = ifcopenshell.open(parametric_path).by_type('IfcExtrudedAreaSolid')
+
+    assert len(solids) == 1
+    position = solids[0].Position
+    assert solids[0].Depth == pytest.approx(3.0)
+    assert np.allclose(position.Location.Coordinates, (6.0, 6.0, 0.0))
+    assert np.allclose(position.Axis.DirectionRatios, (0.0, 0.0, 1.0))
+    angle = np.radians(30.0)
+    assert np.allclose(position.RefDirection.DirectionRatios, (np.cos(angle), np.sin(angle), 0.0))
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
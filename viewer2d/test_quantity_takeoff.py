@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test cantități pe loturi: FootprintBatch dă aceleași arii, perimetre, lungimi de laturi
+și validări ca măsurarea per element (Polygon + np.linalg.norm), iar DeferredVolumes
+scrie volumul ultimului mesh acceptat
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+import numpy as np
+import trimesh
+from shapely.geometry import Polygon
+
+from quantity_takeoff import DeferredVolumes, FootprintBatch
+
+RINGS = [
+    [(0, 0), (4, 0), (4, 0.3), (0, 0.3)],                 # perete
+    [(0, 0), (3, 0), (3, 1), (1, 1), (1, 3), (0, 3)],     # L concav
+    [(0, 0), (2, 0), (2, 2), (0, 2), (0, 0)],             # contur cu punctul de închidere repetat
+    [(0, 0), (2, 2), (2, 0), (0, 2)],                     # fundă (poligon invalid)
+    [(0, 0), (1, 0)],                                     # prea puține puncte
+    [],                                                   # element fără amprentă
+    [(0, 0), (5, 0), (5, 5)],                             # contur deschis
+]
+CLOSED = [True, True, True, True, True, True, False]
+
+
+def measure_element(ring, closed):
+    """Măsurarea per element, ca în bucla de entități de dinainte de loturi"""
+    if not closed or len(ring) < 3:
+        return False, 0.0, 0.0, []
+    points = np.asarray(ring, dtype=float)
+    segments = [float(np.linalg.norm(points[(i + 1) % len(points)] - points[i])) for i in range(len(points))]
+    polygon = Polygon(ring)
+    return polygon.is_valid and polygon.area > 0, polygon.area, polygon.length, segments
+
+
+def test_batch_matches_per_element_measurement():
+    batch = FootprintBatch(RINGS, CLOSED)
+    assert len(batch) == len(RINGS)
+
+    for index, (ring, closed) in enumerate(zip(RINGS, CLOSED)):
+        valid, area, perimeter, segments = measure_element(ring, closed)
+        assert batch.valid[index] == valid
+        assert batch.areas[index] == area
+        assert batch.perimeters[index] == perimeter
+        assert batch.segment_lengths(index) == segments
+        assert (batch.polygon(index) is not None) == (closed and len(ring) >= 3)
+
+
+def test_takeoff_subtracts_openings():
+    batch = FootprintBatch(RINGS[:2])
+    lateral_areas, volumes = batch.takeoff([2.8, 1.0], opening_areas=[2.0, 100.0])
+
+    assert np.allclose(volumes, [4.0 * 0.3 * 2.8, 5.0])
+    assert np.isclose(lateral_areas[0], 8.6 * 2.8 - 2.0)
+    # Aria laterală nu devine negativă
+    assert lateral_areas[1] == 0.0
+
+
+def test_deferred_volumes_use_last_accepted_mesh():
+    mapping = [{"uuid": "wall", "mesh_name": "IfcWall_1", "volume": 0.0},
+               {"uuid": "slab", "mesh_name": "IfcSlab_1", "volume": 7.0}]
+    volumes = DeferredVolumes()
+    volumes.defer("wall", trimesh.creation.box(extents=(2, 1, 1)), "voids")
+    trimmed = trimesh.creation.box(extents=(1, 1, 1))
+    volumes.defer("wall", trimmed, "roof trim")
+    inverted = trimesh.creation.box(extents=(3, 1, 1))
+    inverted.invert()
+    volumes.defer("slab", trimesh.creation.box(extents=(3, 1, 1)), "voids")
+    volumes.defer("slab", inverted, "region clip")
+    volumes.defer("missing", trimesh.creation.box(), "voids")
+
+    # Doar ultimul mesh al fiecărui element rămâne în memorie; cel înlocuit devine un volum de rezervă
+    assert volumes.pending["wall"] == (trimmed, "roof trim", True, (2.0, "voids"))
+    assert volumes.pending["slab"] == (inverted, "region clip", True, (3.0, "voids"))
+
+    assert volumes.resolve(mapping) == 2
+    assert np.isclose(mapping[0]["volume"], 1.0)
+    # Volumul negativ al ultimului mesh nu este acceptat: rămâne cel de după voiduri
+    assert np.isclose(mapping[1]["volume"], 3.0)
+    assert volumes.pending == {}
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test reload signal: notificările scrise în paralel (workeri diferiți, ambele treceri)
+păstrează ultimul semnal al fiecărui DXF, iar fișierul rămâne JSON valid
+"""
+
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+from dxf_watchdog import DXFHandler
+
+LEVELS = 12
+
+
+def handler(tmp_path):
+    # Coada nu este folosită de notificări; un obiect oarecare evită pornirea pool-ului
+    return DXFHandler(tmp_path, tmp_path, 'dxf_to_glb_trimesh.py', tmp_path / 'reload_signal.json', job_queue=object())
+
+
+def test_parallel_levels_keep_one_signal_each(tmp_path):
+    watchdog = handler(tmp_path)
+    threads = [threading.Thread(target=watchdog._notify_godot_reload,
+                                args=(f'level_{i}.dxf', f'level_{i}.glb', None, None, conversion_pass))
+               for i in range(LEVELS) for conversion_pass in ('preview', 'final')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(tmp_path / 'reload_signal.json') as f:
+        data = json.load(f)
+    assert sorted(data['signals']) == sorted(f'level_{i}.dxf' for i in range(LEVELS))
+    for dxf_file, signal in data['signals'].items():
+        assert signal['dxf_file'] == dxf_file
+        assert signal['glb_file'] == dxf_file.replace('.dxf', '.glb')
+    # Primul nivel este ultimul semnal scris (pentru viewer-ele care nu citesc "signals")
+    latest = max(data['signals'].values(), key=lambda signal: signal['timestamp'])
+    assert data['dxf_file'] == latest['dxf_file']
+    assert data['timestamp'] == latest['timestamp']
+    assert os.listdir(tmp_path) == ['reload_signal.json']
+
+
+def test_newer_signal_replaces_same_dxf(tmp_path):
+    watchdog = handler(tmp_path)
+    watchdog._notify_godot_reload('level_0.dxf', 'level_0.glb', conversion_pass='preview')
+    watchdog._notify_godot_reload('level_1.dxf', 'level_1.glb', conversion_pass='final')
+    watchdog._notify_godot_reload('level_0.dxf', 'level_0.glb', conversion_pass='final')
+
+    with open(tmp_path / 'reload_signal.json') as f:
+        signals = json.load(f)['signals']
+    assert len(signals) == 2
+    assert signals['level_0.dxf']['pass'] == 'final'
+    assert signals['level_0.dxf']['timestamp'] > signals['level_1.dxf']['timestamp']
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test smart converter: digest-ul convertorului urmează importurile pipeline-ului, cheia
+de cache se schimbă cu materialele și codul convertorului, revenirea la o versiune
+anterioară a DXF-ului restaurează ieșirile din store, iar salvările paralele ale
+cache-ului își păstrează reciproc intrările
+"""
+
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+import ezdxf
+import pytest
+
+import smart_dxf_converter
+from smart_dxf_converter import SmartDXFConverter, converter_sources
+
+
+def write_walls_dxf(path, count):
+    """DXF cu `count` pereți pe layerul IfcWall"""
+    doc = ezdxf.new('R2010')
+    msp = doc.modelspace()
+    for i in range(count):
+        msp.add_lwpolyline([(i * 2.0, 0), (i * 2.0 + 1, 0), (i * 2.0 + 1, 0.3), (i * 2.0, 0.3)], close=True,
+                           dxfattribs={'layer': 'IfcWall'})
+    doc.saveas(path)
+
+
+@pytest.fixture
+def converter_dir(tmp_path, monkeypatch):
+    """Cache-ul IR al conversiilor în folderul testului"""
+    monkeypatch.setenv('VIEWER2D_IR_CACHE', str(tmp_path / 'ir'))
+    return tmp_path
+
+
+def new_converter(tmp_path):
+    return SmartDXFConverter(cache_dir=tmp_path / 'cache', ifc_mode='none')
+
+
+def test_sources_follow_imports(tmp_path):
+    (tmp_path / 'entry.py').write_text(
+        'import kernel\n'
+        'def run():\n'
+        '    from lazy import helper\n'
+        '    return _load_optional_module("optional", "Optional")\n')
+    (tmp_path / 'kernel.py').write_text('import numpy\nfrom nested import value\n')
+    for name in ('lazy', 'optional', 'nested', 'unused'):
+        (tmp_path / f'{name}.py').write_text('')
+
+    sources = converter_sources('entry.py', tmp_path)
+    assert sources == ['entry.py', 'kernel.py', 'lazy.py', 'nested.py', 'optional.py']
+
+
+def test_pipeline_modules_are_in_digest():
+    sources = converter_sources()
+    assert 'extrusion_kernel.py' in sources
+    assert 'element_store.py' in sources
+    assert 'quantity_takeoff.py' in sources
+    assert 'transform_stack.py' in sources
+
+
+def test_key_changes_with_materials_and_converter_source(converter_dir, monkeypatch):
+    dxf_path = converter_dir / 'walls.dxf'
+    write_walls_dxf(dxf_path, 2)
+    materials = converter_dir / 'layer_materials.json'
+    materials.write_text('{"IfcWall": [0.7, 0.13, 0.13]}')
+    source_dir = converter_dir / 'src'
+    source_dir.mkdir()
+    (source_dir / 'entry.py').write_text('import helper\n')
+    (source_dir / 'helper.py').write_text('VALUE = 1\n')
+    monkeypatch.setattr(smart_dxf_converter, 'MATERIALS_FILE', materials)
+    monkeypatch.setattr(smart_dxf_converter, 'SCRIPT_DIR', source_dir)
+    monkeypatch.setattr(smart_dxf_converter, 'CONVERTER_ENTRY', 'entry.py')
+
+    original = new_converter(converter_dir).get_cache_key(dxf_path)
+    assert new_converter(converter_dir).get_cache_key(dxf_path) == original
+
+    materials.write_text('{"IfcWall": [0.5, 0.5, 0.5]}')
+    changed_materials = new_converter(converter_dir).get_cache_key(dxf_path)
+    assert changed_materials != original
+
+    # Un modul importat (nu doar modulul de intrare) face parte din versiunea convertorului
+    (source_dir / 'helper.py').write_text('VALUE = 2\n')
+    assert new_converter(converter_dir).get_cache_key(dxf_path) not in (original, changed_materials)
+
+
+def test_file_hash_memo_uses_mtime_and_size(converter_dir):
+    dxf_path = converter_dir / 'walls.dxf'
+    write_walls_dxf(dxf_path, 2)
+    converter = new_converter(converter_dir)
+    digest = converter.get_file_hash(dxf_path)
+    known = converter.cache['files'][str(dxf_path.resolve())]
+    assert known['sha256'] == digest
+
+    # Cu același mtime + size, hash-ul reținut se folosește fără recitirea fișierului
+    known['sha256'] = 'memo'
+    assert converter.get_file_hash(dxf_path) == 'memo'
+    write_walls_dxf(dxf_path, 3)
+    assert converter.get_file_hash(dxf_path) not in ('memo', digest)
+
+
+def test_reverted_dxf_is_restored_without_converting(converter_dir, monkeypatch):
+    dxf_path = converter_dir / 'walls.dxf'
+    glb_path = converter_dir / 'out' / 'walls.glb'
+    glb_path.parent.mkdir()
+    mapping_path = converter_dir / 'out' / 'walls_mapping.json'
+
+    write_walls_dxf(dxf_path, 2)
+    original_dxf = dxf_path.read_bytes()
+    assert new_converter(converter_dir).convert_with_status(dxf_path, glb_path) == 'converted'
+    original_glb, original_mapping = glb_path.read_bytes(), mapping_path.read_bytes()
+    assert new_converter(converter_dir).convert_with_status(dxf_path, glb_path) == 'skipped'
+
+    write_walls_dxf(dxf_path, 3)
+    assert new_converter(converter_dir).convert_with_status(dxf_path, glb_path) == 'converted'
+    assert len(json.loads(mapping_path.read_text())) == 3
+
+    def no_conversion(*args, **kwargs):
+        raise AssertionError('dxf_to_gltf called for a cached DXF')
+
+    monkeypatch.setattr(smart_dxf_converter, 'dxf_to_gltf', no_conversion)
+    dxf_path.write_bytes(original_dxf)
+    assert new_converter(converter_dir).convert_with_status(dxf_path, glb_path) == 'restored'
+    assert glb_path.read_bytes() == original_glb
+    assert mapping_path.read_bytes() == original_mapping
+    assert new_converter(converter_dir).convert_with_status(dxf_path, glb_path) == 'skipped'
+
+
+def test_parallel_saves_keep_each_others_entries(converter_dir):
+    converters = [new_converter(converter_dir) for _ in range(4)]
+    barrier = threading.Barrier(len(converters))
+
+    def save(index, converter):
+        for entry in range(5):
+            converter._set_cache('entries', f'key-{index}-{entry}', {'outputs': {}})
+        barrier.wait()
+        converter.save_cache()
+
+    threads = [threading.Thread(target=save, args=item) for item in enumerate(converters)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reloaded = new_converter(converter_dir)
+    assert sorted(reloaded.cache['entries']) == sorted(f'key-{i}-{e}' for i in range(4) for e in range(5))
+    # Un converter care salvează din nou după ceilalți nu le șterge intrările
+    converters[0]._set_cache('entries', 'key-late', {'outputs': {}})
+    converters[0].save_cache()
+    assert len(new_converter(converter_dir).cache['entries']) == 21
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
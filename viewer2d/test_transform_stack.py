@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test transform stack: matricea compusă dă același rezultat ca secvența veche de
+apply_transform / apply_translation succesive (scalare, rotația blocului, rotate_x/y,
+plasarea finală)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python'))
+
+import numpy as np
+import trimesh
+from trimesh.transformations import rotation_matrix
+
+from transform_stack import TransformStack
+
+# Transformările unui INSERT: scalare, rotația Z a blocului, rotate_x/y din XDATA, poziția finală
+SCALE = (1.5, 0.8, 2.0)
+BLOCK_ROTATION = 30.0
+ROTATE_X, ROTATE_Y = 12.0, -45.0
+PIVOT = [1.0, 2.0, 0.5]
+POSITION = [10.0, -4.0, 2.8]
+
+
+def wall():
+    mesh = trimesh.creation.box(extents=(4.0, 0.3, 2.8))
+    mesh.apply_translation([2.0, 0.15, 1.4])
+    return mesh
+
+
+def sequential(mesh):
+    """Secvența de dinainte de TransformStack: câte un apply_transform per pas"""
+    mesh.apply_transform(np.diag(list(SCALE) + [1.0]))
+    mesh.apply_transform(rotation_matrix(np.radians(BLOCK_ROTATION), [0, 0, 1]))
+    # apply_xyz_rotations_around_point: Z, Y, X în jurul pivotului
+    mesh.apply_transform(rotation_matrix(np.radians(ROTATE_Y), [0, 1, 0], PIVOT))
+    mesh.apply_transform(rotation_matrix(np.radians(ROTATE_X), [1, 0, 0], PIVOT))
+    mesh.apply_translation(POSITION)
+    return mesh
+
+
+def composed():
+    return (TransformStack().scale(*SCALE).rotate(BLOCK_ROTATION, [0, 0, 1])
+            .rotate_xyz(ROTATE_X, ROTATE_Y, 0.0, PIVOT).translate(POSITION))
+
+
+def test_composed_matches_sequential_transforms():
+    expected = sequential(wall())
+    mesh = composed().apply(wall())
+
+    assert np.allclose(mesh.vertices, expected.vertices, atol=1e-12)
+    assert np.array_equal(mesh.faces, expected.faces)
+    assert np.isclose(mesh.volume, expected.volume)
+    assert np.allclose(mesh.face_normals, expected.face_normals)
+
+
+def test_transform_points_matches_apply():
+    points = wall().vertices
+    assert np.allclose(composed().transform_points(points), composed().apply(wall()).vertices)
+
+
+def test_copy_then_place_each_component():
+    insert_transform = TransformStack().rotate(90.0, [0, 0, 1])
+    first = insert_transform.copy().translate([1.0, 0.0, 0.0])
+    second = insert_transform.copy().translate([0.0, 5.0, 0.0])
+
+    assert np.allclose(first.transform_points([[1.0, 0.0, 0.0]]), [[1.0, 1.0, 0.0]])
+    assert np.allclose(second.transform_points([[1.0, 0.0, 0.0]]), [[0.0, 6.0, 0.0]])
+    assert np.array_equal(insert_transform.matrix, rotation_matrix(np.radians(90.0), [0, 0, 1]))
+
+
+def test_linear_around_point_matches_per_point_rotation():
+    # create_rotated_90_mesh rotea fiecare punct: R @ (p - pivot) + pivot
+    angle = np.radians(90.0)
+    matrix = np.array([[1, 0, 0], [0, np.cos(angle), -np.sin(angle)], [0, np.sin(angle), np.cos(angle)]])
+    points = wall().vertices
+    expected = np.array([matrix @ (point - PIVOT) + PIVOT for point in points])
+
+    assert np.allclose(TransformStack().linear(matrix, PIVOT).transform_points(points), expected)
+
+
+def test_identity_and_placement_shortcuts():
+    assert TransformStack().scale(1.0, 1.0, 1.0).rotate(1e-9, [0, 0, 1]).is_identity
+    mesh = wall()
+    original = mesh.vertices.copy()
+    assert TransformStack().apply(mesh) is mesh
+    assert np.array_equal(mesh.vertices, original)
+
+    placement = TransformStack().translate(POSITION)
+    assert placement.is_placement
+    assert not composed().is_placement
+    assert np.allclose(placement.apply(mesh).vertices, original + POSITION)
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))